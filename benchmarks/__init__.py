@@ -0,0 +1,20 @@
+"""
+Microbenchmarks du projet de gestion de tâches.
+
+Chaque module s'exécute directement depuis la racine du projet:
+    python -m benchmarks.<nom_du_module>
+"""
+import os
+
+import django
+
+
+def setup_django():
+    """
+    Initialise Django pour un benchmark lancé hors de manage.py.
+
+    Returns:
+        None
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
@@ -0,0 +1,113 @@
+"""
+Benchmark des vues synchrones et asynchrones de l'API sous ASGI.
+
+Lance N clients concurrents (1000 par défaut) contre l'application ASGI du projet,
+appelée directement en mémoire (sans réseau), et compare pour GET /api/taches/:
+    - sync : vues DRF synchrones (passage par le pool de threads d'asgiref)
+    - async: vues de taches.async_views (ORM asynchrone)
+
+Affiche le débit (requêtes/s) et les latences p50/p99/max.
+
+Utilisation:
+    python -m benchmarks.bench_asgi [--clients 1000] [--requetes 5]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import setup_django
+
+
+async def call_asgi(app, path, token):
+    """
+    Envoie une requête GET à l'application ASGI et attend la réponse complète.
+
+    Returns:
+        int: Le code HTTP de la réponse.
+    """
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Token {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+    received = False
+    status_code = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status_code
+        if message['type'] == 'http.response.start':
+            status_code = message['status']
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def run_clients(app, token, clients, requetes):
+    """
+    Exécute `clients` clients concurrents qui envoient chacun `requetes` requêtes.
+
+    Returns:
+        tuple: (durée totale en secondes, liste des latences en secondes)
+    """
+    latences = []
+
+    async def client():
+        for _ in range(requetes):
+            debut = time.perf_counter()
+            code = await call_asgi(app, '/api/taches/', token)
+            latences.append(time.perf_counter() - debut)
+            assert code == 200, code
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - debut, latences
+
+
+def main():
+    """Prépare une base de test, puis mesure les deux chemins."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--requetes', type=int, default=5)
+    parser.add_argument('--taches', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+    from django.db import connection
+    from django.test.utils import override_settings
+    from rest_framework.authtoken.models import Token
+    from taches.models import Tache
+
+    connection.creation.create_test_db(verbosity=0)
+    user = Tache._meta.get_field('proprietaire').related_model.objects.create_user('bench', password='x')
+    token = Token.objects.create(user=user).key
+    Tache.objects.bulk_create(
+        Tache(titre=f'Tâche {i}', proprietaire=user) for i in range(args.taches)
+    )
+
+    app = get_asgi_application()
+    for nom, urlconf in (('sync', None), ('async', settings.ASGI_URLCONF)):
+        with override_settings(ASGI_URLCONF=urlconf):
+            duree, latences = asyncio.run(run_clients(app, token, args.clients, args.requetes))
+        latences.sort()
+        print(
+            f'{nom:<6} {len(latences) / duree:8.0f} req/s  '
+            f'p50 {statistics.median(latences) * 1000:7.1f} ms  '
+            f'p99 {latences[int(len(latences) * 0.99) - 1] * 1000:7.1f} ms  '
+            f'max {latences[-1] * 1000:7.1f} ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
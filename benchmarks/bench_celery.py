@@ -0,0 +1,382 @@
+"""
+Benchmark du débit des tâches Celery de taches/tasks.py, sans réseau.
+
+Chaque configuration (type de pool x concurrence) est mesurée dans un processus
+neuf, avec:
+    - des bases SQLite temporaires, migrées puis remplies pour le scénario;
+    - le transport filesystem de kombu comme broker (un fichier par message
+      dans un dossier temporaire, partagé entre les processus du pool prefork),
+      avec écriture atomique des messages (AtomicFilesystemTransport);
+    - le backend e-mail locmem de Django (aucun envoi réel);
+    - un vrai worker Celery (app.worker_main) avec le pool et la concurrence demandés.
+
+Scénarios (--scenario):
+    - email   : send_creation_email avec l'instantané et l'identifiant du message
+                outbox, comme publié par dispatch_outbox (prise en charge + envoi);
+    - cleanup : cleanup_completed_tasks sur un stock de --lignes tâches terminées,
+                archivé par les appels concurrents;
+    - rapport : report_partition, l'étape map du rapport, sur --lignes tâches
+                réparties entre 100 propriétaires, une plage de 10 propriétaires
+                par message (le rapport complet: benchmarks.bench_report).
+
+Les messages sont publiés d'un coup (file pleine: débit maximal du worker) ou
+à --cadence messages/s (latence sous une charge donnée). Pour chaque tâche, le
+worker enregistre ses instants de début et de fin et le nombre de requêtes SQL
+exécutées (execute_wrapper posé sur les connexions du thread de la tâche).
+
+Affiche le débit (tâches/s), les percentiles de latence de bout en bout
+(publication -> fin) et d'exécution, et le nombre moyen de requêtes SQL par tâche.
+
+Utilisation:
+    python -m benchmarks.bench_celery [--scenario email] [--pools prefork threads]
+        [--concurrences 1 4] [--messages 2000] [--cadence 500]
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from kombu.transport import filesystem
+from kombu.utils.json import dumps
+
+TASKS = {
+    'email': 'taches.tasks.send_creation_email',
+    'cleanup': 'taches.tasks.cleanup_completed_tasks',
+    'rapport': 'taches.tasks.report_partition',
+}
+
+# Nom de la file dédiée au benchmark
+QUEUE = 'bench'
+
+
+class AtomicFilesystemChannel(filesystem.Channel):
+    """
+    Canal filesystem dont les messages apparaissent complets.
+
+    Le transport filesystem de kombu crée le fichier du message puis l'écrit: un
+    worker peut le lire vide entre les deux. Le message est ici écrit dans un
+    fichier temporaire (ignoré par les consommateurs), puis renommé (atomique).
+    """
+
+    def _put(self, queue, payload, **kwargs):
+        name = f'{int(round(time.monotonic() * 1000))}_{uuid.uuid4()}.{queue}.msg'
+        temporary = os.path.join(self.data_folder_out, f'.{uuid.uuid4()}.tmp')
+        with open(temporary, 'wb') as file:
+            file.write(dumps(payload).encode())
+        os.replace(temporary, os.path.join(self.data_folder_out, name))
+
+
+class AtomicFilesystemTransport(filesystem.Transport):
+    Channel = AtomicFilesystemChannel
+
+
+def configure(directory, results=False):
+    """
+    Configure Django et Celery pour une mesure isolée dans `directory`.
+
+    Args:
+        directory (Path): Dossier temporaire (bases, messages, résultats).
+        results (bool): Conserver les résultats des tâches (backend 'file://' dans
+            `directory`, nécessaire aux chords), sinon ils sont ignorés.
+
+    Returns:
+        Celery: L'application Celery du projet, branchée sur le transport filesystem.
+    """
+    os.environ['TACHE_SHARD_COUNT'] = '1'
+    os.environ['TACHE_SHARD_DIR'] = str(directory)
+
+    from django.conf import settings
+
+    from benchmarks import setup_django
+
+    setup_django()
+    settings.DATABASES['default']['NAME'] = directory / 'db.sqlite3'
+    # Attendre le verrou d'écriture au lieu d'échouer ('database is locked')
+    settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 60
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+    folders = {name: directory / name for name in ('messages', 'control', 'resultats')}
+    for folder in folders.values():
+        folder.mkdir()
+    # Paramètres lus par Celery depuis les settings Django (namespace CELERY_)
+    overrides = {
+        'BROKER_URL': 'filesystem://',
+        'BROKER_TRANSPORT': f'{__name__}:AtomicFilesystemTransport',
+        'BROKER_TRANSPORT_OPTIONS': {
+            'data_folder_in': str(folders['messages']),
+            'data_folder_out': str(folders['messages']),
+            'control_folder': str(folders['control']),
+            'store_processed': False,
+            'polling_interval': 0.005,
+        },
+        'BROKER_CONNECTION_RETRY_ON_STARTUP': True,
+        'RESULT_BACKEND': f"file://{folders['resultats']}" if results else None,
+        'TASK_IGNORE_RESULT': not results,
+        # Sans compteur atomique, le backend 'file://' attend la fin des chords
+        # par interrogation (celery.chord_unlock): l'interroger souvent
+        'RESULT_CHORD_RETRY_INTERVAL': 0.05,
+        'TASK_DEFAULT_QUEUE': QUEUE,
+        # Les transports virtuels sont consommés par une boucle bloquante (synloop)
+        # qui n'applique les acquittements du pool threads qu'entre deux attentes
+        # de 2 s: une fenêtre de prefetch limitée plafonnerait le débit à
+        # quelques tâches/s. 0 = pas de limite, comme un worker Redis jamais en attente
+        'WORKER_PREFETCH_MULTIPLIER': 0,
+        'WORKER_ENABLE_REMOTE_CONTROL': False,
+        'WORKER_HIJACK_ROOT_LOGGER': False,
+        'BEAT_SCHEDULE': {},
+    }
+    for name, value in overrides.items():
+        setattr(settings, f'CELERY_{name}', value)
+
+    from config.celery import app
+
+    return app
+
+
+def seed(scenario, messages, lignes):
+    """
+    Remplit la base pour un scénario.
+
+    Returns:
+        list: Les arguments nommés de chaque message à publier.
+    """
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from taches.models import OutboxMessage, Tache
+    from taches.outbox import creation_email_payload
+
+    call_command('migrate', verbosity=0)
+    user = get_user_model().objects.create_user('bench', password='x')
+    if scenario == 'email':
+        taches = Tache.objects.bulk_create(
+            Tache(titre=f'Tâche {i}', description='Description. ' * 20, proprietaire=user)
+            for i in range(messages)
+        )
+        payloads = [creation_email_payload(tache) for tache in taches]
+        outbox = OutboxMessage.objects.bulk_create(
+            OutboxMessage(nom_tache=TASKS['email'], payload=payload) for payload in payloads
+        )
+        return [{**payload, 'outbox_id': message.id} for payload, message in zip(payloads, outbox)]
+
+    if scenario == 'cleanup':
+        Tache.objects.bulk_create(
+            (Tache(titre=f'Tâche {i}', termine=True, proprietaire=user) for i in range(lignes)),
+            batch_size=1000,
+        )
+        return [{} for _ in range(messages)]
+
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(username=f'bench{i}') for i in range(100)
+    )
+    Tache.objects.bulk_create(
+        (Tache(titre=f'Tâche {i}', termine=i % 2 == 0, proprietaire=users[i % 100]) for i in range(lignes)),
+        batch_size=1000,
+    )
+    ranges = [(users[i].id, users[i + 9].id + 1) for i in range(0, 100, 10)]
+    return [{'alias': 'default', 'lo': lo, 'hi': hi} for lo, hi in itertools.islice(itertools.cycle(ranges), messages)]
+
+
+def install_recorder(path):
+    """
+    Enregistre, dans le worker, le début, la fin et le nombre de requêtes SQL de chaque tâche.
+
+    Une ligne JSON par tâche est ajoutée à `path` (écritures O_APPEND, atomiques
+    pour des lignes courtes, quel que soit le processus ou le thread du pool).
+    """
+    from celery.signals import task_postrun, task_prerun
+    from django.db import connections
+
+    state = threading.local()
+
+    def on_prerun(task_id=None, **kwargs):
+        state.queries = 0
+
+        def count(execute, sql, params, many, context):
+            state.queries += 1
+            return execute(sql, params, many, context)
+
+        state.wrapper = count
+        state.debut = time.time()
+        for connection in connections.all(initialized_only=False):
+            connection.execute_wrappers.append(count)
+
+    def on_postrun(task_id=None, **kwargs):
+        fin = time.time()
+        for connection in connections.all(initialized_only=False):
+            if state.wrapper in connection.execute_wrappers:
+                connection.execute_wrappers.remove(state.wrapper)
+        line = json.dumps({'id': task_id, 'debut': state.debut, 'fin': fin, 'requetes': state.queries})
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, f'{line}\n'.encode())
+        finally:
+            os.close(fd)
+
+    task_prerun.connect(on_prerun, weak=False)
+    task_postrun.connect(on_postrun, weak=False)
+
+
+def read_records(path):
+    """Lit les enregistrements du worker, indexés par identifiant de tâche."""
+    if not path.exists():
+        return {}
+    with path.open() as file:
+        # Ignorer une dernière ligne en cours d'écriture
+        lines = [line for line in file if line.endswith('\n')]
+    return {record['id']: record for record in map(json.loads, lines)}
+
+
+def wait_for(path, task_ids, timeout):
+    """
+    Attend que toutes les tâches `task_ids` soient terminées.
+
+    Returns:
+        dict: Les enregistrements du worker.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        records = read_records(path)
+        if task_ids <= records.keys():
+            return records
+        if time.monotonic() > deadline:
+            raise SystemExit(f'{len(task_ids - records.keys())} tâche(s) non terminée(s) après {timeout} s')
+        time.sleep(0.05)
+
+
+def publish(app, name, kwargs_list, cadence=None):
+    """
+    Publie les messages, d'un coup ou à `cadence` messages/s.
+
+    Returns:
+        dict: L'instant de publication de chaque message, par identifiant de tâche.
+    """
+    published = {}
+    start = time.perf_counter()
+    with app.producer_or_acquire() as producer:
+        for i, kwargs in enumerate(kwargs_list):
+            if cadence:
+                delay = start + i / cadence - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            task_id = str(uuid.uuid4())
+            published[task_id] = time.time()
+            app.send_task(name, kwargs=kwargs, task_id=task_id, queue=QUEUE, producer=producer)
+    return published
+
+
+def percentiles(values):
+    """Retourne les percentiles 50, 95 et 99 de `values`, en millisecondes."""
+    if len(values) < 2:
+        return [values[0] * 1000] * 3 if values else [0.0] * 3
+    q = statistics.quantiles(values, n=100, method='inclusive')
+    return [q[49] * 1000, q[94] * 1000, q[98] * 1000]
+
+
+def run_config(scenario, pool, concurrency, messages, lignes, cadence, timeout):
+    """
+    Mesure une configuration (exécuté dans un processus neuf).
+
+    Returns:
+        dict: Débit, percentiles de latence et requêtes SQL par tâche.
+    """
+    directory = Path(tempfile.mkdtemp(prefix='bench_celery_'))
+    app = configure(directory)
+    kwargs_list = seed(scenario, messages, lignes)
+
+    from django.db import connections
+
+    records_path = directory / 'records.jsonl'
+    install_recorder(records_path)
+    connections.close_all()
+
+    context = multiprocessing.get_context('fork')
+    worker = context.Process(target=app.worker_main, args=([
+        'worker', f'--pool={pool}', f'--concurrency={concurrency}', f'--queues={QUEUE}',
+        '--without-gossip', '--without-mingle', '--without-heartbeat', '--loglevel=WARNING',
+    ],))
+    worker.start()
+    try:
+        # Échauffement: démarrage du pool, connexions, premiers imports
+        warmup = publish(app, TASKS[scenario], kwargs_list[:concurrency])
+        wait_for(records_path, warmup.keys(), timeout)
+        published = publish(app, TASKS[scenario], kwargs_list[concurrency:], cadence)
+        records = wait_for(records_path, published.keys(), timeout)
+    finally:
+        os.kill(worker.pid, signal.SIGTERM)
+        worker.join(30)
+        if worker.is_alive():
+            worker.kill()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    measured = [records[task_id] for task_id in published]
+    elapsed = max(r['fin'] for r in measured) - min(published.values())
+    return {
+        'debit': len(measured) / elapsed,
+        'latence': percentiles([records[task_id]['fin'] - t for task_id, t in published.items()]),
+        'execution': percentiles([r['fin'] - r['debut'] for r in measured]),
+        'requetes': statistics.mean(r['requetes'] for r in measured),
+    }
+
+
+def main():
+    """Lance une mesure par configuration, chacune dans un processus neuf."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scenario', choices=TASKS, default='email')
+    parser.add_argument('--pools', nargs='+', choices=['prefork', 'threads', 'solo'], default=['prefork', 'threads'])
+    parser.add_argument('--concurrences', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--messages', type=int, default=2000, help='Messages mesurés (hors échauffement).')
+    parser.add_argument('--lignes', type=int, default=20000, help='Tâches en base (cleanup, rapport).')
+    parser.add_argument('--cadence', type=float, help='Messages publiés par seconde (défaut: tous d\'un coup).')
+    parser.add_argument('--delai', type=float, default=600, help='Durée maximale d\'une mesure (s).')
+    parser.add_argument('--mesure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mesure:
+        pool, concurrency = args.mesure.split(':')
+        concurrency = int(concurrency)
+        result = run_config(
+            args.scenario, pool, concurrency, args.messages + concurrency, args.lignes, args.cadence, args.delai
+        )
+        print(json.dumps(result))
+        return
+
+    charge = f'{args.cadence:.0f} msg/s' if args.cadence else 'file pleine'
+    print(f'{args.scenario}: {args.messages} messages, {charge}')
+    print(f'{"pool":<8} {"c":>3} {"tâches/s":>9}  {"latence p50/p95/p99 (ms)":>26}  {"exécution p50/p99 (ms)":>22}  SQL/tâche')
+    for pool in args.pools:
+        for concurrency in args.concurrences:
+            command = [
+                sys.executable, '-m', 'benchmarks.bench_celery', '--mesure', f'{pool}:{concurrency}',
+                '--scenario', args.scenario, '--messages', str(args.messages),
+                '--lignes', str(args.lignes), '--delai', str(args.delai),
+            ]
+            if args.cadence:
+                command += ['--cadence', str(args.cadence)]
+            process = subprocess.run(
+                command, capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent,
+            )
+            if process.returncode != 0:
+                raise SystemExit(process.stderr)
+            result = json.loads(process.stdout.strip().splitlines()[-1])
+            latence = '/'.join(f'{value:.1f}' for value in result['latence'])
+            execution = '/'.join(f'{value:.1f}' for value in result['execution'][::2])
+            print(
+                f'{pool:<8} {concurrency:>3} {result["debit"]:9.0f}  {latence:>26}  {execution:>22}  '
+                f'{result["requetes"]:.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
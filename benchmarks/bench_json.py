@@ -0,0 +1,73 @@
+"""
+Benchmark d'encodage JSON des réponses de liste de l'API.
+
+Compare le débit du JSONRenderer de DRF (module json standard) et du
+FastJSONRenderer (orjson) sur une liste de 10 000 tâches sérialisées.
+
+Utilisation:
+    python -m benchmarks.bench_json [--taches 10000] [--repetitions 20]
+"""
+import argparse
+import timeit
+from datetime import timedelta
+
+from benchmarks import setup_django
+
+
+def build_payload(nombre):
+    """
+    Construit la sortie de TacheSerializer pour des tâches non sauvegardées.
+
+    Args:
+        nombre (int): Nombre de tâches dans la liste.
+
+    Returns:
+        ReturnList: Les données telles que TacheViewSet.list les passe au renderer.
+    """
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from taches.models import Tache
+    from taches.serializers import TacheSerializer
+
+    proprietaire = get_user_model()(id=1, username='benchmark')
+    maintenant = timezone.now()
+    taches = [
+        Tache(
+            id=i,
+            titre=f'Tâche n°{i} – préparer la réunion',
+            description='Description détaillée de la tâche. ' * (i % 8),
+            cree_le=maintenant - timedelta(minutes=i),
+            termine=bool(i % 3 == 0),
+            proprietaire=proprietaire,
+        )
+        for i in range(nombre)
+    ]
+    return TacheSerializer(taches, many=True).data
+
+
+def main():
+    """Exécute le benchmark et affiche le débit de chaque renderer."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--taches', type=int, default=10_000)
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from taches.renderers import FastJSONRenderer
+
+    data = build_payload(args.taches)
+    reference = JSONRenderer().render(data)
+    assert FastJSONRenderer().render(data) == reference, 'sorties différentes'
+
+    print(f'{args.taches} tâches, {len(reference) / 1024:.0f} Ko par réponse')
+    for renderer in (JSONRenderer(), FastJSONRenderer()):
+        duree = min(timeit.repeat(lambda: renderer.render(data), number=1, repeat=args.repetitions))
+        print(
+            f'{type(renderer).__name__:<18} {duree * 1000:8.2f} ms/réponse '
+            f'{len(reference) / duree / 2**20:8.1f} Mo/s'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark du temps de génération du rapport (map-reduce) selon le nombre de workers.
+
+Prépare une fois une base SQLite temporaire (--utilisateurs, --taches), puis
+pour chaque concurrence (1, 2, 4 par défaut): démarre un worker Celery prefork,
+publie generate_task_report et attend le rapport fusionné. Le broker et le
+backend de résultats sont des dossiers locaux (voir benchmarks.bench_celery),
+sans réseau.
+
+Affiche le temps total (publication -> rapport) et l'accélération par rapport
+à un seul processus. Le temps inclut une attente fixe d'environ 1 s avant le
+reduce: sans compteur atomique, le backend 'file://' attend la fin des
+partitions avec celery.chord_unlock (le backend Redis les compte nativement).
+L'accélération est bornée par le nombre de cœurs de la machine.
+
+Utilisation:
+    python -m benchmarks.bench_report [--concurrences 1 2 4] [--partitions 8]
+        [--utilisateurs 2000] [--taches 1000000]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_celery import QUEUE, configure
+
+
+def seed(users, count):
+    """Crée `users` utilisateurs et `count` tâches réparties entre eux."""
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import transaction
+
+    from taches.models import Tache
+
+    call_command('migrate', verbosity=0)
+    User = get_user_model()
+    user_ids = [user.id for user in User.objects.bulk_create(User(username=f'bench{i}') for i in range(users))]
+    with transaction.atomic():
+        for start in range(0, count, 50000):
+            Tache.objects.bulk_create(
+                (Tache(titre=f'Tâche {i}', termine=i % 3 == 0, proprietaire_id=user_ids[i % users])
+                 for i in range(start, min(start + 50000, count))),
+                batch_size=5000,
+            )
+
+
+def run(app, pool, concurrency, timeout):
+    """
+    Génère un rapport avec un worker de `concurrency` processus.
+
+    Returns:
+        tuple: (durée en secondes, rapport).
+    """
+    from django.db import connections
+
+    from taches.tasks import generate_task_report
+
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    worker = context.Process(target=app.worker_main, args=([
+        'worker', f'--pool={pool}', f'--concurrency={concurrency}', f'--queues={QUEUE}',
+        '--without-gossip', '--without-mingle', '--without-heartbeat', '--loglevel=WARNING',
+    ],))
+    worker.start()
+    try:
+        # Échauffement: démarrage du pool et premières connexions
+        generate_task_report.delay().get(timeout=timeout)
+        start = time.perf_counter()
+        rapport = generate_task_report.delay().get(timeout=timeout, interval=0.01)
+        return time.perf_counter() - start, rapport
+    finally:
+        os.kill(worker.pid, signal.SIGTERM)
+        worker.join(30)
+        if worker.is_alive():
+            worker.kill()
+
+
+def main():
+    """Prépare la base, puis mesure une génération de rapport par concurrence."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrences', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--pool', choices=['prefork', 'threads'], default='prefork')
+    parser.add_argument('--partitions', type=int, default=8, help='Plages de propriétaires (REPORT_PARTITIONS).')
+    parser.add_argument('--utilisateurs', type=int, default=2000)
+    parser.add_argument('--taches', type=int, default=1000000)
+    parser.add_argument('--delai', type=float, default=600, help='Durée maximale d\'une génération (s).')
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix='bench_report_'))
+    try:
+        app = configure(directory, results=True)
+        from django.conf import settings
+
+        settings.REPORT_PARTITIONS = args.partitions
+        print(f'Préparation: {args.utilisateurs} utilisateurs, {args.taches} tâches...')
+        seed(args.utilisateurs, args.taches)
+
+        print(f'{args.partitions} partitions, pool {args.pool}')
+        reference = None
+        for concurrency in args.concurrences:
+            duree, rapport = run(app, args.pool, concurrency, args.delai)
+            assert rapport['total'] == args.taches
+            reference = reference or duree
+            print(f'{concurrency} processus  {duree:6.2f} s  x{reference / duree:.2f}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
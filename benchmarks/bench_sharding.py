@@ -0,0 +1,122 @@
+"""
+Benchmark du débit d'écriture des tâches selon le nombre de shards.
+
+Pour chaque nombre de shards (1, 2, 4 par défaut), dans un processus neuf et
+des fichiers SQLite temporaires: migre les bases, crée des utilisateurs, puis
+lance P processus écrivains qui créent chacun K tâches (une transaction par
+tâche, comme POST /api/taches/) pour des propriétaires tirés au hasard.
+Chaque tâche est écrite sur le shard de son propriétaire (taches.sharding).
+
+Affiche le débit total (tâches/s) et l'accélération par rapport à un shard.
+
+Utilisation:
+    python -m benchmarks.bench_sharding [--shards 1 2 4] [--ecrivains 8] [--taches 300]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def writer(user_ids, count, seed, start_event, results):
+    """Processus écrivain: crée `count` tâches, une transaction par tâche."""
+    from django.db import connections
+
+    from taches.models import Tache
+
+    connections.close_all()
+    rng = random.Random(seed)
+    start_event.wait()
+    for i in range(count):
+        Tache.objects.create(titre=f'Tâche {i}', proprietaire_id=rng.choice(user_ids))
+    results.put(count)
+
+
+def run_shards(shards, writers, count, users):
+    """
+    Mesure le débit d'écriture avec `shards` bases (exécuté dans un processus neuf).
+
+    Returns:
+        float: Le débit en tâches par seconde.
+    """
+    directory = tempfile.mkdtemp(prefix='bench_sharding_')
+    os.environ['TACHE_SHARD_COUNT'] = str(shards)
+    os.environ['TACHE_SHARD_DIR'] = directory
+
+    from django.conf import settings
+
+    from benchmarks import setup_django
+
+    setup_django()
+    settings.DATABASES['default']['NAME'] = Path(directory) / 'db.sqlite3'
+    for alias in settings.DATABASES:
+        # Attendre le verrou d'écriture au lieu d'échouer ('database is locked')
+        settings.DATABASES[alias].setdefault('OPTIONS', {})['timeout'] = 60
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import connections
+
+    for alias in settings.TACHE_SHARDS:
+        call_command('migrate', database=alias, verbosity=0)
+    User = get_user_model()
+    User.objects.bulk_create(User(username=f'bench{i}') for i in range(users))
+    user_ids = list(User.objects.values_list('id', flat=True))
+    connections.close_all()
+
+    context = multiprocessing.get_context('fork')
+    start_event = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=writer, args=(user_ids, count, seed, start_event, results))
+        for seed in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(0.5)
+    start = time.perf_counter()
+    start_event.set()
+    total = sum(results.get() for _ in processes)
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    return total / elapsed
+
+
+def main():
+    """Lance une mesure par nombre de shards, chacune dans un processus neuf."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--ecrivains', type=int, default=8)
+    parser.add_argument('--taches', type=int, default=300, help='Tâches créées par écrivain.')
+    parser.add_argument('--utilisateurs', type=int, default=200)
+    parser.add_argument('--mesure', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mesure:
+        print(run_shards(args.mesure, args.ecrivains, args.taches, args.utilisateurs))
+        return
+
+    print(f'{args.ecrivains} écrivains x {args.taches} tâches')
+    reference = None
+    for shards in args.shards:
+        process = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_sharding', '--mesure', str(shards),
+             '--ecrivains', str(args.ecrivains), '--taches', str(args.taches),
+             '--utilisateurs', str(args.utilisateurs)],
+            capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent,
+        )
+        if process.returncode != 0:
+            raise SystemExit(process.stderr)
+        debit = float(process.stdout.split()[-1])
+        reference = reference or debit
+        print(f'{shards} shard(s)  {debit:8.0f} tâches/s  x{debit / reference:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark de l'envoi des e-mails de création: une connexion SMTP par message ou pool.
+
+Un serveur SMTP local minimal (thread du benchmark) tient lieu de relais: il
+accepte tous les messages et simule le coût d'établissement d'une connexion
+(TCP, TLS, authentification auprès d'un relais distant: --poignee ms avant
+la bannière) et l'aller-retour réseau de chaque commande (--rtt ms).
+
+T threads (comme un worker --pool=threads) envoient chacun K e-mails:
+    - connexion : django.core.mail.send_mail, une connexion par message
+    - pool      : taches.mail.send_mail, connexions gardées ouvertes (EmailConnectionPool)
+
+Affiche le débit (messages/s) et le nombre de connexions ouvertes sur le relais.
+
+Utilisation:
+    python -m benchmarks.bench_smtp [--threads 4] [--messages 200] [--poignee 30] [--rtt 1]
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+from benchmarks import setup_django
+
+
+class SMTPStandIn(socketserver.StreamRequestHandler):
+    """Session SMTP minimale: accepte tout, sans stocker les messages."""
+
+    def reply(self, line):
+        time.sleep(self.server.rtt)
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.count('connexions')
+        time.sleep(self.server.poignee)
+        self.reply('220 bench ESMTP')
+        while line := self.rfile.readline():
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.reply('250-bench\r\n250 8BITMIME')
+            elif command == b'DATA':
+                self.reply('354 Fin par <CRLF>.<CRLF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.server.count('messages')
+                self.reply('250 OK')
+            elif command == b'QUIT':
+                self.reply('221 Au revoir')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, poignee, rtt):
+        super().__init__(('127.0.0.1', 0), SMTPStandIn)
+        self.poignee, self.rtt = poignee, rtt
+        self.counters = {'connexions': 0, 'messages': 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+def run(send, threads, messages):
+    """
+    Envoie `messages` e-mails depuis chacun des `threads` threads.
+
+    Returns:
+        float: Le débit en messages par seconde.
+    """
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for i in range(messages):
+            send(f'Nouvelle tâche créée : Tâche {i}', 'Bonjour,\n\nUne nouvelle tâche vient d\'être créée.\n' * 5,
+                 'noreply@taches.com', ['admin@example.com'])
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * messages / (time.perf_counter() - start)
+
+
+def main():
+    """Démarre le relais local, puis mesure les deux modes d'envoi."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=200, help='E-mails envoyés par thread.')
+    parser.add_argument('--poignee', type=float, default=30, help='Coût d\'ouverture d\'une connexion (ms).')
+    parser.add_argument('--rtt', type=float, default=1, help='Aller-retour réseau par commande (ms).')
+    args = parser.parse_args()
+
+    server = SMTPServer(args.poignee / 1000, args.rtt / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    setup_django()
+    from django.conf import settings
+    from django.core import mail
+
+    from taches import mail as mail_pool
+
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST, settings.EMAIL_PORT = server.server_address
+    settings.EMAIL_POOL_SIZE = args.threads
+
+    print(f'{args.threads} threads x {args.messages} e-mails, ouverture {args.poignee:g} ms, rtt {args.rtt:g} ms')
+    reference = None
+    for nom, send in (('connexion', mail.send_mail), ('pool', mail_pool.send_mail)):
+        server.counters.update(connexions=0, messages=0)
+        debit = run(send, args.threads, args.messages)
+        mail_pool.pool.close_all()
+        assert server.counters['messages'] == args.threads * args.messages
+        reference = reference or debit
+        print(f'{nom:<10} {debit:8.0f} messages/s  x{debit / reference:.2f}  '
+              f'{server.counters["connexions"]} connexions')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
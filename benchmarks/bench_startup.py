@@ -0,0 +1,85 @@
+"""
+Benchmark du temps de démarrage des processus web et worker.
+
+Mesure, dans des processus neufs (comme après un autoscaling ou un recyclage
+de worker avec max_tasks_per_child):
+    - time-to-first-request: import de config.wsgi puis première requête
+      GET /api/taches/ (sans token: 401, sans accès à la base)
+    - time-to-first-task: chargement de l'application Celery et des modules
+      tasks.py, puis exécution de la tâche config.celery.debug_task
+
+Utilisation:
+    python -m benchmarks.bench_startup [--repetitions 5]
+
+Pour le détail par module, voir `python manage.py importprofile`.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+FIRST_REQUEST = '''
+import io
+import config.wsgi
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/taches/', 'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'wsgi.input': io.BytesIO(),
+    'wsgi.url_scheme': 'http', 'wsgi.errors': io.StringIO(),
+}
+statuses = []
+body = b''.join(config.wsgi.application(environ, lambda status, headers: statuses.append(status)))
+assert statuses[0].startswith('401'), statuses
+'''
+
+FIRST_TASK = '''
+import contextlib, io
+from config.celery import app, debug_task
+import celery.apps.worker
+import django
+django.setup()
+app.loader.import_default_modules()
+with contextlib.redirect_stdout(io.StringIO()):
+    debug_task.apply().get()
+'''
+
+
+def time_process(code):
+    """
+    Exécute du code Python dans un processus neuf et mesure sa durée totale.
+
+    Returns:
+        float: Durée en secondes, démarrage de l'interpréteur compris.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='config.settings')
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-c', code], env=env, capture_output=True, text=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    )
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise SystemExit(process.stderr)
+    return elapsed
+
+
+def main():
+    """Mesure les deux scénarios et affiche médiane et minimum."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = [time_process('pass') for _ in range(args.repetitions)]
+    print(f'interpréteur seul     médiane {statistics.median(baseline) * 1000:6.0f} ms')
+    for nom, code in (('time-to-first-request', FIRST_REQUEST), ('time-to-first-task', FIRST_TASK)):
+        durees = [time_process(code) for _ in range(args.repetitions)]
+        print(
+            f'{nom:<21} médiane {statistics.median(durees) * 1000:6.0f} ms  '
+            f'min {min(durees) * 1000:6.0f} ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark du suivi de nombreuses tâches: 100 appels unitaires ou un appel groupé.
+
+Enregistre N résultats dans le backend de résultats configuré
+(CELERY_RESULT_BACKEND, Redis), dont un rapport sur dix en cours de calcul
+(PROGRESS) avec ses partitions, puis mesure via le client de test DRF (pile
+WSGI complète, authentification par token comprise) le temps pour connaître
+l'état de toutes les tâches:
+    - unitaire : N x GET /api/check-report-status/<task_id>/ (AsyncResult)
+    - groupe   : 1 x POST /api/task-status/ (MGET, voir taches.statuses)
+
+Affiche la latence médiane d'un tour de suivi et le nombre de commandes Redis.
+Nécessite un serveur Redis à l'adresse de CELERY_RESULT_BACKEND.
+
+Utilisation:
+    python -m benchmarks.bench_status [--taches 100] [--tours 50]
+"""
+import argparse
+import statistics
+import time
+import uuid
+from unittest import mock
+
+from benchmarks import setup_django
+
+
+def seed(backend, count, partitions=8):
+    """
+    Enregistre `count` résultats de rapports: terminés, ou en cours un sur dix.
+
+    Returns:
+        tuple: (tous les résultats créés, partitions comprises, à supprimer en fin
+            de benchmark; identifiants des rapports suivis).
+    """
+    task_ids, created = [], []
+    for i in range(count):
+        task_id = f'bench-statut-{uuid.uuid4()}'
+        task_ids.append(task_id)
+        created.append(task_id)
+        if i % 10 == 0:
+            backend.store_result(task_id, {'partitions': partitions}, 'PROGRESS')
+            for index in range(0, partitions, 2):
+                created.append(f'{task_id}-p{index}')
+                backend.store_result(created[-1], {'lignes': []}, 'SUCCESS')
+        else:
+            backend.store_result(task_id, {
+                'message': f'Le rapport de tâches a été généré avec succès ! ({i} tâches, dont 0 terminées)',
+                'total': i, 'terminees': 0, 'proprietaires': 1, 'partitions': partitions,
+            }, 'SUCCESS')
+    return created, task_ids
+
+
+def main():
+    """Prépare les résultats et une base de test, puis mesure les deux chemins."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--taches', type=int, default=100)
+    parser.add_argument('--tours', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    import redis
+    from celery import current_app
+    from django.db import connection
+    from django.test.utils import override_settings
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+    from taches.models import Tache
+
+    connection.creation.create_test_db(verbosity=0)
+    user = Tache._meta.get_field('proprietaire').related_model.objects.create_user('bench')
+    client = APIClient(HTTP_HOST='localhost')
+    client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+    backend = current_app.backend
+    created, task_ids = seed(backend, args.taches)
+    chemins = {
+        'unitaire': lambda: [client.get(f'/api/check-report-status/{task_id}/') for task_id in task_ids],
+        'groupe': lambda: [client.post('/api/task-status/', {'task_ids': task_ids}, format='json')],
+    }
+    try:
+        print(f'{args.taches} tâches suivies, {args.tours} tours')
+        reference = None
+        with override_settings(TASK_STATUS_BATCH_MAX=max(args.taches, 200)):
+            for nom, suivre in chemins.items():
+                commandes = []
+                execute = redis.Redis.execute_command
+                with mock.patch.object(
+                    redis.Redis, 'execute_command', autospec=True,
+                    side_effect=lambda self, *a, **k: commandes.append(a[0]) or execute(self, *a, **k),
+                ):
+                    assert all(response.status_code == 200 for response in suivre())
+                durees = []
+                for _ in range(args.tours):
+                    debut = time.perf_counter()
+                    suivre()
+                    durees.append(time.perf_counter() - debut)
+                mediane = statistics.median(durees) * 1000
+                reference = reference or mediane
+                print(f'{nom:<9} {mediane:8.1f} ms/tour  x{reference / mediane:.1f}  '
+                      f'{len(commandes)} commandes Redis/tour')
+    finally:
+        for task_id in created:
+            backend.forget(task_id)
+
+
+if __name__ == '__main__':
+    main()
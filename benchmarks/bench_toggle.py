@@ -0,0 +1,64 @@
+"""
+Benchmark du changement de statut d'une tâche (case à cocher du frontend).
+
+Compare, sur une base de test et via le client de test DRF (pile WSGI complète,
+authentification par token comprise):
+    - patch : PATCH /api/taches/{id}/ {'termine': ...} (partial_update: lecture,
+      validation, sauvegarde de toutes les colonnes, re-sérialisation)
+    - toggle: POST /api/taches/{id}/toggle/ (un seul UPDATE ... RETURNING)
+
+Affiche le débit (requêtes/s) et le nombre de requêtes SQL par appel.
+
+Utilisation:
+    python -m benchmarks.bench_toggle [--requetes 2000]
+"""
+import argparse
+import time
+
+from benchmarks import setup_django
+
+
+def main():
+    """Prépare une base de test, puis mesure les deux chemins."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requetes', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+    from taches.models import Tache
+
+    connection.creation.create_test_db(verbosity=0)
+    user = Tache._meta.get_field('proprietaire').related_model.objects.create_user('bench', password='x')
+    token = Token.objects.create(user=user).key
+    tache = Tache.objects.create(titre='À cocher', description='Description. ' * 20, proprietaire=user)
+    client = APIClient(HTTP_HOST='localhost')
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    url = f'/api/taches/{tache.id}/'
+    chemins = {
+        'patch': lambda i: client.patch(url, {'termine': bool(i % 2)}, format='json'),
+        'toggle': lambda i: client.post(f'{url}toggle/'),
+    }
+    reference = None
+    for nom, appel in chemins.items():
+        # Compter les requêtes avec un execute_wrapper: queries_log est vidé à
+        # chaque début de requête HTTP (signal request_started)
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *a: queries.append(sql) or execute(sql, *a)):
+            assert appel(0).status_code == 200
+        debut = time.perf_counter()
+        for i in range(args.requetes):
+            appel(i)
+        debit = args.requetes / (time.perf_counter() - debut)
+        reference = reference or debit
+        print(
+            f'{nom:<6} {debit:8.0f} req/s  x{debit / reference:.2f}  '
+            f'{len(queries)} requêtes SQL/appel (dont 1 pour le token)'
+        )
+
+
+if __name__ == '__main__':
+    main()
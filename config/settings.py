@@ -23,6 +23,7 @@ Pour plus d'informations:
     https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -55,10 +56,16 @@ INSTALLED_APPS = [
     'taches',
     'rest_framework',
     'rest_framework.authtoken',
+    'adrf',
 ]
 
 MIDDLEWARE = [
+    # Profilage à la demande (taches.profiling): retiré au démarrage sans PROFILING_ENABLED
+    'taches.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # Délestage adaptatif en surcharge (taches.loadshedding), après CORS pour
+    # que le navigateur puisse lire les réponses 503
+    'taches.loadshedding.LoadSheddingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,10 +73,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'taches.middleware.ASGIURLConfMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
 
+# URLs utilisées pour les requêtes ASGI: vues asynchrones de l'API (taches.async_views)
+ASGI_URLCONF = 'config.urls_asgi'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -91,13 +102,49 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Durée de vie des connexions (secondes): les connexions préchauffées par les
+# workers de `manage.py serve` sont réutilisées d'une requête à l'autre
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+
+# Transactions SQLite ouvertes en BEGIN IMMEDIATE: le verrou d'écriture est pris
+# dès le début de transaction.atomic(), en attendant au besoin le délai du
+# verrou. En mode DEFERRED (défaut de SQLite), une transaction qui lit avant
+# d'écrire (rang de la nouvelle tâche, puis INSERT) échoue aussitôt avec
+# « database is locked » si une autre écrit, sans attendre
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': SQLITE_TRANSACTION_MODE},
+        # Bases de test sur disque, comme en production: une base en mémoire
+        # partagée entre threads verrouille par table, sans délai d'attente
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Sharding des tâches par propriétaire (taches.sharding): TACHE_SHARD_COUNT bases,
+# 'default' puis 'shard1', 'shard2', ... (fichiers db_shardN.sqlite3 dans TACHE_SHARD_DIR)
+TACHE_SHARD_COUNT = int(os.environ.get('TACHE_SHARD_COUNT', '1'))
+TACHE_SHARD_DIR = Path(os.environ.get('TACHE_SHARD_DIR', BASE_DIR))
+for _index in range(1, TACHE_SHARD_COUNT):
+    DATABASES[f'shard{_index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': TACHE_SHARD_DIR / f'db_shard{_index}.sqlite3',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': SQLITE_TRANSACTION_MODE},
+        'TEST': {'NAME': TACHE_SHARD_DIR / f'test_db_shard{_index}.sqlite3'},
+    }
+TACHE_SHARDS = list(DATABASES)
+DATABASE_ROUTERS = ['taches.sharding.TacheShardRouter']
+
+# Type des clés primaires automatiques (celui de la migration 0004 de taches)
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -141,10 +188,28 @@ STATICFILES_DIRS = [
     BASE_DIR / 'frontend' / 'dist',
 ]
 
+# collectstatic écrit des variantes .gz/.br de chaque fichier texte (config.storage),
+# servies telles quelles par config.spa
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'config.storage.PrecompressedStaticFilesStorage',
+    },
+    # Fichiers des rapports de tâches (taches.artifacts)
+    'reports': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': BASE_DIR / 'rapports'},
+    },
+}
+
 # Django REST Framework Configuration
 # https://www.django-rest-framework.org/api-guide/authentication/
 # Configuration de l'authentification et des permissions pour l'API REST.
 # Toutes les vues de l'API nécessitent une authentification par token.
+# Le JSON est encodé/décodé avec orjson (taches.renderers / taches.parsers),
+# avec repli automatique sur le module json standard si orjson est absent.
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
@@ -152,6 +217,23 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'taches.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'taches.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Limites des endpoints qui lancent des tâches Celery (taches.throttling):
+    # '<scope>-user' par utilisateur, '<scope>-global' pour tous les utilisateurs
+    'DEFAULT_THROTTLE_RATES': {
+        'start-report-user': '3/min',
+        'start-report-global': '30/min',
+        'test-celery-user': '5/min',
+        'test-celery-global': '60/min',
+    },
 }
 
 # CORS Configuration
@@ -161,11 +243,109 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Vite dev server par défaut
     "http://127.0.0.1:5173",  # Alternative localhost
 ]
+# En-têtes de réponse lisibles par le frontend: délai de nouvelle tentative
+# des réponses 503 du délestage (taches.loadshedding)
+CORS_EXPOSE_HEADERS = ['Retry-After']
 
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Pool de connexions e-mail des workers (taches.mail): connexions inactives
+# conservées par processus, et délai d'inactivité avant fermeture (secondes,
+# inférieur au délai de coupure du relais SMTP)
+EMAIL_POOL_SIZE = 4
+EMAIL_POOL_IDLE_TIMEOUT = 60
+
+# Redis des token buckets de limitation de débit (taches.throttling)
+THROTTLE_REDIS_URL = 'redis://localhost:6379/1'
+
+# Rapport des tâches en map-reduce (taches.reports): nombre de plages de
+# propriétaires (une partition par plage et par shard), et nouvelles tentatives
+# d'une partition en échec
+REPORT_PARTITIONS = 8
+REPORT_PARTITION_RETRIES = 3
+
+# Nombre maximal de tâches par requête de statut groupée (POST /api/task-status/)
+TASK_STATUS_BATCH_MAX = 200
+
+# Durée pendant laquelle les fichiers d'un rapport restent téléchargeables
+# (taches.artifacts), avant leur suppression par purge_report_artifacts
+REPORT_ARTIFACT_RETENTION = timedelta(days=1)
+
+# Profilage à la demande des requêtes et des tâches (taches.profiling), désactivé
+# par défaut. Une requête est profilée si elle porte l'en-tête
+# 'X-Profile: <PROFILING_HEADER_TOKEN>' (jeton secret, aucun si vide) ou selon
+# le taux d'échantillonnage; une tâche si elle est lancée avec headers={'profile': True}.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '') == '1'
+PROFILING_HEADER_TOKEN = os.environ.get('PROFILING_HEADER_TOKEN', '')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+# Intervalle d'échantillonnage des piles (secondes), allocations suivies par
+# tracemalloc, et nombre de lignes de code les plus allocatrices enregistrées
+PROFILING_INTERVAL = 0.005
+PROFILING_TRACEMALLOC = True
+PROFILING_TOP_ALLOCATIONS = 25
+
+# Journal des requêtes SQL lentes (taches.slowqueries): seuil en millisecondes,
+# intervalle minimal entre deux captures du plan EXPLAIN d'une même requête
+# dans un processus (secondes), Redis des agrégats par empreinte et durée de
+# conservation d'une empreinte sans nouvelle requête lente
+SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', '1') == '1'
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_EXPLAIN_INTERVAL = 600
+SLOW_QUERY_REDIS_URL = 'redis://localhost:6379/2'
+SLOW_QUERY_RETENTION = timedelta(days=7)
+SLOW_QUERY_MAX_SQL_LENGTH = 4000
+
+# Serveur de production (`manage.py serve`): adresse d'écoute, nombre et type
+# de workers ('sync' WSGI ou 'asgi'), recyclage d'un worker après
+# SERVE_MAX_REQUESTS requêtes (plus un décalage aléatoire), délais d'arrêt
+# gracieux et de préchauffage des connexions (secondes)
+SERVE_BIND = os.environ.get('SERVE_BIND', '127.0.0.1:8000')
+SERVE_WORKERS = int(os.environ.get('SERVE_WORKERS', str(2 * (os.cpu_count() or 1) + 1)))
+SERVE_WORKER_TYPE = os.environ.get('SERVE_WORKER_TYPE', 'sync')
+SERVE_MAX_REQUESTS = 1000
+SERVE_MAX_REQUESTS_JITTER = 100
+SERVE_GRACEFUL_TIMEOUT = 30
+SERVE_READY_TIMEOUT = 30
+
+# Validation groupée des créations et modifications de l'API (taches.groupcommit):
+# les écritures simultanées d'un processus sont validées ensemble, en une
+# transaction SQLite, après une fenêtre de GROUP_COMMIT_WINDOW_MS millisecondes
+# ou dès que GROUP_COMMIT_MAX_BATCH écritures sont en attente
+GROUP_COMMIT_ENABLED = os.environ.get('GROUP_COMMIT_ENABLED', '0') == '1'
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', '2'))
+GROUP_COMMIT_MAX_BATCH = 200
+
+# Délestage adaptatif des requêtes en surcharge (taches.loadshedding): limite
+# de concurrence par processus (initiale, bornes), ajustée tant que la latence
+# des requêtes admises reste sous LOAD_SHEDDING_TOLERANCE fois la latence à vide.
+# Désactivé par défaut tant que les seuils ne sont pas ajustés (manage.py loadtest)
+LOAD_SHEDDING_ENABLED = os.environ.get('LOAD_SHEDDING_ENABLED', '0') == '1'
+LOAD_SHEDDING_INITIAL_LIMIT = 20
+LOAD_SHEDDING_MIN_LIMIT = 4
+LOAD_SHEDDING_MAX_LIMIT = 200
+LOAD_SHEDDING_TOLERANCE = 2.0
+# Requêtes de priorité basse (méthodes, expression régulière du chemin): les
+# rafraîchissements périodiques du frontend, refusés les premiers. Elles n'ont
+# accès qu'à LOAD_SHEDDING_LOW_PRIORITY_SHARE de la limite, et sont refusées
+# dès que l'attente récente des requêtes dépasse LOAD_SHEDDING_TARGET_DELAY_MS
+LOAD_SHEDDING_LOW_PRIORITY = [
+    (('GET', 'HEAD'), r'^/api/taches/$'),
+    (('GET', 'HEAD'), r'^/api/check-report-status/'),
+    (('POST',), r'^/api/task-status/$'),
+]
+LOAD_SHEDDING_LOW_PRIORITY_SHARE = 0.5
+LOAD_SHEDDING_TARGET_DELAY_MS = 50
+# Attente maximale d'une place des autres lectures et des écritures (ms), et
+# délai de nouvelle tentative suggéré aux clients refusés (Retry-After, s)
+LOAD_SHEDDING_MAX_WAIT_MS = 200
+LOAD_SHEDDING_WRITE_MAX_WAIT_MS = 2000
+LOAD_SHEDDING_RETRY_AFTER = 2
+
+# Nombre de mois d'archive des tâches terminées conservés (taches.archives)
+ARCHIVE_RETENTION_MONTHS = 12
+
 # Celery Beat Configuration
 # Planification des tâches périodiques
 CELERY_BEAT_SCHEDULE = {
@@ -173,5 +353,24 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'taches.tasks.cleanup_completed_tasks',
         'schedule': timedelta(minutes=5),
     },
+    'purge-archives-daily': {
+        'task': 'taches.tasks.purge_archives',
+        'schedule': timedelta(days=1),
+    },
+    'purge-report-artifacts-hourly': {
+        'task': 'taches.tasks.purge_report_artifacts',
+        'schedule': timedelta(hours=1),
+    },
+    # Publication des messages de l'outbox transactionnelle (taches.outbox)
+    'dispatch-outbox-every-2-seconds': {
+        'task': 'taches.tasks.dispatch_outbox',
+        'schedule': timedelta(seconds=2),
+    },
+    # Rappels des échéances atteintes, envoyés par lots (taches.reminders)
+    'send-due-reminders-every-minute': {
+        'task': 'taches.tasks.send_due_reminders',
+        'schedule': timedelta(minutes=1),
+    },
 }
 
+
@@ -0,0 +1,191 @@
+"""
+Service des fichiers du build React (SPA) avec cache HTTP et précompression.
+
+Ce module remplace django.views.static.serve pour le build Vite:
+    - Les fichiers hachés de /assets/ (ex: index-BxY12abC.js) sont servis avec un
+      cache immuable d'un an: leur nom change à chaque build.
+    - Les variantes précompressées (.br, .gz) produites par collectstatic
+      (voir config.storage) sont servies si le client les accepte.
+    - Les requêtes conditionnelles (If-None-Match, If-Modified-Since) retournent 304.
+    - Les fichiers sont transmis par FileResponse, ce qui permet au serveur WSGI
+      d'utiliser sendfile (wsgi.file_wrapper) sans copie en Python.
+    - index.html est gardé en mémoire (avec sa version gzip) et revalidé à chaque
+      requête par son ETag (Cache-Control: no-cache).
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+# Cache navigateur/CDN pour les fichiers dont le nom contient un hash de contenu
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Fichiers non hachés: toujours revalider (réponse 304 si inchangé)
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Vite nomme ses fichiers '<nom>-<hash de 8 caractères>.<ext>'
+HASHED_NAME_RE = re.compile(r'-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$')
+
+# Variantes précompressées, par ordre de préférence
+PRECOMPRESSED_VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def accepted_encodings(request):
+    """
+    Retourne les encodages acceptés par le client (en-tête Accept-Encoding).
+
+    Args:
+        request: L'objet HttpRequest.
+
+    Returns:
+        set: Les codages acceptés (ex: {'gzip', 'br'}), sans ceux marqués q=0.
+    """
+    encodings = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def _etag(stat_result):
+    """Construit un ETag fort à partir de la taille et de la date de modification."""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def serve_asset(request, path, document_root, immutable=None):
+    """
+    Sert un fichier du build React avec cache HTTP et précompression.
+
+    Args:
+        request: L'objet HttpRequest.
+        path (str): Chemin du fichier relatif à document_root.
+        document_root (Path): Dossier racine des fichiers servis.
+        immutable (bool): Force (ou non) le cache immuable. Par défaut, déduit
+            de la présence d'un hash Vite dans le nom du fichier.
+
+    Returns:
+        FileResponse | HttpResponse: Le fichier (éventuellement précompressé)
+            ou une réponse 304 Not Modified.
+
+    Raises:
+        Http404: Si le fichier n'existe pas ou sort de document_root.
+    """
+    try:
+        fullpath = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404('Fichier introuvable')
+    if not os.path.isfile(fullpath):
+        raise Http404('Fichier introuvable')
+
+    if immutable is None:
+        immutable = bool(HASHED_NAME_RE.search(path))
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    # Choisir la meilleure variante précompressée disponible
+    encodings = accepted_encodings(request)
+    content_encoding = None
+    served_path = fullpath
+    for encoding, suffix in PRECOMPRESSED_VARIANTS:
+        if encoding in encodings and os.path.isfile(fullpath + suffix):
+            content_encoding, served_path = encoding, fullpath + suffix
+            break
+
+    stat_result = os.stat(served_path)
+    response = get_conditional_response(
+        request, etag=_etag(stat_result), last_modified=int(stat_result.st_mtime)
+    )
+    if response is None:
+        response = FileResponse(open(served_path, 'rb'), content_type=content_type)
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+    response.headers['ETag'] = _etag(stat_result)
+    response.headers['Last-Modified'] = http_date(stat_result.st_mtime)
+    response.headers['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _load_index(fullpath):
+    """
+    Charge index.html en mémoire, en ne relisant le disque que s'il a changé.
+
+    Args:
+        fullpath (str): Chemin absolu de index.html.
+
+    Returns:
+        dict: Contenu brut, contenu gzip, ETag et date de modification.
+
+    Raises:
+        Http404: Si index.html n'existe pas (build React absent).
+    """
+    try:
+        stat_result = os.stat(fullpath)
+    except FileNotFoundError:
+        raise Http404('Build React introuvable')
+
+    key = (stat_result.st_mtime_ns, stat_result.st_size)
+    entry = _index_cache.get(fullpath)
+    if entry is not None and entry['key'] == key:
+        return entry
+
+    with _index_lock:
+        entry = _index_cache.get(fullpath)
+        if entry is None or entry['key'] != key:
+            with open(fullpath, 'rb') as f:
+                body = f.read()
+            entry = {
+                'key': key,
+                'body': body,
+                'gzip_body': gzip.compress(body, compresslevel=9, mtime=0),
+                'etag': '"%s"' % hashlib.sha256(body).hexdigest()[:32],
+                'last_modified': stat_result.st_mtime,
+            }
+            _index_cache[fullpath] = entry
+    return entry
+
+
+def serve_index(request, document_root):
+    """
+    Sert index.html depuis le cache mémoire, avec revalidation par ETag.
+
+    Args:
+        request: L'objet HttpRequest.
+        document_root (Path): Dossier racine du build React.
+
+    Returns:
+        HttpResponse: index.html (éventuellement compressé en gzip) ou 304.
+    """
+    entry = _load_index(os.path.join(document_root, 'index.html'))
+    body, etag, content_encoding = entry['body'], entry['etag'], None
+    if 'gzip' in accepted_encodings(request) and len(entry['gzip_body']) < len(body):
+        # Chaque représentation a son propre ETag (RFC 9110, section 8.8.3)
+        body, etag, content_encoding = entry['gzip_body'], etag[:-1] + '-gzip"', 'gzip'
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(entry['last_modified'])
+    )
+    if response is None:
+        response = HttpResponse(body, content_type='text/html; charset=utf-8')
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(entry['last_modified'])
+    response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,83 @@
+"""
+Stockage des fichiers statiques avec précompression à la collecte.
+
+Lors de `python manage.py collectstatic`, chaque fichier texte collecté
+(JS, CSS, HTML, SVG, JSON, ...) est accompagné de variantes précompressées:
+    - <fichier>.gz (gzip niveau 9)
+    - <fichier>.br (brotli, si le paquet 'brotli' est installé)
+
+Ces variantes sont ensuite servies directement par config.spa, sans compression
+à la volée pendant les requêtes.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import StaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+# Extensions pour lesquelles la compression est utile
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.html', '.js', '.json', '.map', '.mjs', '.svg', '.txt', '.xml',
+)
+# En dessous de cette taille, le gain ne compense pas l'en-tête Content-Encoding
+MIN_COMPRESS_SIZE = 256
+
+
+def compress_file(path):
+    """
+    Écrit les variantes .gz et .br d'un fichier si elles sont plus petites.
+
+    Args:
+        path (str): Chemin absolu du fichier à compresser.
+
+    Returns:
+        list: Les chemins des variantes écrites.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    if len(content) < MIN_COMPRESS_SIZE:
+        return []
+
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content, quality=11)))
+
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) >= len(content):
+            continue
+        with open(path + suffix, 'wb') as f:
+            f.write(compressed)
+        written.append(path + suffix)
+    return written
+
+
+class PrecompressedStaticFilesStorage(StaticFilesStorage):
+    """
+    StaticFilesStorage qui génère des variantes gzip/brotli à la collecte.
+
+    Configuré dans STORAGES['staticfiles'] (settings.py). Les noms des fichiers
+    ne sont pas modifiés: le build Vite contient déjà un hash dans le nom des
+    fichiers de /assets/.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        """
+        Compresse les fichiers collectés (appelé par collectstatic).
+
+        Args:
+            paths (dict): Fichiers collectés {chemin: (storage, chemin)}.
+            dry_run (bool): Si True, aucun fichier n'est écrit.
+
+        Yields:
+            tuple: (nom original, nom traité, traité ou non) pour collectstatic.
+        """
+        if dry_run:
+            return
+        for name in paths:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                processed = bool(compress_file(self.path(name)))
+                yield name, name, processed
@@ -10,8 +10,11 @@ Routes disponibles:
     - /admin/: Interface d'administration Django
     - /api/token/: Endpoint d'authentification pour obtenir un token (POST)
     - /api/taches/*: Routes de l'API REST pour les tâches (déléguées à taches.urls)
-    - /assets/*: Fichiers statiques du build React (JS, CSS)
-    - /*: Toute autre URL sert index.html (SPA React)
+    - /assets/*: Fichiers statiques du build React (JS, CSS), cache immuable
+    - /*: Toute autre URL sert index.html (SPA React), gardé en mémoire
+
+Le build React est servi depuis STATIC_ROOT s'il a été collecté (avec les
+variantes précompressées .gz/.br), sinon directement depuis frontend/dist.
 
 Pour plus d'informations sur la configuration des URLs Django:
     https://docs.djangoproject.com/en/6.0/topics/http/urls/
@@ -19,16 +22,19 @@ Pour plus d'informations sur la configuration des URLs Django:
 from django.contrib import admin
 from django.conf import settings
 from django.urls import path, include, re_path
-from django.views.static import serve
 from rest_framework.authtoken.views import obtain_auth_token
+from .spa import serve_asset, serve_index
 
-# Racine du build React pour servir le SPA
-REACT_DIST = settings.BASE_DIR / 'frontend' / 'dist'
+# Racine du build React pour servir le SPA: build collecté en priorité
+if (settings.STATIC_ROOT / 'index.html').is_file():
+    REACT_DIST = settings.STATIC_ROOT
+else:
+    REACT_DIST = settings.BASE_DIR / 'frontend' / 'dist'
 
 
 def serve_react_index(request, **_kwargs):
     """Sert index.html du build React pour le fallback SPA (routing côté client)."""
-    return serve(request, 'index.html', document_root=REACT_DIST)
+    return serve_index(request, document_root=REACT_DIST)
 
 
 urlpatterns = [
@@ -36,9 +42,9 @@ urlpatterns = [
     path('api/token/', obtain_auth_token),
     path('', include('taches.urls')),  # /api/taches/ via taches.urls
     # Fichiers statiques du build React (JS, CSS)
-    path('assets/<path:path>', serve, {'document_root': REACT_DIST / 'assets'}),
+    path('assets/<path:path>', serve_asset, {'document_root': REACT_DIST / 'assets'}),
     # Favicon et autres fichiers à la racine du build
-    path('vite.svg', serve, {'document_root': REACT_DIST, 'path': 'vite.svg'}),
+    path('vite.svg', serve_asset, {'document_root': REACT_DIST, 'path': 'vite.svg'}),
     # Fallback SPA : toute URL non couverte sert index.html
     re_path(r'^.*$', serve_react_index),
 ]
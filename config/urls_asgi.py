@@ -0,0 +1,16 @@
+"""
+Configuration des URLs pour les requêtes ASGI.
+
+Reprend config.urls en plaçant devant les routes asynchrones de l'API
+(taches.async_urls): /api/taches/*, /api/check-report-status/<task_id>/ et
+/api/task-status/ sont servis par des vues async, toutes les autres routes (admin, token,
+start-report, SPA) restent celles de config.urls.
+
+Sélectionnée par taches.middleware.ASGIURLConfMiddleware via settings.ASGI_URLCONF.
+"""
+from django.urls import path, include
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path('', include('taches.async_urls')),
+] + wsgi_urlpatterns
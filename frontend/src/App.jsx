@@ -1,10 +1,10 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useCallback } from "react";
 import "./App.css";
 import TacheListe from "./components/TacheListe";
 import AjoutTacheForm from "./components/AjoutTacheForm";
 import LoginPage from "./components/LoginPage";
+import { useTachesPaginees } from "./useTachesPaginees";
 import {
-  fetchTachesApi,
   createTacheApi,
   deleteTacheApi,
   toggleTacheApi,
@@ -12,14 +12,22 @@ import {
   loginApi,
   startReportGenerationApi,
   checkTaskStatusApi,
+  downloadReportApi,
 } from "./api";
 function App() {
   const [token, setToken] = useState(() => localStorage.getItem("token"));
-  const [taches, setTaches] = useState([]);
   const [erreur, setErreur] = useState(null);
   const [reportTaskId, setReportTaskId] = useState(null);
   const [reportStatus, setReportStatus] = useState("");
+  const [reportFichiers, setReportFichiers] = useState(null);
 
+  const handleErreurChargement = useCallback((error) => {
+    console.error("Erreur Fetch :", error);
+    setErreur(error.message);
+  }, []);
+  // Tâches chargées page par page et fusionnées à chaque rafraîchissement
+  const { lignes: taches, total, chargerPlage, ajouter, remplacer, retirer } =
+    useTachesPaginees(token, handleErreurChargement);
 
 
   const handleLogout = () => {
@@ -39,59 +47,50 @@ function App() {
     }
   };
 
-  const handleAjoutTache = async (titre, description) => {
+  // Gestionnaires stables (useCallback): les TacheItem mémoïsés ne sont pas re-rendus
+  const handleAjoutTache = useCallback(async (titre, description) => {
     try {
       const nouvelleTache = await createTacheApi(titre, description, token);
-      setTaches((prevTaches) => [...prevTaches, nouvelleTache]);
+      ajouter(nouvelleTache);
     } catch (error) {
       console.error("Erreur lors de l'ajout de la tÃ¢che :", error);
       setErreur(error.message);
     }
-  };
+  }, [token, ajouter]);
 
-  const handleSupprimeTache = async (id) => {
+  const handleSupprimeTache = useCallback(async (id) => {
     try {
       await deleteTacheApi(id, token);
-      setTaches((prevTaches) =>
-        prevTaches.filter((tache) => tache.id !== id)
-      );
+      retirer(id);
     } catch (error) {
       console.error("Erreur lors de la suppression de la tÃ¢che :", error);
       setErreur(error.message);
     }
-  };
+  }, [token, retirer]);
 
-  const handleToggleTache = async (id, termineActuel) => {
+  const handleToggleTache = useCallback(async (id, termineActuel) => {
     try {
       const tacheMiseAJour = await toggleTacheApi(id, termineActuel, token);
-
-      setTaches((prevTaches) =>
-        prevTaches.map((tache) =>
-          tache.id === id ? { ...tache, ...tacheMiseAJour } : tache
-        )
-      );
+      remplacer(id, tacheMiseAJour);
     } catch (error) {
       console.error("Erreur lors de la mise Ã  jour de la tÃ¢che :", error);
       setErreur(error.message);
     }
-  };
+  }, [token, remplacer]);
 
-  const handleUpdateTache = async (id, data) => {
+  const handleUpdateTache = useCallback(async (id, data) => {
     try {
       const tacheMiseAJour = await updateTacheApi(id, data, token);
-      setTaches((prevTaches) =>
-        prevTaches.map((tache) =>
-          tache.id === id ? { ...tache, ...tacheMiseAJour } : tache
-        )
-      );
+      remplacer(id, tacheMiseAJour);
     } catch (error) {
       console.error("Erreur lors de la modification de la tÃ¢che :", error);
       setErreur(error.message);
     }
-  };
+  }, [token, remplacer]);
 
   const handleGenerateReport = async () => {
     try {
+      setReportFichiers(null);
       setReportStatus("Démarrage de la génération du rapport...");
       const data = await startReportGenerationApi(token);
       setReportTaskId(data.task_id);
@@ -103,21 +102,6 @@ function App() {
     }
   };
 
-  useEffect(() => {
-    if (!token) return;
-    const fetchTaches = async () => {
-      try {
-        const data = await fetchTachesApi(token);
-        setTaches(data);
-      } catch (error) {
-        console.error("Erreur Fetch :", error);
-        setErreur(error.message);
-      }
-    };
-
-    fetchTaches();
-  }, [token]);
-
   useEffect(() => {
     if (!reportTaskId) return;
 
@@ -130,8 +114,12 @@ function App() {
           setReportStatus(`Rapport en attente... (${statusData.state})`);
         } else if (statusData.state === "STARTED") {
           setReportStatus(`Génération en cours... (${statusData.state})`);
+        } else if (statusData.state === "PROGRESS") {
+          const { terminees, partitions } = statusData.progress;
+          setReportStatus(`Génération en cours... (${terminees}/${partitions} partitions)`);
         } else if (statusData.state === "SUCCESS") {
-          setReportStatus(statusData.result);
+          setReportStatus(statusData.result.message);
+          setReportFichiers(statusData.result.fichiers || null);
           clearInterval(interval);
         } else if (statusData.state === "FAILURE") {
           setReportStatus(`Erreur: ${statusData.result}`);
@@ -140,6 +128,8 @@ function App() {
           setReportStatus(`Statut: ${statusData.state}`);
         }
       } catch (error) {
+        // Serveur surchargé (délestage): nouvelle vérification au prochain intervalle
+        if (error.status === 503) return;
         console.error("Erreur lors de la vérification du statut :", error);
         setReportStatus("Erreur lors de la vérification du statut");
         clearInterval(interval);
@@ -183,13 +173,25 @@ function App() {
           'report-status--pending'
         }`}>
           <strong>Statut du rapport :</strong> {reportStatus}
+          {reportFichiers && Object.entries(reportFichiers).map(([format, fichier]) => (
+            <button
+              key={format}
+              type="button"
+              className="btn btn--secondary"
+              onClick={() => downloadReportApi(fichier.url, fichier.nom, token).catch((error) => setErreur(error.message))}
+            >
+              Télécharger ({format.toUpperCase()})
+            </button>
+          ))}
         </div>
       )}
       <main className="app-main">
         <AjoutTacheForm onAjoutTache={handleAjoutTache} />
         <TacheListe
           taches={taches}
+          total={total}
           erreur={erreur}
+          onPlageVisible={chargerPlage}
           onSupprimeTache={handleSupprimeTache}
           onToggleTache={handleToggleTache}
           onUpdateTache={handleUpdateTache}
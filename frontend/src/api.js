@@ -1,7 +1,9 @@
 const API_BASE_URL = "http://127.0.0.1:8000/api";
 
-export async function fetchTachesApi(token) {
-  const response = await fetch(`${API_BASE_URL}/taches/`, {
+// params (optionnel): filtres et tri côté serveur, ex. { termine: false, titre_prefixe: "cou", ordering: "titre" }
+export async function fetchTachesApi(token, params = {}) {
+  const query = new URLSearchParams(params).toString();
+  const response = await fetch(`${API_BASE_URL}/taches/${query ? `?${query}` : ""}`, {
     method: "GET",
     headers: {
       "Content-Type": "application/json",
@@ -10,9 +12,12 @@ export async function fetchTachesApi(token) {
   });
 
   if (!response.ok) {
-    throw new Error(
+    const error = new Error(
       `Erreur ${response.status}: Impossible de rÃ©cupÃ©rer les donnÃ©es`
     );
+    // 503: serveur surchargé (délestage), la requête peut être refaite plus tard
+    error.status = response.status;
+    throw error;
   }
 
   return response.json();
@@ -65,8 +70,24 @@ export async function deleteTacheApi(id, token) {
   }
 }
 
+// Une seule requête SQL côté serveur; la réponse ne contient que { id, termine }
 export async function toggleTacheApi(id, termineActuel, token) {
-  return updateTacheApi(id, { termine: !termineActuel }, token);
+  const action = termineActuel ? "uncomplete" : "complete";
+  const response = await fetch(`${API_BASE_URL}/taches/${id}/${action}/`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Token ${token}`,
+    },
+  });
+
+  if (!response.ok) {
+    throw new Error(
+      `Erreur ${response.status}: Impossible de mettre Ã  jour la tÃ¢che`
+    );
+  }
+
+  return response.json();
 }
 
 export async function updateTacheApi(id, data, token) {
@@ -116,10 +137,32 @@ export async function checkTaskStatusApi(taskId, token) {
   });
 
   if (!response.ok) {
-    throw new Error(
+    const error = new Error(
       `Erreur ${response.status}: Impossible de vérifier le statut de la tâche`
     );
+    error.status = response.status;
+    throw error;
   }
 
   return response.json();
-}
\ No newline at end of file
+}
+// Fichier d'un rapport terminé (url: result.fichiers.<format>.url de checkTaskStatusApi).
+// Le téléchargement exige le token: le fichier est récupéré en Blob puis enregistré.
+export async function downloadReportApi(url, nom, token) {
+  const response = await fetch(`${API_BASE_URL.replace(/\/api$/, "")}${url}`, {
+    method: "GET",
+    headers: { Authorization: `Token ${token}` },
+  });
+
+  if (!response.ok) {
+    throw new Error(
+      `Erreur ${response.status}: Impossible de télécharger le rapport`
+    );
+  }
+
+  const lien = document.createElement("a");
+  lien.href = URL.createObjectURL(await response.blob());
+  lien.download = nom;
+  lien.click();
+  URL.revokeObjectURL(lien.href);
+}
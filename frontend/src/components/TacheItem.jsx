@@ -1,6 +1,7 @@
-import React, { useState } from "react";
+import React, { memo, useState } from "react";
 
-function TacheItem({ tache, onSupprimeTache, onToggleTache, onUpdateTache }) {
+// ref et data-id: mesure de la hauteur par la liste virtualisée (TacheListe)
+function TacheItem({ tache, onSupprimeTache, onToggleTache, onUpdateTache, ref }) {
   const [editing, setEditing] = useState(false);
   const [titre, setTitre] = useState(tache.titre);
   const [description, setDescription] = useState(tache.description ?? "");
@@ -30,7 +31,7 @@ function TacheItem({ tache, onSupprimeTache, onToggleTache, onUpdateTache }) {
 
   if (editing) {
     return (
-      <li className="tache-card tache-card--editing">
+      <li ref={ref} data-id={tache.id} className="tache-card tache-card--editing">
         <div className="tache-card__body">
           <input
             type="text"
@@ -68,7 +69,7 @@ function TacheItem({ tache, onSupprimeTache, onToggleTache, onUpdateTache }) {
   }
 
   return (
-    <li className={`tache-card ${tache.termine ? "tache-card--done" : ""}`}>
+    <li ref={ref} data-id={tache.id} className={`tache-card ${tache.termine ? "tache-card--done" : ""}`}>
       <div className="tache-card__body">
         <h4 className="tache-card__titre">{tache.titre}</h4>
         {tache.description ? (
@@ -108,4 +109,5 @@ function TacheItem({ tache, onSupprimeTache, onToggleTache, onUpdateTache }) {
   );
 }
 
-export default TacheItem;
+// Re-rendue seulement si sa tâche change (fusion des rafraîchissements dans useTachesPaginees)
+export default memo(TacheItem);
@@ -1,28 +1,146 @@
-import React from "react";
+import React, { useCallback, useEffect, useMemo, useRef, useState } from "react";
 import TacheItem from "./TacheItem";
 
-const TacheListe = ({ taches, erreur, onSupprimeTache, onToggleTache, onUpdateTache }) => {
+// Hauteur supposée d'une tâche pas encore mesurée, espacement entre deux
+// tâches (px), et nombre de lignes rendues en plus de chaque côté de la zone visible
+const HAUTEUR_ESTIMEE = 120;
+const ESPACEMENT = 12;
+const DEBORDEMENT = 5;
+
+// Index de la ligne à la position y (recherche dichotomique dans les positions cumulées)
+function ligneA(positions, y) {
+  let bas = 0;
+  let haut = positions.length - 2;
+  while (bas < haut) {
+    const milieu = (bas + haut + 1) >> 1;
+    if (positions[milieu] <= y) bas = milieu;
+    else haut = milieu - 1;
+  }
+  return Math.max(bas, 0);
+}
+
+// Liste virtualisée: seules les tâches visibles (plus DEBORDEMENT de chaque
+// côté) sont dans le DOM, placées d'après la hauteur mesurée de chaque tâche
+// déjà affichée. Les lignes pas encore chargées sont des emplacements vides;
+// onPlageVisible(debut, fin) demande leur chargement au défilement.
+const TacheListe = ({
+  taches,
+  total,
+  erreur,
+  onPlageVisible,
+  onSupprimeTache,
+  onToggleTache,
+  onUpdateTache,
+}) => {
+  const conteneur = useRef(null);
+  const [fenetre, setFenetre] = useState({ haut: 0, hauteur: 0 });
+  // id -> hauteur mesurée, espacement compris (tâches déjà affichées seulement)
+  const [hauteurs, setHauteurs] = useState(() => new Map());
+
+  // Un seul observateur pour toutes les tâches rendues
+  const [observateur] = useState(
+    () =>
+      new ResizeObserver((entrees) => {
+        setHauteurs((precedentes) => {
+          let suivantes = null;
+          for (const entree of entrees) {
+            const id = Number(entree.target.dataset.id);
+            const hauteur = entree.borderBoxSize[0].blockSize + ESPACEMENT;
+            if (precedentes.get(id) !== hauteur) {
+              suivantes ??= new Map(precedentes);
+              suivantes.set(id, hauteur);
+            }
+          }
+          return suivantes ?? precedentes;
+        });
+      })
+  );
+  useEffect(() => () => observateur.disconnect(), [observateur]);
+
+  const refLigne = useCallback(
+    (element) => {
+      if (!element) return undefined;
+      observateur.observe(element);
+      return () => observateur.unobserve(element);
+    },
+    [observateur]
+  );
+
+  useEffect(() => {
+    const element = conteneur.current;
+    const mesurer = () => setFenetre({ haut: element.scrollTop, hauteur: element.clientHeight });
+    const observateurConteneur = new ResizeObserver(mesurer);
+    observateurConteneur.observe(element);
+    return () => observateurConteneur.disconnect();
+  }, []);
+
+  const nombre = total ?? 0;
+  // positions[i]: haut de la ligne i; positions[nombre]: hauteur totale.
+  // Recalculées quand une hauteur ou la liste change, pas au défilement.
+  const positions = useMemo(() => {
+    const resultat = new Float64Array(nombre + 1);
+    for (let i = 0; i < nombre; i++) {
+      const tache = taches[i];
+      resultat[i + 1] = resultat[i] + ((tache && hauteurs.get(tache.id)) || HAUTEUR_ESTIMEE);
+    }
+    return resultat;
+  }, [taches, nombre, hauteurs]);
+
+  const debut = Math.max(ligneA(positions, fenetre.haut) - DEBORDEMENT, 0);
+  const fin = Math.min(ligneA(positions, fenetre.haut + fenetre.hauteur) + 1 + DEBORDEMENT, nombre);
+
+  useEffect(() => {
+    onPlageVisible(debut, fin);
+  }, [debut, fin, onPlageVisible]);
+
+  const lignes = [];
+  for (let i = debut; i < fin; i++) {
+    const tache = taches[i];
+    lignes.push(
+      tache ? (
+        <TacheItem
+          key={tache.id}
+          ref={refLigne}
+          tache={tache}
+          onSupprimeTache={onSupprimeTache}
+          onToggleTache={onToggleTache}
+          onUpdateTache={onUpdateTache}
+        />
+      ) : (
+        <li
+          key={`chargement-${i}`}
+          className="tache-card tache-card--chargement"
+          style={{ height: HAUTEUR_ESTIMEE - ESPACEMENT }}
+          aria-busy="true"
+        />
+      )
+    );
+  }
+
   return (
     <div className="tache-container">
       {erreur && <p className="message message--error">{erreur}</p>}
+      {total === null && !erreur && <p className="message message--muted">Chargement des tâches...</p>}
+      {total === 0 && <p className="message message--muted">Aucune tâche.</p>}
 
-      <ul className="tache-list">
-        {taches && taches.length > 0 ? (
-          taches.map((tache) => (
-            <TacheItem
-              key={tache.id}
-              tache={tache}
-              onSupprimeTache={onSupprimeTache}
-              onToggleTache={onToggleTache}
-              onUpdateTache={onUpdateTache}
-            />
-          ))
-        ) : (
-          !erreur && <p className="message message--muted">Chargement des tâches...</p>
-        )}
-      </ul>
+      <div
+        className="tache-list"
+        ref={conteneur}
+        onScroll={(e) =>
+          setFenetre({ haut: e.currentTarget.scrollTop, hauteur: e.currentTarget.clientHeight })
+        }
+      >
+        <div className="tache-list__espace" style={{ height: positions[nombre] }}>
+          <ul
+            className="tache-list__fenetre"
+            style={{ gap: ESPACEMENT, transform: `translateY(${positions[debut]}px)` }}
+          >
+            {lignes}
+          </ul>
+        </div>
+      </div>
     </div>
   );
 };
 
-export default TacheListe;
\ No newline at end of file
+export default TacheListe;
@@ -0,0 +1,140 @@
+import { useCallback, useEffect, useRef, useState } from "react";
+import { fetchTachesApi } from "./api";
+
+// Taille d'une page chargée (?limit=), au plus TachePagination.max_limit côté serveur
+export const TAILLE_PAGE = 100;
+// Rafraîchissement des pages visibles (ms)
+const INTERVALLE_RAFRAICHISSEMENT = 10000;
+
+const CHAMPS = ["titre", "description", "termine", "cree_le"];
+
+function identiques(a, b) {
+  return a.id === b.id && CHAMPS.every((champ) => a[champ] === b[champ]);
+}
+
+// Fusionne une page reçue dans le tableau creux des lignes (une case par
+// tâche du serveur, undefined tant que sa page n'est pas chargée).
+// Les tâches inchangées gardent leur objet: TacheItem (React.memo) ne les
+// re-rend pas, et l'état n'est pas remplacé si rien n'a changé.
+export function fusionnerPage(lignes, offset, taches, total) {
+  const modifiee = (tache, i) => !lignes[offset + i] || !identiques(lignes[offset + i], tache);
+  if (lignes.length === total && !taches.some(modifiee)) return lignes;
+  const resultat = lignes.slice(0, total);
+  resultat.length = total;
+  taches.forEach((tache, i) => {
+    if (modifiee(tache, i)) resultat[offset + i] = tache;
+  });
+  return resultat;
+}
+
+/**
+ * Liste des tâches chargée page par page, à la demande.
+ *
+ * - chargerPlage(debut, fin): charge les pages des lignes [debut, fin[ qui ne
+ *   le sont pas encore (appelée par la liste virtualisée à chaque défilement);
+ * - les pages visibles sont relues toutes les INTERVALLE_RAFRAICHISSEMENT ms
+ *   et fusionnées dans l'état (fusionnerPage). Si le nombre de tâches a changé
+ *   (créées ou supprimées ailleurs), les autres pages chargées sont décalées:
+ *   elles restent affichées mais seront relues à leur prochain affichage;
+ * - ajouter, remplacer et retirer appliquent les modifications locales sans
+ *   recharger la liste.
+ *
+ * Le coût d'un rendu ou d'un rafraîchissement dépend du nombre de lignes
+ * visibles, pas du nombre total de tâches.
+ */
+export function useTachesPaginees(token, onErreur) {
+  const [lignes, setLignes] = useState([]);
+  const [total, setTotal] = useState(null);
+  // Dernier nombre de tâches connu, pour détecter un décalage des lignes
+  const totalConnu = useRef(null);
+  // Page -> "chargement" ou "chargee"; les pages absentes sont à (re)charger
+  const pages = useRef(new Map());
+  const plageVisible = useRef([0, TAILLE_PAGE]);
+
+  const chargerPage = useCallback(
+    async (page, reinitialiser = false) => {
+      pages.current.set(page, "chargement");
+      try {
+        const offset = page * TAILLE_PAGE;
+        const data = await fetchTachesApi(token, { limit: TAILLE_PAGE, offset });
+        if (reinitialiser) {
+          // Nouvel utilisateur: les lignes précédentes sont abandonnées
+          totalConnu.current = null;
+        } else if (totalConnu.current !== null && totalConnu.current !== data.count) {
+          // Décalage des lignes: seules les pages relues depuis sont à jour
+          for (const autre of pages.current.keys()) {
+            if (autre !== page) pages.current.delete(autre);
+          }
+        }
+        totalConnu.current = data.count;
+        setTotal(data.count);
+        pages.current.set(page, "chargee");
+        setLignes((precedentes) =>
+          fusionnerPage(reinitialiser ? [] : precedentes, offset, data.results, data.count)
+        );
+      } catch (error) {
+        pages.current.delete(page);
+        // Serveur surchargé: la page sera rechargée au prochain rafraîchissement
+        if (error.status !== 503) onErreur(error);
+      }
+    },
+    [token, onErreur]
+  );
+
+  const chargerPlage = useCallback(
+    (debut, fin) => {
+      plageVisible.current = [debut, fin];
+      const premiere = Math.floor(debut / TAILLE_PAGE);
+      const derniere = Math.floor(Math.max(fin - 1, debut) / TAILLE_PAGE);
+      for (let page = premiere; page <= derniere; page++) {
+        if (!pages.current.has(page)) chargerPage(page);
+      }
+    },
+    [chargerPage]
+  );
+
+  useEffect(() => {
+    if (!token) return;
+    pages.current.clear();
+    chargerPage(0, true);
+
+    const interval = setInterval(() => {
+      const [debut, fin] = plageVisible.current;
+      const premiere = Math.floor(debut / TAILLE_PAGE);
+      const derniere = Math.floor(Math.max(fin - 1, debut) / TAILLE_PAGE);
+      for (let page = premiere; page <= derniere; page++) {
+        if (pages.current.get(page) !== "chargement") chargerPage(page);
+      }
+    }, INTERVALLE_RAFRAICHISSEMENT);
+    return () => clearInterval(interval);
+  }, [token, chargerPage]);
+
+  // Nouvelle tâche: en tête de liste (tri par défaut -cree_le)
+  const ajouter = useCallback((tache) => {
+    totalConnu.current = (totalConnu.current ?? 0) + 1;
+    setLignes((precedentes) => [tache, ...precedentes]);
+    setTotal(totalConnu.current);
+  }, []);
+
+  const remplacer = useCallback((id, modifications) => {
+    setLignes((precedentes) => {
+      const index = precedentes.findIndex((tache) => tache?.id === id);
+      if (index === -1) return precedentes;
+      const resultat = precedentes.slice();
+      resultat[index] = { ...precedentes[index], ...modifications };
+      return resultat;
+    });
+  }, []);
+
+  const retirer = useCallback((id) => {
+    totalConnu.current = Math.max((totalConnu.current ?? 1) - 1, 0);
+    setLignes((precedentes) => {
+      const index = precedentes.findIndex((tache) => tache?.id === id);
+      if (index === -1) return precedentes;
+      return [...precedentes.slice(0, index), ...precedentes.slice(index + 1)];
+    });
+    setTotal(totalConnu.current);
+  }, []);
+
+  return { lignes, total, chargerPlage, ajouter, remplacer, retirer };
+}
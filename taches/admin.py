@@ -4,12 +4,64 @@ Configuration de l'interface d'administration Django pour le modèle Tache.
 Ce module permet de gérer les tâches via l'interface d'administration Django
 avec des options de filtrage, recherche et affichage personnalisées.
 """
+from django.conf import settings
 from django.contrib import admin
-from .models import Tache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.html import format_html, format_html_join
+from .models import OutboxMessage, Profil, Tache
+from .outbox import requeue_abandoned
+from .profiling import leaf_functions
+from .sharding import fan_out, shard_for_id
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """
+    Filtre de la liste des objets d'un modèle shardé par shard (taches.sharding).
+
+    Les choix affichent le nombre d'objets de chaque shard, compté sur tous
+    les shards en parallèle. La sélection de la base est faite par
+    ShardedModelAdmin.get_queryset.
+    """
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        shards = settings.TACHE_SHARDS
+        if len(shards) == 1:
+            return []
+        counts = fan_out(lambda using: model_admin.model.objects.using(using).count())
+        return [(alias, f'{alias} ({count})') for alias, count in zip(shards, counts)]
+
+    def queryset(self, request, queryset):
+        return queryset
+
+
+class ShardedModelAdmin(admin.ModelAdmin):
+    """
+    Administration d'un modèle de SHARDED_MODELS (taches.sharding).
+
+    La liste affiche un shard à la fois (filtre 'shard', 'default' par défaut);
+    le détail d'un objet est lu sur le shard déduit de son identifiant.
+    """
+
+    def get_shard(self, request):
+        """Retourne la base à lire: shard de l'objet édité, sinon le filtre 'shard'."""
+        alias = getattr(request, 'admin_shard', None) or request.GET.get('shard')
+        return alias if alias in settings.TACHE_SHARDS else DEFAULT_DB_ALIAS
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).using(self.get_shard(request))
+
+    def get_object(self, request, object_id, from_field=None):
+        try:
+            request.admin_shard = shard_for_id(object_id)
+        except (TypeError, ValueError):
+            return None
+        return super().get_object(request, object_id, from_field)
 
 
 @admin.register(Tache)
-class TacheAdmin(admin.ModelAdmin):
+class TacheAdmin(ShardedModelAdmin):
     """
     Configuration de l'administration Django pour le modèle Tache.
     
@@ -21,6 +73,7 @@ class TacheAdmin(admin.ModelAdmin):
             - titre: Le titre de la tâche
             - termine: Le statut de réalisation
             - cree_le: La date de création
+            - echeance: La date d'échéance
         
         list_filter (tuple): Filtres disponibles dans la barre latérale.
             - termine: Filtre par statut (terminée/en cours)
@@ -32,8 +85,82 @@ class TacheAdmin(admin.ModelAdmin):
         
         readonly_fields (tuple): Champs en lecture seule dans le formulaire d'édition.
             - cree_le: La date de création ne peut pas être modifiée
+            - rappel_envoye_le: Géré par l'envoi des rappels (taches.reminders)
+    
+    Sharding:
+        La liste affiche un shard à la fois (filtre 'shard', 'default' par défaut);
+        le détail d'une tâche est lu sur le shard déduit de son identifiant.
     """
-    list_display = ('titre', 'termine', 'cree_le')
-    list_filter = ('termine', 'cree_le')
+    list_display = ('titre', 'termine', 'cree_le', 'echeance')
+    list_filter = (ShardListFilter, 'termine', 'cree_le')
     search_fields = ('titre', 'description')
-    readonly_fields = ('cree_le',)
+    readonly_fields = ('cree_le', 'rappel_envoye_le')
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(ShardedModelAdmin):
+    """
+    Consultation des messages de l'outbox transactionnelle (voir taches.outbox).
+    
+    Permet de repérer les messages bloqués (tentatives ou échecs élevés) et les
+    messages abandonnés après trop d'échecs de traitement, à republier une fois
+    la cause corrigée (action « Republier »). Les messages sont écrits sur le
+    shard de la donnée modifiée: la liste affiche un shard à la fois, comme
+    celle des tâches.
+    """
+    list_display = (
+        'id', 'nom_tache', 'cree_le', 'publier_le', 'envoye_le', 'traite_le', 'tentatives', 'echecs', 'abandonne_le',
+    )
+    list_filter = (ShardListFilter, 'nom_tache', ('abandonne_le', admin.EmptyFieldListFilter))
+    readonly_fields = (
+        'nom_tache', 'payload', 'cree_le', 'publier_le', 'envoye_le', 'reserve_jusqu_au', 'traite_le',
+        'tentatives', 'echecs', 'abandonne_le',
+    )
+    actions = ('republier',)
+
+    @admin.action(description='Republier les messages abandonnés sélectionnés')
+    def republier(self, request, queryset):
+        count = requeue_abandoned(queryset)
+        self.message_user(request, f'{count} message(s) remis en attente.')
+
+
+@admin.register(Profil)
+class ProfilAdmin(admin.ModelAdmin):
+    """
+    Consultation des profils d'exécution des requêtes et des tâches (voir taches.profiling).
+    
+    Le détail affiche les fonctions les plus souvent au sommet de la pile, les
+    lignes de code qui ont le plus alloué, et les piles repliées complètes (à
+    copier dans speedscope ou flamegraph.pl pour un flame graph).
+    """
+    list_display = ('nom', 'type', 'statut', 'duree_ms', 'echantillons', 'debut', 'identifiant')
+    list_filter = ('type', 'statut')
+    search_fields = ('identifiant', 'nom')
+    date_hierarchy = 'debut'
+    fields = (
+        'type', 'identifiant', 'nom', 'statut', 'debut', 'duree_ms', 'echantillons',
+        'intervalle_ms', 'memoire_pic', 'fonctions', 'allocations_table', 'piles',
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Fonctions en cours (échantillons)')
+    def fonctions(self, obj):
+        return format_html(
+            '<table>{}</table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td></tr>', leaf_functions(obj.piles)),
+        )
+
+    @admin.display(description='Allocations (octets, blocs)')
+    def allocations_table(self, obj):
+        return format_html(
+            '<table>{}</table>',
+            format_html_join('', '<tr><td>{}:{}</td><td>{}</td><td>{}</td></tr>', (
+                (a['fichier'], a['ligne'], a['taille'], a['nombre']) for a in obj.allocations
+            )),
+        )
@@ -6,6 +6,9 @@ des tâches, incluant le nom de l'application et d'éventuelles configurations
 spécifiques à l'application.
 """
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate, pre_delete
 
 
 class TachesConfig(AppConfig):
@@ -20,3 +23,21 @@ class TachesConfig(AppConfig):
         name (str): Nom de l'application ('taches').
     """
     name = 'taches'
+
+    def ready(self):
+        """
+        Connecte les signaux du sharding (taches.sharding), du profilage des
+        tâches (taches.profiling) et du journal des requêtes lentes (taches.slowqueries).
+        """
+        from .sharding import delete_user_taches, reserve_id_ranges
+
+        post_migrate.connect(reserve_id_ranges, sender=self)
+        pre_delete.connect(delete_user_taches, sender=settings.AUTH_USER_MODEL)
+        if settings.PROFILING_ENABLED:
+            from .profiling import connect_task_signals
+
+            connect_task_signals()
+        if settings.SLOW_QUERY_LOG_ENABLED:
+            from .slowqueries import install_slow_query_log
+
+            connection_created.connect(install_slow_query_log)
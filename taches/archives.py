@@ -0,0 +1,214 @@
+"""
+Archive des tâches terminées, partitionnée par mois.
+
+Les tâches terminées sont déplacées par lots de la table Tache vers une table
+par mois d'archivage ('taches_archive_AAAAMM', structure de TacheArchivee):
+    - la table Tache reste petite, ce qui garde TacheViewSet rapide;
+    - l'historique reste consultable (GET /api/archives/, lecture seule);
+    - la purge des vieux mois supprime des tables entières (DROP TABLE) au lieu
+      de supprimer des lignes une à une.
+
+SQLite n'a pas de partitionnement natif: chaque partition est une table
+ordinaire, créée à la demande avec le schema editor de Django, et les lectures
+sur plusieurs mois combinent les partitions avec UNION ALL.
+
+Avec le sharding (taches.sharding), chaque shard a ses propres partitions:
+les fonctions d'écriture prennent l'alias de la base (using).
+"""
+import re
+from datetime import date, datetime
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, models, transaction
+from django.utils import timezone
+
+from .models import Tache, TacheArchivee
+from .sharding import shard_for
+
+# Préfixe des tables de partition, suivi de AAAAMM
+ARCHIVE_TABLE_PREFIX = 'taches_archive_'
+ARCHIVE_TABLE_RE = re.compile(rf'^{ARCHIVE_TABLE_PREFIX}(\d{{4}})(\d{{2}})$')
+
+# Nombre de tâches déplacées par transaction (verrou d'écriture SQLite court)
+ARCHIVE_BATCH_SIZE = 500
+
+# Colonnes copiées de Tache vers la partition (archive_le est ajoutée à part)
+ARCHIVED_COLUMNS = ('id', 'titre', 'description', 'cree_le', 'proprietaire_id')
+
+_partition_models = {}
+
+
+def month_of(moment):
+    """
+    Retourne le mois (premier jour) de partition d'une date d'archivage.
+
+    Args:
+        moment (datetime): Date d'archivage (convertie dans le fuseau courant).
+
+    Returns:
+        date: Le premier jour du mois.
+    """
+    if isinstance(moment, datetime):
+        moment = timezone.localdate(moment)
+    return moment.replace(day=1)
+
+
+def partition_table(mois):
+    """Nom de la table de partition d'un mois."""
+    return f'{ARCHIVE_TABLE_PREFIX}{mois:%Y%m}'
+
+
+def partition_model(mois):
+    """
+    Retourne le modèle (non géré par les migrations) de la partition d'un mois.
+
+    Args:
+        mois (date): Premier jour du mois.
+
+    Returns:
+        type: Sous-classe de TacheArchivee liée à la table du mois.
+    """
+    table = partition_table(mois)
+    model = _partition_models.get(table)
+    if model is None:
+        meta = type('Meta', (), {
+            'db_table': table,
+            'managed': False,
+            'app_label': 'taches',
+            'indexes': [models.Index(fields=['proprietaire_id', '-archive_le'], name=f'{table}_prop')],
+        })
+        model = type(f'TacheArchivee{mois:%Y%m}', (TacheArchivee,), {'__module__': __name__, 'Meta': meta})
+        _partition_models[table] = model
+    return model
+
+
+def list_partitions(using=DEFAULT_DB_ALIAS):
+    """
+    Liste les partitions existantes en base.
+
+    Args:
+        using (str): La base (shard).
+
+    Returns:
+        list: Les mois (premier jour) des partitions, du plus récent au plus ancien.
+    """
+    months = []
+    for table in connections[using].introspection.table_names():
+        match = ARCHIVE_TABLE_RE.match(table)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months, reverse=True)
+
+
+def ensure_partition(mois, using=DEFAULT_DB_ALIAS):
+    """
+    Crée la table de partition d'un mois si elle n'existe pas.
+
+    Doit être appelée hors transaction (contrainte du schema editor SQLite).
+
+    Args:
+        mois (date): Premier jour du mois.
+        using (str): La base (shard).
+
+    Returns:
+        type: Le modèle de la partition.
+    """
+    model = partition_model(mois)
+    connection = connections[using]
+    if model._meta.db_table not in connection.introspection.table_names():
+        try:
+            with connection.schema_editor() as editor:
+                editor.create_model(model)
+        except DatabaseError:
+            # Créée entre-temps par un autre worker
+            if model._meta.db_table not in connection.introspection.table_names():
+                raise
+    return model
+
+
+def archive_completed(batch_size=ARCHIVE_BATCH_SIZE, now=None, using=DEFAULT_DB_ALIAS):
+    """
+    Déplace les tâches terminées vers la partition du mois courant.
+
+    Chaque lot est copié avec un INSERT ... SELECT puis supprimé de Tache, dans
+    une même transaction: une tâche est toujours soit active, soit archivée.
+
+    Args:
+        batch_size (int): Nombre de tâches déplacées par transaction.
+        now (datetime): Date d'archivage (par défaut: maintenant).
+        using (str): La base (shard) dont les tâches terminées sont archivées.
+
+    Returns:
+        int: Le nombre de tâches archivées.
+    """
+    now = now or timezone.now()
+    model = ensure_partition(month_of(now), using=using)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(column) for column in ARCHIVED_COLUMNS)
+    insert_sql = (
+        f'INSERT INTO {qn(model._meta.db_table)} ({columns}, {qn("archive_le")}) '
+        f'SELECT {columns}, %s FROM {qn(Tache._meta.db_table)} '
+        f'WHERE {qn("termine")} AND {qn("id")} BETWEEN %s AND %s'
+    )
+    archive_le = connection.ops.adapt_datetimefield_value(now)
+
+    archived = 0
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(
+                Tache.objects.using(using).filter(termine=True).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return archived
+            with connection.cursor() as cursor:
+                cursor.execute(insert_sql, [archive_le, ids[0], ids[-1]])
+            deleted, _ = Tache.objects.using(using).filter(termine=True, id__range=(ids[0], ids[-1])).delete()
+            archived += deleted
+        if len(ids) < batch_size:
+            return archived
+
+
+def archives_for(user_id, mois=None):
+    """
+    Retourne les tâches archivées d'un utilisateur, toutes partitions de son shard confondues.
+
+    Args:
+        user_id (int): L'identifiant du propriétaire.
+        mois (date): Limiter la lecture à la partition de ce mois.
+
+    Returns:
+        QuerySet: Les tâches archivées, des plus récemment archivées aux plus anciennes
+            (UNION ALL des partitions, paginable).
+    """
+    using = shard_for(user_id)
+    months = list_partitions(using)
+    if mois is not None:
+        months = [m for m in months if m == mois]
+    if not months:
+        return partition_model(month_of(timezone.now())).objects.using(using).none()
+
+    querysets = [
+        partition_model(m).objects.using(using).filter(proprietaire_id=user_id).order_by() for m in months
+    ]
+    first, *others = querysets
+    return first.union(*others, all=True).order_by('-archive_le', '-id')
+
+
+def purge_partitions(before, using=DEFAULT_DB_ALIAS):
+    """
+    Supprime les partitions des mois antérieurs à une date (DROP TABLE).
+
+    Args:
+        before (date): Les partitions des mois strictement antérieurs au mois de
+            cette date sont supprimées.
+        using (str): La base (shard).
+
+    Returns:
+        list: Les mois supprimés.
+    """
+    limit = month_of(before)
+    dropped = [mois for mois in list_partitions(using) if mois < limit]
+    for mois in dropped:
+        with connections[using].schema_editor() as editor:
+            editor.delete_model(partition_model(mois))
+    return dropped
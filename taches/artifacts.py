@@ -0,0 +1,244 @@
+"""
+Fichiers des rapports de tâches (artefacts) et téléchargement par plages.
+
+Le rapport complet (une ligne par propriétaire) peut être volumineux: au lieu de
+le garder dans le backend de résultats Celery (Redis), où chaque suivi de statut
+le renverrait, l'étape reduce l'écrit dans le stockage 'reports'
+(settings.STORAGES) sous forme de fichiers compressés:
+    - csv     : CSV compressé gzip (proprietaire_id,total,terminees);
+    - json    : tableau JSON [[proprietaire_id, total, terminees], ...] compressé gzip;
+    - parquet : format en colonnes (compression zstd), si pyarrow est installé.
+
+Le résultat de la tâche ne contient plus qu'un pointeur vers chaque fichier
+(nom, taille, URL de téléchargement) et sa date d'expiration.
+
+Les fichiers d'un utilisateur sont rangés sous '<utilisateur>/<rapport>.<extension>':
+le téléchargement construit ce chemin à partir de l'utilisateur connecté, un
+utilisateur ne peut donc pas lire le rapport d'un autre. Les fichiers plus
+anciens que REPORT_ARTIFACT_RETENTION ne sont plus servis, et sont supprimés
+par la tâche périodique purge_report_artifacts.
+"""
+import csv
+import gzip
+import io
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.urls import reverse
+from django.utils import timezone
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+    import json
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    pyarrow = None
+
+# Colonnes des lignes du rapport (voir taches.reports.merge_partials)
+REPORT_COLUMNS = ('proprietaire_id', 'total', 'terminees')
+
+# Format -> (extension, type MIME du fichier servi)
+REPORT_FORMATS = {
+    'csv': ('csv.gz', 'application/gzip'),
+    'json': ('json.gz', 'application/gzip'),
+}
+if pyarrow is not None:
+    REPORT_FORMATS['parquet'] = ('parquet', 'application/vnd.apache.parquet')
+
+# Identifiants de rapport acceptés dans un chemin de fichier (UUID Celery)
+REPORT_ID_RE = re.compile(r'^[\w-]+$')
+
+# Une plage 'bytes=debut-fin', 'bytes=debut-' ou 'bytes=-suffixe'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_report_storage():
+    """Retourne le stockage des fichiers de rapports (settings.STORAGES['reports'])."""
+    return storages['reports']
+
+
+def artifact_name(user_id, report_id, fmt):
+    """
+    Chemin d'un fichier de rapport dans le stockage.
+
+    Args:
+        user_id (int): Le propriétaire du rapport (utilisateur qui l'a demandé).
+        report_id (str): L'identifiant du rapport (tâche generate_task_report).
+        fmt (str): Le format (clé de REPORT_FORMATS).
+
+    Returns:
+        str: Le chemin relatif '<utilisateur>/<rapport>.<extension>'.
+
+    Raises:
+        ValueError: Si l'identifiant du rapport ou le format est invalide.
+    """
+    if fmt not in REPORT_FORMATS or not REPORT_ID_RE.match(report_id):
+        raise ValueError(f'Fichier de rapport invalide : {report_id!r} ({fmt!r})')
+    return f'{int(user_id)}/{report_id}.{REPORT_FORMATS[fmt][0]}'
+
+
+def _gzip(data):
+    # mtime=0: un même rapport produit toujours les mêmes octets
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _encode_csv(lignes):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(REPORT_COLUMNS)
+    writer.writerows(lignes)
+    return _gzip(buffer.getvalue().encode())
+
+
+def _encode_json(lignes):
+    data = orjson.dumps(lignes) if orjson is not None else json.dumps(lignes, separators=(',', ':')).encode()
+    return _gzip(data)
+
+
+def _encode_parquet(lignes):
+    columns = list(zip(*lignes)) if lignes else [(), (), ()]
+    table = pyarrow.table({
+        name: pyarrow.array(values, type=pyarrow.int64())
+        for name, values in zip(REPORT_COLUMNS, columns)
+    })
+    buffer = io.BytesIO()
+    pyarrow.parquet.write_table(table, buffer, compression='zstd')
+    return buffer.getvalue()
+
+
+ENCODERS = {'csv': _encode_csv, 'json': _encode_json, 'parquet': _encode_parquet}
+
+
+def write_report_artifacts(report_id, user_id, rapport):
+    """
+    Écrit les lignes d'un rapport dans le stockage, dans chaque format disponible.
+
+    Un fichier existant (nouvelle tentative du reduce) est remplacé.
+
+    Args:
+        report_id (str): L'identifiant du rapport.
+        user_id (int): L'utilisateur qui a demandé le rapport.
+        rapport (dict): Le rapport fusionné (voir taches.reports.merge_partials).
+
+    Returns:
+        dict: Le rapport sans 'lignes', avec 'fichiers' ({format: {'nom',
+            'taille', 'url'}}) et 'expire_le' (date ISO 8601).
+    """
+    storage = get_report_storage()
+    lignes = rapport['lignes']
+    fichiers = {}
+    for fmt in REPORT_FORMATS:
+        name = artifact_name(user_id, report_id, fmt)
+        data = ENCODERS[fmt](lignes)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(data))
+        fichiers[fmt] = {
+            'nom': name.rsplit('/', 1)[1],
+            'taille': len(data),
+            'url': reverse('report-download', kwargs={'task_id': report_id, 'fmt': fmt}),
+        }
+    resume = {key: value for key, value in rapport.items() if key != 'lignes'}
+    resume['fichiers'] = fichiers
+    resume['expire_le'] = (timezone.now() + settings.REPORT_ARTIFACT_RETENTION).isoformat()
+    return resume
+
+
+def is_expired(modified, now=None):
+    """Indique si un fichier modifié à la date `modified` a dépassé REPORT_ARTIFACT_RETENTION."""
+    return modified < (now or timezone.now()) - settings.REPORT_ARTIFACT_RETENTION
+
+
+def purge_artifacts(now=None):
+    """
+    Supprime les fichiers de rapports plus anciens que REPORT_ARTIFACT_RETENTION.
+
+    Args:
+        now (datetime): La date de référence (défaut: maintenant).
+
+    Returns:
+        int: Le nombre de fichiers supprimés.
+    """
+    storage = get_report_storage()
+    if not storage.exists(''):
+        return 0
+    deleted = 0
+    directories, _ = storage.listdir('')
+    for directory in directories:
+        for filename in storage.listdir(directory)[1]:
+            name = f'{directory}/{filename}'
+            if is_expired(storage.get_modified_time(name), now):
+                storage.delete(name)
+                deleted += 1
+    return deleted
+
+
+def parse_byte_range(header, size):
+    """
+    Interprète l'en-tête Range d'une requête de téléchargement.
+
+    Seule une plage unique en octets est servie partiellement: une liste de
+    plages (multipart/byteranges) ou une unité inconnue donne le fichier entier,
+    comme le permet la RFC 9110.
+
+    Args:
+        header (str): La valeur de l'en-tête Range.
+        size (int): La taille du fichier.
+
+    Returns:
+        tuple | None: (premier octet, dernier octet inclus), ou None pour
+            servir le fichier entier.
+
+    Raises:
+        ValueError: Si la plage ne recouvre aucun octet du fichier (réponse 416).
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffixe: les N derniers octets
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError('Plage vide')
+        return max(size - length, 0), size - 1
+    first = int(first)
+    if last != '' and int(last) < first:
+        # 'bytes=5-2': syntaxe invalide, en-tête ignoré
+        return None
+    if first >= size:
+        raise ValueError('Plage hors du fichier')
+    return first, size - 1 if last == '' else min(int(last), size - 1)
+
+
+def iter_range(file, first, last, chunk_size=64 * 1024):
+    """
+    Lit les octets [first, last] d'un fichier ouvert par blocs, puis le ferme.
+
+    Args:
+        file: Le fichier du stockage, ouvert en binaire.
+        first (int): Le premier octet.
+        last (int): Le dernier octet (inclus).
+        chunk_size (int): La taille des blocs lus.
+
+    Yields:
+        bytes: Les blocs de la plage.
+    """
+    try:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
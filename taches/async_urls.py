@@ -0,0 +1,17 @@
+"""
+Routes asynchrones de l'API des tâches (utilisées sous ASGI, voir config/urls_asgi.py).
+
+Mêmes chemins et mêmes noms que taches.urls, mais servis par taches.async_views.
+"""
+from adrf.routers import DefaultRouter
+from django.urls import path, include
+from . import async_views
+
+router = DefaultRouter()
+router.register(r'taches', async_views.AsyncTacheViewSet, basename='tache')
+
+urlpatterns = [
+    path('api/', include(router.urls)),
+    path('api/check-report-status/<str:task_id>/', async_views.AsyncCheckTaskStatusView.as_view(), name='check-report-status'),
+    path('api/task-status/', async_views.AsyncTaskStatusBatchView.as_view(), name='task-status-batch'),
+]
@@ -0,0 +1,193 @@
+"""
+Vues asynchrones de l'API des tâches, servies sous ASGI.
+
+Ces vues reprennent exactement le comportement de TacheViewSet et de
+CheckTaskStatusView (mêmes URLs, authentification, permissions et réponses),
+mais s'exécutent dans la boucle d'événements:
+    - l'ORM est utilisé via son API asynchrone (aget, acreate, asave, adelete, async for),
+    - l'état des tâches Celery est lu dans Redis avec redis.asyncio (voir taches.results).
+
+Seules l'authentification et les permissions (TokenAuthentication est synchrone)
+passent par un thread. Les vues sont branchées par taches.middleware.ASGIURLConfMiddleware
+pour les requêtes ASGI uniquement; les requêtes WSGI gardent les vues synchrones.
+"""
+from adrf.viewsets import ModelViewSet
+from adrf.views import APIView
+from asgiref.sync import sync_to_async
+from celery import states
+from django.http import Http404
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .groupcommit import acommit_write
+from .models import Tache
+from .outbox import save_with_creation_email
+from .reports import REPORT_PROGRESS, areport_progress
+from .results import aget_task_meta
+from .sharding import shard_for
+from .statuses import atask_statuses
+from .views import TacheQuerysetMixin, parse_task_ids
+
+# adrf nomme les actions asynchrones 'alist', 'acreate', ...: on les ramène aux
+# noms DRF pour que get_sparse_fields() et les permissions voient les mêmes actions
+ASYNC_ACTION_NAMES = {
+    'alist': 'list',
+    'acreate': 'create',
+    'aretrieve': 'retrieve',
+    'aupdate': 'update',
+    'partial_aupdate': 'partial_update',
+    'adestroy': 'destroy',
+}
+
+
+class AsyncTacheViewSet(TacheQuerysetMixin, ModelViewSet):
+    """
+    Version asynchrone de TacheViewSet (CRUD des tâches de l'utilisateur connecté).
+
+    Endpoints (identiques à TacheViewSet):
+        - GET /api/taches/, POST /api/taches/
+        - GET, PUT, PATCH, DELETE /api/taches/{id}/
+        - POST /api/taches/{id}/complete/, uncomplete/, toggle/, deplacer/
+
+    Notes:
+        - Le QuerySet est celui de TacheQuerysetMixin (filtré par propriétaire,
+          sparse fieldsets compris) et est évalué avec l'ORM asynchrone.
+        - TacheSerializer ne fait aucune requête en validation ni en sérialisation
+          (le propriétaire est l'utilisateur de la requête), il est donc appelé directement.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request = super().initialize_request(request, *args, **kwargs)
+        self.action = ASYNC_ACTION_NAMES.get(self.action, self.action)
+        return request
+
+    async def aget_object(self):
+        """
+        Récupère la tâche de l'URL parmi celles de l'utilisateur connecté.
+
+        Returns:
+            Tache: La tâche demandée.
+
+        Raises:
+            Http404: Si la tâche n'existe pas ou appartient à un autre utilisateur.
+        """
+        try:
+            instance = await self.get_queryset().aget(pk=self.kwargs['pk'])
+        except (Tache.DoesNotExist, ValueError, TypeError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None and request.query_params.get(self.paginator.limit_query_param):
+            # COUNT + page: évalués dans un thread par la pagination DRF
+            page = await sync_to_async(self.paginate_queryset)(queryset)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        taches = [tache async for tache in queryset]
+        return Response(self.get_serializer(taches, many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def acreate(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await self.perform_acreate(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    async def perform_acreate(self, serializer):
+        """
+        Crée la tâche pour l'utilisateur connecté et son message d'e-mail de
+        notification, dans une même transaction (voir taches.outbox), groupée
+        avec les écritures simultanées si GROUP_COMMIT_ENABLED (taches.groupcommit).
+
+        Args:
+            serializer (TacheSerializer): Le sérialiseur validé.
+        """
+        user = self.request.user
+        await acommit_write(lambda: save_with_creation_email(serializer, user), shard_for(user.pk))
+
+    async def aupdate(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        for attr, value in serializer.validated_data.items():
+            setattr(instance, attr, value)
+        await acommit_write(instance.save, instance._state.db)
+        return Response(serializer.data)
+
+    async def partial_aupdate(self, request, *args, **kwargs):
+        kwargs['partial'] = True
+        return await self.aupdate(request, *args, **kwargs)
+
+    async def adestroy(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        await instance.adelete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    async def complete(self, request, pk=None):
+        return await sync_to_async(self.update_termine)(True)
+
+    @action(detail=True, methods=['post'])
+    async def uncomplete(self, request, pk=None):
+        return await sync_to_async(self.update_termine)(False)
+
+    @action(detail=True, methods=['post'])
+    async def toggle(self, request, pk=None):
+        return await sync_to_async(self.update_termine)(None)
+
+    @action(detail=True, methods=['post'])
+    async def deplacer(self, request, pk=None):
+        return await sync_to_async(self.move_tache)()
+
+
+class AsyncCheckTaskStatusView(APIView):
+    """
+    Version asynchrone de CheckTaskStatusView.
+
+    Endpoint:
+        GET /api/check-report-status/<task_id>/
+
+    Lit l'état et le résultat de la tâche en un seul GET redis.asyncio au lieu des
+    appels bloquants de AsyncResult. La réponse est identique à la vue synchrone.
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, task_id):
+        meta = await aget_task_meta(task_id)
+
+        response_data = {
+            'task_id': task_id,
+            'state': meta['status'],
+            'result': None
+        }
+        if meta['status'] == states.SUCCESS:
+            response_data['result'] = meta['result']
+        elif meta['status'] == states.FAILURE:
+            response_data['result'] = str(meta['result'])
+        elif meta['status'] == REPORT_PROGRESS:
+            response_data['progress'] = await areport_progress(task_id, meta['result'])
+
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+class AsyncTaskStatusBatchView(APIView):
+    """
+    Version asynchrone de TaskStatusBatchView.
+
+    Endpoint:
+        POST /api/task-status/
+
+    Lit les états avec redis.asyncio (voir taches.statuses.atask_statuses).
+    La réponse est identique à la vue synchrone.
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request):
+        return Response(await atask_statuses(parse_task_ids(request.data)), status=status.HTTP_200_OK)
@@ -0,0 +1,113 @@
+"""
+Filtres et tris côté serveur de la liste des tâches (GET /api/taches/).
+
+Paramètres de requête (combinables entre eux, avec les sparse fieldsets et
+avec la pagination ?limit=&offset=):
+    - termine=true|false          : statut
+    - cree_apres=<date ISO>       : créées à partir de cette date (incluse)
+    - cree_avant=<date ISO>       : créées avant cette date (exclue)
+    - titre_prefixe=<texte>       : titre commençant par ce texte (sans tenir compte de la casse)
+    - ordering=<tri>              : un tri de ORDERINGS (défaut: -cree_le), dont
+                                    'rang' pour l'ordre manuel (taches.ranking)
+
+Toutes les combinaisons lisent l'un des index (proprietaire, cree_le),
+(proprietaire, LOWER(titre)) ou (proprietaire, rang, id) de Tache.Meta.indexes, jamais la table entière;
+le statut est vérifié sur les lignes lues. Le préfixe de titre est traduit en
+intervalle sur LOWER(titre) pour utiliser l'index fonctionnel, ce que LIKE ne
+permet pas avec SQLite.
+"""
+from datetime import datetime, time
+
+from django.db.models.functions import Concat, Lower
+from django.db.models import Value
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+# Tris autorisés (?ordering=) et clés de tri SQL; l'id départage les égalités
+ORDERINGS = {
+    '-cree_le': ('-cree_le', '-id'),
+    'cree_le': ('cree_le', 'id'),
+    'titre': (Lower('titre').asc(), 'id'),
+    '-titre': (Lower('titre').desc(), '-id'),
+    'rang': ('rang', 'id'),
+}
+DEFAULT_ORDERING = '-cree_le'
+
+# Plus grand point de code: borne haute de l'intervalle d'un préfixe
+MAX_CHAR = '\U0010ffff'
+
+
+def _parse_bool(value, param):
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise ValidationError({param: 'Valeur attendue : true ou false'})
+
+
+def _parse_moment(value, param):
+    """Convertit une date ou une date-heure ISO 8601 en datetime avec fuseau."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({param: 'Date attendue au format ISO 8601 (AAAA-MM-JJ ou AAAA-MM-JJTHH:MM)'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class TacheFilterBackend(BaseFilterBackend):
+    """
+    Filtres de la liste des tâches: termine, cree_apres, cree_avant, titre_prefixe.
+
+    Appliqués à la liste seulement: le détail d'une tâche ne dépend pas des filtres.
+
+    Raises:
+        ValidationError: Si une valeur est invalide (réponse 400).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if view.action != 'list':
+            return queryset
+        params = request.query_params
+        if 'termine' in params:
+            queryset = queryset.filter(termine=_parse_bool(params['termine'], 'termine'))
+        if 'cree_apres' in params:
+            queryset = queryset.filter(cree_le__gte=_parse_moment(params['cree_apres'], 'cree_apres'))
+        if 'cree_avant' in params:
+            queryset = queryset.filter(cree_le__lt=_parse_moment(params['cree_avant'], 'cree_avant'))
+        prefixe = params.get('titre_prefixe')
+        if prefixe:
+            bas = Lower(Value(prefixe))
+            queryset = queryset.alias(titre_minuscule=Lower('titre')).filter(
+                titre_minuscule__gte=bas,
+                titre_minuscule__lt=Concat(bas, Value(MAX_CHAR)),
+            )
+        return queryset
+
+
+class TacheOrderingFilter(BaseFilterBackend):
+    """
+    Tri de la liste des tâches parmi les tris autorisés (ORDERINGS).
+
+    Raises:
+        ValidationError: Si le tri demandé n'est pas autorisé (réponse 400).
+    """
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        if view.action != 'list':
+            return queryset
+        ordering = request.query_params.get(self.ordering_param, DEFAULT_ORDERING)
+        if ordering not in ORDERINGS:
+            raise ValidationError({
+                self.ordering_param: f"Tris possibles : {', '.join(ORDERINGS)}"
+            })
+        return queryset.order_by(*ORDERINGS[ordering])
@@ -0,0 +1,182 @@
+"""
+Validation groupée (group commit) des écritures de l'API sur SQLite.
+
+Avec SQLite, chaque création ou modification de tâche prend le verrou
+d'écriture de la base et synchronise le journal sur le disque (fsync) à sa
+validation. Les requêtes simultanées s'attendent les unes les autres, et
+au-delà du délai d'attente du verrou échouent avec « database is locked ».
+
+En mode groupé (GROUP_COMMIT_ENABLED), les écritures simultanées d'un même
+processus vers une même base sont rassemblées:
+    - la première écriture d'un lot en devient le meneur: elle attend
+      GROUP_COMMIT_WINDOW_MS millisecondes (ou que le lot atteigne
+      GROUP_COMMIT_MAX_BATCH écritures) que d'autres la rejoignent;
+    - le meneur exécute toutes les écritures du lot dans une seule
+      transaction, chacune dans son propre point de sauvegarde: une écriture
+      en erreur est annulée seule et son erreur est rendue à sa requête;
+    - après la validation (un seul verrou, un seul fsync pour tout le lot),
+      chaque requête reçoit son propre résultat.
+
+Un seul lot par base est validé à la fois dans le processus: les écritures
+qui arrivent pendant une validation forment le lot suivant.
+
+Les fonctions soumises sont exécutées dans le thread du meneur, avec sa
+connexion: elles ne doivent pas dépendre de l'état propre au thread de la
+requête (transaction ouverte, connexion). La validation des données
+(serializer.is_valid) reste faite par chaque requête, avant la soumission.
+
+Les fonctions transaction.on_commit() enregistrées par une écriture sont
+retirées de la transaction groupée et rendues avec son résultat: elles sont
+exécutées une fois, par le thread de la requête qui l'a soumise (après la
+validation du lot, ou de la transaction de la requête si elle en a une), et
+jamais si l'écriture ou le lot est annulé.
+"""
+import os
+import threading
+from concurrent.futures import Future
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+
+
+class _Lot:
+    """Écritures en attente d'un même lot: (fonction, Future)."""
+
+    def __init__(self):
+        self.ecritures = []
+        self.plein = threading.Event()
+
+
+class GroupCommitter:
+    """
+    Rassemble les écritures simultanées d'un processus en transactions groupées.
+
+    Utilisation:
+        committer = GroupCommitter()
+        tache = committer.submit(lambda: serializer.save(proprietaire=user), using='default')
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Base -> lot en cours de constitution
+        self._lots = {}
+        # Base -> verrou de validation (un lot validé à la fois par base)
+        self._commit_locks = {}
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Les lots du parent ne concernent pas l'enfant (workers préforkés)
+        self._lock = threading.Lock()
+        self._lots = {}
+        self._commit_locks = {}
+
+    def submit(self, func, using):
+        """
+        Exécute une écriture dans la prochaine transaction groupée de la base.
+
+        Args:
+            func (callable): L'écriture (sans argument). Elle est exécutée dans
+                un point de sauvegarde de la transaction groupée.
+            using (str): La base écrite.
+
+        Returns:
+            Le résultat de func, une fois la transaction groupée validée.
+
+        Raises:
+            Exception: L'erreur levée par func (seule son écriture est annulée),
+                ou l'erreur de validation de la transaction groupée.
+        """
+        future = Future()
+        with self._lock:
+            lot = self._lots.get(using)
+            meneur = lot is None
+            if meneur:
+                lot = self._lots[using] = _Lot()
+            lot.ecritures.append((func, future))
+            if len(lot.ecritures) >= settings.GROUP_COMMIT_MAX_BATCH:
+                # Lot complet: les écritures suivantes forment un nouveau lot
+                del self._lots[using]
+                lot.plein.set()
+            commit_lock = self._commit_locks.setdefault(using, threading.Lock())
+        if meneur:
+            lot.plein.wait(settings.GROUP_COMMIT_WINDOW_MS / 1000)
+            with commit_lock:
+                # Le lot reste ouvert tant que le lot précédent est en cours de validation
+                with self._lock:
+                    if self._lots.get(using) is lot:
+                        del self._lots[using]
+                self._commit(lot.ecritures, using)
+        resultat, callbacks = future.result()
+        # Fonctions on_commit de l'écriture, dans le thread de la requête
+        for func, robust in callbacks:
+            transaction.on_commit(func, using=using, robust=robust)
+        return resultat
+
+    def _commit(self, ecritures, using):
+        connection = connections[using]
+        resultats = []
+        try:
+            with transaction.atomic(using=using):
+                for func, future in ecritures:
+                    debut = len(connection.run_on_commit)
+                    try:
+                        with transaction.atomic(using=using):
+                            resultat = func()
+                    except Exception as exc:
+                        resultats.append((future, None, exc))
+                        continue
+                    # Fonctions on_commit de cette écriture: rendues à son thread
+                    callbacks = [(f, robust) for _, f, robust in connection.run_on_commit[debut:]]
+                    del connection.run_on_commit[debut:]
+                    resultats.append((future, (resultat, callbacks), None))
+        except Exception as exc:
+            # Transaction groupée annulée (verrou, disque...): toutes les écritures échouent
+            for _, future in ecritures:
+                future.set_exception(exc)
+            return
+        for future, resultat, exc in resultats:
+            if exc is None:
+                future.set_result(resultat)
+            else:
+                future.set_exception(exc)
+
+
+committer = GroupCommitter()
+
+
+def commit_write(func, using):
+    """
+    Exécute une écriture de l'API, groupée avec les écritures simultanées si
+    GROUP_COMMIT_ENABLED, sinon directement.
+
+    Args:
+        func (callable): L'écriture (sans argument).
+        using (str): La base écrite (shard du propriétaire).
+
+    Returns:
+        Le résultat de func.
+    """
+    if not settings.GROUP_COMMIT_ENABLED:
+        return func()
+    return committer.submit(func, using)
+
+
+async def acommit_write(func, using):
+    """
+    Version asynchrone de commit_write, pour les vues ASGI.
+
+    En mode groupé, l'écriture attend son lot dans un thread qui lui est propre
+    (thread_sensitive=False): avec le thread unique des appels synchrones, les
+    écritures simultanées ne pourraient pas se rejoindre.
+
+    Args:
+        func (callable): L'écriture synchrone (sans argument).
+        using (str): La base écrite.
+
+    Returns:
+        Le résultat de func.
+    """
+    if not settings.GROUP_COMMIT_ENABLED:
+        return await sync_to_async(func)()
+    return await sync_to_async(committer.submit, thread_sensitive=False)(func, using)
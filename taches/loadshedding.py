@@ -0,0 +1,393 @@
+"""
+Délestage adaptatif des requêtes de l'API en cas de surcharge.
+
+Quand les workers ou la base saturent, les requêtes s'accumulent sans limite
+dans la file d'attente et la latence augmente pour tout le monde. Le
+middleware LoadSheddingMiddleware limite plutôt le nombre de requêtes en
+cours de traitement dans le processus, et refuse le surplus (503 avec
+Retry-After) en commençant par les requêtes les moins importantes.
+
+Limite de concurrence adaptative (AdaptiveLimiter, algorithme « gradient »):
+    - la latence de traitement des requêtes admises est lissée, et comparée à
+      la latence minimale récente (celle du serveur non chargé);
+    - tant que la latence lissée reste sous LOAD_SHEDDING_TOLERANCE fois la
+      latence minimale, la limite augmente (si elle est réellement atteinte);
+    - au-delà, la limite diminue en proportion: les requêtes en trop ne font
+      qu'allonger la file d'attente interne de la base ou du processeur.
+
+Priorités:
+    - basse: les requêtes de LOAD_SHEDDING_LOW_PRIORITY (rafraîchissement
+      périodique de la liste, suivi des rapports et des tâches). Admises seulement sous
+      LOAD_SHEDDING_LOW_PRIORITY_SHARE de la limite et tant que l'attente
+      récente reste sous LOAD_SHEDDING_TARGET_DELAY_MS; sinon refusées aussitôt;
+    - normale: les autres lectures. Attendent une place au plus
+      LOAD_SHEDDING_MAX_WAIT_MS;
+    - haute: les autres requêtes, c'est-à-dire les écritures (POST, PUT,
+      PATCH, DELETE) des utilisateurs. Attendent une place au
+      plus LOAD_SHEDDING_WRITE_MAX_WAIT_MS.
+
+L'attente mesurée comprend le temps passé à attendre une place, et le temps
+passé dans la file du proxy si celui-ci indique l'arrivée de la requête dans
+l'en-tête X-Request-Start (par exemple avec nginx:
+`proxy_set_header X-Request-Start "t=${msec}";`). Une requête qui a déjà
+attendu plus que son attente maximale est refusée dès son arrivée: sa réponse
+arriverait trop tard pour être utile.
+
+Sous ASGI, les requêtes en attente d'une place ne bloquent pas la boucle
+d'événements: elles sont réveillées dans l'ordre d'arrivée par la libération
+d'une place (AdaptiveLimiter.acquire_async).
+
+Désactivé par défaut (LOAD_SHEDDING_ENABLED): les seuils sont à ajuster à
+l'application servie, par exemple avec `manage.py loadtest`.
+
+Avec les workers 'sync' de `manage.py serve` (une requête à la fois par
+processus), la limite de concurrence n'intervient pas: seule l'attente
+indiquée par X-Request-Start permet alors le délestage. Elle s'applique
+pleinement aux serveurs à threads (runserver) et aux workers 'asgi'.
+"""
+import asyncio
+import collections
+import math
+import re
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+
+# Priorités des requêtes
+BASSE, NORMALE, HAUTE = 'basse', 'normale', 'haute'
+
+# Méthodes HTTP sans effet de bord (priorité normale)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Lissage exponentiel de la latence et de l'attente (poids de la dernière mesure)
+SMOOTHING = 0.2
+
+# Intervalle de réévaluation de la latence minimale (secondes): elle suit
+# ainsi les variations durables (base plus grosse, autre machine)
+MIN_LATENCY_WINDOW = 30
+
+# Durée de validité de l'attente lissée (secondes): sans requête admise
+# depuis, elle n'est plus représentative et les requêtes de priorité basse
+# sont de nouveau admises
+DELAY_WINDOW = 1.0
+
+
+class _AsyncWaiter:
+    """Requête ASGI en attente d'une place (AdaptiveLimiter.acquire_async)."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+        # Place donnée par release(), sous le verrou du limiteur
+        self.granted = False
+
+    def wake(self):
+        # Exécuté dans la boucle de la requête (Future n'est pas thread-safe)
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdaptiveLimiter:
+    """
+    Limite de concurrence adaptative d'un processus (voir le docstring du module).
+
+    Utilisation:
+        limiter = AdaptiveLimiter(initial=20, minimum=2, maximum=200)
+        if limiter.acquire(timeout=0.5):  # ou: await limiter.acquire_async(timeout=0.5)
+            try:
+                ...
+            finally:
+                limiter.release(latence, attente)
+    """
+
+    def __init__(self, initial, minimum, maximum, tolerance=2.0):
+        self._condition = threading.Condition()
+        # Requêtes ASGI en attente d'une place, dans l'ordre d'arrivée
+        self._waiters = collections.deque()
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.in_flight = 0
+        # Latence lissée et latence minimale récente des requêtes admises (secondes)
+        self.latency = None
+        self.min_latency = None
+        self._min_latency_reset = time.monotonic() + MIN_LATENCY_WINDOW
+        # Attente lissée des requêtes admises (secondes), et date de sa mise à jour
+        self.delay = 0.0
+        self._delay_at = 0.0
+
+    @property
+    def recent_delay(self):
+        """Attente lissée des requêtes admises récemment (secondes), 0 si aucune."""
+        if time.monotonic() - self._delay_at > DELAY_WINDOW:
+            return 0.0
+        return self.delay
+
+    def _capacity(self, share):
+        return max(int(self.limit * share), 1)
+
+    def try_acquire(self, share=1.0):
+        """
+        Prend une place si le nombre de requêtes en cours le permet.
+
+        Args:
+            share (float): Part de la limite accessible (priorité basse: moins de 1).
+
+        Returns:
+            bool: True si la requête est admise.
+        """
+        with self._condition:
+            # Les requêtes ASGI en attente passent avant
+            if not self._waiters and self.in_flight < self._capacity(share):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, share=1.0, timeout=0.0):
+        """
+        Prend une place, en attendant au plus timeout secondes qu'une se libère.
+
+        Returns:
+            bool: True si la requête est admise.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_flight < self._capacity(share), timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    async def acquire_async(self, timeout=0.0):
+        """
+        Prend une place sans bloquer la boucle d'événements (ASGI), en attendant
+        au plus timeout secondes qu'une se libère.
+
+        Les requêtes en attente sont servies dans l'ordre d'arrivée: release()
+        donne la place libérée à la plus ancienne et la réveille.
+
+        Returns:
+            bool: True si la requête est admise.
+        """
+        with self._condition:
+            if not self._waiters and self.in_flight < self._capacity(1.0):
+                self.in_flight += 1
+                return True
+            if timeout <= 0:
+                return False
+            waiter = _AsyncWaiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # Requête annulée (client déconnecté): rendre la place reçue entre-temps
+            with self._condition:
+                if waiter.granted:
+                    self.in_flight -= 1
+                    self._hand_off()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+        with self._condition:
+            # Place éventuellement donnée juste avant l'expiration du délai
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+            return waiter.granted
+
+    def _hand_off(self):
+        """Donne les places libres aux requêtes ASGI en attente (sous le verrou)."""
+        while self._waiters and self.in_flight < self._capacity(1.0):
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self.in_flight += 1
+            waiter.loop.call_soon_threadsafe(waiter.wake)
+
+    def release(self, latency, delay=0.0):
+        """
+        Libère une place et ajuste la limite d'après la latence de la requête.
+
+        Args:
+            latency (float): Durée de traitement de la requête admise (secondes).
+            delay (float): Attente de la requête avant son traitement (secondes).
+        """
+        with self._condition:
+            # Limite peu utilisée: la latence ne dit rien de la bonne limite
+            utilisee = self.in_flight * 2 >= self.limit
+            self.in_flight -= 1
+            now = time.monotonic()
+            if now - self._delay_at > DELAY_WINDOW:
+                self.delay = delay
+            else:
+                self.delay += SMOOTHING * (delay - self.delay)
+            self._delay_at = now
+            if self.latency is None:
+                self.latency = self.min_latency = latency
+            else:
+                self.latency += SMOOTHING * (latency - self.latency)
+            if now >= self._min_latency_reset:
+                self.min_latency = self.latency
+                self._min_latency_reset = now + MIN_LATENCY_WINDOW
+            else:
+                self.min_latency = min(self.min_latency, latency)
+
+            if utilisee:
+                gradient = min(max(self.tolerance * self.min_latency / max(self.latency, 1e-9), 0.5), 1.0)
+                # Marge de file d'attente: la limite croît tant que la latence le permet
+                cible = self.limit * gradient + math.sqrt(self.limit)
+                self.limit += SMOOTHING * (cible - self.limit)
+                self.limit = min(max(self.limit, self.minimum), self.maximum)
+            self._hand_off()
+            # Tous les threads en attente revérifient leur part: un seul réveillé
+            # pourrait être de priorité trop basse et laisser les autres attendre
+            self._condition.notify_all()
+
+
+def request_priority(request):
+    """
+    Retourne la priorité d'une requête: basse, normale ou haute.
+
+    Args:
+        request (HttpRequest): La requête.
+
+    Returns:
+        str: BASSE, NORMALE ou HAUTE.
+    """
+    for methods, pattern in settings.LOAD_SHEDDING_LOW_PRIORITY:
+        if request.method in methods and re.match(pattern, request.path_info):
+            return BASSE
+    return NORMALE if request.method in SAFE_METHODS else HAUTE
+
+
+def upstream_delay(request, now=None):
+    """
+    Retourne l'attente de la requête dans la file du proxy (en-tête X-Request-Start).
+
+    Formats acceptés: 't=<secondes>' (nginx ${msec}), ou un horodatage en
+    secondes, millisecondes ou microsecondes.
+
+    Args:
+        request (HttpRequest): La requête.
+        now (float): L'heure courante (time.time()).
+
+    Returns:
+        float: L'attente en secondes (0 si l'en-tête est absent ou invalide).
+    """
+    valeur = request.headers.get('X-Request-Start', '')
+    try:
+        debut = float(valeur.removeprefix('t='))
+    except ValueError:
+        return 0.0
+    # Secondes, millisecondes ou microsecondes depuis l'époque Unix
+    while debut > 1e11:
+        debut /= 1000
+    return max((now or time.time()) - debut, 0.0)
+
+
+def shed_response(priority):
+    """
+    Réponse 503 d'une requête délestée.
+
+    Args:
+        priority (str): La priorité de la requête.
+
+    Returns:
+        JsonResponse: La réponse, avec l'en-tête Retry-After.
+    """
+    response = JsonResponse(
+        {'detail': 'Service momentanément surchargé, réessayez plus tard.', 'priorite': priority},
+        status=503,
+    )
+    response.headers['Retry-After'] = str(settings.LOAD_SHEDDING_RETRY_AFTER)
+    return response
+
+
+class LoadSheddingMiddleware:
+    """
+    Délestage adaptatif des requêtes, en WSGI comme en ASGI (voir le docstring du module).
+
+    Placé au début de settings.MIDDLEWARE (après CorsMiddleware, pour que le
+    navigateur puisse lire les réponses 503). Retiré au démarrage si
+    LOAD_SHEDDING_ENABLED est faux.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.LOAD_SHEDDING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limiter = AdaptiveLimiter(
+            settings.LOAD_SHEDDING_INITIAL_LIMIT,
+            settings.LOAD_SHEDDING_MIN_LIMIT,
+            settings.LOAD_SHEDDING_MAX_LIMIT,
+            settings.LOAD_SHEDDING_TOLERANCE,
+        )
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def max_wait(self, priority):
+        """
+        Attente maximale d'une requête (secondes) pour une priorité: le temps
+        passé dans la file du proxy en est déduit.
+        """
+        if priority == BASSE:
+            return 0.0
+        if priority == HAUTE:
+            return settings.LOAD_SHEDDING_WRITE_MAX_WAIT_MS / 1000
+        return settings.LOAD_SHEDDING_MAX_WAIT_MS / 1000
+
+    def admit_low_priority(self, attente_amont=0.0):
+        """
+        Admet une requête de priorité basse sans attendre, si la charge le permet.
+
+        Args:
+            attente_amont (float): Attente de la requête dans la file du proxy (secondes).
+
+        Returns:
+            bool: True si la requête est admise (une place est prise).
+        """
+        cible = settings.LOAD_SHEDDING_TARGET_DELAY_MS / 1000
+        if attente_amont > cible or self.limiter.recent_delay > cible:
+            return False
+        return self.limiter.try_acquire(settings.LOAD_SHEDDING_LOW_PRIORITY_SHARE)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        priority = request_priority(request)
+        arrivee = time.monotonic()
+        attente_amont = upstream_delay(request)
+        if priority == BASSE:
+            admise = self.admit_low_priority(attente_amont)
+        else:
+            budget = self.max_wait(priority) - attente_amont
+            admise = budget > 0 and self.limiter.acquire(timeout=budget)
+        if not admise:
+            return shed_response(priority)
+        debut = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            self.limiter.release(time.monotonic() - debut, debut - arrivee + attente_amont)
+
+    async def __acall__(self, request):
+        priority = request_priority(request)
+        arrivee = time.monotonic()
+        attente_amont = upstream_delay(request)
+        if priority == BASSE:
+            admise = self.admit_low_priority(attente_amont)
+        else:
+            budget = self.max_wait(priority) - attente_amont
+            admise = budget > 0 and await self.limiter.acquire_async(timeout=budget)
+        if not admise:
+            return shed_response(priority)
+        debut = time.monotonic()
+        try:
+            return await self.get_response(request)
+        finally:
+            self.limiter.release(time.monotonic() - debut, debut - arrivee + attente_amont)
@@ -0,0 +1,183 @@
+"""
+Pool de connexions e-mail des workers Celery.
+
+django.core.mail.send_mail ouvre une connexion au serveur SMTP (TCP, TLS,
+authentification) pour chaque message et la ferme aussitôt. Lors d'une rafale de
+créations de tâches, l'établissement de la connexion coûte plus cher que l'envoi
+lui-même et sollicite inutilement le relais.
+
+Le pool garde les connexions ouvertes d'une tâche à l'autre, dans chaque processus:
+    - une connexion n'est utilisée que par un thread à la fois (pool threads);
+    - les connexions inactives depuis plus de EMAIL_POOL_IDLE_TIMEOUT secondes
+      sont fermées avant que le serveur ne les coupe, et au plus EMAIL_POOL_SIZE
+      connexions inactives sont conservées;
+    - un envoi interrompu par une déconnexion reprend une fois sur une
+      nouvelle connexion, au premier message non envoyé;
+    - après un fork (pool prefork), le processus enfant repart d'un pool vide:
+      les connexions du parent ne sont ni réutilisées ni fermées par l'enfant.
+
+Fonctionne avec tous les backends e-mail de Django (SMTP, console, locmem).
+"""
+import logging
+import os
+import smtplib
+import threading
+import time
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+# Erreurs indiquant que la connexion est perdue (l'envoi peut être refait)
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class EmailConnectionPool:
+    """
+    Pool de connexions au backend e-mail (settings.EMAIL_BACKEND), propre au processus.
+
+    Utilisation:
+        pool = EmailConnectionPool()
+        pool.send_messages([EmailMessage(...)])
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Connexions inactives: (connexion, instant de dernière utilisation)
+        self._idle = []
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Les sockets sont partagés avec le parent: les abandonner sans QUIT
+        self._lock = threading.Lock()
+        self._idle = []
+
+    def acquire(self):
+        """
+        Prend une connexion ouverte dans le pool, ou en ouvre une nouvelle.
+
+        Returns:
+            BaseEmailBackend: La connexion, réservée à l'appelant jusqu'à release() ou discard().
+        """
+        expired = []
+        connection = None
+        with self._lock:
+            if self._idle:
+                candidate, last_used = self._idle.pop()
+                if time.monotonic() - last_used < settings.EMAIL_POOL_IDLE_TIMEOUT:
+                    connection = candidate
+                else:
+                    # Les connexions restantes sont plus anciennes: toutes expirées
+                    expired = [candidate, *(other for other, _ in self._idle)]
+                    self._idle.clear()
+        for candidate in expired:
+            self.discard(candidate)
+        if connection is None:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+        return connection
+
+    def release(self, connection):
+        """
+        Rend une connexion en bon état au pool.
+
+        Args:
+            connection (BaseEmailBackend): La connexion obtenue par acquire().
+        """
+        with self._lock:
+            if len(self._idle) < settings.EMAIL_POOL_SIZE:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        """
+        Ferme une connexion sans la rendre au pool (expirée, en erreur ou en surnombre).
+
+        Args:
+            connection (BaseEmailBackend): La connexion à fermer.
+        """
+        try:
+            connection.close()
+        except Exception:
+            # Connexion déjà coupée par le serveur
+            logger.debug('Fermeture de la connexion e-mail impossible', exc_info=True)
+
+    def send_messages(self, messages):
+        """
+        Envoie des messages sur une connexion du pool.
+
+        Les messages sont remis au backend un par un, sur la même connexion: en
+        cas d'erreur, on sait lesquels sont partis. Si la connexion a été coupée
+        (délai du serveur, relais redémarré), l'envoi reprend une fois, sur une
+        nouvelle connexion, au premier message non envoyé: les messages déjà
+        partis ne sont pas renvoyés.
+
+        Args:
+            messages (list): Les EmailMessage à envoyer.
+
+        Returns:
+            int: Le nombre de messages envoyés.
+
+        Raises:
+            Exception: L'erreur du backend si l'envoi échoue (deux fois pour une
+                déconnexion). Son attribut sent_count donne le nombre de messages
+                en tête de liste remis au backend avant l'erreur.
+        """
+        sent = done = 0
+        retried = False
+        while done < len(messages):
+            connection = self.acquire()
+            try:
+                while done < len(messages):
+                    sent += connection.send_messages([messages[done]]) or 0
+                    done += 1
+            except RECONNECT_ERRORS as exc:
+                self.discard(connection)
+                if retried:
+                    exc.sent_count = done
+                    raise
+                retried = True
+                logger.info('Connexion e-mail perdue, nouvel essai sur une nouvelle connexion')
+                continue
+            except Exception as exc:
+                self.discard(connection)
+                exc.sent_count = done
+                raise
+            self.release(connection)
+        return sent
+
+    def close_all(self):
+        """Ferme toutes les connexions inactives (arrêt du worker)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self.discard(connection)
+
+
+pool = EmailConnectionPool()
+
+
+def send_mail(subject, message, from_email, recipient_list):
+    """
+    Équivalent de django.core.mail.send_mail utilisant le pool de connexions du processus.
+
+    Args:
+        subject (str): Le sujet.
+        message (str): Le corps du message (texte).
+        from_email (str): L'expéditeur.
+        recipient_list (list): Les destinataires.
+
+    Returns:
+        int: Le nombre de messages envoyés (0 ou 1).
+    """
+    return pool.send_messages([EmailMessage(subject, message, from_email, recipient_list)])
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_pool(**kwargs):
+    """Ferme proprement (QUIT) les connexions du processus à l'arrêt du worker."""
+    pool.close_all()
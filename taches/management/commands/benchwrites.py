@@ -0,0 +1,141 @@
+"""
+Commande de mesure du débit des créations de tâches sous écritures simultanées.
+
+Lance --ecrivains threads qui créent chacun --requetes tâches en même temps,
+par la vue de l'API (TacheViewSet, POST /api/taches/: validation, tâche et
+message outbox), sans puis avec la validation groupée (taches.groupcommit),
+et affiche pour chaque mode le débit, la latence (médiane, p99) et les
+erreurs « database is locked ».
+
+Les transactions SQLite sont ouvertes en mode IMMEDIATE
+(settings.SQLITE_TRANSACTION_MODE): en mode direct, une erreur « database is
+locked » signifie qu'une écriture a attendu le verrou plus longtemps que le
+délai de SQLite (5 s par défaut), et non un échec de montée de verrou.
+
+Les écritures vont dans les bases configurées, pour un utilisateur dédié
+supprimé à la fin (avec ses tâches et leurs messages outbox).
+
+Utilisation:
+    python manage.py benchwrites
+    python manage.py benchwrites --ecrivains 200 --requetes 10 --fenetre 5
+    python manage.py benchwrites --mode groupe
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.db.models import Max
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from taches.models import OutboxMessage
+from taches.sharding import shard_for
+from taches.views import TacheViewSet
+
+MODES = {'direct': False, 'groupe': True}
+
+
+def percentile(valeurs, p):
+    """Percentile p (0-100) d'une liste de valeurs, par le rang le plus proche."""
+    valeurs = sorted(valeurs)
+    if not valeurs:
+        return 0.0
+    return valeurs[min(int(len(valeurs) * p / 100), len(valeurs) - 1)]
+
+
+class Command(BaseCommand):
+    """
+    Mesure le débit des créations de tâches avec et sans validation groupée.
+    """
+    help = 'Mesure le débit des créations simultanées de tâches, avec et sans validation groupée.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ecrivains', type=int, default=200, help='Threads écrivains simultanés (défaut: 200).')
+        parser.add_argument('--requetes', type=int, default=5, help='Créations par écrivain (défaut: 5).')
+        parser.add_argument(
+            '--fenetre', type=float, default=None,
+            help='Fenêtre de regroupement en ms (défaut: GROUP_COMMIT_WINDOW_MS).',
+        )
+        parser.add_argument(
+            '--mode', choices=['direct', 'groupe', 'les-deux'], default='les-deux',
+            help='Mode(s) mesuré(s) (défaut: les deux).',
+        )
+
+    def handle(self, *args, **options):
+        fenetre = options['fenetre'] if options['fenetre'] is not None else settings.GROUP_COMMIT_WINDOW_MS
+        modes = list(MODES) if options['mode'] == 'les-deux' else [options['mode']]
+        user = get_user_model().objects.create_user(username=f'benchwrites-{time.time_ns()}')
+        using = shard_for(user.pk)
+        dernier_message = OutboxMessage.objects.using(using).aggregate(dernier=Max('id'))['dernier'] or 0
+        try:
+            for mode in modes:
+                with override_settings(GROUP_COMMIT_ENABLED=MODES[mode], GROUP_COMMIT_WINDOW_MS=fenetre):
+                    self.report(mode, self.run(user, options['ecrivains'], options['requetes']))
+        finally:
+            OutboxMessage.objects.using(using).filter(id__gt=dernier_message).delete()
+            # Supprime aussi ses tâches (taches.sharding.delete_user_taches)
+            user.delete()
+
+    def run(self, user, ecrivains, requetes):
+        """
+        Lance les écrivains et attend leur fin.
+
+        Returns:
+            dict: 'duree' (s), 'latences' (s, créations réussies), 'verrou' (erreurs
+                « database is locked ») et 'autres' (autres échecs).
+        """
+        view = TacheViewSet.as_view({'post': 'create'})
+        factory = APIRequestFactory()
+        depart = threading.Barrier(ecrivains + 1)
+        lock = threading.Lock()
+        resultat = {'latences': [], 'verrou': 0, 'autres': 0}
+
+        def ecrire(numero):
+            try:
+                depart.wait()
+                for index in range(requetes):
+                    request = factory.post('/api/taches/', {'titre': f'Bench {numero}-{index}'}, format='json')
+                    force_authenticate(request, user=user)
+                    debut = time.perf_counter()
+                    try:
+                        response = view(request)
+                        erreur = None if response.status_code == 201 else 'autres'
+                    except OperationalError as exc:
+                        erreur = 'verrou' if 'locked' in str(exc) else 'autres'
+                    except Exception:
+                        erreur = 'autres'
+                    duree = time.perf_counter() - debut
+                    with lock:
+                        if erreur:
+                            resultat[erreur] += 1
+                        else:
+                            resultat['latences'].append(duree)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=ecrire, args=(numero,)) for numero in range(ecrivains)]
+        for thread in threads:
+            thread.start()
+        depart.wait()
+        debut = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        resultat['duree'] = time.perf_counter() - debut
+        return resultat
+
+    def report(self, mode, resultat):
+        """Affiche les mesures d'un mode."""
+        latences = resultat['latences']
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{mode}:'))
+        self.stdout.write(
+            f"  {len(latences)} créations en {resultat['duree']:.2f} s "
+            f"({len(latences) / max(resultat['duree'], 1e-9):.0f} créations/s)"
+        )
+        self.stdout.write(
+            f'  latence médiane {percentile(latences, 50) * 1000:.1f} ms, '
+            f'p99 {percentile(latences, 99) * 1000:.1f} ms'
+        )
+        self.stdout.write(f"  erreurs: {resultat['verrou']} « database is locked », {resultat['autres']} autres")
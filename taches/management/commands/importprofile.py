@@ -0,0 +1,144 @@
+"""
+Commande de profilage des imports au démarrage des processus.
+
+Mesure, module par module, le temps d'import des points d'entrée du projet
+avec `python -X importtime`, dans un processus neuf pour chaque point d'entrée:
+    - web   : config.wsgi + chargement des URLs (ce que paie la première requête WSGI)
+    - asgi  : config.asgi + chargement des URLs asynchrones
+    - worker: application Celery + machinerie du worker + modules tasks.py
+
+Utilisation:
+    python manage.py importprofile
+    python manage.py importprofile --entry worker --top 40
+    python manage.py importprofile --entry web --min-ms 5
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Code exécuté dans le processus profilé pour chaque point d'entrée
+ENTRY_POINTS = {
+    'web': (
+        'import config.wsgi\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver().url_patterns\n'
+    ),
+    'asgi': (
+        'import config.asgi\n'
+        'from django.conf import settings\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver(settings.ASGI_URLCONF).url_patterns\n'
+    ),
+    'worker': (
+        'from config.celery import app\n'
+        'import celery.apps.worker\n'
+        'import django\n'
+        'django.setup()\n'
+        'app.loader.import_default_modules()\n'
+    ),
+}
+
+
+def parse_importtime(stderr):
+    """
+    Analyse la sortie de `python -X importtime`.
+
+    Args:
+        stderr (str): La sortie d'erreur du processus profilé.
+
+    Returns:
+        list: Tuples (module, temps propre en µs, temps cumulé en µs), dans l'ordre d'import.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def profile_entry_point(entry):
+    """
+    Importe un point d'entrée dans un processus neuf et mesure ses imports.
+
+    Args:
+        entry (str): Nom du point d'entrée (clé de ENTRY_POINTS).
+
+    Returns:
+        tuple: (durée totale du processus en secondes, liste des modules importés)
+
+    Raises:
+        CommandError: Si l'import du point d'entrée échoue.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', ENTRY_POINTS[entry]],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise CommandError(f"L'import du point d'entrée '{entry}' a échoué:\n{process.stderr[-2000:]}")
+    return elapsed, parse_importtime(process.stderr)
+
+
+class Command(BaseCommand):
+    """
+    Affiche le temps d'import par module et par paquet des points d'entrée.
+
+    Pour chaque point d'entrée: durée totale du processus, temps d'import total,
+    temps cumulé par paquet de premier niveau (django, celery, kombu, ...) et
+    modules les plus coûteux (temps propre, hors sous-imports).
+    """
+    help = "Profile le temps d'import des points d'entrée web, ASGI et worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entry', choices=[*ENTRY_POINTS, 'all'], default='all',
+            help="Point d'entrée à profiler (défaut: tous).",
+        )
+        parser.add_argument(
+            '--top', type=int, default=25,
+            help='Nombre de modules les plus coûteux à afficher.',
+        )
+        parser.add_argument(
+            '--min-ms', type=float, default=0.0,
+            help='Ignorer les modules dont le temps propre est inférieur à ce seuil.',
+        )
+
+    def handle(self, *args, **options):
+        entries = list(ENTRY_POINTS) if options['entry'] == 'all' else [options['entry']]
+        for entry in entries:
+            elapsed, modules = profile_entry_point(entry)
+            self.report(entry, elapsed, modules, options['top'], options['min_ms'])
+
+    def report(self, entry, elapsed, modules, top, min_ms):
+        """Affiche le rapport d'un point d'entrée."""
+        total_us = sum(self_us for _, self_us, _ in modules)
+        by_package = defaultdict(int)
+        for name, self_us, _ in modules:
+            by_package[name.split('.')[0]] += self_us
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {entry} =='))
+        self.stdout.write(
+            f'Processus: {elapsed * 1000:.0f} ms, imports: {total_us / 1000:.0f} ms, '
+            f'{len(modules)} modules'
+        )
+
+        self.stdout.write(self.style.MIGRATE_LABEL('Par paquet:'))
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:15]:
+            self.stdout.write(f'  {self_us / 1000:8.1f} ms  {package}')
+
+        self.stdout.write(self.style.MIGRATE_LABEL('Modules les plus coûteux (propre / cumulé):'))
+        costly = sorted(modules, key=lambda module: -module[1])
+        for name, self_us, cumulative_us in costly[:top]:
+            if self_us / 1000 < min_ms:
+                break
+            self.stdout.write(f'  {self_us / 1000:8.1f} ms {cumulative_us / 1000:8.1f} ms  {name}')
+        self.stdout.write('')
@@ -0,0 +1,278 @@
+"""
+Commande de test de charge de l'API, sans puis avec délestage adaptatif.
+
+Sert l'application dans un processus enfant (serveur WSGI wsgiref, un thread
+par requête, comme runserver), puis:
+    - mesure la capacité du serveur: --clients clients en boucle fermée
+      pendant --calibration secondes, délestage désactivé (requêtes par seconde);
+    - pour chaque mode (sans puis avec taches.loadshedding), envoie pendant
+      --duree secondes des requêtes en boucle ouverte, avec des arrivées de
+      Poisson au débit de --charge fois la capacité mesurée: les clients
+      n'attendent pas les réponses pour envoyer les requêtes suivantes, comme
+      les navigateurs d'un grand nombre d'utilisateurs.
+
+Les requêtes mêlent les trois priorités du délestage:
+    - 70 % de rafraîchissements de la liste (GET /api/taches/, priorité basse);
+    - 10 % de lectures d'une tâche (GET /api/taches/<id>/, priorité normale);
+    - 20 % de créations (POST /api/taches/, priorité haute).
+
+Affiche pour chaque mode et chaque priorité les requêtes admises, délestées
+(503) et en erreur, et la latence des requêtes admises (médiane, p99).
+
+Les requêtes sont faites pour un utilisateur dédié, supprimé à la fin avec ses
+tâches et leurs messages outbox. Le client et le serveur partagent la machine:
+la capacité mesurée en tient compte.
+
+Utilisation:
+    python manage.py loadtest
+    python manage.py loadtest --charge 3 --duree 20
+    python manage.py loadtest --capacite 150 --mode delestage
+"""
+import http.client
+import json
+import logging
+import os
+import random
+import signal
+import socketserver
+import threading
+import time
+from wsgiref import simple_server
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from taches.loadshedding import BASSE, HAUTE, NORMALE
+from taches.models import OutboxMessage, Tache
+from taches.sharding import shard_for
+
+from .benchwrites import percentile
+
+MODES = {'sans-delestage': False, 'delestage': True}
+
+# Répartition des requêtes: (probabilité cumulée, priorité)
+MELANGE = ((0.7, BASSE), (0.8, NORMALE), (1.0, HAUTE))
+
+# Délai maximal d'une requête côté client (secondes)
+CLIENT_TIMEOUT = 60
+
+# Tâches créées avant le test, lues par les requêtes de priorité normale
+TACHES_LUES = 20
+
+
+class _RequestHandler(simple_server.WSGIRequestHandler):
+    """Gestionnaire de requêtes wsgiref sans journal d'accès."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, simple_server.WSGIServer):
+    """Serveur WSGI, un thread par requête, file d'attente du socket large."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class Command(BaseCommand):
+    """
+    Compare la latence des requêtes admises en surcharge, sans et avec délestage.
+    """
+    help = "Test de charge de l'API en surcharge, sans et avec délestage adaptatif."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--charge', type=float, default=3.0,
+            help='Débit envoyé, en multiple de la capacité mesurée (défaut: 3).',
+        )
+        parser.add_argument('--duree', type=float, default=10.0, help='Durée de chaque mode en secondes (défaut: 10).')
+        parser.add_argument(
+            '--capacite', type=float, default=None,
+            help='Capacité du serveur en requêtes/s (défaut: mesurée).',
+        )
+        parser.add_argument(
+            '--clients', type=int, default=8,
+            help='Clients en boucle fermée de la mesure de capacité (défaut: 8).',
+        )
+        parser.add_argument(
+            '--calibration', type=float, default=3.0,
+            help='Durée de la mesure de capacité en secondes (défaut: 3).',
+        )
+        parser.add_argument(
+            '--mode', choices=[*MODES, 'les-deux'], default='les-deux',
+            help='Mode(s) mesuré(s) (défaut: les deux).',
+        )
+
+    def handle(self, *args, **options):
+        modes = list(MODES) if options['mode'] == 'les-deux' else [options['mode']]
+        user = get_user_model().objects.create_user(username=f'loadtest-{time.time_ns()}')
+        token = Token.objects.create(user=user).key
+        using = shard_for(user.pk)
+        dernier_message = OutboxMessage.objects.using(using).aggregate(dernier=Max('id'))['dernier'] or 0
+        ids = []
+        for index in range(TACHES_LUES):
+            tache = Tache(titre=f'Charge {index}', proprietaire=user)
+            tache.save(using=using)
+            ids.append(tache.pk)
+        try:
+            capacite = options['capacite']
+            if capacite is None:
+                with self.server(False) as port:
+                    capacite = self.calibrate(port, token, ids, options['clients'], options['calibration'])
+                self.stdout.write(f'Capacité mesurée: {capacite:.0f} requêtes/s')
+            debit = capacite * options['charge']
+            self.stdout.write(f"Débit envoyé: {debit:.0f} requêtes/s ({options['charge']:g}x) pendant {options['duree']:g} s")
+            for mode in modes:
+                with self.server(MODES[mode]) as port:
+                    self.report(mode, self.run(port, token, ids, debit, options['duree']))
+        finally:
+            OutboxMessage.objects.using(using).filter(id__gt=dernier_message).delete()
+            # Supprime aussi ses tâches (taches.sharding.delete_user_taches) et son token
+            user.delete()
+
+    def server(self, delestage):
+        """
+        Démarre le serveur dans un processus enfant, avec ou sans délestage.
+
+        Returns:
+            contextmanager: Donne le port d'écoute; le processus est arrêté à la sortie.
+        """
+        command = self
+
+        class _Server:
+            def __enter__(self):
+                with override_settings(LOAD_SHEDDING_ENABLED=delestage):
+                    # Middlewares chargés avec le réglage du mode
+                    application = WSGIHandler()
+                httpd = ThreadingServer(('127.0.0.1', 0), _RequestHandler)
+                httpd.set_app(application)
+                # Les connexions aux bases ne sont pas partagées avec l'enfant
+                connections.close_all()
+                self.pid = os.fork()
+                if self.pid == 0:  # pragma: no cover - processus enfant
+                    # Erreurs attendues en surcharge (« database is locked »...):
+                    # elles sont comptées par le client
+                    logging.disable(logging.CRITICAL)
+                    try:
+                        httpd.serve_forever()
+                    finally:
+                        os._exit(0)
+                httpd.socket.close()
+                return httpd.server_port
+
+            def __exit__(self, *exc):
+                os.kill(self.pid, signal.SIGTERM)
+                os.waitpid(self.pid, 0)
+                command.stdout.flush()
+
+        return _Server()
+
+    def request(self, port, token, ids, priorite):
+        """
+        Envoie une requête de la priorité donnée.
+
+        Returns:
+            tuple: (statut HTTP ou None si erreur réseau, durée en secondes).
+        """
+        headers = {
+            'Authorization': f'Token {token}',
+            'Content-Type': 'application/json',
+            # Arrivée de la requête, comme l'indiquerait le proxy (taches.loadshedding)
+            'X-Request-Start': f't={time.time():.3f}',
+        }
+        if priorite == BASSE:
+            methode, chemin, corps = 'GET', '/api/taches/?limit=20', None
+        elif priorite == NORMALE:
+            methode, chemin, corps = 'GET', f'/api/taches/{random.choice(ids)}/', None
+        else:
+            methode, chemin, corps = 'POST', '/api/taches/', json.dumps({'titre': 'Charge'})
+        debut = time.perf_counter()
+        connexion = http.client.HTTPConnection('127.0.0.1', port, timeout=CLIENT_TIMEOUT)
+        try:
+            connexion.request(methode, chemin, body=corps, headers=headers)
+            response = connexion.getresponse()
+            response.read()
+            statut = response.status
+        except OSError:
+            statut = None
+        finally:
+            connexion.close()
+        return statut, time.perf_counter() - debut
+
+    def calibrate(self, port, token, ids, clients, duree):
+        """
+        Mesure la capacité du serveur en boucle fermée.
+
+        Returns:
+            float: Les requêtes réussies par seconde.
+        """
+        fin = time.perf_counter() + duree
+        reussies = []
+
+        def client():
+            while time.perf_counter() < fin:
+                statut, _ = self.request(port, token, ids, self.priorite())
+                if statut is not None and statut < 400:
+                    reussies.append(1)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        debut = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(reussies) / (time.perf_counter() - debut)
+
+    def priorite(self):
+        tirage = random.random()
+        return next(priorite for seuil, priorite in MELANGE if tirage < seuil)
+
+    def run(self, port, token, ids, debit, duree):
+        """
+        Envoie des requêtes en boucle ouverte (arrivées de Poisson) et attend leurs réponses.
+
+        Returns:
+            dict: Priorité -> {'latences' (s, requêtes admises), 'delestees', 'erreurs'}.
+        """
+        resultat = {priorite: {'latences': [], 'delestees': 0, 'erreurs': 0} for _, priorite in MELANGE}
+        lock = threading.Lock()
+
+        def envoyer(priorite):
+            statut, duree_requete = self.request(port, token, ids, priorite)
+            with lock:
+                if statut == 503:
+                    resultat[priorite]['delestees'] += 1
+                elif statut is None or statut >= 400:
+                    resultat[priorite]['erreurs'] += 1
+                else:
+                    resultat[priorite]['latences'].append(duree_requete)
+
+        threads = []
+        debut = time.perf_counter()
+        prochaine = debut
+        while prochaine < debut + duree:
+            attente = prochaine - time.perf_counter()
+            if attente > 0:
+                time.sleep(attente)
+            thread = threading.Thread(target=envoyer, args=(self.priorite(),), daemon=True)
+            thread.start()
+            threads.append(thread)
+            prochaine += random.expovariate(debit)
+        for thread in threads:
+            thread.join()
+        return resultat
+
+    def report(self, mode, resultat):
+        """Affiche les mesures d'un mode."""
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{mode}:'))
+        for priorite, mesures in resultat.items():
+            latences = mesures['latences']
+            self.stdout.write(
+                f"  {priorite:<8} {len(latences):>5} admises, {mesures['delestees']:>5} délestées, "
+                f"{mesures['erreurs']:>4} erreurs; latence médiane {percentile(latences, 50) * 1000:7.1f} ms, "
+                f"p99 {percentile(latences, 99) * 1000:7.1f} ms"
+            )
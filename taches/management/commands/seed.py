@@ -0,0 +1,343 @@
+"""
+Commande de génération de données synthétiques en volume (benchmarks, tests de capacité).
+
+Crée des utilisateurs (avec leur token) puis des tâches réparties entre eux selon
+des distributions réalistes et réglables:
+    - tâches par utilisateur : loi de Pareto (--pareto), quelques utilisateurs très
+      actifs et une longue traîne d'utilisateurs avec peu de tâches; le total
+      est exactement --taches;
+    - tâches terminées       : proportion --part-terminees;
+    - descriptions           : vides pour --part-sans-description, sinon longueur
+      log-normale de moyenne --description-moyenne caractères;
+    - dates de création      : sur les --jours jours précédant --fin, uniformes
+      ou concentrées sur les jours récents (--repartition recente);
+    - ordre manuel           : celui de la génération (clés de rang consécutives).
+
+Les données sont déterministes: à paramètres et --graine égaux, les mêmes lignes
+sont produites (chaque utilisateur a son propre générateur, indépendant du
+découpage entre workers). Les utilisateurs et tokens sont créés par bulk_create;
+les tâches, bien plus nombreuses, par executemany d'une requête INSERT préparée
+(bulk_create compile chaque valeur en Python), par lots de --lot lignes dans de
+grandes transactions (--transaction lignes). Avec plusieurs shards
+(taches.sharding), chaque base est remplie par son propre processus (--workers):
+les fichiers SQLite ont chacun leur verrou d'écriture.
+
+Utilisation:
+    python manage.py seed --utilisateurs 100000 --taches 10000000 --graine 42
+    python manage.py seed --utilisateurs 50 --taches 2000 --mot-de-passe demo --prefixe demo
+    TACHE_SHARD_COUNT=4 python manage.py seed --taches 10000000 --workers 4
+"""
+import itertools
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from taches.models import Tache
+from taches.ranking import sequential_keys
+from taches.sharding import shard_for
+
+VERBES = (
+    'Acheter', 'Appeler', 'Écrire', 'Préparer', 'Relire', 'Réserver', 'Ranger', 'Payer',
+    'Envoyer', 'Réparer', 'Planifier', 'Vérifier', 'Nettoyer', 'Commander', 'Organiser',
+)
+OBJETS = (
+    'le rapport', 'les courses', 'la facture', 'le devis', 'le garage', 'la réunion',
+    'le billet de train', 'le dentiste', 'la présentation', 'le budget', 'les photos',
+    'le contrat', 'la déclaration', 'le jardin', 'les invitations', 'la newsletter',
+)
+MOTS = (
+    'avant', 'vendredi', 'penser', 'à', 'demander', 'confirmation', 'pour', 'le', 'la',
+    'les', 'client', 'équipe', 'dossier', 'urgent', 'prochaine', 'semaine', 'avec',
+    'relance', 'si', 'pas', 'de', 'réponse', 'version', 'finale', 'pièces', 'jointes',
+    'voir', 'notes', 'réunion', 'mardi', 'budget', 'validé', 'en', 'attente', 'retour',
+)
+# Texte de référence des descriptions: une description est une tranche de ce texte
+TEXTE = ' '.join(random.Random(0).choice(MOTS) for _ in range(20000))
+DESCRIPTION_MAX = 4000
+
+# Champs écrits par la génération (l'identifiant vient du compteur du shard)
+TACHE_FIELDS = ('titre', 'description', 'cree_le', 'termine', 'rang', 'proprietaire')
+
+
+def task_counts(users, total, alpha, seed):
+    """
+    Répartit `total` tâches entre `users` utilisateurs selon une loi de Pareto.
+
+    Args:
+        users (int): Le nombre d'utilisateurs.
+        total (int): Le nombre total de tâches.
+        alpha (float): Le paramètre de la loi (plus il est petit, plus la traîne est longue).
+        seed (int): La graine.
+
+    Returns:
+        list: Le nombre de tâches de chaque utilisateur (somme exactement égale à total).
+    """
+    rng = random.Random(seed)
+    weights = [rng.paretovariate(alpha) for _ in range(users)]
+    scale = total / sum(weights)
+    shares = [weight * scale for weight in weights]
+    counts = [int(share) for share in shares]
+    # Méthode du plus fort reste: le total est exact
+    remainder = total - sum(counts)
+    for index in sorted(range(users), key=lambda i: counts[i] - shares[i])[:remainder]:
+        counts[index] += 1
+    return counts
+
+
+def generate_taches(index, user_id, count, options):
+    """
+    Génère les tâches d'un utilisateur, toujours identiques pour un même index et une même graine.
+
+    Args:
+        index (int): Le rang de l'utilisateur dans la génération.
+        user_id (int): L'identifiant de l'utilisateur.
+        count (int): Le nombre de tâches.
+        options (dict): Les options de la commande.
+
+    Yields:
+        tuple: Les valeurs des champs TACHE_FIELDS d'une tâche.
+    """
+    rng = random.Random((options['graine'] << 32) | index)
+    fin = options['fin']
+    span = options['jours'] * 86400
+    recente = options['repartition'] == 'recente'
+    mu = math.log(max(options['description_moyenne'], 1)) - 0.5  # sigma = 1
+    for numero, rang in enumerate(sequential_keys(count)):
+        description = ''
+        if rng.random() >= options['part_sans_description']:
+            length = min(int(rng.lognormvariate(mu, 1.0)), DESCRIPTION_MAX)
+            start = rng.randrange(len(TEXTE) - length)
+            description = TEXTE[start:start + length]
+        age = min(rng.expovariate(5 / span), span) if recente else rng.random() * span
+        yield (
+            f'{rng.choice(VERBES)} {rng.choice(OBJETS)} ({numero + 1})',
+            description,
+            fin - timedelta(seconds=age),
+            rng.random() < options['part_terminees'],
+            rang,
+            user_id,
+        )
+
+
+def fast_writes(alias):
+    """
+    Allège la durabilité de la connexion de génération (SQLite uniquement).
+
+    synchronous=OFF: pas de fsync à chaque transaction. Une coupure de courant
+    pendant la génération peut corrompre la base, ce qui est acceptable pour des
+    données jetables; les autres connexions ne sont pas concernées. Sans effet
+    dans une transaction déjà ouverte (SQLite le refuse), par exemple un test.
+    """
+    connection = connections[alias]
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+
+
+def insert_sql(connection):
+    """
+    Requête INSERT d'une tâche (champs TACHE_FIELDS), pour executemany.
+
+    Args:
+        connection: La connexion Django du shard.
+
+    Returns:
+        str: La requête, avec des paramètres %s.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(Tache._meta.get_field(name).column) for name in TACHE_FIELDS)
+    placeholders = ', '.join(['%s'] * len(TACHE_FIELDS))
+    return f'INSERT INTO {quote(Tache._meta.db_table)} ({columns}) VALUES ({placeholders})'
+
+
+def _batches(users, options, adapt_datetime):
+    batch = []
+    for index, user_id, count in users:
+        for titre, description, cree_le, termine, rang, proprietaire_id in generate_taches(index, user_id, count, options):
+            batch.append((titre, description, adapt_datetime(cree_le), termine, rang, proprietaire_id))
+            if len(batch) == options['lot']:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def seed_shard(alias, users, options):
+    """
+    Remplit un shard avec les tâches de ses utilisateurs.
+
+    Les lignes sont insérées par lots (executemany d'une requête préparée) dans
+    des transactions de --transaction lignes.
+
+    Args:
+        alias (str): Le shard.
+        users (list): Les triplets (index, identifiant, nombre de tâches).
+        options (dict): Les options de la commande.
+
+    Returns:
+        tuple: (alias, nombre de tâches créées, durée en secondes).
+    """
+    start = time.perf_counter()
+    connection = connections[alias]
+    fast_writes(alias)
+    sql = insert_sql(connection)
+    batches = _batches(users, options, connection.ops.adapt_datetimefield_value)
+    per_transaction = max(options['transaction'] // options['lot'], 1)
+    created = 0
+    while True:
+        written = 0
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            for batch in itertools.islice(batches, per_transaction):
+                cursor.executemany(sql, batch)
+                created += len(batch)
+                written += 1
+        if written < per_transaction:
+            break
+    return alias, created, time.perf_counter() - start
+
+
+def _seed_shard_in_worker(alias, users, options):
+    # Processus enfant (fork): le parent a fermé ses connexions avant le fork
+    try:
+        return seed_shard(alias, users, options)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """
+    Génère des utilisateurs, leurs tokens et des millions de tâches.
+
+    Les utilisateurs et tokens sont créés dans 'default', puis les tâches de
+    chaque shard par un processus dédié (ou dans le processus courant avec
+    --workers 1, ou si une base est en mémoire).
+    """
+    help = 'Génère des utilisateurs, tokens et tâches synthétiques en volume (données déterministes).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--utilisateurs', type=int, default=1000, help='Nombre d\'utilisateurs (défaut: 1000).')
+        parser.add_argument('--taches', type=int, default=100000, help='Nombre total de tâches (défaut: 100000).')
+        parser.add_argument('--graine', type=int, default=0, help='Graine des générateurs aléatoires.')
+        parser.add_argument(
+            '--pareto', type=float, default=1.2,
+            help='Paramètre de la loi de Pareto des tâches par utilisateur (défaut: 1.2).',
+        )
+        parser.add_argument('--part-terminees', type=float, default=0.3, help='Proportion de tâches terminées.')
+        parser.add_argument('--part-sans-description', type=float, default=0.2, help='Proportion de descriptions vides.')
+        parser.add_argument(
+            '--description-moyenne', type=int, default=120,
+            help='Longueur moyenne des descriptions non vides (caractères).',
+        )
+        parser.add_argument('--jours', type=int, default=365, help='Étendue des dates de création (jours).')
+        parser.add_argument(
+            '--repartition', choices=['uniforme', 'recente'], default='uniforme',
+            help='Dates de création uniformes, ou concentrées sur les jours récents.',
+        )
+        parser.add_argument(
+            '--fin', type=datetime.fromisoformat, default=None,
+            help='Date de la tâche la plus récente (AAAA-MM-JJ, défaut: aujourd\'hui à minuit UTC).',
+        )
+        parser.add_argument('--prefixe', default='seed', help='Préfixe des noms d\'utilisateur (défaut: seed).')
+        parser.add_argument(
+            '--mot-de-passe', default=None,
+            help='Mot de passe commun des utilisateurs (défaut: aucun, connexion par token seulement).',
+        )
+        parser.add_argument('--lot', type=int, default=5000, help="Lignes par lot d'insertion.")
+        parser.add_argument('--transaction', type=int, default=500000, help='Lignes par transaction.')
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Processus d\'écriture des tâches (défaut: un par shard).',
+        )
+
+    def handle(self, *args, **options):
+        users, total = options['utilisateurs'], options['taches']
+        if users < 1 or total < 0:
+            raise CommandError('Il faut au moins un utilisateur et un nombre de tâches positif.')
+        if options['fin'] is None:
+            options['fin'] = datetime.combine(timezone.now().date(), dt_time(), tzinfo=dt_timezone.utc)
+        elif timezone.is_naive(options['fin']):
+            options['fin'] = options['fin'].replace(tzinfo=dt_timezone.utc)
+        prefixe = options['prefixe']
+        User = get_user_model()
+        if User.objects.filter(username__startswith=prefixe).exists():
+            raise CommandError(f'Des utilisateurs « {prefixe}* » existent déjà: choisir un autre --prefixe.')
+
+        start = time.perf_counter()
+        user_ids = self.create_users(users, options)
+        self.stdout.write(f'{users} utilisateurs et tokens créés en {time.perf_counter() - start:.1f} s')
+
+        counts = task_counts(users, total, options['pareto'], options['graine'])
+        plan = {alias: [] for alias in settings.TACHE_SHARDS}
+        for index, (user_id, count) in enumerate(zip(user_ids, counts)):
+            if count:
+                plan[shard_for(user_id)].append((index, user_id, count))
+        jobs = [(alias, shard_users, options) for alias, shard_users in plan.items() if shard_users]
+
+        start = time.perf_counter()
+        for alias, created, duration in self.run(jobs, options['workers']):
+            self.stdout.write(f'  {alias}: {created} tâches en {duration:.1f} s')
+        duration = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} tâches créées en {duration:.1f} s ({total / max(duration, 1e-9):.0f} tâches/s), '
+            f'max {max(counts)} par utilisateur, médiane {sorted(counts)[users // 2]}'
+        ))
+
+    def create_users(self, users, options):
+        """
+        Crée les utilisateurs et leurs tokens dans 'default', par lots.
+
+        Returns:
+            list: Les identifiants des utilisateurs, dans l'ordre de génération.
+        """
+        User = get_user_model()
+        rng = random.Random(options['graine'])
+        # Un seul hachage pour tous les utilisateurs: PBKDF2 coûte ~0,5 s par appel
+        password = make_password(options['mot_de_passe']) if options['mot_de_passe'] else UNUSABLE_PASSWORD_PREFIX
+        prefixe, lot = options['prefixe'], options['lot']
+        user_ids = []
+        fast_writes(DEFAULT_DB_ALIAS)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            for first in range(0, users, lot):
+                created = User.objects.bulk_create(
+                    User(username=f'{prefixe}{index}', password=password)
+                    for index in range(first, min(first + lot, users))
+                )
+                ids = [user.pk for user in created]
+                Token.objects.bulk_create(
+                    Token(key=f'{rng.getrandbits(160):040x}', user_id=user_id) for user_id in ids
+                )
+                user_ids.extend(ids)
+        return user_ids
+
+    def run(self, jobs, workers):
+        """
+        Remplit les shards, en parallèle si possible.
+
+        Args:
+            jobs (list): Les arguments de seed_shard, un triplet par shard.
+            workers (int): Le nombre de processus (défaut: un par shard).
+
+        Returns:
+            list: Les résultats de seed_shard.
+        """
+        workers = min(workers or len(jobs), len(jobs))
+        # Une base en mémoire (tests) n'est pas partagée avec des processus enfants
+        in_memory = any(connections[alias].is_in_memory_db() for alias, _, _ in jobs)
+        if workers <= 1 or in_memory:
+            return [seed_shard(*job) for job in jobs]
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(_seed_shard_in_worker, *job) for job in jobs]
+            return [future.result() for future in futures]
@@ -0,0 +1,550 @@
+"""
+Commande de service de l'application en production: un maître et des workers préforkés.
+
+Le processus maître ouvre le socket d'écoute, charge l'application (settings,
+modèles, URLs, middlewares, tâches Celery, imports différés des vues) puis
+crée les workers par fork: le code chargé est partagé en copie sur écriture
+entre tous les workers (gc.freeze() évite que le ramasse-miettes ne recopie
+les pages des objets préchargés).
+
+Chaque worker:
+    - préchauffe ses connexions (bases de settings.TACHE_SHARDS, caches Django,
+      clients Redis) et ne signale qu'ensuite au maître qu'il est prêt à
+      accepter des connexions (préchauffage réessayé jusqu'à --ready-timeout);
+    - sert les requêtes sur le socket partagé: 'sync' (WSGI, une requête à la
+      fois, wsgiref) ou 'asgi' (vues asynchrones, uvicorn, dépendance optionnelle);
+    - se termine après --max-requests requêtes (plus un décalage aléatoire
+      jusqu'à --max-requests-jitter, pour ne pas recycler tous les workers en
+      même temps); le maître le remplace.
+
+Signaux du maître:
+    - TERM, INT: arrêt gracieux, les requêtes en cours se terminent (au plus
+      --graceful-timeout secondes);
+    - HUP      : remplacement gracieux des workers, sans interruption du service:
+      les nouveaux workers sont créés et préchauffés, puis les anciens terminent
+      leurs requêtes et s'arrêtent;
+    - USR2     : rechargement du code: après un `manage.py check` réussi, le
+      maître se ré-exécute en conservant le socket d'écoute, recharge
+      l'application, puis remplace les anciens workers comme pour HUP.
+
+Les connexions préchauffées ne sont conservées d'une requête à l'autre que si
+CONN_MAX_AGE est positif (DB_CONN_MAX_AGE dans les settings).
+
+Utilisation:
+    python manage.py serve
+    python manage.py serve --bind 0.0.0.0:8000 --workers 4 --max-requests 1000
+    python manage.py serve --worker-type asgi
+"""
+import gc
+import importlib
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from wsgiref import simple_server
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+try:
+    import uvicorn
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    uvicorn = None
+
+logger = logging.getLogger(__name__)
+
+WORKER_TYPES = ('sync', 'asgi')
+
+# Variables d'environnement transmises au maître ré-exécuté (USR2)
+LISTEN_FD_ENV = 'SERVE_LISTEN_FD'
+PREVIOUS_WORKERS_ENV = 'SERVE_PREVIOUS_WORKERS'
+
+# Modules importés à la demande par les vues (voir la commande importprofile),
+# chargés une fois dans le maître plutôt qu'à la première requête de chaque worker
+DEFERRED_IMPORTS = {
+    'sync': ('celery.result',),
+    'asgi': ('celery.result', 'redis.asyncio'),
+}
+
+# Code de sortie d'un worker qui n'a pas pu préchauffer ses connexions
+WARMUP_FAILED = 3
+
+# Signaux traités par la boucle du maître
+MASTER_SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR2, signal.SIGCHLD)
+
+
+def parse_bind(bind):
+    """
+    Analyse une adresse d'écoute.
+
+    Args:
+        bind (str): 'hôte:port', ':port', 'port' ou '[ipv6]:port'.
+
+    Returns:
+        tuple: (hôte, port).
+
+    Raises:
+        CommandError: Si l'adresse est invalide.
+    """
+    host, _, port = bind.rpartition(':')
+    try:
+        port = int(port)
+    except ValueError:
+        raise CommandError(f"Adresse d'écoute invalide: '{bind}' (attendu 'hôte:port').")
+    if not 0 <= port <= 65535:
+        raise CommandError(f"Port invalide: {port}.")
+    return host.strip('[]') or '0.0.0.0', port
+
+
+def create_socket(host, port, backlog):
+    """
+    Ouvre le socket d'écoute partagé par les workers.
+
+    Le socket est non bloquant: quand plusieurs workers sont réveillés pour la
+    même connexion, ceux qui ne l'obtiennent pas retournent à leur attente au
+    lieu de rester bloqués dans accept().
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind((host, port))
+    except OSError as exc:
+        sock.close()
+        raise CommandError(f"Écoute sur {host}:{port} impossible: {exc}")
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def load_application(worker_type):
+    """
+    Charge l'application dans le maître, avant la création des workers.
+
+    Args:
+        worker_type (str): 'sync' (WSGI) ou 'asgi'.
+
+    Returns:
+        L'application WSGI ou ASGI, middlewares et URLs chargés.
+    """
+    from celery import current_app
+    from django.urls import get_resolver
+
+    if worker_type == 'asgi':
+        from config.asgi import application
+
+        get_resolver(settings.ASGI_URLCONF).url_patterns
+    else:
+        from config.wsgi import application
+    get_resolver().url_patterns
+    current_app.loader.import_default_modules()
+    for module in DEFERRED_IMPORTS[worker_type]:
+        importlib.import_module(module)
+    return application
+
+
+def warm_up(timeout):
+    """
+    Préchauffe les connexions du worker avant qu'il n'accepte des requêtes.
+
+    Les bases et les caches doivent répondre: le préchauffage est réessayé
+    jusqu'à `timeout` secondes. Les clients Redis (limitation de débit, résultats
+    Celery) sont seulement ouverts: l'API fonctionne sans eux (fail-open).
+
+    Args:
+        timeout (float): Le délai maximal en secondes.
+
+    Raises:
+        Exception: La dernière erreur si les connexions ne sont pas prêtes à temps.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            for alias in settings.TACHE_SHARDS:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            for alias in settings.CACHES:
+                caches[alias].get('serve:warmup')
+            break
+        except Exception as exc:
+            if time.monotonic() >= deadline:
+                raise
+            logger.warning('Worker %s: connexions indisponibles (%s), nouvelle tentative', os.getpid(), exc)
+            connections.close_all()
+            time.sleep(0.5)
+
+    from celery import current_app
+
+    from taches.throttling import get_throttle_redis
+
+    for ping in (get_throttle_redis().ping, lambda: current_app.backend.client.ping()):
+        try:
+            ping()
+        except Exception as exc:
+            logger.warning('Worker %s: Redis indisponible (%s)', os.getpid(), exc)
+
+
+class _RequestHandler(simple_server.WSGIRequestHandler):
+    """Gestionnaire de requêtes wsgiref, journal d'accès via logging."""
+
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+
+class SyncServer(simple_server.WSGIServer):
+    """
+    Serveur WSGI d'un worker 'sync' sur le socket d'écoute hérité du maître.
+
+    Une requête à la fois; handle_request() rend la main toutes les secondes
+    pour vérifier l'arrêt demandé et le nombre de requêtes servies.
+    """
+    timeout = 1.0
+
+    def __init__(self, sock, application):
+        socketserver.BaseServer.__init__(self, sock.getsockname()[:2], _RequestHandler)
+        self.socket = sock
+        host, self.server_port = sock.getsockname()[:2]
+        self.server_name = socket.getfqdn(host)
+        self.setup_environ()
+        self.set_app(application)
+        self.served = 0
+
+    def server_close(self):
+        # Le socket d'écoute appartient au maître
+        pass
+
+    def finish_request(self, request, client_address):
+        try:
+            super().finish_request(request, client_address)
+        finally:
+            self.served += 1
+
+
+class Worker:
+    """Un worker vu du maître: identifiant, génération et état de préparation."""
+
+    def __init__(self, pid, generation, ready=False):
+        self.pid = pid
+        self.generation = generation
+        self.ready = ready
+        self.stopping = False
+
+
+class Arbiter:
+    """
+    Processus maître: crée, surveille, recycle et remplace les workers.
+
+    Args:
+        sock (socket.socket): Le socket d'écoute.
+        application: L'application préchargée.
+        options (dict): Les options de la commande.
+        log (callable): Écrit un message de la commande.
+    """
+
+    def __init__(self, sock, application, options, log):
+        self.sock = sock
+        self.application = application
+        self.options = options
+        self.log = log
+        self.workers = {}
+        self.generation = 0
+        self.stopping = False
+        self.stop_deadline = None
+        self.signals = []
+        self.spawn_after = 0.0
+        self.ready_r, self.ready_w = os.pipe()
+        self.wakeup_r, self.wakeup_w = os.pipe()
+        for fd in (self.ready_r, self.wakeup_r, self.wakeup_w):
+            os.set_blocking(fd, False)
+        # Workers d'un maître précédent (USR2): remplacés dès que les nouveaux sont prêts
+        for pid in filter(None, os.environ.pop(PREVIOUS_WORKERS_ENV, '').split(',')):
+            self.workers[int(pid)] = Worker(int(pid), generation=-1, ready=True)
+
+    # Boucle du maître
+
+    def run(self):
+        """Exécute la boucle du maître jusqu'à l'arrêt de tous les workers."""
+        signal.set_wakeup_fd(self.wakeup_w)
+        for signum in MASTER_SIGNALS:
+            signal.signal(signum, self._on_signal)
+        while True:
+            self.reap()
+            self.handle_signals()
+            if self.stopping:
+                if not self.workers:
+                    break
+                if time.monotonic() >= self.stop_deadline:
+                    self.kill_all(signal.SIGKILL)
+            else:
+                self.spawn_missing()
+                self.retire_previous_generations()
+            self.wait(1.0)
+        self.log('Arrêt terminé.')
+
+    def _on_signal(self, signum, frame):
+        self.signals.append(signum)
+
+    def handle_signals(self):
+        while self.signals:
+            signum = self.signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT) and not self.stopping:
+                self.log(f'Arrêt gracieux ({signal.Signals(signum).name}).')
+                self.stopping = True
+                self.stop_deadline = time.monotonic() + self.options['graceful_timeout']
+                self.kill_all(signal.SIGTERM)
+            elif signum == signal.SIGHUP and not self.stopping:
+                self.generation += 1
+                self.log(f'Remplacement gracieux des workers (génération {self.generation}).')
+            elif signum == signal.SIGUSR2 and not self.stopping:
+                self.reexec()
+
+    def wait(self, timeout):
+        try:
+            readable, _, _ = select.select([self.ready_r, self.wakeup_r], [], [], timeout)
+        except InterruptedError:
+            return
+        if self.wakeup_r in readable:
+            while _read(self.wakeup_r):
+                pass
+        if self.ready_r in readable:
+            data = _read(self.ready_r)
+            while data:
+                for (pid,) in struct.iter_unpack('!I', data):
+                    worker = self.workers.get(pid)
+                    if worker is not None:
+                        worker.ready = True
+                        self.log(f'Worker {pid} prêt (génération {worker.generation}).')
+                data = _read(self.ready_r)
+
+    def reap(self):
+        """Récupère les workers terminés."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if not worker.ready:
+                # Préchauffage impossible ou erreur au démarrage: pas de relance en boucle
+                self.spawn_after = time.monotonic() + 1.0
+                self.log(f'Worker {pid} arrêté avant d\'être prêt (code {code}).')
+            elif not (worker.stopping or self.stopping):
+                self.log(f'Worker {pid} recyclé (code {code}).')
+
+    def current_workers(self):
+        return [worker for worker in self.workers.values() if worker.generation == self.generation]
+
+    def spawn_missing(self):
+        if time.monotonic() < self.spawn_after:
+            return
+        for _ in range(self.options['workers'] - len(self.current_workers())):
+            self.spawn()
+
+    def retire_previous_generations(self):
+        """Arrête les anciens workers dès que la génération courante est au complet et prête."""
+        current = self.current_workers()
+        if len(current) < self.options['workers'] or not all(worker.ready for worker in current):
+            return
+        for worker in self.workers.values():
+            if worker.generation != self.generation and not worker.stopping:
+                worker.stopping = True
+                _kill(worker.pid, signal.SIGTERM)
+
+    def kill_all(self, signum):
+        for worker in self.workers.values():
+            worker.stopping = True
+            _kill(worker.pid, signum)
+
+    def reexec(self):
+        """Ré-exécute le maître (nouveau code) en conservant le socket et les workers actuels."""
+        check = subprocess.run(
+            [sys.executable, sys.argv[0], 'check'], capture_output=True, text=True,
+        )
+        if check.returncode != 0:
+            self.log(f'Rechargement annulé, `check` a échoué:\n{check.stderr[-2000:]}')
+            return
+        self.log('Rechargement du code: ré-exécution du maître.')
+        self.sock.set_inheritable(True)
+        os.environ[LISTEN_FD_ENV] = str(self.sock.fileno())
+        os.environ[PREVIOUS_WORKERS_ENV] = ','.join(map(str, self.workers))
+        signal.set_wakeup_fd(-1)
+        for signum in MASTER_SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, sys.orig_argv)
+
+    # Workers
+
+    def spawn(self):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = Worker(pid, self.generation)
+            return
+        code = 1
+        try:
+            code = self.run_worker()
+        except BaseException:
+            logger.exception('Worker %s: erreur fatale', os.getpid())
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Pas de nettoyage du maître (atexit, finally) dans le worker
+            os._exit(code)
+
+    def run_worker(self):
+        """Corps d'un worker: préchauffage, signal de préparation, service des requêtes."""
+        signal.set_wakeup_fd(-1)
+        for signum in MASTER_SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        for signum in (signal.SIGHUP, signal.SIGUSR2):
+            signal.signal(signum, signal.SIG_IGN)
+        for fd in (self.ready_r, self.wakeup_r, self.wakeup_w):
+            os.close(fd)
+        master = os.getppid()
+        try:
+            warm_up(self.options['ready_timeout'])
+        except Exception as exc:
+            logger.error('Worker %s: préchauffage impossible: %s', os.getpid(), exc)
+            return WARMUP_FAILED
+        max_requests = self.options['max_requests']
+        if max_requests:
+            max_requests += random.randint(0, self.options['max_requests_jitter'])
+        _watch_master(master)
+        os.write(self.ready_w, struct.pack('!I', os.getpid()))
+        os.close(self.ready_w)
+        if self.options['worker_type'] == 'asgi':
+            return self.serve_asgi(max_requests)
+        return self.serve_sync(max_requests)
+
+    def serve_sync(self, max_requests):
+        server = SyncServer(self.sock, self.application)
+        stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda signum, frame: stopping.set())
+        while not stopping.is_set() and not (max_requests and server.served >= max_requests):
+            server.handle_request()
+        connections.close_all()
+        return 0
+
+    def serve_asgi(self, max_requests):
+        config = uvicorn.Config(
+            self.application, lifespan='off', interface='asgi3', log_config=None, access_log=False,
+            limit_max_requests=max_requests or None,
+            timeout_graceful_shutdown=self.options['graceful_timeout'],
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+        return 0
+
+
+def _read(fd):
+    try:
+        return os.read(fd, 4096)
+    except BlockingIOError:
+        return b''
+
+
+def _kill(pid, signum):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def _watch_master(master):
+    """Arrête gracieusement le worker si son maître disparaît (ré-attaché à init)."""
+    def watch():
+        while os.getppid() == master:
+            time.sleep(1.0)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=watch, name='serve-master-watch', daemon=True).start()
+
+
+class Command(BaseCommand):
+    """
+    Sert l'application avec un maître et des workers préforkés, préchargés et recyclés.
+
+    Les valeurs par défaut des options viennent des settings SERVE_*.
+    """
+    help = "Sert l'application en production avec des workers préforkés (sync ou ASGI)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bind', default=settings.SERVE_BIND,
+            help="Adresse d'écoute 'hôte:port' (port 0: port libre choisi par le système).",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.SERVE_WORKERS,
+            help='Nombre de workers.',
+        )
+        parser.add_argument(
+            '--worker-type', choices=WORKER_TYPES, default=settings.SERVE_WORKER_TYPE,
+            help="Type de worker: 'sync' (WSGI) ou 'asgi' (uvicorn, vues asynchrones).",
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=settings.SERVE_MAX_REQUESTS,
+            help='Requêtes servies avant le recyclage d\'un worker (0: jamais).',
+        )
+        parser.add_argument(
+            '--max-requests-jitter', type=int, default=settings.SERVE_MAX_REQUESTS_JITTER,
+            help='Décalage aléatoire maximal ajouté à --max-requests pour chaque worker.',
+        )
+        parser.add_argument(
+            '--graceful-timeout', type=float, default=settings.SERVE_GRACEFUL_TIMEOUT,
+            help="Délai laissé aux requêtes en cours à l'arrêt d'un worker (secondes).",
+        )
+        parser.add_argument(
+            '--ready-timeout', type=float, default=settings.SERVE_READY_TIMEOUT,
+            help='Délai maximal du préchauffage des connexions d\'un worker (secondes).',
+        )
+        parser.add_argument(
+            '--backlog', type=int, default=2048,
+            help="Taille de la file d'attente des connexions du socket d'écoute.",
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('Il faut au moins un worker.')
+        if options['worker_type'] == 'asgi' and uvicorn is None:
+            raise CommandError("Les workers 'asgi' nécessitent uvicorn (pip install uvicorn).")
+        inherited = os.environ.pop(LISTEN_FD_ENV, None)
+        if inherited:
+            sock = socket.socket(fileno=int(inherited))
+            sock.set_inheritable(False)
+        else:
+            sock = create_socket(*parse_bind(options['bind']), options['backlog'])
+
+        start = time.perf_counter()
+        application = load_application(options['worker_type'])
+        # Aucune connexion ouverte par le maître ne doit être partagée par les workers
+        connections.close_all()
+        gc.collect()
+        gc.freeze()
+        host, port = sock.getsockname()[:2]
+        self.log(
+            f"Application chargée en {time.perf_counter() - start:.2f} s. Écoute sur http://{host}:{port} "
+            f"({options['workers']} workers {options['worker_type']}, maître {os.getpid()})."
+        )
+        Arbiter(sock, application, options, self.log).run()
+
+    def log(self, message):
+        self.stdout.write(message)
+        self.stdout.flush()
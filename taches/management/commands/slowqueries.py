@@ -0,0 +1,77 @@
+"""
+Commande de rapport des requêtes SQL lentes (voir taches.slowqueries).
+
+Affiche les empreintes de requêtes les plus coûteuses enregistrées par les
+processus web et les workers: nombre d'exécutions lentes, durées cumulée,
+moyenne et maximale, sites d'appel, et plan d'exécution capturé.
+
+Utilisation:
+    python manage.py slowqueries
+    python manage.py slowqueries --tri max --limite 5 --plan
+    python manage.py slowqueries --reset
+"""
+import redis
+from django.core.management.base import BaseCommand, CommandError
+
+from taches.slowqueries import reset_slow_queries, slow_query_report
+
+
+class Command(BaseCommand):
+    """
+    Affiche les pires requêtes lentes, agrégées par empreinte de SQL normalisé.
+
+    Pour chaque empreinte: statistiques de durée, base, première et dernière
+    occurrence, SQL normalisé, sites d'appel par nombre d'occurrences et, avec
+    --plan, le plan EXPLAIN et la requête exacte de l'exécution la plus lente.
+    """
+    help = 'Affiche les requêtes SQL lentes agrégées par empreinte.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limite', type=int, default=20,
+            help="Nombre d'empreintes à afficher.",
+        )
+        parser.add_argument(
+            '--tri', choices=['total', 'max', 'moyenne', 'nombre'], default='total',
+            help='Critère de tri (défaut: durée cumulée).',
+        )
+        parser.add_argument(
+            '--plan', action='store_true',
+            help="Afficher le plan d'exécution et la requête la plus lente.",
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Supprimer les agrégats enregistrés.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['reset']:
+                self.stdout.write(f'{reset_slow_queries()} empreintes supprimées.')
+                return
+            entries = slow_query_report(options['limite'], options['tri'])
+        except redis.RedisError as exc:
+            raise CommandError(f'Redis des requêtes lentes injoignable: {exc}')
+        if not entries:
+            self.stdout.write('Aucune requête lente enregistrée.')
+            return
+        for rang, entry in enumerate(entries, 1):
+            self.report(rang, entry, options['plan'])
+
+    def report(self, rang, entry, plan):
+        """Affiche une empreinte."""
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"#{rang} {entry['empreinte']}  {entry['nombre']} x  total {entry['total_ms']:.1f} ms  "
+            f"moyenne {entry['moyenne_ms']:.1f} ms  max {entry['max_ms']:.1f} ms  ({entry['base']})"
+        ))
+        self.stdout.write(f"  du {entry['premier']} au {entry['dernier']}")
+        self.stdout.write(f"  {entry['sql']}")
+        for site, count in entry['sites'].items():
+            self.stdout.write(f'    {count:>6}  {site}')
+        if plan:
+            self.stdout.write(f"  exemple le plus lent ({entry['site']}):")
+            self.stdout.write(f"    {entry['exemple']}")
+            self.stdout.write('  plan:')
+            for line in (entry['plan'] or '(non capturé)').splitlines():
+                self.stdout.write(f'    {line}')
+        self.stdout.write('')
@@ -0,0 +1,23 @@
+"""
+Middlewares de l'application taches.
+"""
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.deprecation import MiddlewareMixin
+
+
+class ASGIURLConfMiddleware(MiddlewareMixin):
+    """
+    Sert les requêtes ASGI avec les vues asynchrones de l'API.
+
+    Sous ASGI, les requêtes utilisent settings.ASGI_URLCONF (config.urls_asgi),
+    qui route /api/taches/, /api/check-report-status/ et /api/task-status/
+    vers taches.async_views.
+    Les requêtes WSGI (runserver, config/wsgi.py) gardent ROOT_URLCONF et les
+    vues synchrones. Les URLs publiques sont les mêmes dans les deux cas.
+    """
+
+    def process_request(self, request):
+        urlconf = getattr(settings, 'ASGI_URLCONF', None)
+        if urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = urlconf
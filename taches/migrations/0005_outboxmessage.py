@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-19 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0004_alter_tache_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom_tache', models.CharField(max_length=200)),
+                ('payload', models.JSONField()),
+                ('cree_le', models.DateTimeField(auto_now_add=True)),
+                ('envoye_le', models.DateTimeField(blank=True, null=True)),
+                ('traite_le', models.DateTimeField(blank=True, null=True)),
+                ('tentatives', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('envoye_le__isnull', True)), fields=['id'], name='outbox_en_attente_idx')],
+            },
+        ),
+    ]
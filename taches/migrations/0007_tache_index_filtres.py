@@ -0,0 +1,30 @@
+# Generated by Django 5.2.10 on 2026-10-19 13:29
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0006_tache_proprietaire_sans_contrainte'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tache',
+            name='proprietaire',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='taches', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['proprietaire', 'cree_le'], name='tache_prop_cree_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(models.F('proprietaire'), django.db.models.functions.text.Lower('titre'), name='tache_prop_titre_idx'),
+        ),
+    ]
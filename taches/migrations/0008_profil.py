@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-19 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0007_tache_index_filtres'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profil',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('requete', 'Requête web'), ('tache', 'Tâche Celery')], max_length=10)),
+                ('identifiant', models.CharField(db_index=True, max_length=255)),
+                ('nom', models.CharField(max_length=255)),
+                ('statut', models.CharField(blank=True, max_length=20)),
+                ('debut', models.DateTimeField()),
+                ('duree_ms', models.FloatField()),
+                ('intervalle_ms', models.FloatField()),
+                ('echantillons', models.PositiveIntegerField(default=0)),
+                ('piles', models.TextField(blank=True)),
+                ('allocations', models.JSONField(default=list)),
+                ('memoire_pic', models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-debut'],
+            },
+        ),
+    ]
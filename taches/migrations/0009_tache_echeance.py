@@ -0,0 +1,29 @@
+# Generated by Django 5.2.10 on 2026-10-19 15:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0008_profil'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='echeance',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tache',
+            name='rappel_envoye_le',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(condition=models.Q(('echeance__isnull', False), ('rappel_envoye_le__isnull', True), ('termine', False)), fields=['echeance', 'id'], name='tache_rappel_en_attente_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.10 on 2026-10-19 15:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Copie figée de taches.ranking.sequential_keys: la migration ne doit pas
+# dépendre du code courant, qui peut changer après elle
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def sequential_keys():
+    """Clés de rang croissantes: 'a0', 'a1', ..., 'az', 'b00', ..., 'z' + 26 chiffres."""
+    head, digits = 'a', [0]
+    while True:
+        yield head + ''.join(DIGITS[d] for d in digits)
+        for i in reversed(range(len(digits))):
+            digits[i] += 1
+            if digits[i] < len(DIGITS):
+                break
+            digits[i] = 0
+        else:
+            if head == 'z':
+                return
+            head, digits = chr(ord(head) + 1), [0] * (len(digits) + 1)
+
+
+def attribuer_rangs(apps, schema_editor):
+    """Ordre manuel initial: celui de la liste par défaut (création décroissante)."""
+    Tache = apps.get_model('taches', 'Tache')
+    connection = schema_editor.connection
+    taches = Tache.objects.using(connection.alias)
+    qn = connection.ops.quote_name
+    sql = f'UPDATE {qn(Tache._meta.db_table)} SET {qn("rang")} = %s WHERE {qn("id")} = %s'
+    proprietaires = taches.order_by().values_list('proprietaire_id', flat=True).distinct()
+    with connection.cursor() as cursor:
+        for proprietaire_id in list(proprietaires):
+            ids = taches.filter(proprietaire_id=proprietaire_id).order_by('-cree_le', '-id').values_list('id', flat=True)
+            cursor.executemany(sql, list(zip(sequential_keys(), ids)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0009_tache_echeance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='rang',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        # Sur chaque shard (taches.sharding.TacheShardRouter.allow_migrate)
+        migrations.RunPython(attribuer_rangs, migrations.RunPython.noop, hints={'model_name': 'tache'}),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['proprietaire', 'rang', 'id'], name='tache_prop_rang_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.10 on 2026-10-19 16:28
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def planifier_publications(apps, schema_editor):
+    """Messages non traités: à publier depuis leur création; messages traités: plus rien à publier."""
+    OutboxMessage = apps.get_model('taches', 'OutboxMessage')
+    messages = OutboxMessage.objects.using(schema_editor.connection.alias)
+    messages.filter(traite_le__isnull=True).update(publier_le=F('cree_le'))
+    messages.filter(traite_le__isnull=False).update(publier_le=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0010_tache_rang'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxmessage',
+            name='outbox_en_attente_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='abandonne_le',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='echecs',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='publier_le',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='reserve_jusqu_au',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # Sur chaque shard (taches.sharding.TacheShardRouter.allow_migrate)
+        migrations.RunPython(
+            planifier_publications, migrations.RunPython.noop, hints={'model_name': 'outboxmessage'},
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(condition=models.Q(('publier_le__isnull', False)), fields=['id'], name='outbox_a_publier_idx'),
+        ),
+    ]
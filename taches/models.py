@@ -1,5 +1,151 @@
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Lower
 from django.conf import settings
+from django.utils import timezone
+
+from .ranking import key_between, sequential_keys
+
+
+class TacheQuerySet(models.QuerySet):
+    """
+    QuerySet des tâches: create() écrit sur le shard du propriétaire.
+
+    QuerySet.create() choisit la base sans connaître l'instance, donc sans
+    passer son propriétaire au routeur (taches.sharding.TacheShardRouter).
+    Sans base explicite (.using()), la base est choisie par Model.save(),
+    qui transmet l'instance au routeur.
+    """
+
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+    def set_termine(self, pk, proprietaire_id, termine=None):
+        """
+        Modifie le statut d'une tâche en une seule requête (UPDATE ... RETURNING).
+
+        La tâche n'est ni chargée ni validée: seule la colonne 'termine' est
+        écrite, à condition que la tâche appartienne à proprietaire_id.
+        Nécessite SQLite 3.35+ ou PostgreSQL.
+
+        Args:
+            pk (int): L'identifiant de la tâche.
+            proprietaire_id (int): L'identifiant de l'utilisateur connecté.
+            termine (bool): Le nouveau statut, ou None pour inverser le statut actuel.
+
+        Returns:
+            bool | None: Le nouveau statut, ou None si la tâche n'existe pas
+                pour cet utilisateur.
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        valeur = f'NOT {qn("termine")}' if termine is None else '%s'
+        params = ([] if termine is None else [termine]) + [pk, proprietaire_id]
+        sql = (
+            f'UPDATE {qn(self.model._meta.db_table)} SET {qn("termine")} = {valeur} '
+            f'WHERE {qn("id")} = %s AND {qn("proprietaire_id")} = %s RETURNING {qn("termine")}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        return None if row is None else bool(row[0])
+
+    def top_rank(self, proprietaire_id):
+        """
+        Retourne une clé de rang placée avant toutes les tâches d'un propriétaire.
+
+        Lit le premier rang par l'index (proprietaire, rang, id).
+
+        Args:
+            proprietaire_id (int): L'identifiant du propriétaire.
+
+        Returns:
+            str: La clé de rang (voir taches.ranking).
+        """
+        first = (
+            self.filter(proprietaire_id=proprietaire_id)
+            .order_by('rang', 'id')
+            .values_list('rang', flat=True)
+            .first()
+        )
+        return key_between(None, first or None)
+
+    def move(self, pk, proprietaire_id, apres=None):
+        """
+        Place une tâche juste après une autre dans l'ordre manuel, en un seul UPDATE.
+
+        Les rangs de la tâche précédente et de la suivante sont lus par l'index
+        (proprietaire, rang, id), puis seule la tâche déplacée reçoit une clé
+        comprise entre les deux (taches.ranking.key_between): les autres
+        tâches ne sont pas réécrites, quelle que soit la longueur de la liste.
+        Si l'une des deux n'a pas encore de rang (créée par bulk_create), les
+        rangs du propriétaire sont d'abord réattribués (rebalance_ranks).
+
+        Args:
+            pk (int): L'identifiant de la tâche à déplacer.
+            proprietaire_id (int): L'identifiant de l'utilisateur connecté.
+            apres (int): L'identifiant de la tâche qui doit précéder la tâche
+                déplacée, ou None pour la placer en tête.
+
+        Returns:
+            str | None: La nouvelle clé de rang, ou None si la tâche n'existe pas
+                pour cet utilisateur.
+
+        Raises:
+            Tache.DoesNotExist: Si la tâche 'apres' n'existe pas pour cet utilisateur.
+            ValueError: Si la tâche doit être placée après elle-même.
+        """
+        if apres == pk:
+            raise ValueError('Une tâche ne peut pas être placée après elle-même')
+        taches = self.filter(proprietaire_id=proprietaire_id)
+        if apres is None:
+            precedent = None
+            suivants = taches
+        else:
+            precedent = taches.filter(id=apres).values_list('rang', flat=True).first()
+            if precedent is None:
+                raise self.model.DoesNotExist
+            suivants = taches.filter(rang__gt=precedent)
+        suivant = suivants.exclude(id=pk).order_by('rang', 'id').values_list('rang', flat=True).first()
+        if '' in (precedent, suivant):
+            # Tâches sans rang (bulk_create n'appelle pas save()): rangs attribués
+            # dans l'ordre actuel (les rangs vides sont en tête), puis nouvel essai
+            self.rebalance_ranks(proprietaire_id)
+            return self.move(pk, proprietaire_id, apres)
+        rang = key_between(precedent, suivant)
+        return rang if taches.filter(id=pk).update(rang=rang) else None
+
+    def rebalance_ranks(self, proprietaire_id):
+        """
+        Réécrit les rangs d'un propriétaire avec des clés courtes, dans le même ordre.
+
+        Lancé en arrière-plan (taches.tasks.rebalance_ranks) quand un
+        déplacement produit une clé trop longue (RANK_REBALANCE_LENGTH).
+        Toutes les lignes sont réécrites dans une transaction, par une requête
+        préparée (executemany).
+
+        Args:
+            proprietaire_id (int): L'identifiant du propriétaire.
+
+        Returns:
+            int: Le nombre de tâches réécrites.
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        sql = f'UPDATE {qn(self.model._meta.db_table)} SET {qn("rang")} = %s WHERE {qn("id")} = %s'
+        with transaction.atomic(using=self.db):
+            ids = list(
+                self.filter(proprietaire_id=proprietaire_id)
+                .order_by('rang', 'id')
+                .values_list('id', flat=True)
+            )
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, list(zip(sequential_keys(), ids)))
+        return len(ids)
+
 
 class Tache(models.Model):
     """
@@ -15,27 +161,72 @@ class Tache(models.Model):
         description (TextField): Description détaillée de la tâche (optionnel, peut être vide).
         cree_le (DateTimeField): Date et heure de création (automatiquement défini à la création).
         termine (BooleanField): Indicateur de l'accomplissement de la tâche (faux par défaut).
+        echeance (DateTimeField): Date d'échéance (optionnelle). Un rappel est envoyé
+            au propriétaire quand elle est atteinte (voir taches.reminders).
+        rappel_envoye_le (DateTimeField): Date de prise en charge du rappel d'échéance
+            (None tant que le rappel n'est pas envoyé, remis à None si l'échéance change).
+        rang (CharField): Clé de rang de l'ordre manuel (taches.ranking), attribuée à
+            la création (en tête de liste) et modifiée par les déplacements (move).
         proprietaire (ForeignKey): Référence vers l'utilisateur propriétaire de la tâche.
             Suppression en cascade si l'utilisateur est supprimé.
     
     Relations:
         - proprietaire: Relation ForeignKey vers AUTH_USER_MODEL avec related_name='taches'.
+          Sans contrainte en base: la tâche peut être sur un autre shard que l'utilisateur.
     
     Métadonnées:
         - ordering: Les tâches sont triées par date de création décroissante ('-cree_le').
+        - indexes: Index (propriétaire, ...) des filtres et tris de la liste (taches.filters),
+          dont celui de l'ordre manuel (proprietaire, rang, id), et index partiel
+          des rappels d'échéance en attente (taches.reminders).
     """
     titre = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     cree_le = models.DateTimeField(auto_now_add=True)
     termine = models.BooleanField(default=False)
+    echeance = models.DateTimeField(null=True, blank=True)
+    rappel_envoye_le = models.DateTimeField(null=True, blank=True)
+    rang = models.CharField(max_length=255, default='', editable=False)
     proprietaire = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE,
-        related_name='taches'
+        related_name='taches',
+        # Les utilisateurs restent dans 'default', les tâches sont sur le shard du
+        # propriétaire (taches.sharding): pas de contrainte entre bases
+        db_constraint=False,
+        # Couvert par les index (proprietaire, ...) de Meta.indexes
+        db_index=False,
     )
 
+    objects = TacheQuerySet.as_manager()
+
     class Meta:
         ordering = ['-cree_le']
+        # Index des filtres et tris de la liste (taches.filters), précédés du
+        # propriétaire puisque toutes les requêtes de l'API en dépendent.
+        # Pas d'index sur 'termine': deux valeurs seulement, SQLite ne l'utiliserait
+        # pas de préférence à un index qui évite le tri
+        indexes = [
+            models.Index(fields=['proprietaire', 'cree_le'], name='tache_prop_cree_idx'),
+            models.Index('proprietaire', Lower('titre'), name='tache_prop_titre_idx'),
+            # Pages de l'ordre manuel, et voisins d'une tâche déplacée (move)
+            models.Index(fields=['proprietaire', 'rang', 'id'], name='tache_prop_rang_idx'),
+            # Rappels en attente seulement: l'index ne grossit pas avec les rappels
+            # envoyés ni les tâches sans échéance, et le parcours par échéance
+            # croissante (taches.reminders) s'arrête à la première échéance future
+            models.Index(
+                fields=['echeance', 'id'],
+                condition=models.Q(echeance__isnull=False, rappel_envoye_le__isnull=True, termine=False),
+                name='tache_rappel_en_attente_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Nouvelle tâche: en tête de l'ordre manuel de son propriétaire
+        if self._state.adding and not self.rang:
+            using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+            self.rang = type(self).objects.using(using).top_rank(self.proprietaire_id)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """
@@ -48,3 +239,144 @@ class Tache(models.Model):
             str: Le titre de la tâche.
         """
         return self.titre
+
+
+class OutboxMessage(models.Model):
+    """
+    Message en attente d'envoi à Celery (transactional outbox).
+
+    Les effets de bord d'une écriture (e-mail de création, ...) ne sont pas
+    envoyés au broker pendant la requête: un OutboxMessage est enregistré dans la
+    même transaction que la tâche, puis le dispatcher (taches.outbox.dispatch_pending,
+    lancé par Celery Beat) les publie par lots. Si la transaction est annulée,
+    aucun message n'est envoyé; si le broker est indisponible, l'API n'est pas ralentie.
+
+    Attributs:
+        nom_tache (CharField): Nom de la tâche Celery à lancer (ex: 'taches.tasks.send_creation_email').
+        payload (JSONField): Arguments nommés de la tâche, dont un instantané des données
+            nécessaires (le worker n'a pas à relire Tache ni User).
+        cree_le (DateTimeField): Date d'enregistrement du message.
+        publier_le (DateTimeField): Date de la prochaine publication au broker: la
+            création, puis, tant que le message n'est pas traité, la date à laquelle
+            il sera republié (délai de prise en charge, échec du traitement).
+            None une fois le message traité ou abandonné.
+        envoye_le (DateTimeField): Date de la dernière publication au broker.
+        reserve_jusqu_au (DateTimeField): Fin de la prise en charge par un worker: tant
+            qu'elle court, aucun autre worker ne traite le message.
+        traite_le (DateTimeField): Date de la fin du traitement réussi (garantit qu'un
+            message publié plusieurs fois n'est traité qu'une fois).
+        tentatives (PositiveIntegerField): Nombre d'échecs de publication.
+        echecs (PositiveIntegerField): Nombre d'échecs de traitement.
+        abandonne_le (DateTimeField): Date d'abandon du message après trop d'échecs
+            de traitement (à republier depuis l'administration).
+
+    Métadonnées:
+        - Index partiel sur les messages à publier ou en cours de traitement, lu
+          par le dispatcher.
+    """
+    nom_tache = models.CharField(max_length=200)
+    payload = models.JSONField()
+    cree_le = models.DateTimeField(auto_now_add=True)
+    publier_le = models.DateTimeField(null=True, blank=True, default=timezone.now)
+    envoye_le = models.DateTimeField(null=True, blank=True)
+    reserve_jusqu_au = models.DateTimeField(null=True, blank=True)
+    traite_le = models.DateTimeField(null=True, blank=True)
+    tentatives = models.PositiveIntegerField(default=0)
+    echecs = models.PositiveIntegerField(default=0)
+    abandonne_le = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(publier_le__isnull=False),
+                name='outbox_a_publier_idx',
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Retourne la représentation textuelle du message.
+
+        Returns:
+            str: Le nom de la tâche Celery et l'identifiant du message.
+        """
+        return f'{self.nom_tache} #{self.id}'
+
+
+class Profil(models.Model):
+    """
+    Profil d'exécution d'une requête web ou d'une tâche Celery (voir taches.profiling).
+
+    Enregistré uniquement pour les exécutions profilées à la demande (en-tête
+    privilégié, taux d'échantillonnage ou option de la tâche), dans la base
+    'default', et consultable dans l'administration.
+
+    Attributs:
+        type (CharField): 'requete' ou 'tache'.
+        identifiant (CharField): L'identifiant de la requête (X-Request-ID) ou de la tâche Celery.
+        nom (CharField): La méthode et le chemin de la requête, ou le nom de la tâche.
+        statut (CharField): Le code HTTP de la réponse, ou l'état final de la tâche.
+        debut (DateTimeField): Le début de l'exécution.
+        duree_ms (FloatField): La durée de l'exécution.
+        intervalle_ms (FloatField): L'intervalle entre deux échantillons de la pile.
+        echantillons (PositiveIntegerField): Le nombre d'échantillons de pile.
+        piles (TextField): Les piles d'appels échantillonnées, au format « replié »
+            ('racine;appelant;fonction N' par ligne, lisible par flamegraph.pl et speedscope).
+        allocations (JSONField): Les lignes de code qui ont le plus alloué
+            pendant l'exécution (tracemalloc).
+        memoire_pic (BigIntegerField): Le pic de mémoire suivie par tracemalloc (octets).
+    """
+    TYPES = [('requete', 'Requête web'), ('tache', 'Tâche Celery')]
+
+    type = models.CharField(max_length=10, choices=TYPES)
+    identifiant = models.CharField(max_length=255, db_index=True)
+    nom = models.CharField(max_length=255)
+    statut = models.CharField(max_length=20, blank=True)
+    debut = models.DateTimeField()
+    duree_ms = models.FloatField()
+    intervalle_ms = models.FloatField()
+    echantillons = models.PositiveIntegerField(default=0)
+    piles = models.TextField(blank=True)
+    allocations = models.JSONField(default=list)
+    memoire_pic = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-debut']
+
+    def __str__(self):
+        return f'{self.nom} ({self.duree_ms:.0f} ms)'
+
+
+class TacheArchivee(models.Model):
+    """
+    Structure commune des partitions mensuelles de l'archive des tâches terminées.
+
+    Modèle abstrait: chaque mois d'archivage a sa propre table
+    ('taches_archive_AAAAMM'), créée à la demande par taches.archives. La table
+    Tache ne contient ainsi que les tâches actives, et la purge d'un mois entier
+    supprime une table au lieu de supprimer des lignes une à une.
+
+    Attributs:
+        id (BigIntegerField): L'identifiant de la tâche d'origine (conservé tel quel).
+        titre (CharField): Le titre de la tâche.
+        description (TextField): La description de la tâche.
+        cree_le (DateTimeField): La date de création de la tâche d'origine.
+        archive_le (DateTimeField): La date d'archivage (détermine la partition).
+        proprietaire_id (BigIntegerField): L'identifiant du propriétaire. Pas de clé
+            étrangère: les partitions sont créées hors migrations et ne sont pas
+            modifiées par la suppression d'un utilisateur.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    titre = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    cree_le = models.DateTimeField()
+    archive_le = models.DateTimeField()
+    proprietaire_id = models.BigIntegerField()
+
+    class Meta:
+        abstract = True
+        ordering = ['-archive_le', '-id']
+
+    def __str__(self):
+        return self.titre
@@ -0,0 +1,273 @@
+"""
+Transactional outbox pour les effets de bord envoyés à Celery.
+
+Au lieu d'appeler `.delay()` pendant la requête (aller-retour synchrone vers le
+broker, avant même que la transaction soit validée), les vues enregistrent un
+OutboxMessage dans la même transaction que la donnée modifiée. Le dispatcher
+publie ensuite les messages en attente par lots.
+
+Garanties:
+    - Un message n'existe que si la transaction de la requête a été validée.
+    - La latence de l'API ne dépend pas de l'état du broker.
+    - Livraison au moins une fois: un message peut être publié plusieurs fois
+      (plantage entre publication et marquage, dispatchers concurrents). Les
+      consommateurs le prennent en charge avec claim_message(), pour une durée
+      limitée (OUTBOX_CLAIM_LEASE), et ne le marquent traité qu'après le succès
+      du traitement (complete_message()).
+
+Reprises (publier_le):
+    - un message publié mais pas pris en charge (perdu par le broker ou par un
+      worker arrêté) est republié après OUTBOX_REPUBLISH_AFTER;
+    - un message pris en charge par un worker qui s'arrête avant la fin est
+      republié à l'expiration de la prise en charge;
+    - un traitement en échec (release_message) est republié après un délai qui
+      double à chaque échec (OUTBOX_RETRY_DELAY, au plus OUTBOX_RETRY_MAX_DELAY).
+      Après OUTBOX_MAX_FAILURES échecs (erreur permanente), le message est
+      abandonné (abandonne_le): il n'est plus republié, et peut l'être depuis
+      l'administration une fois la cause corrigée.
+"""
+import logging
+from datetime import timedelta
+
+from celery import current_app
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .sharding import shard_for, shard_for_id
+
+logger = logging.getLogger(__name__)
+
+# Nombre de messages publiés par lot (une seule connexion au broker par lot)
+OUTBOX_BATCH_SIZE = 100
+
+# Durée de conservation des messages traités (utile au diagnostic)
+OUTBOX_RETENTION = timedelta(days=1)
+
+# Délai de republication d'un message publié mais pas pris en charge
+OUTBOX_REPUBLISH_AFTER = timedelta(minutes=10)
+
+# Durée de la prise en charge d'un message par un worker
+OUTBOX_CLAIM_LEASE = timedelta(minutes=5)
+
+# Délai avant de republier un message après un échec de traitement (doublé à
+# chaque échec), et nombre d'échecs au-delà duquel le message est abandonné
+OUTBOX_RETRY_DELAY = timedelta(seconds=30)
+OUTBOX_RETRY_MAX_DELAY = timedelta(hours=1)
+OUTBOX_MAX_FAILURES = 8
+
+
+def enqueue(nom_tache, payload, using=DEFAULT_DB_ALIAS):
+    """
+    Enregistre un message à publier, dans la transaction courante.
+
+    Args:
+        nom_tache (str): Nom de la tâche Celery.
+        payload (dict): Arguments nommés de la tâche (sérialisables en JSON).
+        using (str): La base de la donnée modifiée (shard du propriétaire).
+
+    Returns:
+        OutboxMessage: Le message enregistré.
+    """
+    return OutboxMessage.objects.using(using).create(nom_tache=nom_tache, payload=payload)
+
+
+def creation_email_payload(tache):
+    """
+    Construit l'instantané d'une tâche nécessaire à send_creation_email.
+
+    Args:
+        tache (Tache): La tâche qui vient d'être créée (propriétaire déjà chargé).
+
+    Returns:
+        dict: Les arguments nommés de send_creation_email.
+    """
+    return {
+        'tache_id': tache.id,
+        'tache': {
+            'titre': tache.titre,
+            'description': tache.description,
+            'proprietaire': tache.proprietaire.username,
+            'cree_le': tache.cree_le.isoformat(),
+            'termine': tache.termine,
+        },
+    }
+
+
+def save_with_creation_email(serializer, proprietaire):
+    """
+    Crée une tâche et son message d'e-mail de notification dans une même transaction,
+    sur le shard du propriétaire.
+
+    Args:
+        serializer (TacheSerializer): Le sérialiseur validé.
+        proprietaire (User): L'utilisateur propriétaire de la tâche.
+
+    Returns:
+        Tache: La tâche créée.
+    """
+    using = shard_for(proprietaire.pk)
+    with transaction.atomic(using=using):
+        tache = serializer.save(proprietaire=proprietaire)
+        enqueue('taches.tasks.send_creation_email', creation_email_payload(tache), using=using)
+    return tache
+
+
+def dispatch_pending(batch_size=OUTBOX_BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Publie à Celery les messages à publier (publier_le atteint), par lots, dans l'ordre d'enregistrement.
+
+    S'arrête au premier échec de publication (broker indisponible): le message
+    en échec voit son compteur de tentatives incrémenté et sera republié au
+    prochain passage, comme tous les suivants. Un message publié sera republié
+    après OUTBOX_REPUBLISH_AFTER s'il n'a pas été pris en charge d'ici là.
+
+    Args:
+        batch_size (int): Nombre de messages lus et publiés par lot.
+        using (str): La base (shard) dont les messages sont publiés.
+
+    Returns:
+        int: Le nombre de messages publiés.
+    """
+    messages = OutboxMessage.objects.using(using)
+    published = 0
+    while True:
+        now = timezone.now()
+        batch = list(
+            messages.filter(publier_le__lte=now)
+            .order_by('id')
+            .only('id', 'nom_tache', 'payload')[:batch_size]
+        )
+        if not batch:
+            return published
+
+        sent_ids = []
+        failed = False
+        with current_app.producer_or_acquire() as producer:
+            for message in batch:
+                try:
+                    current_app.send_task(
+                        message.nom_tache,
+                        kwargs={**message.payload, 'outbox_id': message.id},
+                        producer=producer,
+                    )
+                except Exception:
+                    logger.exception('Publication du message outbox #%s impossible', message.id)
+                    messages.filter(id=message.id).update(tentatives=F('tentatives') + 1)
+                    failed = True
+                    break
+                sent_ids.append(message.id)
+
+        # Condition sur publier_le: un message pris en charge entre-temps garde sa date
+        messages.filter(id__in=sent_ids, publier_le__lte=now).update(
+            envoye_le=now, publier_le=now + OUTBOX_REPUBLISH_AFTER,
+        )
+        published += len(sent_ids)
+        if failed or len(batch) < batch_size:
+            return published
+
+
+def claim_message(outbox_id):
+    """
+    Prend en charge un message côté worker, pour OUTBOX_CLAIM_LEASE.
+
+    Un message traité, abandonné ou déjà pris en charge par un autre worker
+    n'est pas repris. Si le worker s'arrête sans appeler complete_message() ni
+    release_message(), le message est republié à la fin de la prise en charge.
+
+    Args:
+        outbox_id (int): L'identifiant du message.
+
+    Returns:
+        bool: True si ce worker doit traiter le message, False sinon.
+    """
+    now = timezone.now()
+    return bool(
+        OutboxMessage.objects.using(shard_for_id(outbox_id))
+        .filter(id=outbox_id, traite_le__isnull=True, abandonne_le__isnull=True)
+        .filter(Q(reserve_jusqu_au__isnull=True) | Q(reserve_jusqu_au__lt=now))
+        .update(reserve_jusqu_au=now + OUTBOX_CLAIM_LEASE, publier_le=now + OUTBOX_CLAIM_LEASE)
+    )
+
+
+def complete_message(outbox_id):
+    """
+    Marque traité un message pris en charge, après le succès de son traitement.
+
+    Args:
+        outbox_id (int): L'identifiant du message.
+    """
+    OutboxMessage.objects.using(shard_for_id(outbox_id)).filter(id=outbox_id).update(
+        traite_le=timezone.now(), publier_le=None, reserve_jusqu_au=None,
+    )
+
+
+def retry_delay(echecs):
+    """
+    Délai avant de republier un message après son n-ième échec de traitement.
+
+    Args:
+        echecs (int): Le nombre d'échecs (1 pour le premier).
+
+    Returns:
+        timedelta: OUTBOX_RETRY_DELAY, doublé à chaque échec, au plus OUTBOX_RETRY_MAX_DELAY.
+    """
+    return min(OUTBOX_RETRY_DELAY * 2 ** (echecs - 1), OUTBOX_RETRY_MAX_DELAY)
+
+
+def release_message(outbox_id):
+    """
+    Annule la prise en charge d'un message dont le traitement a échoué.
+
+    Le message est republié par le dispatcher après retry_delay(); une
+    livraison déjà en file peut le reprendre aussitôt. Au-delà de
+    OUTBOX_MAX_FAILURES échecs, il est abandonné et n'est plus republié.
+
+    Args:
+        outbox_id (int): L'identifiant du message.
+    """
+    using = shard_for_id(outbox_id)
+    messages = OutboxMessage.objects.using(using)
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        echecs = messages.select_for_update().filter(id=outbox_id).values_list('echecs', flat=True).first()
+        if echecs is None:
+            return
+        echecs += 1
+        if echecs >= OUTBOX_MAX_FAILURES:
+            logger.error('Message outbox #%s abandonné après %s échecs de traitement', outbox_id, echecs)
+            changes = {'abandonne_le': now, 'publier_le': None}
+        else:
+            changes = {'publier_le': now + retry_delay(echecs)}
+        messages.filter(id=outbox_id).update(echecs=echecs, reserve_jusqu_au=None, **changes)
+
+
+def requeue_abandoned(queryset):
+    """
+    Remet en attente des messages abandonnés (action de l'administration).
+
+    Args:
+        queryset (QuerySet): Les messages, sur leur shard.
+
+    Returns:
+        int: Le nombre de messages remis en attente.
+    """
+    return queryset.filter(abandonne_le__isnull=False).update(
+        abandonne_le=None, echecs=0, publier_le=timezone.now(),
+    )
+
+
+def purge_processed(retention=OUTBOX_RETENTION, using=DEFAULT_DB_ALIAS):
+    """
+    Supprime les messages traités depuis plus longtemps que la durée de conservation.
+
+    Args:
+        retention (timedelta): Durée de conservation des messages traités.
+        using (str): La base (shard) à purger.
+
+    Returns:
+        int: Le nombre de messages supprimés.
+    """
+    deleted, _ = OutboxMessage.objects.using(using).filter(traite_le__lt=timezone.now() - retention).delete()
+    return deleted
@@ -0,0 +1,51 @@
+"""
+Parsers JSON rapides pour l'API REST.
+
+Ce module fournit un parser basé sur orjson pour décoder le corps des requêtes
+JSON (création et modification de tâches). Il retourne les mêmes données que le
+JSONParser de DRF et se replie sur celui-ci si orjson n'est pas installé.
+"""
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    Parser JSON basé sur orjson, compatible avec le JSONParser de DRF.
+
+    orjson ne lit que de l'UTF-8: les corps déclarés dans un autre encodage
+    sont délégués au JSONParser standard. Comme DRF en mode strict, les
+    constantes NaN et Infinity sont refusées.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Décode le flux d'octets JSON de la requête.
+
+        Args:
+            stream: Le flux de la requête.
+            media_type (str): Le type de média de la requête.
+            parser_context (dict): Le contexte fourni par la vue.
+
+        Returns:
+            Les données décodées (dict, list, ...).
+
+        Raises:
+            ParseError: Si le corps n'est pas un JSON valide.
+        """
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
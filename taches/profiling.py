@@ -0,0 +1,361 @@
+"""
+Profilage à la demande des requêtes web et des tâches Celery.
+
+Quand une requête de l'API ou un rapport est lent en production, ce module
+enregistre ce que faisait le processus, pour une exécution choisie:
+    - piles d'appels CPU: un thread échantillonne la pile du thread profilé
+      toutes les PROFILING_INTERVAL secondes (sys._current_frames), et compte
+      les piles identiques (format « replié » des flame graphs);
+    - allocations: tracemalloc compare la mémoire allouée par ligne de code au
+      début et à la fin de l'exécution (PROFILING_TOP_ALLOCATIONS lignes).
+
+Déclenchement (si PROFILING_ENABLED):
+    - requête web : en-tête 'X-Profile: <PROFILING_HEADER_TOKEN>', ou tirage
+      aléatoire avec la probabilité PROFILING_SAMPLE_RATE;
+    - tâche Celery: en-tête de message 'profile', par exemple
+      generate_task_report.apply_async(headers={'profile': True}).
+
+Les profils (modèle Profil) sont enregistrés avec l'identifiant de la requête
+(en-tête X-Request-ID, sinon un UUID, renvoyé dans X-Profile-Id) ou de la tâche,
+et consultables dans l'administration.
+
+Sans PROFILING_ENABLED, le middleware se retire de la chaîne au démarrage
+(MiddlewareNotUsed) et les signaux Celery ne sont pas connectés: aucun coût.
+"""
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+# En-têtes du déclenchement et de l'identifiant du profil
+PROFILE_HEADER = 'X-Profile'
+REQUEST_ID_HEADER = 'X-Request-ID'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+# Préfixes retirés des noms de fichiers dans les piles (projet, bibliothèques)
+_PATH_PREFIXES = sorted(
+    {str(settings.BASE_DIR) + os.sep, *(path + os.sep for path in sys.path if path.endswith('-packages'))},
+    key=len, reverse=True,
+)
+
+
+def short_path(filename):
+    """
+    Retourne le chemin d'un fichier relatif au projet ou au site-packages qui le contient.
+
+    Args:
+        filename (str): Le chemin absolu du fichier.
+
+    Returns:
+        str: Par exemple 'taches/views.py' ou 'django/db/models/query.py'.
+    """
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _frame_label(code):
+    return f'{code.co_qualname} ({short_path(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """
+    Échantillonneur de la pile d'appels d'un thread, depuis un thread séparé.
+
+    Utilisation:
+        sampler = StackSampler(threading.get_ident(), interval=0.005)
+        sampler.start()
+        ...
+        piles = sampler.stop()   # {'racine;...;fonction': nombre d'échantillons}
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+
+    def _collapse(self, frame):
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(code)
+            labels.append(label)
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+            del frame
+
+    def start(self):
+        """Démarre l'échantillonnage."""
+        self._thread.start()
+
+    def stop(self):
+        """
+        Arrête l'échantillonnage.
+
+        Returns:
+            Counter: Le nombre d'échantillons de chaque pile repliée.
+        """
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+class _TracemallocUsers:
+    """tracemalloc est global au processus: démarré au premier profil, arrêté après le dernier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self._started_here = False
+
+    def acquire(self):
+        with self._lock:
+            if self._count == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_here = True
+            self._count += 1
+            tracemalloc.reset_peak()
+
+    def release(self):
+        with self._lock:
+            self._count -= 1
+            if self._count == 0 and self._started_here:
+                tracemalloc.stop()
+                self._started_here = False
+
+
+_tracemalloc_users = _TracemallocUsers()
+
+
+def leaf_functions(piles, limit=30):
+    """
+    Compte les échantillons par fonction en cours d'exécution (sommet de la pile).
+
+    Args:
+        piles (str): Les piles repliées d'un profil ('a;b;c N' par ligne).
+        limit (int): Le nombre de fonctions retournées.
+
+    Returns:
+        list: Les couples (fonction, nombre d'échantillons), par nombre décroissant.
+    """
+    counts = Counter()
+    for line in piles.splitlines():
+        stack, _, count = line.rpartition(' ')
+        counts[stack.rpartition(';')[2]] += int(count)
+    return counts.most_common(limit)
+
+
+def top_allocations(before, after, limit):
+    """
+    Compare deux instantanés tracemalloc et retourne les lignes qui ont le plus alloué.
+
+    Args:
+        before (tracemalloc.Snapshot): L'instantané du début de l'exécution.
+        after (tracemalloc.Snapshot): L'instantané de la fin de l'exécution.
+        limit (int): Le nombre de lignes retournées.
+
+    Returns:
+        list: Les dicts {'fichier', 'ligne', 'taille', 'nombre'} (octets et blocs
+            alloués pendant l'exécution et toujours présents à la fin), par taille décroissante.
+    """
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    return [
+        {
+            'fichier': short_path(stat.traceback[0].filename),
+            'ligne': stat.traceback[0].lineno,
+            'taille': stat.size_diff,
+            'nombre': stat.count_diff,
+        }
+        for stat in stats[:limit] if stat.size_diff > 0
+    ]
+
+
+class Profiler:
+    """
+    Profil d'une exécution: piles d'appels échantillonnées et allocations.
+
+    Utilisation:
+        profiler = Profiler().start()
+        ...
+        profil = profiler.stop('requete', request_id, 'GET /api/taches/', statut='200')
+    """
+
+    def start(self, thread_id=None):
+        """
+        Démarre le profilage d'un thread.
+
+        Args:
+            thread_id (int | None): Le thread échantillonné (défaut: le thread courant).
+
+        Returns:
+            Profiler: self.
+        """
+        self.debut = timezone.now()
+        self._start = time.perf_counter()
+        self._allocations = settings.PROFILING_TRACEMALLOC
+        if self._allocations:
+            _tracemalloc_users.acquire()
+            self._before = tracemalloc.take_snapshot()
+        self._sampler = StackSampler(thread_id or threading.get_ident(), settings.PROFILING_INTERVAL)
+        self._sampler.start()
+        return self
+
+    def stop(self, type, identifiant, nom, statut=''):
+        """
+        Arrête le profilage et enregistre le profil.
+
+        Args:
+            type (str): 'requete' ou 'tache'.
+            identifiant (str): L'identifiant de la requête ou de la tâche.
+            nom (str): La requête ('GET /api/taches/') ou le nom de la tâche.
+            statut (str): Le code HTTP ou l'état final de la tâche.
+
+        Returns:
+            Profil | None: Le profil enregistré (None si l'enregistrement a échoué).
+        """
+        from .models import Profil
+
+        duree = time.perf_counter() - self._start
+        stacks = self._sampler.stop()
+        allocations, memoire_pic = [], None
+        if self._allocations:
+            try:
+                allocations = top_allocations(
+                    self._before, tracemalloc.take_snapshot(), settings.PROFILING_TOP_ALLOCATIONS
+                )
+                memoire_pic = tracemalloc.get_traced_memory()[1]
+            finally:
+                _tracemalloc_users.release()
+        try:
+            return Profil.objects.create(
+                type=type, identifiant=str(identifiant)[:255], nom=nom[:255], statut=str(statut),
+                debut=self.debut, duree_ms=duree * 1000, intervalle_ms=settings.PROFILING_INTERVAL * 1000,
+                echantillons=sum(stacks.values()),
+                piles=''.join(f'{stack} {count}\n' for stack, count in stacks.most_common()),
+                allocations=allocations, memoire_pic=memoire_pic,
+            )
+        except Exception:
+            # Le profilage ne doit jamais faire échouer la requête ou la tâche profilée
+            logger.exception("Enregistrement du profil de %s impossible", nom)
+            return None
+
+
+def should_profile(request):
+    """
+    Indique si une requête doit être profilée: en-tête privilégié ou tirage aléatoire.
+
+    Args:
+        request: L'objet HttpRequest.
+
+    Returns:
+        bool: True si la requête doit être profilée.
+    """
+    token = settings.PROFILING_HEADER_TOKEN
+    header = request.headers.get(PROFILE_HEADER)
+    if token and header and constant_time_compare(header, token):
+        return True
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+class ProfilingMiddleware:
+    """
+    Profile les requêtes web choisies (voir should_profile), en WSGI comme en ASGI.
+
+    Placé en tête de settings.MIDDLEWARE pour couvrir toute la chaîne. Retiré au
+    démarrage si PROFILING_ENABLED est faux.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _request_id(self, request):
+        return request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not should_profile(request):
+            return self.get_response(request)
+        request_id = self._request_id(request)
+        profiler = Profiler().start()
+        response = self.get_response(request)
+        profiler.stop('requete', request_id, f'{request.method} {request.path}', response.status_code)
+        response.headers[PROFILE_ID_HEADER] = request_id
+        return response
+
+    async def __acall__(self, request):
+        if not should_profile(request):
+            return await self.get_response(request)
+        request_id = self._request_id(request)
+        # Sous ASGI, le thread échantillonné est celui de la boucle d'événements;
+        # l'instantané tracemalloc (synchrone, coûteux) est pris hors de la boucle
+        profiler = await sync_to_async(Profiler().start)(threading.get_ident())
+        response = await self.get_response(request)
+        await sync_to_async(profiler.stop)(
+            'requete', request_id, f'{request.method} {request.path}', response.status_code
+        )
+        response.headers[PROFILE_ID_HEADER] = request_id
+        return response
+
+
+# Profilers des tâches en cours, par identifiant de tâche
+_task_profilers = {}
+
+
+def _wants_profile(task):
+    request = task.request
+    return bool(getattr(request, 'profile', None) or (request.headers or {}).get('profile'))
+
+
+def task_prerun_profile(task_id=None, task=None, **kwargs):
+    """Démarre le profilage d'une tâche lancée avec l'en-tête 'profile' (signal task_prerun)."""
+    if task is not None and _wants_profile(task):
+        _task_profilers[task_id] = Profiler().start()
+
+
+def task_postrun_profile(task_id=None, task=None, state=None, **kwargs):
+    """Enregistre le profil d'une tâche profilée (signal task_postrun)."""
+    profiler = _task_profilers.pop(task_id, None)
+    if profiler is not None:
+        profiler.stop('tache', task_id, task.name, state or '')
+
+
+def connect_task_signals():
+    """Connecte les signaux Celery du profilage des tâches (appelé si PROFILING_ENABLED)."""
+    from celery.signals import task_postrun, task_prerun
+
+    task_prerun.connect(task_prerun_profile, weak=False)
+    task_postrun.connect(task_postrun_profile, weak=False)
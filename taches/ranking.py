@@ -0,0 +1,192 @@
+"""
+Clés de rang de l'ordre manuel des tâches (fractional indexing).
+
+Une colonne de position entière obligerait à réécrire toutes les tâches
+suivantes à chaque déplacement. Ici, le rang d'une tâche est une chaîne
+comparée dans l'ordre lexicographique (ordre binaire des octets): pour placer
+une tâche entre deux autres, il suffit de lui donner une clé comprise entre
+les leurs (key_between), sans toucher aux autres lignes. Un déplacement ne
+coûte qu'un UPDATE, quelle que soit la longueur de la liste.
+
+Format d'une clé (base 62, chiffres '0-9A-Za-z' dans l'ordre ASCII):
+    - une partie entière de longueur variable: le premier caractère en donne
+      la longueur ('a' -> 2, 'b' -> 3, ..., 'Z' -> 2, 'Y' -> 3, ... pour les
+      entiers négatifs), suivi des chiffres. Les ajouts répétés en tête ou en
+      fin de liste incrémentent ou décrémentent l'entier: la clé ne grandit
+      que d'un caractère tous les 62^n ajouts;
+    - une partie fractionnaire optionnelle, sans zéro final, qui s'allonge
+      quand on insère entre deux clés voisines.
+
+Les insertions répétées au même endroit allongent les clés d'environ un
+caractère toutes les six. Au-delà de RANK_REBALANCE_LENGTH caractères, les
+rangs du propriétaire sont réécrits en arrière-plan avec des clés courtes et
+régulières (sequential_keys), dans le même ordre.
+"""
+from itertools import islice
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# Clé de l'entier 0, et plus petit entier représentable (interdit comme clé)
+INTEGER_ZERO = 'a0'
+SMALLEST_INTEGER = 'A' + '0' * 26
+
+# Longueur de clé au-delà de laquelle les rangs du propriétaire sont rééquilibrés
+RANK_REBALANCE_LENGTH = 16
+
+
+def _integer_length(head):
+    if 'a' <= head <= 'z':
+        return ord(head) - ord('a') + 2
+    if 'A' <= head <= 'Z':
+        return ord('Z') - ord(head) + 2
+    raise ValueError(f'Clé de rang invalide (tête {head!r})')
+
+
+def _split(key):
+    """Sépare une clé en parties entière et fractionnaire, en la validant."""
+    if not key or key == SMALLEST_INTEGER:
+        raise ValueError(f'Clé de rang invalide : {key!r}')
+    length = _integer_length(key[0])
+    integer, fraction = key[:length], key[length:]
+    if len(integer) != length or fraction.endswith('0'):
+        raise ValueError(f'Clé de rang invalide : {key!r}')
+    return integer, fraction
+
+
+def _midpoint(a, b):
+    """
+    Retourne une partie fractionnaire strictement entre a et b.
+
+    Args:
+        a (str): La borne basse ('' pour 0).
+        b (str): La borne haute (None pour 1), strictement supérieure à a.
+
+    Returns:
+        str: La partie fractionnaire, sans zéro final.
+    """
+    if b is not None:
+        # Préfixe commun (a complété par des zéros)
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    low = DIGITS.index(a[0]) if a else 0
+    high = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if high - low > 1:
+        return DIGITS[(low + high + 1) // 2]
+    # Chiffres consécutifs
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[low] + _midpoint(a[1:], None)
+
+
+def _increment_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        value = DIGITS.index(digits[i]) + 1
+        if value < len(DIGITS):
+            digits[i] = DIGITS[value]
+            return head + ''.join(digits)
+        digits[i] = '0'
+    # Retenue sur tous les chiffres: entier d'un chiffre de plus (ou de moins
+    # pour les négatifs)
+    if head == 'Z':
+        return INTEGER_ZERO
+    if head == 'z':
+        return None
+    head = chr(ord(head) + 1)
+    if head > 'a':
+        digits.append('0')
+    else:
+        digits.pop()
+    return head + ''.join(digits)
+
+
+def _decrement_integer(integer):
+    head, digits = integer[0], list(integer[1:])
+    for i in reversed(range(len(digits))):
+        value = DIGITS.index(digits[i]) - 1
+        if value >= 0:
+            digits[i] = DIGITS[value]
+            return head + ''.join(digits)
+        digits[i] = DIGITS[-1]
+    if head == 'a':
+        return 'Z' + DIGITS[-1]
+    if head == 'A':
+        return None
+    head = chr(ord(head) - 1)
+    if head < 'Z':
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + ''.join(digits)
+
+
+def key_between(a, b):
+    """
+    Retourne une clé de rang strictement comprise entre a et b.
+
+    Args:
+        a (str): La clé précédente, ou None pour placer en tête.
+        b (str): La clé suivante, ou None pour placer en fin.
+
+    Returns:
+        str: La nouvelle clé.
+
+    Raises:
+        ValueError: Si une clé est invalide ou si a n'est pas strictement inférieure à b.
+
+    Exemples:
+        key_between(None, None)   -> 'a0'
+        key_between('a0', None)   -> 'a1'
+        key_between(None, 'a0')   -> 'Zz'
+        key_between('a0', 'a1')   -> 'a0V'
+    """
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f'Clés de rang non ordonnées : {a!r} >= {b!r}')
+    if a is None:
+        if b is None:
+            return INTEGER_ZERO
+        integer, fraction = _split(b)
+        if integer == SMALLEST_INTEGER:
+            return integer + _midpoint('', fraction)
+        if fraction:
+            return integer
+        key = _decrement_integer(integer)
+        if key is None:
+            raise ValueError('Plus de clé de rang disponible en tête')
+        return key
+    integer, fraction = _split(a)
+    if b is None:
+        key = _increment_integer(integer)
+        return integer + _midpoint(fraction, None) if key is None else key
+    integer_b, fraction_b = _split(b)
+    if integer == integer_b:
+        return integer + _midpoint(fraction, fraction_b)
+    key = _increment_integer(integer)
+    if key is not None and key < b:
+        return key
+    return integer + _midpoint(fraction, None)
+
+
+def sequential_keys(count=None):
+    """
+    Génère des clés de rang courtes et croissantes: 'a0', 'a1', ..., 'az', 'b00', ...
+
+    Utilisé pour attribuer les rangs d'une liste entière (rééquilibrage,
+    génération de données): 100 000 tâches ont des clés de 4 caractères.
+
+    Args:
+        count (int): Le nombre de clés, ou None pour une suite sans fin.
+
+    Yields:
+        str: Les clés, dans l'ordre.
+    """
+    def keys():
+        key = INTEGER_ZERO
+        while key is not None:
+            yield key
+            key = _increment_integer(key)
+
+    return keys() if count is None else islice(keys(), count)
@@ -0,0 +1,201 @@
+"""
+Rappels d'échéance des tâches.
+
+Planifier un message Celery retardé (eta/countdown) par rappel garderait dans
+Redis, et dans la mémoire des workers qui les réservent, autant de messages que
+de rappels en attente. Ici, aucun message n'est créé par rappel: une tâche
+périodique (send_due_reminders, lancée par Celery Beat) parcourt les tâches
+dont l'échéance est atteinte et envoie leurs rappels par lots. La mémoire du
+broker ne dépend pas du nombre de rappels en attente.
+
+Parcours:
+    - l'index partiel 'tache_rappel_en_attente_idx' (echeance, id) ne contient
+      que les rappels en attente: le parcours par échéance croissante lit une
+      plage d'index et s'arrête à la première échéance future;
+    - chaque lot reprend après la dernière ligne du lot précédent (filigrane
+      (echeance, id)): une ligne laissée en place (prise par un autre passage,
+      libérée après un échec d'envoi) n'est pas relue pendant le même passage.
+
+Prise en charge:
+    - un lot est réservé par un seul UPDATE ... RETURNING conditionné par
+      rappel_envoye_le IS NULL: si deux passages se chevauchent, chaque rappel
+      n'est réservé, donc envoyé, que par l'un d'eux;
+    - les e-mails d'un lot sont envoyés ensemble, sur une connexion du pool
+      (taches.mail);
+    - si l'envoi échoue, les réservations des rappels non envoyés du lot sont
+      annulées (le pool indique combien de messages sont partis avant l'erreur):
+      ils seront repris au passage suivant, sans renvoyer les autres.
+
+Avec le sharding (taches.sharding), chaque shard est parcouru séparément.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from .mail import pool
+from .models import Tache
+
+logger = logging.getLogger(__name__)
+
+# Nombre de rappels réservés et envoyés par lot (une connexion e-mail par lot)
+REMINDER_BATCH_SIZE = 200
+
+REMINDER_FROM_EMAIL = 'noreply@taches.com'
+
+
+def pending_reminders(now, after=None, batch_size=REMINDER_BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Retourne le prochain lot de rappels échus, par échéance croissante.
+
+    Args:
+        now (datetime): Les échéances postérieures ne sont pas lues.
+        after (tuple): Le filigrane (echeance, id) de la dernière ligne du lot
+            précédent, ou None pour le premier lot.
+        batch_size (int): Nombre maximal de lignes.
+        using (str): La base (shard).
+
+    Returns:
+        list: Les couples (echeance, id) du lot.
+    """
+    queryset = Tache.objects.using(using).filter(
+        echeance__isnull=False, rappel_envoye_le__isnull=True, termine=False, echeance__lte=now,
+    )
+    if after is not None:
+        echeance, pk = after
+        # Borne inférieure sur echeance (début de la plage d'index), puis les
+        # lignes de même échéance déjà vues sont écartées
+        queryset = queryset.filter(echeance__gte=echeance).exclude(echeance=echeance, id__lte=pk)
+    return list(queryset.order_by('echeance', 'id').values_list('echeance', 'id')[:batch_size])
+
+
+def claim_reminders(ids, now, using=DEFAULT_DB_ALIAS):
+    """
+    Réserve des rappels en une seule requête (UPDATE ... RETURNING).
+
+    Seuls les rappels encore en attente et échus sont réservés: ceux pris entre-temps
+    par un autre passage, dont l'échéance a changé ou dont la tâche a été terminée
+    sont ignorés. Nécessite SQLite 3.35+ ou PostgreSQL.
+
+    Args:
+        ids (list): Les identifiants des tâches.
+        now (datetime): La date de réservation (rappel_envoye_le) et la limite des échéances.
+        using (str): La base (shard).
+
+    Returns:
+        list: Les identifiants des tâches réservées.
+    """
+    if not ids:
+        return []
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    moment = connection.ops.adapt_datetimefield_value(now)
+    sql = (
+        f'UPDATE {qn(Tache._meta.db_table)} SET {qn("rappel_envoye_le")} = %s '
+        f'WHERE {qn("id")} IN ({", ".join(["%s"] * len(ids))}) AND {qn("rappel_envoye_le")} IS NULL '
+        f'AND {qn("echeance")} <= %s AND {qn("termine")} = %s RETURNING {qn("id")}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [moment, *ids, moment, False])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def release_reminders(ids, claimed_at, using=DEFAULT_DB_ALIAS):
+    """
+    Annule la réservation de rappels dont l'envoi a échoué.
+
+    Args:
+        ids (list): Les identifiants des tâches.
+        claimed_at (datetime): La date de réservation: un rappel réservé depuis
+            par un autre passage n'est pas libéré.
+        using (str): La base (shard).
+    """
+    Tache.objects.using(using).filter(id__in=ids, rappel_envoye_le=claimed_at).update(rappel_envoye_le=None)
+
+
+def reminder_message(titre, echeance, user):
+    """
+    Construit l'e-mail de rappel d'une tâche.
+
+    Args:
+        titre (str): Le titre de la tâche.
+        echeance (datetime): L'échéance de la tâche.
+        user (tuple): Le nom d'utilisateur et l'adresse e-mail du propriétaire.
+
+    Returns:
+        EmailMessage: Le message à envoyer.
+    """
+    username, email = user
+    echeance = timezone.localtime(echeance)
+    return EmailMessage(
+        subject=f'Rappel : {titre}',
+        body=(
+            f'Bonjour {username},\n\n'
+            f"La tâche « {titre} » arrive à échéance le {echeance:%d/%m/%Y à %H:%M}.\n"
+        ),
+        from_email=REMINDER_FROM_EMAIL,
+        to=[email],
+    )
+
+
+def send_due(batch_size=REMINDER_BATCH_SIZE, now=None, using=DEFAULT_DB_ALIAS):
+    """
+    Envoie les rappels des tâches dont l'échéance est atteinte, par lots.
+
+    Les propriétaires sans adresse e-mail n'ont pas de rappel: leurs tâches sont
+    tout de même réservées, pour ne pas être relues à chaque passage.
+
+    Args:
+        batch_size (int): Nombre de rappels réservés et envoyés par lot.
+        now (datetime): Les échéances postérieures sont ignorées (par défaut: maintenant).
+        using (str): La base (shard) dont les rappels sont envoyés.
+
+    Returns:
+        int: Le nombre de rappels envoyés.
+
+    Raises:
+        Exception: L'erreur du backend e-mail; les rappels du lot en échec qui
+            n'ont pas été envoyés restent en attente.
+    """
+    now = now or timezone.now()
+    taches = Tache.objects.using(using)
+    users = get_user_model().objects.using(DEFAULT_DB_ALIAS)
+    sent = 0
+    after = None
+    while True:
+        batch = pending_reminders(now, after, batch_size, using=using)
+        if not batch:
+            return sent
+        after = batch[-1]
+        claimed_at = timezone.now()
+        claimed = claim_reminders([pk for _, pk in batch], claimed_at, using=using)
+        if claimed:
+            rows = list(
+                taches.filter(id__in=claimed)
+                .order_by('echeance', 'id')
+                .values_list('id', 'titre', 'echeance', 'proprietaire_id')
+            )
+            owners = {
+                pk: (username, email)
+                for pk, username, email in users.filter(id__in={row[3] for row in rows})
+                .exclude(email='')
+                .values_list('id', 'username', 'email')
+            }
+            pending = [
+                (pk, reminder_message(titre, echeance, owners[proprietaire_id]))
+                for pk, titre, echeance, proprietaire_id in rows
+                if proprietaire_id in owners
+            ]
+            try:
+                if pending:
+                    sent += pool.send_messages([message for _, message in pending]) or 0
+            except Exception as exc:
+                # Les rappels partis avant l'erreur restent réservés: ne libérer que les autres
+                unsent = pending[getattr(exc, 'sent_count', 0):]
+                release_reminders([pk for pk, _ in unsent], claimed_at, using=using)
+                logger.exception("Envoi de %s rappels d'échéance impossible", len(unsent))
+                raise
+        if len(batch) < batch_size:
+            return sent
@@ -0,0 +1,80 @@
+"""
+Renderers JSON rapides pour l'API REST.
+
+Ce module fournit un renderer basé sur orjson, beaucoup plus rapide que le module
+json de la bibliothèque standard utilisé par le JSONRenderer de DRF. La sortie est
+identique octet pour octet à celle de DRF pour les données de l'API (dates au format
+ISO 8601 avec 'Z', titres unicode non échappés, séparateurs compacts).
+
+Si orjson n'est pas installé, le renderer se comporte exactement comme le
+JSONRenderer de DRF.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+
+# Les dates sont déléguées à l'encodeur de DRF (suffixe 'Z' au lieu de '+00:00'),
+# et les clés non-str sont converties comme le fait json.dumps.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if orjson is not None else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON basé sur orjson, compatible avec le JSONRenderer de DRF.
+
+    Utilisé par défaut pour toutes les réponses de l'API (voir REST_FRAMEWORK
+    dans settings.py). Les cas que orjson ne sait pas reproduire à l'identique
+    sont délégués au JSONRenderer standard:
+        - orjson absent de l'environnement
+        - indentation demandée (API navigable, 'application/json; indent=4')
+        - sortie ASCII ou non compacte configurée dans REST_FRAMEWORK
+        - données non encodables par orjson (entiers > 64 bits, etc.)
+
+    Notes:
+        - Les types non natifs (dates, Decimal, lazy strings, QuerySet) passent par
+          l'encodeur de DRF via le paramètre 'default' d'orjson.
+        - Les caractères U+2028 et U+2029 sont échappés comme dans DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Sérialise les données en JSON et retourne une chaîne d'octets.
+
+        Args:
+            data: Les données à sérialiser (généralement serializer.data).
+            accepted_media_type (str): Le type de média négocié.
+            renderer_context (dict): Le contexte fourni par la vue.
+
+        Returns:
+            bytes: Le document JSON encodé en UTF-8.
+        """
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Même échappement que DRF pour produire un sous-ensemble strict de JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
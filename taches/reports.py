@@ -0,0 +1,194 @@
+"""
+Génération du rapport des tâches en map-reduce sur les workers Celery.
+
+Le rapport compte, pour chaque propriétaire, ses tâches et ses tâches terminées.
+Au lieu d'un seul worker parcourant tous les propriétaires, le calcul est découpé
+en partitions (shard, plage d'identifiants de propriétaires) exécutées en
+parallèle par un chord Celery:
+    - map    : report_partition agrège une partition (un GROUP BY sur l'index
+               (proprietaire, cree_le) du shard, limité à la plage);
+    - reduce : merge_report_partitions fusionne les agrégats partiels.
+
+Une partition en échec (base verrouillée, worker perdu) est réessayée seule:
+les agrégats des autres partitions restent dans le backend de résultats. Ils
+en sont supprimés dès la fusion terminée (forget_partitions), sans attendre
+l'expiration des résultats.
+
+Suivi: tant que le reduce n'est pas terminé, le résultat du rapport est dans
+l'état PROGRESS avec le nombre de partitions, et report_progress() compte les
+partitions déjà calculées (identifiants '<rapport>-p<index>').
+"""
+from celery import current_app, states
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Min, Q
+
+from .models import Tache
+from .results import get_async_redis
+
+# État Celery d'un rapport dont les partitions sont en cours de calcul
+REPORT_PROGRESS = 'PROGRESS'
+
+
+def owner_ranges(count=None):
+    """
+    Découpe les identifiants des utilisateurs en plages contiguës de même largeur.
+
+    Args:
+        count (int): Le nombre de plages (défaut: settings.REPORT_PARTITIONS).
+
+    Returns:
+        list: Les plages (début inclus, fin exclue), au plus `count`, vide sans utilisateur.
+    """
+    count = count or settings.REPORT_PARTITIONS
+    bounds = get_user_model().objects.aggregate(lo=Min('id'), hi=Max('id'))
+    if bounds['lo'] is None:
+        return []
+    lo, hi = bounds['lo'], bounds['hi'] + 1
+    width = -(-(hi - lo) // count)
+    return [(start, min(start + width, hi)) for start in range(lo, hi, width)]
+
+
+def report_partitions():
+    """
+    Retourne les partitions du rapport: chaque plage de propriétaires sur chaque shard.
+
+    Returns:
+        list: Les triplets (alias du shard, début, fin).
+    """
+    ranges = owner_ranges()
+    return [(alias, lo, hi) for alias in settings.TACHE_SHARDS for lo, hi in ranges]
+
+
+def partition_task_id(report_id, index):
+    """Identifiant de la tâche Celery d'une partition du rapport."""
+    return f'{report_id}-p{index}'
+
+
+def forget_partitions(report_id, count):
+    """
+    Supprime du backend de résultats les agrégats partiels d'un rapport fusionné.
+
+    Args:
+        report_id (str): L'identifiant du rapport.
+        count (int): Le nombre de partitions.
+    """
+    backend = current_app.backend
+    for index in range(count):
+        backend.forget(partition_task_id(report_id, index))
+
+
+def aggregate_partition(alias, lo, hi):
+    """
+    Agrège les tâches des propriétaires d'identifiant compris dans [lo, hi) sur un shard.
+
+    Args:
+        alias (str): Le shard.
+        lo (int): Premier identifiant de propriétaire (inclus).
+        hi (int): Dernier identifiant de propriétaire (exclu).
+
+    Returns:
+        dict: 'lignes' ([proprietaire_id, total, terminees] par propriétaire, par
+            identifiant croissant), 'total' et 'terminees' de la partition.
+    """
+    rows = (
+        Tache.objects.using(alias)
+        .filter(proprietaire_id__gte=lo, proprietaire_id__lt=hi)
+        .values('proprietaire_id')
+        .annotate(total=Count('id'), terminees=Count('id', filter=Q(termine=True)))
+        .order_by('proprietaire_id')
+        .values_list('proprietaire_id', 'total', 'terminees')
+    )
+    lignes = [list(row) for row in rows]
+    return {
+        'lignes': lignes,
+        'total': sum(row[1] for row in lignes),
+        'terminees': sum(row[2] for row in lignes),
+    }
+
+
+def merge_partials(partials):
+    """
+    Fusionne les agrégats partiels des partitions (étape reduce).
+
+    Args:
+        partials (list): Les résultats de aggregate_partition.
+
+    Returns:
+        dict: Le rapport: 'message', 'total', 'terminees', 'proprietaires',
+            'partitions' et 'lignes' (par identifiant de propriétaire croissant).
+    """
+    par_proprietaire = {}
+    for partial in partials:
+        for proprietaire_id, total, terminees in partial['lignes']:
+            cumul = par_proprietaire.setdefault(proprietaire_id, [0, 0])
+            cumul[0] += total
+            cumul[1] += terminees
+    lignes = [[pid, total, terminees] for pid, (total, terminees) in sorted(par_proprietaire.items())]
+    total = sum(row[1] for row in lignes)
+    terminees = sum(row[2] for row in lignes)
+    return {
+        'message': f"Le rapport de tâches a été généré avec succès ! ({total} tâches, dont {terminees} terminées)",
+        'total': total,
+        'terminees': terminees,
+        'proprietaires': len(lignes),
+        'partitions': len(partials),
+        'lignes': lignes,
+    }
+
+
+def count_done(payloads):
+    """
+    Compte les partitions calculées parmi les résultats bruts lus dans le backend.
+
+    Args:
+        payloads (list): Les valeurs des clés des partitions (None si absente).
+
+    Returns:
+        dict: {'partitions': nombre total, 'terminees': partitions calculées}.
+    """
+    backend = current_app.backend
+    done = sum(
+        1 for payload in payloads
+        if payload is not None and backend.decode_result(payload)['status'] == states.SUCCESS
+    )
+    return {'partitions': len(payloads), 'terminees': done}
+
+
+def progress_keys(report_id, meta):
+    """
+    Retourne les clés du backend de résultats des partitions d'un rapport en cours.
+
+    Args:
+        report_id (str): L'identifiant du rapport (tâche generate_task_report).
+        meta (dict): Le résultat stocké dans l'état PROGRESS.
+
+    Returns:
+        list: Les clés des résultats des partitions.
+    """
+    backend = current_app.backend
+    return [
+        backend.get_key_for_task(partition_task_id(report_id, index))
+        for index in range(meta['partitions'])
+    ]
+
+
+def report_progress(report_id, meta):
+    """
+    Compte les partitions calculées d'un rapport en cours, en une lecture groupée (MGET).
+
+    Args:
+        report_id (str): L'identifiant du rapport.
+        meta (dict): Le résultat stocké dans l'état PROGRESS.
+
+    Returns:
+        dict: {'partitions': nombre total, 'terminees': partitions calculées}.
+    """
+    keys = progress_keys(report_id, meta)
+    return count_done(current_app.backend.mget(keys) if keys else [])
+
+
+async def areport_progress(report_id, meta):
+    """Version asynchrone de report_progress (redis.asyncio, voir taches.results)."""
+    keys = progress_keys(report_id, meta)
+    return count_done(await get_async_redis().mget(keys) if keys else [])
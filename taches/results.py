@@ -0,0 +1,52 @@
+"""
+Lecture non bloquante des résultats Celery stockés dans Redis.
+
+AsyncResult interroge le backend de résultats de façon synchrone, ce qui bloque
+la boucle d'événements sous ASGI. Ce module lit directement la clé du résultat
+('celery-task-meta-<id>') avec redis.asyncio et la décode avec le backend Celery
+configuré, ce qui donne les mêmes état et résultat que AsyncResult.
+"""
+import asyncio
+import weakref
+
+from celery import current_app, states
+from django.conf import settings
+
+# Un client par boucle d'événements: les connexions redis.asyncio y sont liées
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis():
+    """
+    Retourne le client redis.asyncio du backend de résultats pour la boucle courante.
+
+    Returns:
+        redis.asyncio.Redis: Client partagé par toutes les requêtes de la boucle.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # Import différé: redis.asyncio (~35 ms) n'est pas chargé au démarrage ASGI
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(settings.CELERY_RESULT_BACKEND)
+        _clients[loop] = client
+    return client
+
+
+async def aget_task_meta(task_id):
+    """
+    Récupère l'état et le résultat d'une tâche Celery en un aller-retour Redis.
+
+    Args:
+        task_id (str): L'identifiant de la tâche Celery.
+
+    Returns:
+        dict: Les métadonnées décodées ('status', 'result', ...). Une tâche
+            inconnue du backend est PENDING, comme avec AsyncResult.
+    """
+    backend = current_app.backend
+    payload = await get_async_redis().get(backend.get_key_for_task(task_id))
+    if payload is None:
+        return {'task_id': task_id, 'status': states.PENDING, 'result': None}
+    return backend.decode_result(payload)
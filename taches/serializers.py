@@ -1,6 +1,32 @@
 from rest_framework import serializers
 from .models import Tache
 
+# Longueur maximale de la description en mode aperçu (?preview=1 sur la liste)
+DESCRIPTION_PREVIEW_LENGTH = 140
+
+
+class DescriptionPreviewField(serializers.Field):
+    """
+    Champ en lecture seule qui retourne un aperçu tronqué de la description.
+
+    Lit l'annotation 'description_apercu' posée par TacheViewSet (seuls les
+    premiers caractères sont alors lus en base), ou à défaut la description complète.
+    Une description tronquée se termine par '…'.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        apercu = getattr(instance, 'description_apercu', None)
+        return apercu if apercu is not None else instance.description
+
+    def to_representation(self, value):
+        if len(value) > DESCRIPTION_PREVIEW_LENGTH:
+            return value[:DESCRIPTION_PREVIEW_LENGTH].rstrip() + '…'
+        return value
+
 
 class TacheSerializer(serializers.ModelSerializer):
     """
@@ -16,15 +42,56 @@ class TacheSerializer(serializers.ModelSerializer):
         - description (str): Description détaillée de la tâche (optionnel, peut être vide).
         - cree_le (datetime, lecture seule): Date et heure de création au format ISO 8601.
         - termine (bool): Statut de réalisation de la tâche (False par défaut).
+        - echeance (datetime): Date d'échéance (optionnelle, null sans échéance).
+        - rappel_envoye_le (datetime, lecture seule): Date d'envoi du rappel d'échéance.
+        - rang (str, lecture seule): Clé de l'ordre manuel, modifiée par l'action deplacer.
         - proprietaire (str, lecture seule): Nom d'utilisateur du propriétaire de la tâche.
     
+    Arguments optionnels (sparse fieldsets, utilisés par TacheViewSet):
+        - fields (iterable): Ne garder que ces champs.
+        - omit (iterable): Retirer ces champs.
+        - description_preview (bool): Remplacer 'description' par un aperçu tronqué.
+
     Notes:
         - Le champ 'proprietaire' est en lecture seule et affiche le nom d'utilisateur.
         - Le champ 'proprietaire' ne peut pas être modifié via l'API (géré automatiquement par le ViewSet).
         - Les champs 'id' et 'cree_le' sont automatiquement générés et en lecture seule.
+        - Modifier l'échéance remet 'rappel_envoye_le' à None: un nouveau rappel
+          sera envoyé à la nouvelle échéance (voir taches.reminders).
     """
     proprietaire = serializers.ReadOnlyField(source='proprietaire.username')
     
     class Meta:
         model = Tache
         fields = '__all__'
+        read_only_fields = ('rappel_envoye_le',)
+
+    def __init__(self, *args, fields=None, omit=None, description_preview=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in omit or ():
+            self.fields.pop(name, None)
+        if description_preview and 'description' in self.fields:
+            self.fields['description'] = DescriptionPreviewField()
+
+    def validate(self, attrs):
+        # Nouvelle échéance: le rappel de l'ancienne ne vaut pas pour elle
+        if self.instance is not None and 'echeance' in attrs and attrs['echeance'] != self.instance.echeance:
+            attrs['rappel_envoye_le'] = None
+        return attrs
+
+
+class TacheArchiveeSerializer(serializers.Serializer):
+    """
+    Sérialiseur en lecture seule des tâches archivées (partitions de TacheArchivee).
+
+    Un Serializer simple plutôt qu'un ModelSerializer: chaque partition mensuelle
+    a son propre modèle, et une page peut mélanger plusieurs mois.
+    """
+    id = serializers.IntegerField(read_only=True)
+    titre = serializers.CharField(read_only=True)
+    description = serializers.CharField(read_only=True)
+    cree_le = serializers.DateTimeField(read_only=True)
+    archive_le = serializers.DateTimeField(read_only=True)
@@ -0,0 +1,186 @@
+"""
+Sharding des tâches par propriétaire sur plusieurs bases de données.
+
+Avec une seule base SQLite, toutes les écritures passent par un même verrou
+d'écriture, quel que soit le nombre de workers web. Les tâches (et leurs
+messages outbox, écrits dans la même transaction) sont donc réparties sur les
+bases de settings.TACHE_SHARDS selon l'identifiant de leur propriétaire:
+    - shard_for(user_id): base des tâches d'un utilisateur (jump consistent hash:
+      stable, et seul ~1/N des utilisateurs change de base quand on passe à N shards);
+    - shard_for_id(pk): base d'une ligne d'après son identifiant, chaque shard
+      numérotant ses lignes dans sa propre plage (SHARD_ID_RANGE);
+    - fan_out(func): exécute func(alias) sur tous les shards en parallèle
+      (nettoyage, rapports, administration).
+
+Les utilisateurs, tokens et tables Django restent dans la base 'default', qui
+est aussi le premier shard. Configuration locale avec plusieurs fichiers SQLite:
+    TACHE_SHARD_COUNT=4 python manage.py migrate --database shard1  (etc.)
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Modèles répartis par propriétaire (nom de modèle en minuscules)
+SHARDED_MODELS = {'tache', 'outboxmessage'}
+
+# Taille de la plage d'identifiants de chaque shard: le shard d'index i numérote
+# ses lignes à partir de i * SHARD_ID_RANGE
+SHARD_ID_RANGE = 10 ** 12
+
+
+def jump_hash(key, buckets):
+    """
+    Jump consistent hash (Lamping et Veach, 2014).
+
+    Args:
+        key (int): La clé à répartir (identifiant du propriétaire).
+        buckets (int): Le nombre de shards.
+
+    Returns:
+        int: L'index du shard, entre 0 et buckets - 1.
+    """
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_for(user_id):
+    """
+    Retourne l'alias de la base contenant les tâches d'un utilisateur.
+
+    Args:
+        user_id (int): L'identifiant du propriétaire.
+
+    Returns:
+        str: Un alias de settings.TACHE_SHARDS.
+    """
+    shards = settings.TACHE_SHARDS
+    return shards[jump_hash(int(user_id), len(shards))]
+
+
+def shard_for_id(pk):
+    """
+    Retourne l'alias de la base d'une tâche ou d'un message outbox d'après son identifiant.
+
+    Args:
+        pk (int): L'identifiant de la ligne.
+
+    Returns:
+        str: Un alias de settings.TACHE_SHARDS ('default' pour un identifiant hors plage).
+    """
+    shards = settings.TACHE_SHARDS
+    index = int(pk) // SHARD_ID_RANGE
+    return shards[index] if 0 <= index < len(shards) else DEFAULT_DB_ALIAS
+
+
+def _run_and_close(func, alias):
+    try:
+        return func(alias)
+    finally:
+        # Les connexions Django sont propres à chaque thread
+        connections.close_all()
+
+
+def fan_out(func, aliases=None):
+    """
+    Exécute func(alias) sur chaque shard, en parallèle (un thread par shard).
+
+    Args:
+        func (callable): Fonction prenant l'alias de la base.
+        aliases (list): Les shards concernés (par défaut: tous).
+
+    Returns:
+        list: Les résultats, dans l'ordre des shards.
+    """
+    aliases = list(settings.TACHE_SHARDS if aliases is None else aliases)
+    if len(aliases) == 1:
+        # Un seul shard: pas de thread, la connexion de l'appelant est réutilisée
+        return [func(aliases[0])]
+    with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+        return list(executor.map(lambda alias: _run_and_close(func, alias), aliases))
+
+
+class TacheShardRouter:
+    """
+    Routeur de bases de données: Tache et OutboxMessage sur le shard du propriétaire.
+
+    Les écritures d'une instance vont sur le shard de son propriétaire
+    (ou de son identifiant pour un OutboxMessage), et user.taches lit le shard
+    de l'utilisateur. Les autres lectures vont sur 'default': le code qui lit
+    un autre shard choisit la base avec .using(shard_for(user_id)) ou fan_out().
+    """
+
+    def _db_for_instance(self, model, instance):
+        if model._meta.model_name not in SHARDED_MODELS or instance is None:
+            return None
+        if instance._meta.label == settings.AUTH_USER_MODEL:
+            # Gestionnaire inverse user.taches: les tâches de cet utilisateur
+            return shard_for(instance.pk)
+        if instance._state.db:
+            return instance._state.db
+        proprietaire_id = getattr(instance, 'proprietaire_id', None)
+        if proprietaire_id is not None:
+            return shard_for(proprietaire_id)
+        if instance.pk is not None:
+            return shard_for_id(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_instance(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_instance(model, hints.get('instance'))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Tache.proprietaire pointe vers un utilisateur de 'default' depuis un autre shard
+        models = {obj1._meta.model_name, obj2._meta.model_name}
+        if models & SHARDED_MODELS:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS or db not in settings.TACHE_SHARDS:
+            return None
+        return app_label == 'taches' and model_name in SHARDED_MODELS
+
+
+def reserve_id_ranges(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Place les compteurs d'identifiants d'un shard au début de sa plage (signal post_migrate).
+
+    Seul SQLite est géré (table sqlite_sequence des colonnes AUTOINCREMENT).
+    N'abaisse jamais un compteur déjà plus haut.
+    """
+    if using not in settings.TACHE_SHARDS or connections[using].vendor != 'sqlite':
+        return
+    from .models import OutboxMessage, Tache
+
+    start = settings.TACHE_SHARDS.index(using) * SHARD_ID_RANGE
+    if not start:
+        return
+    with connections[using].cursor() as cursor:
+        for model in (Tache, OutboxMessage):
+            table = model._meta.db_table
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start])
+            elif row[0] < start:
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s', [start, table])
+
+
+def delete_user_taches(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Supprime les tâches d'un utilisateur supprimé sur son shard (signal pre_delete).
+
+    La suppression en cascade de Django ne concerne que la base de l'utilisateur.
+    """
+    from .models import Tache
+
+    shard = shard_for(instance.pk)
+    if shard != using:
+        Tache.objects.using(shard).filter(proprietaire_id=instance.pk).delete()
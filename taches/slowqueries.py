@@ -0,0 +1,399 @@
+"""
+Journal des requêtes SQL lentes, avec capture automatique du plan d'exécution.
+
+Les requêtes ORM de TacheViewSet, de l'administration ou des tâches Celery
+peuvent se dégrader à mesure que la table des tâches grossit. Chaque connexion
+à la base (web comme worker, tous shards) reçoit un execute wrapper
+(connection.execute_wrappers) qui chronomètre ses requêtes; une requête plus
+longue que SLOW_QUERY_THRESHOLD_MS est enregistrée avec:
+    - son empreinte: le SQL normalisé (valeurs et listes IN remplacées par '?'),
+      identique pour toutes les exécutions de la même requête;
+    - le site d'appel: la première ligne du projet dans la pile (hors Django);
+    - sa durée, et le plan EXPLAIN de la requête (au plus une capture par
+      empreinte et par processus toutes les SLOW_QUERY_EXPLAIN_INTERVAL secondes).
+
+Les enregistrements sont agrégés par empreinte dans Redis
+(SLOW_QUERY_REDIS_URL) par un script Lua, atomique entre processus et
+serveurs: nombre, durées totale et maximale, exemple le plus lent, sites
+d'appel. La commande `python manage.py slowqueries` affiche les pires requêtes.
+
+Coût: un appel à time.perf_counter() par requête rapide; la normalisation
+et l'EXPLAIN ne concernent que les requêtes lentes. L'EXPLAIN ne fait que
+planifier la requête, sans l'exécuter. L'écriture dans Redis est faite hors
+du chemin de la requête: l'enregistrement est placé dans une file bornée
+(SLOW_QUERY_QUEUE_SIZE) que vide un thread d'arrière-plan. Une requête lente
+ne fait donc jamais attendre Redis, même dans une transaction qui tient le
+verrou d'écriture SQLite. Si la file est pleine, ou si Redis est injoignable,
+la requête lente est seulement journalisée (fail-open).
+"""
+import hashlib
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .profiling import short_path
+
+logger = logging.getLogger(__name__)
+
+# Clés Redis: index des empreintes trié par durée totale, puis une table de
+# hachage d'agrégats et une table des sites d'appel par empreinte
+INDEX_KEY = 'slowqueries:index'
+KEY_PREFIX = 'slowqueries:'
+
+# KEYS: index, agrégats, sites d'appel. ARGV: empreinte, durée (ms), SQL
+# normalisé, SQL de l'exemple, site d'appel, plan ('' si non capturé), base,
+# horodatage, rétention (ms).
+RECORD_SCRIPT = """
+redis.call('ZINCRBY', KEYS[1], ARGV[2], ARGV[1])
+redis.call('HINCRBY', KEYS[2], 'nombre', 1)
+redis.call('HINCRBYFLOAT', KEYS[2], 'total_ms', ARGV[2])
+redis.call('HSETNX', KEYS[2], 'sql', ARGV[3])
+redis.call('HSETNX', KEYS[2], 'premier', ARGV[8])
+redis.call('HSET', KEYS[2], 'dernier', ARGV[8], 'base', ARGV[7])
+local max = tonumber(redis.call('HGET', KEYS[2], 'max_ms')) or -1
+if tonumber(ARGV[2]) > max then
+    redis.call('HSET', KEYS[2], 'max_ms', ARGV[2], 'exemple', ARGV[4], 'site', ARGV[5])
+end
+if ARGV[6] ~= '' then
+    redis.call('HSET', KEYS[2], 'plan', ARGV[6])
+end
+redis.call('HINCRBY', KEYS[3], ARGV[5], 1)
+redis.call('PEXPIRE', KEYS[2], ARGV[9])
+redis.call('PEXPIRE', KEYS[3], ARGV[9])
+"""
+
+# Normalisation du SQL: noms de savepoints, chaînes, nombres et paramètres
+# deviennent '?', puis les listes de '?' (IN, VALUES de bulk_create) sont
+# réduites à un seul élément
+_SAVEPOINT_RE = re.compile(r'(SAVEPOINT\s+)"[^"]*"', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PARAM_RE = re.compile(r'%s|\?')
+_LIST_RE = re.compile(r'\?(?:\s*,\s*\?)+')
+_ROWS_RE = re.compile(r'\((\?)\)(?:\s*,\s*\(\?\))+')
+_SPACE_RE = re.compile(r'\s+')
+
+# Requêtes dont le plan peut être demandé (pas de DDL, PRAGMA, SAVEPOINT, ...)
+_EXPLAINABLE_RE = re.compile(r'\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+
+# Fichiers ignorés dans la recherche du site d'appel
+_SKIPPED_PATH_PARTS = ('-packages', 'lib/python', __file__.rpartition('.')[0])
+
+# Dernière capture de plan par empreinte, dans ce processus, des plus
+# anciennes aux plus récentes. Sans verrou: une course entre threads ne coûte
+# qu'un EXPLAIN de plus. Au-delà de EXPLAINED_MAX empreintes, les plus
+# anciennes sont oubliées (leur plan sera capturé de nouveau).
+_explained = {}
+EXPLAINED_MAX = 1000
+
+# Enregistrements en attente d'écriture dans Redis (thread d'arrière-plan)
+SLOW_QUERY_QUEUE_SIZE = 1000
+_queue = queue.Queue(SLOW_QUERY_QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _redis():
+    """
+    Retourne le module redis.
+
+    Import différé: redis n'est pas chargé au démarrage des processus.
+    """
+    import redis
+
+    return redis
+
+
+def get_slow_query_redis():
+    """
+    Retourne le client Redis partagé du journal des requêtes lentes (settings.SLOW_QUERY_REDIS_URL).
+
+    Returns:
+        redis.Redis: Client thread-safe avec pool de connexions.
+    """
+    url = settings.SLOW_QUERY_REDIS_URL
+    client = _clients.get(url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(url)
+            if client is None:
+                client = _redis().Redis.from_url(
+                    url, socket_timeout=0.5, socket_connect_timeout=0.5, decode_responses=True,
+                )
+                _clients[url] = client
+    return client
+
+
+def normalize_sql(sql):
+    """
+    Normalise une requête SQL: même résultat pour toutes les exécutions d'une même requête.
+
+    Args:
+        sql (str): La requête, avec ses marqueurs de paramètres ou ses valeurs.
+
+    Returns:
+        str: La requête sur une ligne, valeurs et listes de valeurs remplacées par '?'.
+    """
+    sql = _SAVEPOINT_RE.sub(r'\1?', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PARAM_RE.sub('?', sql)
+    sql = _LIST_RE.sub('?', sql)
+    sql = _ROWS_RE.sub(r'(\1)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """
+    Calcule l'empreinte d'une requête SQL normalisée.
+
+    Args:
+        sql (str): La requête normalisée (voir normalize_sql).
+
+    Returns:
+        str: 16 caractères hexadécimaux.
+    """
+    return hashlib.sha1(sql.encode()).hexdigest()[:16]
+
+
+def call_site(frame=None):
+    """
+    Retourne la première ligne du projet dans la pile d'appels (hors Django et bibliothèques).
+
+    Args:
+        frame: La frame de départ (par défaut, celle de l'appelant).
+
+    Returns:
+        str: 'taches/views.py:42 (TacheViewSet.get_queryset)', ou '?' si la
+            requête ne vient pas du code du projet (migrations, commandes Django).
+    """
+    frame = frame or sys._getframe(1)
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if filename.startswith(base_dir) and not any(part in filename for part in _SKIPPED_PATH_PARTS):
+            return f'{short_path(filename)}:{frame.f_lineno} ({code.co_qualname})'
+        frame = frame.f_back
+    return '?'
+
+
+def explain(connection, sql, params):
+    """
+    Capture le plan d'exécution d'une requête.
+
+    L'EXPLAIN passe par un curseur du backend (connection.create_cursor()):
+    il n'est ni chronométré par les execute wrappers, ni compté dans
+    connection.queries ou assertNumQueries.
+
+    Args:
+        connection: La connexion Django de la requête.
+        sql (str): La requête exécutée.
+        params: Ses paramètres.
+
+    Returns:
+        str: Le plan, une ligne par nœud ('' si la requête ne peut pas être expliquée).
+    """
+    if not _EXPLAINABLE_RE.match(sql) or connection.needs_rollback:
+        return ''
+    try:
+        prefix = connection.ops.explain_query_prefix()
+        cursor = connection.create_cursor()
+        try:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception:
+        logger.debug("EXPLAIN impossible pour %s", sql[:200], exc_info=True)
+        return ''
+    # SQLite: (id, parent, notused, détail); PostgreSQL: une colonne de texte
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def record_slow_query(connection, sql, params, many, duration_ms, site, failed=False):
+    """
+    Journalise une requête lente et l'ajoute aux agrégats de son empreinte.
+
+    Args:
+        connection: La connexion Django de la requête.
+        sql (str): La requête exécutée.
+        params: Ses paramètres (une liste de jeux de paramètres si many).
+        many (bool): True pour un executemany (pas de plan capturé).
+        duration_ms (float): La durée d'exécution en millisecondes.
+        site (str): Le site d'appel (voir call_site).
+        failed (bool): True si la requête a levé une exception (pas de plan
+            capturé: verrou, transaction interrompue, ...).
+    """
+    normalized = normalize_sql(sql)
+    empreinte = fingerprint(normalized)
+    logger.warning(
+        "Requête lente%s (%.1f ms, %s, %s) %s: %s",
+        ' en échec' if failed else '', duration_ms, connection.alias, empreinte, site, normalized[:500],
+    )
+    plan = ''
+    now = time.monotonic()
+    if not (many or failed) and now - _explained.get(empreinte, -float('inf')) >= settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+        _explained.pop(empreinte, None)
+        _explained[empreinte] = now
+        while len(_explained) > EXPLAINED_MAX:
+            _explained.pop(next(iter(_explained)), None)
+        plan = explain(connection, sql, params)
+    keys = [INDEX_KEY, f'{KEY_PREFIX}{empreinte}', f'{KEY_PREFIX}{empreinte}:sites']
+    args = [
+        empreinte, round(duration_ms, 3), normalized, sql[:settings.SLOW_QUERY_MAX_SQL_LENGTH], site,
+        plan, connection.alias, timezone.now().isoformat(),
+        int(settings.SLOW_QUERY_RETENTION.total_seconds() * 1000),
+    ]
+    try:
+        _queue.put_nowait((keys, args))
+    except queue.Full:
+        logger.warning("Journal des requêtes lentes: file pleine, requête %s non agrégée", empreinte)
+        return
+    _start_writer()
+
+
+def _start_writer():
+    """Démarre le thread d'écriture dans Redis du processus, s'il ne tourne pas déjà."""
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_records, name='slowqueries-writer', daemon=True)
+            _writer.start()
+
+
+def _write_records():
+    """Boucle du thread d'écriture: agrège les enregistrements de la file dans Redis."""
+    redis = _redis()
+    while True:
+        keys, args = _queue.get()
+        try:
+            get_slow_query_redis().eval(RECORD_SCRIPT, len(keys), *keys, *args)
+        except redis.RedisError:
+            logger.warning("Journal des requêtes lentes: Redis indisponible, requête %s non agrégée", args[0])
+        except Exception:
+            logger.exception("Agrégation de la requête lente %s impossible", args[0])
+        finally:
+            _queue.task_done()
+
+
+def _after_fork():
+    # Le thread d'écriture du parent n'existe pas dans l'enfant (workers préforkés)
+    global _queue, _writer, _writer_lock
+    _queue = queue.Queue(SLOW_QUERY_QUEUE_SIZE)
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def flush_slow_queries():
+    """
+    Attend que les requêtes lentes en file soient agrégées dans Redis
+    (lecture des agrégats juste après des requêtes du même processus).
+    """
+    _queue.join()
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """
+    Execute wrapper qui chronomètre les requêtes et enregistre les requêtes lentes.
+
+    Installé sur chaque connexion par install_slow_query_log. Le seuil est relu
+    à chaque requête lente (override_settings dans les tests).
+    """
+    start = time.perf_counter()
+    failed = True
+    try:
+        result = execute(sql, params, many, context)
+        failed = False
+        return result
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            try:
+                record_slow_query(
+                    context['connection'], sql, params, many, duration_ms, call_site(sys._getframe(1)), failed,
+                )
+            except Exception:
+                # Le journal ne doit jamais faire échouer la requête observée
+                logger.exception("Enregistrement de la requête lente impossible")
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    """Ajoute slow_query_wrapper à une nouvelle connexion (signal connection_created)."""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+def slow_query_report(limit=20, order='total'):
+    """
+    Lit les agrégats des requêtes lentes, des pires aux moins pires.
+
+    Args:
+        limit (int): Le nombre d'empreintes retournées.
+        order (str): Le critère de tri: 'total' (durée cumulée), 'max',
+            'moyenne' ou 'nombre'.
+
+    Returns:
+        list: Les dicts {'empreinte', 'sql', 'nombre', 'total_ms', 'moyenne_ms',
+            'max_ms', 'exemple', 'site', 'sites' ({site: nombre}), 'plan',
+            'base', 'premier', 'dernier'}.
+    """
+    client = get_slow_query_redis()
+    empreintes = client.zrevrange(INDEX_KEY, 0, -1)
+    pipe = client.pipeline(transaction=False)
+    for empreinte in empreintes:
+        pipe.hgetall(f'{KEY_PREFIX}{empreinte}')
+        pipe.hgetall(f'{KEY_PREFIX}{empreinte}:sites')
+    results = pipe.execute()
+    entries, expired = [], []
+    for index, empreinte in enumerate(empreintes):
+        data, sites = results[2 * index], results[2 * index + 1]
+        if not data:
+            expired.append(empreinte)
+            continue
+        nombre, total = int(data['nombre']), float(data['total_ms'])
+        entries.append({
+            'empreinte': empreinte, 'sql': data['sql'], 'nombre': nombre,
+            'total_ms': total, 'moyenne_ms': total / nombre, 'max_ms': float(data['max_ms']),
+            'exemple': data['exemple'], 'site': data['site'],
+            'sites': dict(sorted(((site, int(count)) for site, count in sites.items()),
+                                 key=lambda item: -item[1])),
+            'plan': data.get('plan', ''), 'base': data['base'],
+            'premier': data['premier'], 'dernier': data['dernier'],
+        })
+    if expired:
+        # Agrégats expirés (SLOW_QUERY_RETENTION): retirés de l'index
+        client.zrem(INDEX_KEY, *expired)
+    if order != 'total':
+        key = {'max': 'max_ms', 'moyenne': 'moyenne_ms', 'nombre': 'nombre'}[order]
+        entries.sort(key=lambda entry: entry[key], reverse=True)
+    return entries[:limit]
+
+
+def reset_slow_queries():
+    """
+    Supprime tous les agrégats des requêtes lentes.
+
+    Returns:
+        int: Le nombre d'empreintes supprimées.
+    """
+    client = get_slow_query_redis()
+    empreintes = client.zrange(INDEX_KEY, 0, -1)
+    keys = [f'{KEY_PREFIX}{empreinte}{suffix}' for empreinte in empreintes for suffix in ('', ':sites')]
+    client.delete(INDEX_KEY, *keys)
+    return len(empreintes)
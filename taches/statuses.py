@@ -0,0 +1,84 @@
+"""
+Lecture groupée de l'état de plusieurs tâches Celery.
+
+Un tableau de bord qui suit plusieurs imports ou rapports interrogerait
+CheckTaskStatusView une fois par tâche, et chaque appel fait plusieurs
+allers-retours au backend (état, puis résultat ou progression). Ici, l'état et
+le résultat de toutes les tâches sont lus en un seul MGET, puis la progression
+de tous les rapports en cours (partitions calculées, voir taches.reports) en un
+second MGET, seulement s'il y a des rapports en cours: deux allers-retours au
+plus, quel que soit le nombre de tâches.
+
+Chaque état a la même forme que la réponse de CheckTaskStatusView, en plus
+compact: 'result' est omis s'il est vide.
+"""
+from celery import current_app, states
+
+from .reports import REPORT_PROGRESS, count_done, progress_keys
+from .results import get_async_redis
+
+
+def _decode(task_ids, payloads):
+    backend = current_app.backend
+    return {
+        task_id: backend.decode_result(payload) if payload is not None
+        else {'status': states.PENDING, 'result': None}
+        for task_id, payload in zip(task_ids, payloads)
+    }
+
+
+def _progress_plan(metas):
+    # Rapports en cours -> (clés de leurs partitions), à lire en un seul MGET
+    return {
+        task_id: progress_keys(task_id, meta['result'])
+        for task_id, meta in metas.items() if meta['status'] == REPORT_PROGRESS
+    }
+
+
+def _statuses(metas, plan, payloads):
+    statuses = {}
+    for task_id, meta in metas.items():
+        entry = {'state': meta['status']}
+        if meta['status'] == states.SUCCESS and meta['result'] is not None:
+            entry['result'] = meta['result']
+        elif meta['status'] == states.FAILURE:
+            entry['result'] = str(meta['result'])
+        statuses[task_id] = entry
+    offset = 0
+    for task_id, keys in plan.items():
+        statuses[task_id]['progress'] = count_done(payloads[offset:offset + len(keys)])
+        offset += len(keys)
+    return statuses
+
+
+def task_statuses(task_ids):
+    """
+    Récupère l'état, le résultat et la progression de plusieurs tâches.
+
+    Args:
+        task_ids (list): Les identifiants des tâches Celery (sans doublon).
+
+    Returns:
+        dict: {task_id: {'state', 'result' (si terminée ou en échec),
+            'progress' (rapport en cours)}}, dans l'ordre de task_ids. Une
+            tâche inconnue du backend est PENDING, comme avec AsyncResult.
+    """
+    backend = current_app.backend
+    if not task_ids:
+        return {}
+    metas = _decode(task_ids, backend.mget([backend.get_key_for_task(task_id) for task_id in task_ids]))
+    plan = _progress_plan(metas)
+    keys = [key for partition_keys in plan.values() for key in partition_keys]
+    return _statuses(metas, plan, backend.mget(keys) if keys else [])
+
+
+async def atask_statuses(task_ids):
+    """Version asynchrone de task_statuses (redis.asyncio, voir taches.results)."""
+    backend = current_app.backend
+    if not task_ids:
+        return {}
+    client = get_async_redis()
+    metas = _decode(task_ids, await client.mget([backend.get_key_for_task(task_id) for task_id in task_ids]))
+    plan = _progress_plan(metas)
+    keys = [key for partition_keys in plan.values() for key in partition_keys]
+    return _statuses(metas, plan, await client.mget(keys) if keys else [])
@@ -8,9 +8,28 @@ Les tâches sont définies avec le décorateur @shared_task, ce qui permet
 de les utiliser sans dépendance directe à l'instance de l'application Celery.
 """
 import time
+from datetime import date, datetime
 from celery import shared_task
-from django.core.mail import send_mail
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from .archives import archive_completed, purge_partitions
+from .artifacts import purge_artifacts, write_report_artifacts
+from .mail import send_mail
 from .models import Tache
+from .outbox import (
+    claim_message,
+    complete_message,
+    creation_email_payload,
+    dispatch_pending,
+    purge_processed,
+    release_message,
+)
+from .reminders import send_due
+from .reports import (
+    REPORT_PROGRESS, aggregate_partition, forget_partitions, merge_partials, partition_task_id, report_partitions,
+)
+from .sharding import fan_out, shard_for, shard_for_id
 
 @shared_task
 def tache_test_asynchrone():
@@ -42,7 +61,7 @@ def tache_test_asynchrone():
 
 
 @shared_task
-def send_creation_email(tache_id):
+def send_creation_email(tache_id, tache=None, outbox_id=None):
     """
     Envoie un e-mail de notification lors de la création d'une tâche.
     
@@ -52,109 +71,268 @@ def send_creation_email(tache_id):
     
     Args:
         tache_id (int): L'identifiant de la tâche qui vient d'être créée.
+        tache (dict): Instantané de la tâche (titre, description, proprietaire,
+            cree_le, termine) enregistré avec le message outbox. S'il est fourni,
+            la base n'est pas relue.
+        outbox_id (int): L'identifiant du message outbox à l'origine de l'envoi.
+            Un message publié plusieurs fois n'envoie qu'un seul e-mail (sauf
+            arrêt du worker entre l'envoi et le marquage: livraison au moins une fois).
     
     Utilisation:
+        # Via l'outbox (dans la transaction de création, voir taches.outbox)
+        enqueue('taches.tasks.send_creation_email', creation_email_payload(tache), using=shard)
+        
         # Exécuter de manière asynchrone (non-bloquant)
         send_creation_email.delay(tache_id)
-        
-        # Exécuter de manière asynchrone avec gestion du résultat
-        result = send_creation_email.apply_async(args=[tache_id])
     
     Returns:
         str: Un message de confirmation de l'envoi de l'e-mail.
     
-    Raises:
-        Tache.DoesNotExist: Si aucune tâche ne correspond à l'ID fourni.
-    
     Notes:
         - En développement, l'e-mail s'affiche dans la console du serveur Django.
         - En production, configurez EMAIL_BACKEND pour utiliser un vrai serveur SMTP.
+        - La connexion au serveur est gardée ouverte d'un e-mail à l'autre dans
+          chaque processus du worker (pool de connexions de taches.mail).
         - L'adresse 'admin@example.com' est factice et doit être remplacée en production.
     """
-    try:
-        # Récupérer la tâche depuis la base de données
-        tache = Tache.objects.get(id=tache_id)
-        
-        # Construire le sujet et le message de l'e-mail
-        sujet = f"Nouvelle tâche créée : {tache.titre}"
-        message = f"""
+    if tache is None:
+        # Ancien format de message (sans instantané): relire la tâche
+        try:
+            instance = Tache.objects.using(shard_for_id(tache_id)).get(id=tache_id)
+        except Tache.DoesNotExist:
+            return f"Erreur : Aucune tâche trouvée avec l'ID {tache_id}"
+        tache = creation_email_payload(instance)['tache']
+
+    if outbox_id is not None and not claim_message(outbox_id):
+        return f"E-mail déjà envoyé (ou en cours d'envoi) pour la tâche #{tache_id}"
+
+    # Construire le sujet et le message de l'e-mail
+    cree_le = datetime.fromisoformat(tache['cree_le'])
+    # Un saut de ligne dans l'en-tête Subject ferait échouer chaque envoi (BadHeaderError)
+    sujet = ' '.join(f"Nouvelle tâche créée : {tache['titre']}".split())
+    message = f"""
 Bonjour,
 
 Une nouvelle tâche vient d'être créée :
 
-Titre : {tache.titre}
-Description : {tache.description or 'Aucune description'}
-Créée par : {tache.proprietaire.username}
-Date de création : {tache.cree_le.strftime('%d/%m/%Y à %H:%M')}
-Statut : {'Terminée' if tache.termine else 'En cours'}
+Titre : {tache['titre']}
+Description : {tache['description'] or 'Aucune description'}
+Créée par : {tache['proprietaire']}
+Date de création : {cree_le.strftime('%d/%m/%Y à %H:%M')}
+Statut : {'Terminée' if tache['termine'] else 'En cours'}
 
 Cordialement,
 L'équipe de gestion de tâches
         """
-        
-        # Envoyer l'e-mail
+    
+    # Envoyer l'e-mail
+    try:
         send_mail(
             subject=sujet,
             message=message,
             from_email='noreply@taches.com',
             recipient_list=['admin@example.com'],
-            fail_silently=False,
         )
-        
-        return f"E-mail envoyé avec succès pour la tâche #{tache_id}"
-        
-    except Tache.DoesNotExist:
-        return f"Erreur : Aucune tâche trouvée avec l'ID {tache_id}"
+    except Exception:
+        # Remettre le message en attente: le dispatcher le republiera plus tard
+        if outbox_id is not None:
+            release_message(outbox_id)
+        raise
+    # Traité seulement une fois l'e-mail parti: un worker arrêté avant ne le perd pas
+    if outbox_id is not None:
+        complete_message(outbox_id)
+    
+    return f"E-mail envoyé avec succès pour la tâche #{tache_id}"
 
 
-@shared_task
-def generate_task_report():
+@shared_task(ignore_result=True)
+def dispatch_outbox():
+    """
+    Publie à Celery les messages de l'outbox en attente (voir taches.outbox).
+    
+    Planifiée par Celery Beat toutes les quelques secondes (CELERY_BEAT_SCHEDULE).
+    Chaque shard a sa propre outbox, publiée en parallèle. Les messages traités
+    depuis plus d'un jour sont supprimés au passage.
+    
+    Returns:
+        int: Le nombre de messages publiés.
+    """
+    def dispatch(using):
+        published = dispatch_pending(using=using)
+        purge_processed(using=using)
+        return published
+
+    return sum(fan_out(dispatch))
+
+
+@shared_task(ignore_result=True)
+def rebalance_ranks(proprietaire_id, outbox_id=None):
+    """
+    Réécrit les clés de rang de l'ordre manuel d'un utilisateur (voir taches.ranking).
+    
+    Demandée via l'outbox par un déplacement dont la nouvelle clé dépasse
+    RANK_REBALANCE_LENGTH caractères. Les tâches gardent leur ordre et
+    reçoivent des clés courtes et régulières.
+    
+    Args:
+        proprietaire_id (int): L'identifiant de l'utilisateur.
+        outbox_id (int): L'identifiant du message outbox à l'origine du rééquilibrage.
+    
+    Returns:
+        int: Le nombre de tâches réécrites.
+    """
+    if outbox_id is not None and not claim_message(outbox_id):
+        return 0
+    try:
+        count = Tache.objects.using(shard_for(proprietaire_id)).rebalance_ranks(proprietaire_id)
+    except Exception:
+        # Remettre le message en attente: le dispatcher le republiera plus tard
+        if outbox_id is not None:
+            release_message(outbox_id)
+        raise
+    if outbox_id is not None:
+        complete_message(outbox_id)
+    return count
+
+
+@shared_task(ignore_result=True)
+def send_due_reminders():
+    """
+    Envoie les rappels des tâches dont l'échéance est atteinte (voir taches.reminders).
+    
+    Planifiée par Celery Beat toutes les minutes (CELERY_BEAT_SCHEDULE). Les
+    rappels ne sont pas planifiés un à un dans le broker: chaque passage
+    parcourt les échéances atteintes de chaque shard, en parallèle, et envoie
+    les rappels par lots. Deux passages qui se chevauchent n'envoient pas deux
+    fois le même rappel.
+    
+    Returns:
+        int: Le nombre de rappels envoyés.
+    """
+    return sum(fan_out(lambda using: send_due(using=using)))
+
+
+@shared_task(bind=True)
+def generate_task_report(self, user_id=None):
     """
-    Génère un rapport de tâches de manière asynchrone.
+    Génère le rapport des tâches par propriétaire, en map-reduce sur les workers.
     
-    Cette tâche simule un traitement long (analyse, calculs, génération de PDF, etc.)
-    en attendant 15 secondes avant de retourner un message de succès.
+    Cette tâche découpe le calcul en partitions (shard, plage de propriétaires,
+    voir taches.reports) puis se remplace par un chord Celery: les partitions
+    (report_partition) sont calculées en parallèle par tous les workers
+    disponibles, puis fusionnées par merge_report_partitions. Le résultat du
+    chord est enregistré sous l'identifiant de cette tâche.
     
-    Elle peut être utilisée pour démontrer le suivi de progression d'une tâche
-    asynchrone depuis l'interface utilisateur React.
+    Args:
+        user_id (int): L'utilisateur qui demande le rapport. Les lignes du
+            rapport sont écrites dans des fichiers qui lui sont réservés (voir
+            taches.artifacts). Sans utilisateur, elles restent dans le résultat.
     
     Utilisation:
         # Exécuter de manière asynchrone (non-bloquant)
-        result = generate_task_report.delay()
+        result = generate_task_report.delay(request.user.id)
         
         # Récupérer l'ID de la tâche pour le suivi
         task_id = result.id
         
-        # Vérifier le statut plus tard
+        # Vérifier le statut plus tard (GET /api/check-report-status/<task_id>/)
         from celery.result import AsyncResult
         task_result = AsyncResult(task_id)
         if task_result.ready():
-            print(task_result.result)
+            print(task_result.result['message'])
     
     Returns:
-        str: Un message de confirmation de génération du rapport.
+        dict: Le rapport (voir taches.reports.merge_partials): 'message', 'total',
+            'terminees', 'proprietaires' et 'partitions', avec 'fichiers' et
+            'expire_le' (voir taches.artifacts.write_report_artifacts), ou
+            'lignes' sans user_id.
     
     Notes:
-        - Le traitement prend 15 secondes (simulation d'un long traitement)
-        - En production, cette tâche pourrait générer un vrai rapport PDF,
-          analyser des données, effectuer des calculs complexes, etc.
-        - L'utilisateur peut suivre la progression via l'ID de la tâche retourné
+        - Pendant le calcul, l'état est PROGRESS et CheckTaskStatusView indique
+          le nombre de partitions calculées.
+        - Le nombre de plages de propriétaires se règle avec REPORT_PARTITIONS
+          (multiplié par le nombre de shards).
+        - Une partition en échec est réessayée seule (REPORT_PARTITION_RETRIES fois).
+        - Les fichiers sont téléchargeables pendant REPORT_ARTIFACT_RETENTION
+          (GET /api/reports/<task_id>/<format>/).
+    """
+    # Import différé: celery.canvas (et celery.result) ne sont pas chargés au
+    # démarrage du processus web, qui importe ce module pour lancer les tâches
+    from celery import chord, group
+
+    partitions = report_partitions()
+    header = group(
+        report_partition.s(alias, lo, hi).set(task_id=partition_task_id(self.request.id, index))
+        for index, (alias, lo, hi) in enumerate(partitions)
+    )
+    if not self.request.is_eager:
+        self.update_state(state=REPORT_PROGRESS, meta={'partitions': len(partitions)})
+    if not partitions:
+        return merge_report_partitions([], report_id=self.request.id, user_id=user_id)
+    return self.replace(chord(header, merge_report_partitions.s(report_id=self.request.id, user_id=user_id)))
+
+
+@shared_task(
+    autoretry_for=(DatabaseError,),
+    retry_backoff=True,
+    max_retries=settings.REPORT_PARTITION_RETRIES,
+)
+def report_partition(alias, lo, hi):
     """
-    # Simuler un traitement long
-    time.sleep(15)
+    Étape map du rapport: agrège les tâches d'une plage de propriétaires sur un shard.
+    
+    Args:
+        alias (str): Le shard.
+        lo (int): Premier identifiant de propriétaire (inclus).
+        hi (int): Dernier identifiant de propriétaire (exclu).
+    
+    Returns:
+        dict: L'agrégat partiel (voir taches.reports.aggregate_partition).
+    
+    Notes:
+        - En cas d'erreur de base de données, seule cette partition est
+          recalculée (nouvelle tentative avec délai croissant, même task_id).
+    """
+    return aggregate_partition(alias, lo, hi)
+
+
+@shared_task
+def merge_report_partitions(partials, report_id=None, user_id=None):
+    """
+    Étape reduce du rapport: fusionne les agrégats partiels des partitions.
+    
+    Args:
+        partials (list): Les résultats de report_partition, dans l'ordre des partitions.
+        report_id (str): L'identifiant du rapport (nom des fichiers).
+        user_id (int): L'utilisateur qui a demandé le rapport.
     
-    # Retourner le message de succès
-    return "Le rapport de tâches a été généré avec succès !"
+    Returns:
+        dict: Le rapport complet (voir taches.reports.merge_partials), dont les
+            lignes sont remplacées par les fichiers du stockage 'reports' si
+            l'utilisateur est connu (voir taches.artifacts).
+    
+    Notes:
+        - Une fois le rapport fusionné, les agrégats partiels sont supprimés du
+          backend de résultats (taches.reports.forget_partitions).
+    """
+    rapport = merge_partials(partials)
+    if user_id is not None:
+        rapport = write_report_artifacts(report_id, user_id, rapport)
+    if report_id is not None:
+        forget_partitions(report_id, len(partials))
+    return rapport
 
 
 @shared_task
 def cleanup_completed_tasks():
     """
-    Supprime toutes les tâches marquées comme terminées.
+    Archive toutes les tâches marquées comme terminées.
     
-    Cette tâche asynchrone recherche toutes les tâches avec termine=True
-    et les supprime de la base de données. Utile pour le nettoyage
-    périodique des tâches complétées.
+    Cette tâche asynchrone déplace par lots les tâches avec termine=True vers
+    la partition mensuelle de l'archive (voir taches.archives), sur tous les
+    shards en parallèle. La table Tache
+    ne garde que les tâches actives, et l'historique reste consultable via
+    GET /api/archives/.
     
     Utilisation:
         # Exécuter de manière asynchrone (non-bloquant)
@@ -163,24 +341,47 @@ def cleanup_completed_tasks():
         # Exécuter de manière synchrone (pour les tests)
         count = cleanup_completed_tasks()
         
-        # Planifier avec Celery Beat (exemple dans settings.py)
-        # CELERY_BEAT_SCHEDULE = {
-        #     'cleanup-completed-tasks-weekly': {
-        #         'task': 'taches.tasks.cleanup_completed_tasks',
-        #         'schedule': crontab(hour=0, minute=0, day_of_week='sunday'),
-        #     },
-        # }
+        # Planification avec Celery Beat: voir CELERY_BEAT_SCHEDULE dans settings.py
     
     Returns:
-        int: Le nombre de tâches supprimées.
+        int: Le nombre de tâches archivées.
     
     Notes:
-        - Cette action est irréversible.
-        - En production, envisagez d'archiver les tâches plutôt que de les supprimer.
+        - Les archives sont supprimées par mois entiers par purge_archives,
+          après ARCHIVE_RETENTION_MONTHS mois.
+    """
+    return sum(fan_out(lambda using: archive_completed(using=using)))
+
+
+@shared_task
+def purge_archives():
     """
-    # Récupérer et supprimer toutes les tâches terminées
-    taches_terminees = Tache.objects.filter(termine=True)
-    count = taches_terminees.count()
-    taches_terminees.delete()
+    Supprime les partitions d'archive plus anciennes que la durée de conservation.
     
-    return count
\ No newline at end of file
+    Chaque mois d'archive est une table: la purge la supprime en une opération
+    (DROP TABLE), sans suppression ligne par ligne.
+    
+    Returns:
+        list: Les mois supprimés, au format 'AAAA-MM'.
+    """
+    today = timezone.localdate()
+    months = today.year * 12 + today.month - 1 - settings.ARCHIVE_RETENTION_MONTHS
+    before = date(months // 12, months % 12 + 1, 1)
+    dropped = set()
+    for months_dropped in fan_out(lambda using: purge_partitions(before, using=using)):
+        dropped.update(months_dropped)
+    return [f'{mois:%Y-%m}' for mois in sorted(dropped)]
+
+
+@shared_task
+def purge_report_artifacts():
+    """
+    Supprime les fichiers de rapports plus anciens que REPORT_ARTIFACT_RETENTION.
+    
+    Planifiée par Celery Beat (CELERY_BEAT_SCHEDULE). Les fichiers expirés ne
+    sont déjà plus servis par le téléchargement: la purge libère l'espace.
+    
+    Returns:
+        int: Le nombre de fichiers supprimés.
+    """
+    return purge_artifacts()
@@ -4,15 +4,93 @@ Tests unitaires pour l'application taches.
 Ce module contient tous les tests pour vérifier le bon fonctionnement
 du modèle Tache, du sérialiseur TacheSerializer, et du ViewSet TacheViewSet.
 """
+import asyncio
+import gzip
+import io
+import itertools
+import multiprocessing
+import random
+import signal
+import smtplib
+import subprocess
+import sys
+import tempfile
+import threading
 import time
-from django.test import TestCase
+import tracemalloc
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+import redis
+from celery import current_app
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.mail import BadHeaderError, EmailMessage
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.http import Http404, HttpResponse
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from .models import Tache
-from .serializers import TacheSerializer
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.renderers import JSONRenderer
+from config.spa import serve_asset, serve_index
+from config.storage import PrecompressedStaticFilesStorage
+from .archives import archive_completed, list_partitions, partition_model, purge_partitions
+from .artifacts import artifact_name, purge_artifacts
+from .async_views import AsyncTacheViewSet, AsyncTaskStatusBatchView
+from .filters import ORDERINGS
+from .groupcommit import GroupCommitter, commit_write, committer as groupcommit_committer
+from .loadshedding import BASSE, HAUTE, NORMALE, AdaptiveLimiter, LoadSheddingMiddleware, request_priority
+from .mail import EmailConnectionPool, pool as mail_pool
+from .management.commands.importprofile import parse_importtime
+from .management.commands.seed import generate_taches, task_counts
+from .management.commands.serve import parse_bind
+from .models import OutboxMessage, Profil, Tache, TacheQuerySet
+from .outbox import (
+    OUTBOX_CLAIM_LEASE,
+    OUTBOX_MAX_FAILURES,
+    OUTBOX_REPUBLISH_AFTER,
+    OUTBOX_RETRY_DELAY,
+    OUTBOX_RETRY_MAX_DELAY,
+    claim_message,
+    dispatch_pending,
+    enqueue,
+    requeue_abandoned,
+)
+from .parsers import FastJSONParser
+from .ranking import key_between, sequential_keys
+from .reminders import claim_reminders, pending_reminders, send_due
+from .profiling import (
+    Profiler, ProfilingMiddleware, StackSampler, connect_task_signals, leaf_functions,
+    task_postrun_profile, task_prerun_profile,
+)
+from .renderers import FastJSONRenderer
+from .serializers import DESCRIPTION_PREVIEW_LENGTH, TacheSerializer
+from . import slowqueries
+from .slowqueries import (
+    call_site, fingerprint, flush_slow_queries, install_slow_query_log,
+    normalize_sql, reset_slow_queries, slow_query_report,
+)
+from .sharding import SHARD_ID_RANGE, TacheShardRouter, fan_out, jump_hash, shard_for, shard_for_id
+from .reports import aggregate_partition, merge_partials, owner_ranges, progress_keys, report_partitions
+from .tasks import (
+    cleanup_completed_tasks, generate_task_report, merge_report_partitions, purge_report_artifacts,
+    rebalance_ranks, send_creation_email, send_due_reminders,
+)
+from .throttling import StartReportThrottle, get_throttle_redis
+from .views import TacheViewSet
 
 User = get_user_model()
 
@@ -425,4 +503,2525 @@ class TacheViewSetTest(APITestCase):
         self.assertEqual(ids[0], tache3.id)
         self.assertEqual(ids[1], tache2.id)
         self.assertEqual(ids[2], tache1.id)
-        self.assertEqual(ids[3], self.tache_user1.id)
\ No newline at end of file
+        self.assertEqual(ids[3], self.tache_user1.id)
+
+class FastJSONRendererTest(TestCase):
+    """Tests pour le renderer et le parser JSON basés sur orjson."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.tache = Tache.objects.create(
+            titre='Tâche unicode – café ☕ \u2028 fin',
+            description='Ligne 1\nLigne 2 « guillemets » 日本語',
+            proprietaire=self.user
+        )
+
+    def test_sortie_identique_drf(self):
+        """Test que la sortie est identique octet pour octet au JSONRenderer de DRF."""
+        data = TacheSerializer([self.tache] * 3, many=True).data
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_date_creation_format_drf(self):
+        """Test que cree_le et les datetime bruts sont encodés comme dans DRF."""
+        data = {'cree_le': self.tache.cree_le, 'id': self.tache.id}
+        rendu = FastJSONRenderer().render(data)
+        self.assertEqual(rendu, JSONRenderer().render(data))
+        self.assertIn(b'Z"', rendu)
+
+    def test_indentation_deleguee(self):
+        """Test que l'indentation demandée produit la même sortie que DRF."""
+        data = TacheSerializer(self.tache).data
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type)
+        )
+
+    def test_repli_sans_orjson(self):
+        """Test que le renderer et le parser fonctionnent sans orjson."""
+        data = TacheSerializer(self.tache).data
+        with mock.patch('taches.renderers.orjson', None), \
+                mock.patch('taches.parsers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+            parsed = FastJSONParser().parse(io.BytesIO(JSONRenderer().render(data)))
+        self.assertEqual(parsed['titre'], self.tache.titre)
+
+    def test_parser_invalide(self):
+        """Test qu'un corps JSON invalide lève une ParseError."""
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"titre": NaN}'))
+
+    def test_parser_unicode(self):
+        """Test que le parser décode les titres unicode."""
+        corps = '{"titre": "Réunion ☕", "termine": true}'.encode('utf-8')
+        data = FastJSONParser().parse(io.BytesIO(corps))
+        self.assertEqual(data, {'titre': 'Réunion ☕', 'termine': True})
+
+
+class SPAServingTest(TestCase):
+    """Tests pour le service du build React (config.spa et config.storage)."""
+
+    def setUp(self):
+        """Crée un faux build Vite dans un dossier temporaire."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        (self.root / 'assets').mkdir()
+        self.script = 'console.log("tâches");\n' * 100
+        (self.root / 'assets' / 'index-BxY12abC.js').write_text(self.script, encoding='utf-8')
+        (self.root / 'index.html').write_text('<!doctype html><div id="root"></div>' * 20)
+        (self.root / 'vite.svg').write_text('<svg></svg>')
+        self.factory = RequestFactory()
+
+    def test_asset_hache_cache_immuable(self):
+        """Test que les fichiers hachés de Vite ont un cache immuable d'un an."""
+        response = serve_asset(self.factory.get('/assets/index-BxY12abC.js'),
+                               'index-BxY12abC.js', self.root / 'assets')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(b''.join(response.streaming_content), self.script.encode())
+
+    def test_fichier_non_hache_revalide(self):
+        """Test que vite.svg est revalidé à chaque requête."""
+        response = serve_asset(self.factory.get('/vite.svg'), 'vite.svg', self.root)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+
+    def test_requete_conditionnelle_304(self):
+        """Test qu'un ETag connu retourne 304 Not Modified."""
+        request = self.factory.get('/vite.svg')
+        etag = serve_asset(request, 'vite.svg', self.root)['ETag']
+        response = serve_asset(
+            self.factory.get('/vite.svg', HTTP_IF_NONE_MATCH=etag), 'vite.svg', self.root
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_chemin_hors_racine_404(self):
+        """Test qu'un chemin sortant du build est refusé."""
+        with self.assertRaises(Http404):
+            serve_asset(self.factory.get('/assets/x'), '../../etc/passwd', self.root / 'assets')
+
+    def test_variante_precompressee(self):
+        """Test que collectstatic écrit un .gz servi aux clients qui l'acceptent."""
+        storage = PrecompressedStaticFilesStorage(location=self.root)
+        processed = list(storage.post_process({'assets/index-BxY12abC.js': None}))
+        self.assertEqual(processed, [('assets/index-BxY12abC.js', 'assets/index-BxY12abC.js', True)])
+
+        response = serve_asset(
+            self.factory.get('/assets/index-BxY12abC.js', HTTP_ACCEPT_ENCODING='gzip, deflate'),
+            'index-BxY12abC.js', self.root / 'assets'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(body, self.script.encode())
+
+    def test_index_en_memoire(self):
+        """Test que index.html est servi depuis la mémoire, gzip et 304 compris."""
+        response = serve_index(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'), self.root)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        with mock.patch('builtins.open', side_effect=AssertionError('relu sur disque')):
+            again = serve_index(
+                self.factory.get('/taches', HTTP_ACCEPT_ENCODING='gzip',
+                                 HTTP_IF_NONE_MATCH=response['ETag']),
+                self.root
+            )
+        self.assertEqual(again.status_code, 304)
+
+        (self.root / 'index.html').write_text('<!doctype html><p>nouveau build</p>')
+        fresh = serve_index(self.factory.get('/'), self.root)
+        self.assertEqual(fresh.content, b'<!doctype html><p>nouveau build</p>')
+
+
+class SparseFieldsetTest(APITestCase):
+    """Tests pour ?fields=, ?omit= et ?preview= sur TacheViewSet."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(
+            username='user1',
+            password='pass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.tache = Tache.objects.create(
+            titre='Longue tâche',
+            description='mot ' * 1000,
+            proprietaire=self.user
+        )
+        self.url = reverse('tache-list')
+
+    def test_fields_limite_reponse_et_sql(self):
+        """Test que ?fields= limite les champs et les colonnes lues."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'fields': 'id,titre,termine'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'titre', 'termine'})
+        sql = ctx.captured_queries[-1]['sql']
+        self.assertIn('"titre"', sql)
+        self.assertNotIn('"description"', sql)
+
+    def test_omit_retire_champ(self):
+        """Test que ?omit= retire les champs demandés."""
+        response = self.client.get(self.url, {'omit': 'description,proprietaire'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'titre', 'cree_le', 'termine', 'echeance', 'rappel_envoye_le', 'rang'})
+
+    def test_champ_inconnu_400(self):
+        """Test qu'un champ inconnu est refusé."""
+        response = self.client.get(self.url, {'fields': 'titre,mot_de_passe'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+    def test_preview_description_tronquee(self):
+        """Test que ?preview=1 tronque la description de la liste."""
+        response = self.client.get(self.url, {'preview': '1'})
+
+        description = response.data[0]['description']
+        self.assertTrue(description.endswith('…'))
+        self.assertLessEqual(len(description), DESCRIPTION_PREVIEW_LENGTH + 1)
+
+    def test_detail_description_complete(self):
+        """Test que le détail et les écritures gardent la description complète."""
+        url = reverse('tache-detail', kwargs={'pk': self.tache.id})
+        response = self.client.get(url, {'preview': '1'})
+        self.assertEqual(response.data['description'], self.tache.description)
+
+        response = self.client.patch(url, {'termine': True}, format='json')
+        self.assertEqual(response.data['description'], self.tache.description)
+
+    def test_liste_une_seule_requete(self):
+        """Test que le propriétaire n'est pas relu (pas de requête par tâche)."""
+        for i in range(5):
+            Tache.objects.create(titre=f'Tâche {i}', proprietaire=self.user)
+
+        # Authentification par token (1 requête) + liste (1 requête)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 6)
+
+
+class TacheStatutActionTest(APITestCase):
+    """Tests pour les actions complete, uncomplete et toggle (une requête SQL)."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(username='user1', password='pass123')
+        self.autre = User.objects.create_user(username='user2', password='pass123')
+        self.tache = Tache.objects.create(titre='À cocher', proprietaire=self.user)
+        self.tache_autre = Tache.objects.create(titre='Pas à moi', proprietaire=self.autre)
+        self.client.force_authenticate(self.user)
+
+    def url(self, action, tache=None):
+        return reverse(f'tache-{action}', kwargs={'pk': (tache or self.tache).id})
+
+    def test_toggle_une_seule_requete(self):
+        """Test que toggle inverse le statut en une requête et ne renvoie que le statut."""
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url('toggle'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'id': self.tache.id, 'termine': True})
+        self.tache.refresh_from_db()
+        self.assertTrue(self.tache.termine)
+
+        response = self.client.post(self.url('toggle'))
+        self.assertFalse(response.data['termine'])
+
+    def test_complete_uncomplete_idempotents(self):
+        """Test que complete et uncomplete fixent le statut quel que soit l'état actuel."""
+        with self.assertNumQueries(1):
+            self.client.post(self.url('complete'))
+        response = self.client.post(self.url('complete'))
+        self.assertTrue(response.data['termine'])
+
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url('uncomplete'))
+        self.assertFalse(response.data['termine'])
+        self.tache.refresh_from_db()
+        self.assertFalse(self.tache.termine)
+
+    def test_tache_autre_utilisateur_404(self):
+        """Test qu'on ne peut pas modifier la tâche d'un autre utilisateur."""
+        response = self.client.post(self.url('complete', self.tache_autre))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.tache_autre.refresh_from_db()
+        self.assertFalse(self.tache_autre.termine)
+        self.assertEqual(
+            self.client.post(reverse('tache-toggle', kwargs={'pk': 999999})).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_non_authentifie(self):
+        """Test que l'authentification reste obligatoire."""
+        response = APIClient().post(self.url('toggle'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TacheOrdreManuelTest(APITestCase):
+    """Tests pour l'ordre manuel des tâches (clés de rang, action deplacer)."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(username='user1', password='pass123')
+        self.autre = User.objects.create_user(username='user2', password='pass123')
+        self.shard = shard_for(self.user.pk)
+        self.client.force_authenticate(self.user)
+        # Créées en dernier = en tête: C, B, A
+        self.a, self.b, self.c = (
+            Tache.objects.create(titre=titre, proprietaire=self.user) for titre in 'ABC'
+        )
+        self.tache_autre = Tache.objects.create(titre='Pas à moi', proprietaire=self.autre)
+
+    def ordre(self):
+        response = self.client.get(reverse('tache-list'), {'ordering': 'rang', 'fields': 'titre'})
+        return ''.join(t['titre'] for t in response.data)
+
+    def deplacer(self, tache, apres):
+        return self.client.post(reverse('tache-deplacer', kwargs={'pk': tache.id}), {'apres': apres}, format='json')
+
+    def test_cles_de_rang(self):
+        """Test que key_between place toujours la clé strictement entre ses bornes."""
+        rng = random.Random(1)
+        cles = [key_between(None, None)]
+        for _ in range(2000):
+            i = rng.randrange(len(cles) + 1)
+            avant, apres = (cles[i - 1] if i else None), (cles[i] if i < len(cles) else None)
+            cle = key_between(avant, apres)
+            self.assertTrue((avant is None or avant < cle) and (apres is None or cle < apres))
+            cles.insert(i, cle)
+        self.assertLess(max(map(len, cles)), 12)
+        self.assertEqual(list(sequential_keys(3)), ['a0', 'a1', 'a2'])
+        with self.assertRaises(ValueError):
+            key_between('a1', 'a0')
+
+    def test_nouvelle_tache_en_tete(self):
+        """Test qu'une tâche créée par l'API est placée en tête de l'ordre manuel."""
+        self.client.post(reverse('tache-list'), {'titre': 'D'}, format='json')
+
+        self.assertEqual(self.ordre(), 'DCBA')
+
+    def test_deplacer_un_seul_update(self):
+        """Test qu'un déplacement n'écrit que la tâche déplacée, en un UPDATE."""
+        rangs = dict(Tache.objects.using(self.shard).values_list('id', 'rang'))
+
+        with CaptureQueriesContext(connections[self.shard]) as requetes:
+            response = self.deplacer(self.c, self.a.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.c.id)
+        self.assertEqual([q['sql'].split()[0] for q in requetes if q['sql'].startswith('UPDATE')], ['UPDATE'])
+        self.assertEqual(self.ordre(), 'BAC')
+        rangs[self.c.id] = response.data['rang']
+        self.assertEqual(dict(Tache.objects.using(self.shard).values_list('id', 'rang')), rangs)
+
+        self.deplacer(self.a, None)
+        self.assertEqual(self.ordre(), 'ABC')
+        self.deplacer(self.b, self.a.id)
+        self.assertEqual(self.ordre(), 'ABC')
+
+    def test_deplacer_requetes_invalides(self):
+        """Test les erreurs: voisin absent, inconnu, d'un autre utilisateur ou la tâche elle-même."""
+        url = reverse('tache-deplacer', kwargs={'pk': self.a.id})
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        for apres in ('x', self.tache_autre.id, 999999, self.a.id):
+            with self.subTest(apres=apres):
+                self.assertEqual(self.deplacer(self.a, apres).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.deplacer(self.tache_autre, None).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.ordre(), 'CBA')
+
+    def test_cles_longues_reequilibrees(self):
+        """Test que des déplacements répétés au même endroit demandent un rééquilibrage qui garde l'ordre."""
+        for _ in range(60):
+            # A et B échangés sans cesse juste après C: l'écart entre C et le suivant se réduit
+            self.deplacer(self.a, self.c.id)
+            self.deplacer(self.b, self.c.id)
+        self.assertEqual(self.ordre(), 'CBA')
+        message = OutboxMessage.objects.using(self.shard).filter(nom_tache='taches.tasks.rebalance_ranks').first()
+        self.assertIsNotNone(message)
+        self.assertEqual(message.payload, {'proprietaire_id': self.user.pk})
+
+        self.assertEqual(rebalance_ranks(**message.payload), 3)
+
+        self.assertEqual(self.ordre(), 'CBA')
+        rangs = Tache.objects.using(self.shard).filter(proprietaire=self.user).values_list('rang', flat=True)
+        self.assertTrue(all(len(rang) <= 2 for rang in rangs))
+
+    def test_reequilibrage_en_echec_remis_en_attente(self):
+        """Test qu'un rééquilibrage en échec remet son message outbox en attente."""
+        message = enqueue('taches.tasks.rebalance_ranks', {'proprietaire_id': self.user.pk}, using=self.shard)
+
+        with mock.patch.object(TacheQuerySet, 'rebalance_ranks', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                rebalance_ranks(outbox_id=message.id, **message.payload)
+        message.refresh_from_db(using=self.shard)
+        self.assertEqual((message.echecs, message.traite_le, message.reserve_jusqu_au), (1, None, None))
+
+        self.assertEqual(rebalance_ranks(outbox_id=message.id, **message.payload), 3)
+        message.refresh_from_db(using=self.shard)
+        self.assertIsNotNone(message.traite_le)
+
+    def test_deplacer_taches_sans_rang(self):
+        """Test que des tâches créées par bulk_create (rang vide) reçoivent un rang au déplacement."""
+        d, e = Tache.objects.using(self.shard).bulk_create(
+            Tache(titre=titre, proprietaire=self.user) for titre in 'DE'
+        )
+        self.assertEqual(self.ordre(), 'DECBA')
+
+        # Voisin précédent sans rang
+        response = self.deplacer(d, e.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ordre(), 'EDCBA')
+        self.assertFalse(Tache.objects.using(self.shard).filter(proprietaire=self.user, rang='').exists())
+
+        # Voisin suivant sans rang (placement en tête)
+        Tache.objects.using(self.shard).filter(id=e.id).update(rang='')
+        self.assertEqual(self.deplacer(self.a, None).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.ordre(), 'AEDCB')
+
+
+class TacheFiltresTest(APITestCase):
+    """Tests pour les filtres, tris et la pagination de la liste des tâches."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(username='user1', password='pass123')
+        self.client.force_authenticate(self.user)
+        autre = User.objects.create_user(username='user2', password='pass123')
+        Tache.objects.create(titre='Courses de autre', proprietaire=autre)
+        for jour, titre, termine in (
+            (1, 'courses', False), (2, 'Coder', True), (3, 'Courir', False), (4, 'appeler', True),
+        ):
+            tache = Tache.objects.create(titre=titre, termine=termine, proprietaire=self.user)
+            Tache.objects.filter(id=tache.id).update(
+                cree_le=datetime(2026, 3, jour, 12, tzinfo=dt_timezone.utc)
+            )
+        self.url = reverse('tache-list')
+
+    def titres(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [t['titre'] for t in response.data]
+
+    def test_filtres(self):
+        """Test les filtres termine, dates de création et préfixe du titre."""
+        self.assertEqual(self.titres(termine='true'), ['appeler', 'Coder'])
+        self.assertEqual(self.titres(cree_apres='2026-03-02', cree_avant='2026-03-04'), ['Courir', 'Coder'])
+        self.assertEqual(self.titres(cree_apres='2026-03-03T12:00:00Z'), ['appeler', 'Courir'])
+        self.assertEqual(self.titres(titre_prefixe='cou'), ['Courir', 'courses'])
+        self.assertEqual(self.titres(titre_prefixe='CO', termine='false'), ['Courir', 'courses'])
+
+    def test_tris(self):
+        """Test les tris autorisés et le tri par défaut."""
+        self.assertEqual(self.titres(), ['appeler', 'Courir', 'Coder', 'courses'])
+        self.assertEqual(self.titres(ordering='cree_le'), ['courses', 'Coder', 'Courir', 'appeler'])
+        self.assertEqual(self.titres(ordering='titre'), ['appeler', 'Coder', 'Courir', 'courses'])
+        self.assertEqual(self.titres(ordering='-titre'), ['courses', 'Courir', 'Coder', 'appeler'])
+
+    def test_pagination_combinee(self):
+        """Test que la pagination s'applique après les filtres et le tri."""
+        response = self.client.get(self.url, {'titre_prefixe': 'co', 'ordering': 'titre', 'limit': 2, 'offset': 1})
+
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([t['titre'] for t in response.data['results']], ['Courir', 'courses'])
+        self.assertIsNone(response.data['next'])
+
+    def test_parametres_invalides_400(self):
+        """Test que les valeurs invalides et les tris non autorisés sont refusés."""
+        for params in ({'termine': 'peut-etre'}, {'cree_apres': 'hier'}, {'ordering': 'description'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_detail_ignore_filtres(self):
+        """Test que les filtres ne s'appliquent pas au détail d'une tâche."""
+        tache = Tache.objects.get(titre='courses')
+        response = self.client.get(reverse('tache-detail', kwargs={'pk': tache.id}), {'termine': 'true'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+def simuler_statistiques(alias, lignes=1_000_000, proprietaires=1000):
+    """
+    Remplace les statistiques de l'optimiseur SQLite (sqlite_stat1) de la table
+    des tâches par celles d'une table de `lignes` tâches réparties entre
+    `proprietaires` utilisateurs, pour obtenir les plans d'exécution choisis à
+    cette échelle sans créer les lignes.
+    """
+    par_proprietaire = lignes // proprietaires
+    with connections[alias].cursor() as cursor:
+        cursor.execute('ANALYZE')
+        cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'taches_tache'")
+        cursor.executemany('INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (%s, %s, %s)', [
+            ('taches_tache', None, str(lignes)),
+            ('taches_tache', 'tache_prop_cree_idx', f'{lignes} {par_proprietaire} 1'),
+            ('taches_tache', 'tache_prop_titre_idx', f'{lignes} {par_proprietaire} 2'),
+            ('taches_tache', 'tache_prop_rang_idx', f'{lignes} {par_proprietaire} 1 1'),
+        ])
+        cursor.execute('ANALYZE sqlite_schema')
+
+
+class TacheFiltresPlanTest(TestCase):
+    """Plans d'exécution des filtres et tris de la liste à l'échelle d'un million de tâches."""
+    databases = '__all__'
+
+    FILTRES = {
+        'termine': 'true',
+        'cree_apres': '2026-01-01',
+        'cree_avant': '2026-06-01',
+        'titre_prefixe': 'rap',
+    }
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(username='user1', password='pass123')
+        simuler_statistiques(shard_for(self.user.pk))
+        self.factory = RequestFactory()
+
+    def plan(self, params):
+        """Retourne le plan SQLite de la requête de liste pour ces paramètres."""
+        view = TacheViewSet(action_map={'get': 'list'}, kwargs={}, format_kwarg=None)
+        view.request = view.initialize_request(self.factory.get('/', params))
+        view.request.user = self.user
+        return view.filter_queryset(view.get_queryset()).explain()
+
+    def test_aucun_parcours_complet(self):
+        """Test que chaque combinaison de filtres et de tri lit un index du propriétaire."""
+        for nombre in range(len(self.FILTRES) + 1):
+            for noms in itertools.combinations(self.FILTRES, nombre):
+                for ordering in ORDERINGS:
+                    params = {nom: self.FILTRES[nom] for nom in noms}
+                    params['ordering'] = ordering
+                    plan = self.plan(params)
+                    with self.subTest(params=params):
+                        self.assertRegex(plan, r'SEARCH taches_tache USING INDEX tache_prop_\w+_idx \(proprietaire_id=\?')
+                        self.assertNotRegex(plan, r'SCAN taches_tache(?! USING)')
+
+    def test_tri_sans_tri_temporaire(self):
+        """Test que les tris sans filtre d'intervalle sur une autre colonne suivent l'index."""
+        for ordering in ORDERINGS:
+            for params in ({}, {'termine': 'false'}):
+                plan = self.plan({**params, 'ordering': ordering})
+                with self.subTest(ordering=ordering, params=params):
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+
+class AsyncTacheViewSetTest(TestCase):
+    """Tests pour les vues asynchrones de l'API servies sous ASGI."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user1 = User.objects.create_user(username='user1', password='pass123')
+        self.user2 = User.objects.create_user(username='user2', password='pass123')
+        self.token1 = Token.objects.create(user=self.user1)
+        self.tache_user1 = Tache.objects.create(
+            titre='Tâche user1',
+            description='Description user1',
+            proprietaire=self.user1
+        )
+        self.tache_user2 = Tache.objects.create(titre='Tâche user2', proprietaire=self.user2)
+        self.headers = {'Authorization': f'Token {self.token1.key}'}
+
+    async def test_requete_asgi_servie_par_vue_async(self):
+        """Test que les requêtes ASGI utilisent AsyncTacheViewSet."""
+        response = await self.async_client.get(reverse('tache-list'), headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.resolver_match.func.cls, AsyncTacheViewSet)
+        self.assertEqual([t['id'] for t in response.json()], [self.tache_user1.id])
+
+    async def test_non_authentifie(self):
+        """Test que l'authentification par token reste obligatoire."""
+        response = await self.async_client.get(reverse('tache-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_sparse_fieldsets(self):
+        """Test que ?fields= s'applique aussi à la liste asynchrone."""
+        response = await self.async_client.get(
+            reverse('tache-list'), {'fields': 'id,titre'}, headers=self.headers
+        )
+
+        self.assertEqual(response.json(), [{'id': self.tache_user1.id, 'titre': 'Tâche user1'}])
+
+    async def test_create_tache(self):
+        """Test la création asynchrone d'une tâche."""
+        response = await self.async_client.post(
+            reverse('tache-list'), {'titre': 'Nouvelle tâche'},
+            content_type='application/json', headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['proprietaire'], 'user1')
+        message = await OutboxMessage.objects.aget()
+        self.assertEqual(message.payload['tache_id'], response.json()['id'])
+        self.assertEqual(await Tache.objects.filter(proprietaire=self.user1).acount(), 2)
+
+    async def test_toggle_asynchrone(self):
+        """Test que l'action toggle est servie par la vue async."""
+        response = await self.async_client.post(
+            reverse('tache-toggle', kwargs={'pk': self.tache_user1.id}), headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.resolver_match.func.cls, AsyncTacheViewSet)
+        self.assertEqual(response.json(), {'id': self.tache_user1.id, 'termine': True})
+
+    async def test_deplacer_asynchrone(self):
+        """Test que l'action deplacer est servie par la vue async."""
+        autre = await Tache.objects.acreate(titre='Autre tâche user1', proprietaire=self.user1)
+        response = await self.async_client.post(
+            reverse('tache-deplacer', kwargs={'pk': autre.id}), {'apres': self.tache_user1.id},
+            content_type='application/json', headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.resolver_match.func.cls, AsyncTacheViewSet)
+        await self.tache_user1.arefresh_from_db()
+        self.assertGreater(response.json()['rang'], self.tache_user1.rang)
+
+    async def test_create_titre_requis(self):
+        """Test que la validation renvoie 400 comme la vue synchrone."""
+        response = await self.async_client.post(
+            reverse('tache-list'), {'description': 'sans titre'},
+            content_type='application/json', headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('titre', response.json())
+
+    async def test_retrieve_update_delete(self):
+        """Test le détail, la modification partielle et la suppression."""
+        url = reverse('tache-detail', kwargs={'pk': self.tache_user1.id})
+
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.json()['titre'], 'Tâche user1')
+
+        response = await self.async_client.patch(
+            url, {'termine': True}, content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['termine'])
+        self.assertEqual(response.json()['titre'], 'Tâche user1')
+
+        response = await self.async_client.delete(url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Tache.objects.filter(id=self.tache_user1.id).aexists())
+
+    async def test_tache_autre_utilisateur_404(self):
+        """Test qu'un utilisateur ne peut pas accéder aux tâches d'un autre."""
+        url = reverse('tache-detail', kwargs={'pk': self.tache_user2.id})
+
+        response = await self.async_client.delete(url, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(await Tache.objects.filter(id=self.tache_user2.id).aexists())
+
+    async def test_statut_tache_celery(self):
+        """Test que le statut est lu dans Redis sans AsyncResult."""
+        payload = current_app.backend.encode({
+            'status': 'SUCCESS', 'result': 'Rapport prêt', 'traceback': None,
+            'children': [], 'date_done': None, 'task_id': 'abc',
+        })
+        redis_client = mock.AsyncMock()
+        redis_client.get.return_value = payload
+
+        with mock.patch('taches.results.get_async_redis', return_value=redis_client):
+            response = await self.async_client.get(
+                reverse('check-report-status', kwargs={'task_id': 'abc'}), headers=self.headers
+            )
+
+        self.assertEqual(response.json(), {'task_id': 'abc', 'state': 'SUCCESS', 'result': 'Rapport prêt'})
+
+    async def test_statut_tache_inconnue(self):
+        """Test qu'une tâche absente du backend est PENDING."""
+        redis_client = mock.AsyncMock()
+        redis_client.get.return_value = None
+
+        with mock.patch('taches.results.get_async_redis', return_value=redis_client):
+            response = await self.async_client.get(
+                reverse('check-report-status', kwargs={'task_id': 'inconnue'}), headers=self.headers
+            )
+
+        self.assertEqual(response.json()['state'], 'PENDING')
+
+    async def test_statut_rapport_en_cours(self):
+        """Test que la progression d'un rapport est lue en un MGET redis.asyncio."""
+        backend = current_app.backend
+
+        def meta(statut, resultat):
+            return backend.encode({
+                'status': statut, 'result': resultat, 'traceback': None,
+                'children': [], 'date_done': None, 'task_id': 'r',
+            })
+
+        redis_client = mock.AsyncMock()
+        redis_client.get.return_value = meta('PROGRESS', {'partitions': 3})
+        redis_client.mget.return_value = [meta('SUCCESS', {}), None, meta('RETRY', None)]
+
+        with mock.patch('taches.results.get_async_redis', return_value=redis_client), \
+                mock.patch('taches.reports.get_async_redis', return_value=redis_client):
+            response = await self.async_client.get(
+                reverse('check-report-status', kwargs={'task_id': 'r'}), headers=self.headers
+            )
+
+        self.assertEqual(response.json()['progress'], {'partitions': 3, 'terminees': 1})
+        redis_client.mget.assert_awaited_once_with([
+            backend.get_key_for_task(f'r-p{index}') for index in range(3)
+        ])
+
+    async def test_statut_groupe(self):
+        """Test que le statut groupé lit les tâches puis les partitions en deux MGET redis.asyncio."""
+        backend = current_app.backend
+
+        def meta(statut, resultat):
+            return backend.encode({
+                'status': statut, 'result': resultat, 'traceback': None,
+                'children': [], 'date_done': None, 'task_id': 'x',
+            })
+
+        redis_client = mock.AsyncMock()
+        redis_client.mget.side_effect = [
+            [meta('SUCCESS', 'Rapport prêt'), meta('PROGRESS', {'partitions': 2}), None],
+            [meta('SUCCESS', {}), None],
+        ]
+
+        with mock.patch('taches.statuses.get_async_redis', return_value=redis_client):
+            response = await self.async_client.post(
+                reverse('task-status-batch'), {'task_ids': ['a', 'r', 'z']},
+                content_type='application/json', headers=self.headers,
+            )
+
+        self.assertEqual(response.resolver_match.func.cls, AsyncTaskStatusBatchView)
+        self.assertEqual(response.json(), {
+            'a': {'state': 'SUCCESS', 'result': 'Rapport prêt'},
+            'r': {'state': 'PROGRESS', 'progress': {'partitions': 2, 'terminees': 1}},
+            'z': {'state': 'PENDING'},
+        })
+        self.assertEqual(redis_client.mget.await_count, 2)
+
+
+class ImportProfileCommandTest(TestCase):
+    """Tests pour la commande importprofile."""
+
+    def test_parse_importtime(self):
+        """Test l'analyse de la sortie de python -X importtime."""
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   celery.result\n'
+            'import time:      1500 |       4100 | taches.views\n'
+            'Unauthorized: /api/taches/\n'
+        )
+        self.assertEqual(
+            parse_importtime(stderr),
+            [('celery.result', 120, 120), ('taches.views', 1500, 4100)]
+        )
+
+    def test_rapport_point_entree_web(self):
+        """Test que la commande profile le point d'entrée web dans un processus neuf."""
+        out = io.StringIO()
+        call_command('importprofile', entry='web', top=5, stdout=out)
+
+        rapport = out.getvalue()
+        self.assertIn('== web ==', rapport)
+        self.assertIn('django', rapport)
+        self.assertIn('config.wsgi', rapport)
+
+
+
+class SeedCommandTest(TestCase):
+    """Tests pour la commande seed (données synthétiques en volume)."""
+
+    databases = '__all__'
+
+    options = {
+        'graine': 3, 'fin': datetime(2026, 6, 1, tzinfo=dt_timezone.utc), 'jours': 30,
+        'repartition': 'uniforme', 'description_moyenne': 80,
+        'part_sans_description': 0.2, 'part_terminees': 0.3,
+    }
+
+    def test_repartition_longue_traine(self):
+        """Test que le total est exact, la répartition déterministe et très inégale."""
+        counts = task_counts(1000, 100000, 1.2, seed=1)
+
+        self.assertEqual(sum(counts), 100000)
+        self.assertEqual(counts, task_counts(1000, 100000, 1.2, seed=1))
+        self.assertNotEqual(counts, task_counts(1000, 100000, 1.2, seed=2))
+        self.assertGreater(max(counts), 20 * sorted(counts)[500])
+
+    def test_taches_deterministes(self):
+        """Test que les tâches d'un utilisateur ne dépendent que de la graine et de son rang."""
+        taches = list(generate_taches(7, 42, 200, self.options))
+
+        self.assertEqual(taches, list(generate_taches(7, 42, 200, self.options)))
+        self.assertNotEqual(taches, list(generate_taches(8, 42, 200, self.options)))
+        dates = [cree_le for _, _, cree_le, *_ in taches]
+        self.assertTrue(all(
+            self.options['fin'] - timedelta(days=30) <= cree_le <= self.options['fin'] for cree_le in dates
+        ))
+        self.assertTrue(0.15 < sum(termine for _, _, _, termine, *_ in taches) / 200 < 0.45)
+        self.assertTrue(0.1 < sum(not description for _, description, *_ in taches) / 200 < 0.3)
+        # Ordre manuel: celui de la génération
+        rangs = [rang for *_, rang, _ in taches]
+        self.assertEqual(rangs, sorted(set(rangs)))
+
+    def test_generation(self):
+        """Test que la commande crée utilisateurs, tokens et tâches sur leurs shards."""
+        out = io.StringIO()
+        # Un seul processus: les processus enfants ne verraient pas la transaction du test
+        call_command('seed', utilisateurs=30, taches=500, graine=3, fin=self.options['fin'], workers=1, stdout=out)
+
+        users = User.objects.filter(username__startswith='seed')
+        self.assertEqual(users.count(), 30)
+        self.assertEqual(Token.objects.filter(user__in=users).count(), 30)
+        self.assertFalse(users.first().has_usable_password())
+        self.assertEqual(sum(Tache.objects.using(using).count() for using in settings.TACHE_SHARDS), 500)
+        for user in users:
+            # Toutes les tâches d'un utilisateur sont sur son shard
+            self.assertEqual(
+                Tache.objects.using(shard_for(user.id)).filter(proprietaire_id=user.id).count(),
+                sum(Tache.objects.using(using).filter(proprietaire_id=user.id).count() for using in settings.TACHE_SHARDS),
+            )
+        self.assertFalse(any(
+            Tache.objects.using(using).filter(cree_le__gt=self.options['fin']).exists()
+            for using in settings.TACHE_SHARDS
+        ))
+        self.assertIn('500 tâches créées', out.getvalue())
+
+    def test_prefixe_deja_utilise(self):
+        """Test qu'une deuxième génération avec le même préfixe est refusée."""
+        User.objects.create_user(username='seed0')
+
+        with self.assertRaises(CommandError):
+            call_command('seed', utilisateurs=1, taches=1, workers=1, stdout=io.StringIO())
+
+
+
+class ServeCommandTest(TestCase):
+    """Tests pour la commande serve (maître et workers préforkés)."""
+
+    def test_adresse_ecoute(self):
+        """Test l'analyse de l'adresse d'écoute."""
+        self.assertEqual(parse_bind('127.0.0.1:8000'), ('127.0.0.1', 8000))
+        self.assertEqual(parse_bind(':8080'), ('0.0.0.0', 8080))
+        self.assertEqual(parse_bind('[::1]:0'), ('::1', 0))
+        with self.assertRaises(CommandError):
+            parse_bind('localhost')
+
+    def test_asgi_sans_uvicorn(self):
+        """Test que les workers ASGI sont refusés sans uvicorn."""
+        with mock.patch('taches.management.commands.serve.uvicorn', None), self.assertRaises(CommandError):
+            call_command('serve', worker_type='asgi', stdout=io.StringIO())
+
+    def test_recyclage_et_remplacement_gracieux(self):
+        """Test le service par plusieurs workers, leur recyclage, HUP puis l'arrêt gracieux par TERM."""
+        process = subprocess.Popen(
+            [sys.executable, 'manage.py', 'serve', '--bind', '127.0.0.1:0', '--workers', '2',
+             '--max-requests', '2', '--max-requests-jitter', '0'],
+            cwd=settings.BASE_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        self.addCleanup(process.kill)
+        lignes = []
+
+        def attendre(motif, nombre=1):
+            while sum(motif in ligne for ligne in lignes) < nombre:
+                ligne = process.stdout.readline()
+                if not ligne:
+                    self.fail(f'Serveur arrêté avant « {motif} »: {lignes}')
+                lignes.append(ligne)
+
+        attendre('Écoute sur')
+        port = int(lignes[-1].split('http://127.0.0.1:')[1].split()[0])
+        attendre('prêt (génération 0)', 2)
+
+        def statut():
+            try:
+                return urllib.request.urlopen(f'http://127.0.0.1:{port}/api/taches/', timeout=5).status
+            except urllib.error.HTTPError as exc:
+                return exc.code
+
+        self.assertEqual([statut() for _ in range(5)], [401] * 5)
+        attendre('recyclé')
+
+        process.send_signal(signal.SIGHUP)
+        attendre('prêt (génération 1)', 2)
+        self.assertEqual(statut(), 401)
+
+        process.send_signal(signal.SIGTERM)
+        self.assertEqual(process.wait(timeout=30), 0)
+        lignes.extend(process.stdout.readlines())
+        process.stdout.close()
+        self.assertIn('Arrêt terminé.\n', lignes)
+
+
+def calcul_long(duree):
+    """Occupe le processeur pendant `duree` secondes (pile à échantillonner)."""
+    fin = time.perf_counter() + duree
+    while time.perf_counter() < fin:
+        sum(range(100))
+
+
+class ProfilageTest(APITestCase):
+    """Tests du profilage à la demande des requêtes et des tâches (taches.profiling)."""
+
+    def setUp(self):
+        """Utilisateur authentifié."""
+        self.user = User.objects.create_user(username='profile')
+        self.client.force_authenticate(self.user)
+
+    def test_echantillonnage_de_la_pile(self):
+        """Test que l'échantillonneur compte les piles du thread profilé."""
+        sampler = StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        calcul_long(0.1)
+        piles = sampler.stop()
+
+        self.assertGreater(sum(piles.values()), 5)
+        self.assertTrue(any('calcul_long (taches/tests.py:' in pile for pile in piles))
+        fonctions = dict(leaf_functions(''.join(f'{pile} {n}\n' for pile, n in piles.items())))
+        self.assertIn('calcul_long', ' '.join(fonctions))
+
+    def test_desactive_sans_cout(self):
+        """Test que le middleware se retire de la chaîne sans PROFILING_ENABLED."""
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_HEADER_TOKEN='secret')
+    def test_requete_profilee_par_en_tete(self):
+        """Test qu'une requête avec le jeton privilégié est profilée et enregistrée."""
+        response = self.client.get(
+            reverse('tache-list'), headers={'X-Profile': 'secret', 'X-Request-ID': 'req-42'}
+        )
+
+        self.assertEqual(response['X-Profile-Id'], 'req-42')
+        profil = Profil.objects.get()
+        self.assertEqual(
+            (profil.type, profil.identifiant, profil.nom, profil.statut),
+            ('requete', 'req-42', 'GET /api/taches/', '200'),
+        )
+        self.assertGreater(profil.duree_ms, 0)
+        self.assertIsNotNone(profil.memoire_pic)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_HEADER_TOKEN='secret')
+    async def test_requete_asgi_profilee(self):
+        """Test que le middleware profile aussi les vues asynchrones (ASGI)."""
+        token = await Token.objects.acreate(user=self.user)
+
+        response = await self.async_client.get(
+            reverse('tache-list'), headers={'X-Profile': 'secret', 'Authorization': f'Token {token.key}'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profil = await Profil.objects.aget(identifiant=response['X-Profile-Id'])
+        self.assertEqual(profil.nom, 'GET /api/taches/')
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_HEADER_TOKEN='secret')
+    async def test_demarrage_asgi_hors_de_la_boucle(self):
+        """Test que l'instantané tracemalloc est pris hors de la boucle, qui reste le thread échantillonné."""
+        token = await Token.objects.acreate(user=self.user)
+        boucle = threading.get_ident()
+        appels = []
+        start = Profiler.start
+
+        def espion(profiler, thread_id=None):
+            appels.append((threading.get_ident(), thread_id))
+            return start(profiler, thread_id)
+
+        with mock.patch.object(Profiler, 'start', espion):
+            await self.async_client.get(
+                reverse('tache-list'), headers={'X-Profile': 'secret', 'Authorization': f'Token {token.key}'}
+            )
+
+        [(thread_courant, thread_echantillonne)] = appels
+        self.assertNotEqual(thread_courant, boucle)
+        self.assertEqual(thread_echantillonne, boucle)
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_HEADER_TOKEN='secret')
+    def test_jeton_invalide(self):
+        """Test qu'un jeton invalide ne déclenche pas le profilage."""
+        response = self.client.get(reverse('tache-list'), headers={'X-Profile': 'devine'})
+
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(Profil.objects.exists())
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+    def test_taux_d_echantillonnage(self):
+        """Test que les requêtes sont profilées selon PROFILING_SAMPLE_RATE."""
+        response = self.client.get(reverse('tache-list'))
+
+        self.assertEqual(Profil.objects.get().identifiant, response['X-Profile-Id'])
+
+    @override_settings(PROFILING_ENABLED=True)
+    def test_tache_profilee_par_option(self):
+        """Test qu'une tâche lancée avec l'en-tête 'profile' est profilée, et elle seule."""
+        connect_task_signals()
+        self.addCleanup(task_prerun.disconnect, task_prerun_profile)
+        self.addCleanup(task_postrun.disconnect, task_postrun_profile)
+
+        merge_report_partitions.apply(args=[[]])
+        resultat = merge_report_partitions.apply(args=[[]], headers={'profile': True})
+
+        profil = Profil.objects.get()
+        self.assertEqual((profil.type, profil.identifiant), ('tache', resultat.id))
+        self.assertEqual((profil.nom, profil.statut), ('taches.tasks.merge_report_partitions', 'SUCCESS'))
+
+    def test_consultation_dans_l_admin(self):
+        """Test que le détail d'un profil affiche fonctions et allocations."""
+        profil = Profil.objects.create(
+            type='requete', identifiant='req-1', nom='GET /api/taches/', statut='200',
+            debut=datetime(2026, 3, 1, tzinfo=dt_timezone.utc), duree_ms=12.5, intervalle_ms=5,
+            echantillons=3, piles='main (a.py:1);lent (a.py:9) 2\nmain (a.py:1) 1\n',
+            allocations=[{'fichier': 'taches/views.py', 'ligne': 120, 'taille': 2048, 'nombre': 3}],
+        )
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+        response = self.client.get(reverse('admin:taches_profil_change', args=[profil.id]))
+
+        self.assertContains(response, 'lent (a.py:9)')
+        self.assertContains(response, 'taches/views.py:120')
+
+
+def redis_disponible(url):
+    """Retourne True si le serveur Redis de l'URL répond."""
+    try:
+        return redis.Redis.from_url(url, socket_connect_timeout=0.2).ping()
+    except redis.RedisError:
+        return False
+
+
+def consommer_jetons(tentatives, resultats):
+    """Appelé dans un processus séparé: tente `tentatives` requêtes et compte les acceptées."""
+    requete = SimpleNamespace(user=SimpleNamespace(pk=1, is_authenticated=True))
+    throttle = StartReportThrottle()
+    resultats.put(sum(throttle.allow_request(requete, None) for _ in range(tentatives)))
+
+
+THROTTLE_TEST_REDIS_URL = 'redis://localhost:6379/15'
+
+
+@skipUnless(redis_disponible(THROTTLE_TEST_REDIS_URL), 'Redis non disponible')
+@override_settings(THROTTLE_REDIS_URL=THROTTLE_TEST_REDIS_URL)
+class RedisTokenBucketThrottleTest(APITestCase):
+    """Tests pour la limitation de débit des endpoints Celery (token bucket Redis)."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        for key in get_throttle_redis().scan_iter('throttle:*'):
+            get_throttle_redis().delete(key)
+        self.user = User.objects.create_user(username='user1', password='pass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_limite_par_utilisateur_429(self):
+        """Test qu'au-delà de la rafale autorisée, la réponse est 429 avec Retry-After."""
+        url = reverse('start-report')
+        with override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'start-report-user': '2/min', 'start-report-global': None},
+        }), mock.patch('taches.views.generate_task_report') as task:
+            task.delay.return_value.id = 'abc'
+            codes = [self.client.post(url).status_code for _ in range(3)]
+            response = self.client.post(url)
+
+        self.assertEqual(codes, [202, 202, 429])
+        self.assertEqual(task.delay.call_count, 2)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 30)
+
+    def test_limite_globale_ne_consomme_pas_quota_utilisateur(self):
+        """Test qu'un refus global ne débite pas le bucket de l'utilisateur."""
+        autre = User.objects.create_user(username='user2', password='pass123')
+        requete = SimpleNamespace(user=self.user)
+        requete_autre = SimpleNamespace(user=autre)
+        throttle = StartReportThrottle()
+        with override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'start-report-user': '2/day', 'start-report-global': '1/day'},
+        }):
+            self.assertTrue(throttle.allow_request(requete_autre, None))
+            self.assertFalse(throttle.allow_request(requete, None))
+            tokens = get_throttle_redis().hget(f'throttle:start-report:user:{self.user.pk}', 'tokens')
+
+        self.assertEqual(float(tokens), 2.0)
+
+    def test_limite_respectee_entre_processus(self):
+        """Test que 4 processus concurrents n'obtiennent pas plus de jetons que la capacité."""
+        contexte = multiprocessing.get_context('fork')
+        resultats = contexte.Queue()
+        with override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'start-report-user': '10/day', 'start-report-global': '1000/day'},
+        }):
+            processus = [
+                contexte.Process(target=consommer_jetons, args=(25, resultats)) for _ in range(4)
+            ]
+            for p in processus:
+                p.start()
+            acceptees = sum(resultats.get(timeout=30) for _ in processus)
+            for p in processus:
+                p.join()
+
+        self.assertEqual(acceptees, 10)
+
+    def test_redis_indisponible_fail_open(self):
+        """Test qu'une panne Redis n'empêche pas de lancer un rapport."""
+        with override_settings(THROTTLE_REDIS_URL='redis://localhost:1/0'), \
+                mock.patch('taches.views.generate_task_report') as task:
+            task.delay.return_value.id = 'abc'
+            response = self.client.post(reverse('start-report'))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+
+SLOW_QUERY_TEST_REDIS_URL = 'redis://localhost:6379/14'
+
+
+def requete_taches(ids):
+    """Exécute une requête de tâches depuis le code du projet (site d'appel des tests)."""
+    return list(Tache.objects.filter(id__in=ids))
+
+
+class SlowQueryFingerprintTest(TestCase):
+    """Tests de l'empreinte et du site d'appel des requêtes lentes (taches.slowqueries)."""
+
+    def test_meme_empreinte_pour_valeurs_differentes(self):
+        """Test que les valeurs et la taille des listes IN n'influent pas sur l'empreinte."""
+        a = normalize_sql('SELECT "id" FROM "t" WHERE "id" IN (%s, %s, %s) AND "titre" = \'x\'\'y\' LIMIT 21')
+        b = normalize_sql('SELECT "id"  FROM "t"\n WHERE "id" IN (%s) AND "titre" = \'z\' LIMIT 5')
+
+        self.assertEqual(a, 'SELECT "id" FROM "t" WHERE "id" IN (?) AND "titre" = ? LIMIT ?')
+        self.assertEqual(fingerprint(a), fingerprint(b))
+        self.assertNotEqual(fingerprint(a), fingerprint(normalize_sql('SELECT "id" FROM "t2"')))
+
+    def test_insertion_groupee(self):
+        """Test que les lignes d'un bulk_create sont réduites à une seule."""
+        self.assertEqual(
+            normalize_sql('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" ("a", "b") VALUES (?)',
+        )
+
+    def test_site_appel_hors_django(self):
+        """Test que le site d'appel est la première ligne du projet dans la pile."""
+        self.assertRegex(call_site(), r'^taches/tests\.py:\d+ \(SlowQueryFingerprintTest\.test_site')
+
+
+@skipUnless(redis_disponible(SLOW_QUERY_TEST_REDIS_URL), 'Redis non disponible')
+@override_settings(SLOW_QUERY_REDIS_URL=SLOW_QUERY_TEST_REDIS_URL)
+class SlowQueryLogTest(TestCase):
+    """Tests du journal des requêtes lentes agrégé dans Redis."""
+
+    def setUp(self):
+        """Agrégats vidés, wrapper installé sur toutes les connexions et plans non encore capturés."""
+        reset_slow_queries()
+        for alias in settings.TACHE_SHARDS:
+            install_slow_query_log(None, connections[alias])
+        patcher = mock.patch.dict('taches.slowqueries._explained', clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @contextmanager
+    def tout_journaliser(self):
+        """Considère toutes les requêtes comme lentes, et capture leurs journaux."""
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0), \
+                self.assertLogs('taches.slowqueries', 'WARNING') as logs:
+            yield logs
+            flush_slow_queries()
+
+    def entrees_taches(self):
+        return [entry for entry in slow_query_report(100) if 'FROM "taches_tache"' in entry['sql']]
+
+    def test_agregation_par_empreinte(self):
+        """Test que deux exécutions d'une même requête sont agrégées avec site d'appel et plan."""
+        with self.tout_journaliser():
+            requete_taches([1, 2, 3])
+            requete_taches([4])
+
+        entry, = self.entrees_taches()
+        self.assertEqual(entry['nombre'], 2)
+        self.assertIn('IN (?)', entry['sql'])
+        self.assertGreaterEqual(entry['total_ms'], entry['max_ms'])
+        self.assertEqual(list(entry['sites']), [entry['site']])
+        self.assertRegex(entry['site'], r'^taches/tests\.py:\d+ \(requete_taches\)$')
+        self.assertIn('taches_tache', entry['plan'])
+
+    def test_explain_hors_comptage_des_requetes(self):
+        """Test que l'EXPLAIN n'est pas compté par assertNumQueries ni chronométré."""
+        with self.tout_journaliser(), self.assertNumQueries(1):
+            requete_taches([1])
+
+        self.assertEqual(self.entrees_taches()[0]['nombre'], 1)
+
+    def test_sous_le_seuil(self):
+        """Test qu'une requête plus rapide que le seuil n'est pas enregistrée."""
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=float('inf')):
+            requete_taches([1])
+
+        self.assertEqual(self.entrees_taches(), [])
+
+    def test_requete_en_echec(self):
+        """Test qu'une requête en échec est journalisée sans plan, puis l'exception propagée."""
+        with self.tout_journaliser() as logs, self.assertRaises(OperationalError), connection.cursor() as cursor:
+            cursor.execute('SELECT * FROM table_inexistante WHERE id = %s', [1])
+
+        self.assertIn('Requête lente en échec', logs.output[0])
+        entry, = [entry for entry in slow_query_report(100) if 'table_inexistante' in entry['sql']]
+        self.assertEqual(entry['plan'], '')
+
+    def test_redis_indisponible(self):
+        """Test que la requête aboutit si Redis est injoignable (fail-open)."""
+        client = mock.Mock()
+        client.eval.side_effect = redis.ConnectionError
+        with mock.patch('taches.slowqueries.get_slow_query_redis', return_value=client), \
+                self.tout_journaliser() as logs:
+            self.assertEqual(requete_taches([1]), [])
+
+        self.assertTrue(any('Redis indisponible' in line for line in logs.output))
+
+    def test_agregation_hors_du_chemin_de_la_requete(self):
+        """Test qu'une requête lente n'attend pas Redis: l'agrégation est faite en arrière-plan."""
+        client = mock.Mock()
+        ecriture = threading.Event()
+        client.eval.side_effect = lambda *args: ecriture.wait(5)
+        with mock.patch('taches.slowqueries.get_slow_query_redis', return_value=client), \
+                self.tout_journaliser():
+            debut = time.perf_counter()
+            requete_taches([1])
+            self.assertLess(time.perf_counter() - debut, 1)
+            ecriture.set()
+
+        client.eval.assert_called_once()
+
+    def test_plans_captures_bornes(self):
+        """Test que les empreintes dont le plan a été capturé sont bornées aux plus récentes."""
+        with mock.patch('taches.slowqueries.EXPLAINED_MAX', 2), self.tout_journaliser():
+            for index in range(4):
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT {index} AS colonne_{index}')
+
+        self.assertEqual(len(slowqueries._explained), 2)
+
+    def test_commande_rapport(self):
+        """Test que la commande affiche les pires requêtes avec leur plan, puis les supprime."""
+        with self.tout_journaliser():
+            requete_taches([1, 2])
+        sortie = io.StringIO()
+        call_command('slowqueries', '--plan', '--tri', 'max', stdout=sortie)
+
+        self.assertIn('FROM "taches_tache"', sortie.getvalue())
+        self.assertIn('requete_taches', sortie.getvalue())
+        self.assertIn('plan:', sortie.getvalue())
+
+        call_command('slowqueries', '--reset', stdout=io.StringIO())
+        sortie = io.StringIO()
+        call_command('slowqueries', stdout=sortie)
+        self.assertIn('Aucune requête lente', sortie.getvalue())
+
+
+class TransactionalOutboxTest(APITestCase):
+    """Tests pour l'outbox transactionnelle de l'e-mail de création."""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(username='user1', password='pass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def creer_tache(self, titre='Nouvelle tâche'):
+        return self.client.post(reverse('tache-list'), {'titre': titre}, format='json')
+
+    def test_creation_enregistre_message_sans_appel_broker(self):
+        """Test que la création écrit un message outbox sans contacter le broker."""
+        with mock.patch.object(current_app, 'send_task') as send_task:
+            response = self.creer_tache()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        send_task.assert_not_called()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.nom_tache, 'taches.tasks.send_creation_email')
+        self.assertEqual(message.payload['tache_id'], response.data['id'])
+        self.assertEqual(message.payload['tache']['proprietaire'], 'user1')
+        self.assertIsNone(message.envoye_le)
+
+    def test_creation_invalide_sans_message(self):
+        """Test qu'une création refusée n'enregistre aucun message."""
+        response = self.client.post(reverse('tache-list'), {'description': 'sans titre'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_dispatch_publie_par_lots_et_marque_envoye(self):
+        """Test que le dispatcher publie tous les messages en attente, dans l'ordre."""
+        for i in range(5):
+            self.creer_tache(f'Tâche {i}')
+
+        with mock.patch.object(current_app, 'send_task') as send_task:
+            publies = dispatch_pending(batch_size=2)
+            republies = dispatch_pending(batch_size=2)
+
+        self.assertEqual((publies, republies), (5, 0))
+        ids = list(OutboxMessage.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual([c.kwargs['kwargs']['outbox_id'] for c in send_task.call_args_list], ids)
+        self.assertFalse(OutboxMessage.objects.filter(envoye_le__isnull=True).exists())
+
+    def test_dispatch_broker_indisponible(self):
+        """Test qu'un échec de publication laisse le message en attente."""
+        self.creer_tache()
+
+        with mock.patch.object(current_app, 'send_task', side_effect=ConnectionError):
+            publies = dispatch_pending()
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(publies, 0)
+        self.assertIsNone(message.envoye_le)
+        self.assertEqual(message.tentatives, 1)
+
+    def test_consommateur_idempotent(self):
+        """Test qu'un message publié deux fois n'envoie qu'un seul e-mail."""
+        self.creer_tache()
+        message = OutboxMessage.objects.get()
+        kwargs = {**message.payload, 'outbox_id': message.id}
+
+        premier = send_creation_email(**kwargs)
+        second = send_creation_email(**kwargs)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Nouvelle tâche', mail.outbox[0].subject)
+        self.assertIn('succès', premier)
+        self.assertIn('déjà', second)
+
+    def test_echec_envoi_permet_nouvelle_tentative(self):
+        """Test qu'un envoi en échec libère le message pour la livraison suivante."""
+        self.creer_tache()
+        message = OutboxMessage.objects.get()
+        kwargs = {**message.payload, 'outbox_id': message.id}
+
+        with mock.patch('taches.tasks.send_mail', side_effect=OSError):
+            with self.assertRaises(OSError):
+                send_creation_email(**kwargs)
+        send_creation_email(**kwargs)
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    def publier(self, decalage=timedelta(0)):
+        """Lance le dispatcher à maintenant + decalage; retourne les kwargs publiés."""
+        with mock.patch.object(current_app, 'send_task') as send_task, \
+                mock.patch('taches.outbox.timezone.now', return_value=timezone.now() + decalage):
+            dispatch_pending()
+        return [c.kwargs['kwargs'] for c in send_task.call_args_list]
+
+    def test_echec_envoi_republie_par_le_dispatcher(self):
+        """Test qu'un message dont l'envoi a échoué est republié après un délai, puis livré."""
+        self.creer_tache()
+        kwargs, = self.publier()
+
+        with mock.patch('taches.tasks.send_mail', side_effect=OSError):
+            with self.assertRaises(OSError):
+                send_creation_email(**kwargs)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.echecs, message.traite_le, message.reserve_jusqu_au), (1, None, None))
+
+        self.assertEqual(self.publier(), [])
+        kwargs, = self.publier(OUTBOX_RETRY_DELAY)
+        send_creation_email(**kwargs)
+
+        self.assertEqual(len(mail.outbox), 1)
+        message.refresh_from_db()
+        self.assertIsNotNone(message.traite_le)
+        self.assertIsNone(message.publier_le)
+        self.assertEqual(self.publier(OUTBOX_RETRY_MAX_DELAY), [])
+
+    def test_echecs_repetes_abandon(self):
+        """Test que les reprises s'espacent, puis qu'un message toujours en échec est abandonné."""
+        self.creer_tache()
+        message = OutboxMessage.objects.get()
+        kwargs = {**message.payload, 'outbox_id': message.id}
+        delais = []
+
+        with mock.patch('taches.tasks.send_mail', side_effect=BadHeaderError):
+            for _ in range(OUTBOX_MAX_FAILURES):
+                with self.assertRaises(BadHeaderError):
+                    send_creation_email(**kwargs)
+                message.refresh_from_db()
+                if message.publier_le is not None:
+                    delais.append(message.publier_le - timezone.now())
+
+        self.assertEqual(len(delais), OUTBOX_MAX_FAILURES - 1)
+        self.assertEqual(delais, sorted(delais))
+        self.assertLessEqual(delais[-1], OUTBOX_RETRY_MAX_DELAY)
+        self.assertIsNotNone(message.abandonne_le)
+        self.assertIn('déjà', send_creation_email(**kwargs))
+        self.assertEqual(self.publier(timedelta(days=30)), [])
+
+        self.assertEqual(requeue_abandoned(OutboxMessage.objects.all()), 1)
+        kwargs, = self.publier()
+        send_creation_email(**kwargs)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_prise_en_charge_expiree_republiee(self):
+        """Test qu'un message pris en charge par un worker arrêté avant l'envoi est republié et livré."""
+        self.creer_tache()
+        kwargs, = self.publier()
+        # Worker arrêté entre la prise en charge et l'envoi
+        self.assertTrue(claim_message(kwargs['outbox_id']))
+
+        self.assertIn('déjà', send_creation_email(**kwargs))
+        self.assertEqual(self.publier(OUTBOX_CLAIM_LEASE - timedelta(seconds=1)), [])
+        kwargs, = self.publier(OUTBOX_CLAIM_LEASE + timedelta(seconds=1))
+        with mock.patch('taches.outbox.timezone.now', return_value=timezone.now() + OUTBOX_CLAIM_LEASE * 2):
+            send_creation_email(**kwargs)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIsNotNone(OutboxMessage.objects.get().traite_le)
+
+    def test_message_non_pris_en_charge_republie(self):
+        """Test qu'un message publié mais jamais pris en charge (perdu par le broker) est republié."""
+        self.creer_tache()
+        self.assertEqual(len(self.publier()), 1)
+
+        self.assertEqual(self.publier(OUTBOX_REPUBLISH_AFTER - timedelta(seconds=1)), [])
+        self.assertEqual(len(self.publier(OUTBOX_REPUBLISH_AFTER + timedelta(seconds=1))), 1)
+
+    def test_titre_sur_plusieurs_lignes(self):
+        """Test qu'un titre avec saut de ligne donne un sujet d'e-mail valide."""
+        self.creer_tache('Première ligne\nseconde ligne')
+        kwargs, = self.publier()
+
+        send_creation_email(**kwargs)
+
+        self.assertEqual(mail.outbox[0].subject, 'Nouvelle tâche créée : Première ligne seconde ligne')
+
+
+class RappelEcheanceTest(APITestCase):
+    """Tests des rappels d'échéance envoyés par lots (taches.reminders)."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(username='user1', password='pass123', email='user1@example.com')
+        self.shard = shard_for(self.user.pk)
+        self.maintenant = datetime(2026, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+    def creer_tache(self, titre, echeance, **kwargs):
+        return Tache.objects.create(titre=titre, echeance=echeance, proprietaire=kwargs.pop('proprietaire', self.user), **kwargs)
+
+    def envoyer(self, **kwargs):
+        """Lance un passage sur chaque shard (fan_out ne voit pas la transaction du test)."""
+        return sum(send_due(now=self.maintenant, using=alias, **kwargs) for alias in settings.TACHE_SHARDS)
+
+    def test_rappels_echus_envoyes_une_fois(self):
+        """Test que seules les échéances atteintes des tâches en cours sont rappelées, une fois."""
+        heure = timedelta(hours=1)
+        echue = self.creer_tache('Échue', self.maintenant - heure)
+        self.creer_tache('Future', self.maintenant + heure)
+        self.creer_tache('Terminée', self.maintenant - heure, termine=True)
+        self.creer_tache('Sans échéance', None)
+        sans_email = User.objects.create_user(username='user2', password='pass123')
+        anonyme = self.creer_tache('Sans adresse', self.maintenant - heure, proprietaire=sans_email)
+
+        envoyes = self.envoyer()
+        renvoyes = self.envoyer()
+
+        self.assertEqual((envoyes, renvoyes), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user1@example.com'])
+        self.assertIn('Échue', mail.outbox[0].subject)
+        self.assertIsNotNone(Tache.objects.using(self.shard).get(id=echue.id).rappel_envoye_le)
+        # Réservée sans envoi: n'est plus relue aux passages suivants
+        self.assertIsNotNone(Tache.objects.using(shard_for(sans_email.pk)).get(id=anonyme.id).rappel_envoye_le)
+
+    def test_lots_suivent_le_filigrane(self):
+        """Test que tous les rappels sont envoyés par lots, par échéance croissante."""
+        for minutes in (5, 1, 4, 2, 3):
+            self.creer_tache(f'T{minutes}', self.maintenant - timedelta(minutes=minutes))
+
+        with mock.patch.object(mail_pool, 'send_messages', wraps=mail_pool.send_messages) as send_messages:
+            envoyes = self.envoyer(batch_size=2)
+
+        self.assertEqual(envoyes, 5)
+        self.assertEqual([len(c.args[0]) for c in send_messages.call_args_list], [2, 2, 1])
+        self.assertEqual([m.subject for m in mail.outbox], [f'Rappel : T{m}' for m in (5, 4, 3, 2, 1)])
+
+    def test_passages_simultanes_reservation_unique(self):
+        """Test qu'un rappel lu par deux passages n'est réservé que par l'un d'eux."""
+        tache = self.creer_tache('Échue', self.maintenant - timedelta(minutes=1))
+        premier = [pk for _, pk in pending_reminders(self.maintenant, using=self.shard)]
+        second = [pk for _, pk in pending_reminders(self.maintenant, using=self.shard)]
+
+        self.assertEqual(claim_reminders(premier, self.maintenant, using=self.shard), [tache.id])
+        self.assertEqual(claim_reminders(second, self.maintenant, using=self.shard), [])
+
+    def test_echec_envoi_libere_les_rappels(self):
+        """Test qu'un envoi en échec laisse les rappels du lot en attente."""
+        self.creer_tache('Échue', self.maintenant - timedelta(minutes=1))
+
+        with mock.patch.object(mail_pool, 'send_messages', side_effect=smtplib.SMTPException):
+            with self.assertLogs('taches.reminders', 'ERROR'), self.assertRaises(smtplib.SMTPException):
+                self.envoyer()
+        self.assertFalse(Tache.objects.using(self.shard).filter(rappel_envoye_le__isnull=False).exists())
+
+        self.assertEqual(self.envoyer(), 1)
+
+    def test_echec_partiel_garde_les_rappels_envoyes(self):
+        """Test qu'un lot en échec partiel ne libère que les rappels non envoyés."""
+        for minutes in (3, 2, 1):
+            self.creer_tache(f'T{minutes}', self.maintenant - timedelta(minutes=minutes))
+        connexion = connexion_factice(side_effect=[1, smtplib.SMTPDataError(451, b'Plus tard')])
+        mail_pool.close_all()
+
+        with mock.patch('taches.mail.get_connection', return_value=connexion):
+            with self.assertLogs('taches.reminders', 'ERROR'), self.assertRaises(smtplib.SMTPDataError):
+                self.envoyer()
+
+        reserves = Tache.objects.using(self.shard).filter(rappel_envoye_le__isnull=False)
+        self.assertEqual([t.titre for t in reserves], ['T3'])
+        self.assertEqual(self.envoyer(), 2)
+        self.assertEqual([m.subject for m in mail.outbox], ['Rappel : T2', 'Rappel : T1'])
+
+    def test_nouvelle_echeance_nouveau_rappel(self):
+        """Test que modifier l'échéance via l'API réarme le rappel, qui reste en lecture seule."""
+        tache = self.creer_tache('Échue', self.maintenant - timedelta(minutes=1))
+        self.envoyer()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        url = reverse('tache-detail', args=[tache.id])
+
+        self.client.patch(url, {'titre': 'Renommée', 'rappel_envoye_le': None}, format='json')
+        self.assertIsNotNone(Tache.objects.using(self.shard).get(id=tache.id).rappel_envoye_le)
+
+        response = self.client.patch(url, {'echeance': '2026-02-28T18:00:00Z'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['rappel_envoye_le'])
+        self.assertEqual(self.envoyer(), 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_date_de_rappel_dans_la_liste(self):
+        """Test que la liste et le détail exposent la date d'envoi du rappel."""
+        tache = self.creer_tache('Échue', self.maintenant - timedelta(minutes=1))
+        self.envoyer()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        liste = self.client.get(reverse('tache-list'))
+        detail = self.client.get(reverse('tache-detail', args=[tache.id]))
+
+        self.assertIsNotNone(liste.data[0]['rappel_envoye_le'])
+        self.assertEqual(detail.data['rappel_envoye_le'], liste.data[0]['rappel_envoye_le'])
+
+    def test_tache_celery(self):
+        """Test que la tâche périodique parcourt les shards."""
+        self.creer_tache('Échue', datetime.now(dt_timezone.utc) - timedelta(minutes=1))
+        with mock.patch('taches.tasks.fan_out', side_effect=lambda func: [func(alias) for alias in settings.TACHE_SHARDS]):
+            self.assertEqual(send_due_reminders(), 1)
+
+    def test_parcours_par_index_partiel(self):
+        """Test que le parcours des rappels lit l'index partiel, sans tri temporaire."""
+        connexion = connections[self.shard]
+        for filigrane in (None, (self.maintenant - timedelta(days=1), 10)):
+            with CaptureQueriesContext(connexion) as requetes:
+                pending_reminders(self.maintenant, filigrane, using=self.shard)
+            with connexion.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {requetes[0]['sql']}")
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+            with self.subTest(filigrane=filigrane):
+                self.assertIn('tache_rappel_en_attente_idx', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+def connexion_factice(**kwargs):
+    """Connexion e-mail simulée (backend SMTP sans serveur)."""
+    return mock.Mock(send_messages=mock.Mock(return_value=1, **kwargs))
+
+
+class EmailConnectionPoolTest(TestCase):
+    """Tests du pool de connexions e-mail des workers (taches.mail)."""
+
+    def setUp(self):
+        self.pool = EmailConnectionPool()
+        self.message = EmailMessage('Sujet', 'Corps', 'noreply@taches.com', ['admin@example.com'])
+
+    def test_connexion_reutilisee(self):
+        """Test que plusieurs envois successifs utilisent une seule connexion."""
+        connexion = connexion_factice()
+        with mock.patch('taches.mail.get_connection', return_value=connexion) as get_connection:
+            for _ in range(3):
+                self.assertEqual(self.pool.send_messages([self.message]), 1)
+
+        get_connection.assert_called_once()
+        connexion.open.assert_called_once()
+        connexion.close.assert_not_called()
+        self.assertEqual(connexion.send_messages.call_count, 3)
+
+    def test_connexion_inactive_fermee(self):
+        """Test qu'une connexion inactive depuis trop longtemps est fermée puis remplacée."""
+        ancienne, nouvelle = connexion_factice(), connexion_factice()
+        with mock.patch('taches.mail.get_connection', side_effect=[ancienne, nouvelle]):
+            self.pool.send_messages([self.message])
+            with override_settings(EMAIL_POOL_IDLE_TIMEOUT=0):
+                self.pool.send_messages([self.message])
+
+        ancienne.close.assert_called_once()
+        nouvelle.send_messages.assert_called_once()
+
+    def test_reconnexion_apres_deconnexion(self):
+        """Test qu'un envoi sur une connexion coupée est refait sur une nouvelle connexion."""
+        coupee = connexion_factice(side_effect=smtplib.SMTPServerDisconnected)
+        nouvelle = connexion_factice()
+        with mock.patch('taches.mail.get_connection', side_effect=[coupee, nouvelle]):
+            self.assertEqual(self.pool.send_messages([self.message]), 1)
+
+        coupee.close.assert_called_once()
+        nouvelle.send_messages.assert_called_once_with([self.message])
+        self.assertEqual(self.pool._idle[0][0], nouvelle)
+
+    def test_reprise_sans_renvoi(self):
+        """Test qu'après une déconnexion, seuls les messages non envoyés sont renvoyés."""
+        messages = [EmailMessage(f'Sujet {i}', 'Corps', 'noreply@taches.com', ['admin@example.com']) for i in range(3)]
+        coupee = connexion_factice(side_effect=[1, smtplib.SMTPServerDisconnected])
+        nouvelle = connexion_factice()
+        with mock.patch('taches.mail.get_connection', side_effect=[coupee, nouvelle]):
+            self.assertEqual(self.pool.send_messages(messages), 3)
+
+        self.assertEqual(coupee.send_messages.call_args_list, [mock.call([messages[0]]), mock.call([messages[1]])])
+        self.assertEqual(nouvelle.send_messages.call_args_list, [mock.call([messages[1]]), mock.call([messages[2]])])
+
+    def test_erreur_indique_les_messages_envoyes(self):
+        """Test que l'erreur d'un envoi indique combien de messages sont partis avant elle."""
+        messages = [self.message] * 3
+        connexion = connexion_factice(side_effect=[1, 1, smtplib.SMTPDataError(451, b'Plus tard')])
+        with mock.patch('taches.mail.get_connection', return_value=connexion):
+            with self.assertRaises(smtplib.SMTPDataError) as erreur:
+                self.pool.send_messages(messages)
+
+        self.assertEqual(erreur.exception.sent_count, 2)
+
+    def test_deconnexions_repetees(self):
+        """Test que l'erreur est remontée si la nouvelle connexion échoue aussi."""
+        connexions = [connexion_factice(side_effect=ConnectionResetError) for _ in range(2)]
+        with mock.patch('taches.mail.get_connection', side_effect=connexions):
+            with self.assertRaises(ConnectionResetError):
+                self.pool.send_messages([self.message])
+
+        self.assertEqual(self.pool._idle, [])
+
+    def test_erreur_non_reessayee(self):
+        """Test qu'un refus du serveur n'est pas réessayé et ferme la connexion."""
+        refus = smtplib.SMTPRecipientsRefused({'admin@example.com': (550, b'Inconnu')})
+        connexion = connexion_factice(side_effect=refus)
+        with mock.patch('taches.mail.get_connection', return_value=connexion) as get_connection:
+            with self.assertRaises(smtplib.SMTPRecipientsRefused):
+                self.pool.send_messages([self.message])
+
+        get_connection.assert_called_once()
+        connexion.close.assert_called_once()
+
+    def test_une_connexion_par_thread(self):
+        """Test que des envois concurrents n'utilisent jamais la même connexion en même temps."""
+        en_cours, conflits = set(), []
+        barriere = threading.Barrier(4)
+
+        def envoyer(connexion):
+            if connexion in en_cours:
+                conflits.append(connexion)
+            en_cours.add(connexion)
+            time.sleep(0.01)
+            en_cours.discard(connexion)
+            return 1
+
+        def creer_connexion(**kwargs):
+            connexion = mock.Mock()
+            connexion.send_messages.side_effect = lambda messages: envoyer(connexion)
+            return connexion
+
+        def worker():
+            barriere.wait()
+            for _ in range(5):
+                self.pool.send_messages([self.message])
+
+        with override_settings(EMAIL_POOL_SIZE=2), \
+                mock.patch('taches.mail.get_connection', side_effect=creer_connexion):
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(conflits, [])
+        self.assertLessEqual(len(self.pool._idle), 2)
+
+    def test_pool_vide_apres_fork(self):
+        """Test qu'un processus enfant n'hérite pas des connexions du parent."""
+        connexion = connexion_factice()
+        with mock.patch('taches.mail.get_connection', return_value=connexion):
+            self.pool.send_messages([self.message])
+
+        self.pool._after_fork()
+
+        self.assertEqual(self.pool._idle, [])
+        connexion.close.assert_not_called()
+
+    def test_fermeture_a_l_arret(self):
+        """Test que les connexions inactives sont fermées à l'arrêt du worker."""
+        connexion = connexion_factice()
+        with mock.patch('taches.mail.get_connection', return_value=connexion):
+            self.pool.send_messages([self.message])
+
+        self.pool.close_all()
+
+        connexion.close.assert_called_once()
+        self.assertEqual(self.pool._idle, [])
+
+    def test_envoi_via_pool(self):
+        """Test que send_creation_email envoie l'e-mail par le pool du processus."""
+        mail_pool.close_all()
+        with mock.patch('taches.mail.get_connection', wraps=mail.get_connection) as get_connection:
+            send_creation_email(1, tache={
+                'titre': 'A', 'description': '', 'proprietaire': 'u',
+                'cree_le': '2026-01-01T10:00:00+00:00', 'termine': False,
+            })
+            send_creation_email(2, tache={
+                'titre': 'B', 'description': '', 'proprietaire': 'u',
+                'cree_le': '2026-01-01T10:00:00+00:00', 'termine': False,
+            })
+
+        get_connection.assert_called_once()
+        self.assertEqual([m.subject for m in mail.outbox], ['Nouvelle tâche créée : A', 'Nouvelle tâche créée : B'])
+
+
+class RapportMapReduceTest(APITestCase):
+    """Tests du rapport des tâches calculé en map-reduce (taches.reports)."""
+
+    databases = '__all__'
+
+    def setUp(self):
+        """Crée 10 utilisateurs ayant chacun i % 4 tâches, dont une terminée."""
+        self.users = [User.objects.create_user(username=f'user{i}') for i in range(10)]
+        for i, user in enumerate(self.users):
+            for j in range(i % 4):
+                Tache.objects.create(titre=f'Tâche {j}', proprietaire=user, termine=j == 0)
+        self.attendu = [[user.id, i % 4, 1] for i, user in enumerate(self.users) if i % 4]
+
+    def test_plages_proprietaires(self):
+        """Test que les plages couvrent tous les utilisateurs, sans recouvrement."""
+        plages = owner_ranges(3)
+
+        self.assertEqual(len(plages), 3)
+        self.assertEqual(plages[0][0], self.users[0].id)
+        self.assertEqual(plages[-1][1], self.users[-1].id + 1)
+        self.assertTrue(all(fin == debut for (_, fin), (debut, _) in zip(plages, plages[1:])))
+
+    def test_partitions_par_shard(self):
+        """Test qu'il y a une partition par plage et par shard."""
+        with override_settings(REPORT_PARTITIONS=4):
+            partitions = report_partitions()
+
+        self.assertEqual(len(partitions), 4 * len(settings.TACHE_SHARDS))
+        self.assertEqual({alias for alias, _, _ in partitions}, set(settings.TACHE_SHARDS))
+
+    def test_rapport_complet(self):
+        """Test que le rapport fusionné compte les tâches de chaque propriétaire."""
+        with override_settings(REPORT_PARTITIONS=3):
+            rapport = generate_task_report.apply().get()
+
+        self.assertEqual(rapport['lignes'], self.attendu)
+        self.assertEqual((rapport['total'], rapport['terminees']), (13, 7))
+        self.assertEqual(rapport['proprietaires'], 7)
+        self.assertEqual(rapport['partitions'], 3 * len(settings.TACHE_SHARDS))
+        self.assertIn('13 tâches, dont 7 terminées', rapport['message'])
+
+    def test_fusion_des_partitions(self):
+        """Test que la fusion additionne les lignes d'un même propriétaire et les trie."""
+        rapport = merge_partials([
+            {'lignes': [[5, 2, 1]], 'total': 2, 'terminees': 1},
+            {'lignes': [[1, 1, 0], [5, 3, 3]], 'total': 4, 'terminees': 3},
+        ])
+
+        self.assertEqual(rapport['lignes'], [[1, 1, 0], [5, 5, 4]])
+        self.assertEqual((rapport['total'], rapport['terminees'], rapport['partitions']), (6, 4, 2))
+
+    def test_partition_en_echec_reessayee_seule(self):
+        """Test qu'une partition en échec est recalculée sans recalculer les autres."""
+        echecs = []
+
+        def agreger(alias, lo, hi):
+            if lo == self.users[0].id and not echecs:
+                echecs.append(lo)
+                raise OperationalError('database is locked')
+            return aggregate_partition(alias, lo, hi)
+
+        with override_settings(REPORT_PARTITIONS=2), \
+                mock.patch('taches.tasks.aggregate_partition', side_effect=agreger) as appel:
+            rapport = generate_task_report.apply().get()
+
+        self.assertEqual(rapport['lignes'], self.attendu)
+        self.assertEqual(appel.call_count, 2 * len(settings.TACHE_SHARDS) + 1)
+
+    @skipUnless(redis_disponible(settings.CELERY_RESULT_BACKEND), 'Redis non disponible')
+    def test_progression_dans_le_statut(self):
+        """Test que CheckTaskStatusView indique les partitions déjà calculées."""
+        token = Token.objects.create(user=self.users[0])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        rapport_id = f'test-rapport-{time.time_ns()}'
+        backend = current_app.backend
+        backend.store_result(rapport_id, {'partitions': 4}, 'PROGRESS')
+        for index in (0, 2):
+            backend.store_result(f'{rapport_id}-p{index}', {'lignes': []}, 'SUCCESS')
+        try:
+            response = self.client.get(reverse('check-report-status', kwargs={'task_id': rapport_id}))
+        finally:
+            for task_id in (rapport_id, f'{rapport_id}-p0', f'{rapport_id}-p2'):
+                backend.forget(task_id)
+
+        self.assertEqual(response.json(), {
+            'task_id': rapport_id, 'state': 'PROGRESS', 'result': None,
+            'progress': {'partitions': 4, 'terminees': 2},
+        })
+
+    @skipUnless(redis_disponible(settings.CELERY_RESULT_BACKEND), 'Redis non disponible')
+    def test_agregats_partiels_supprimes_apres_fusion(self):
+        """Test que la fusion supprime les résultats des partitions du backend."""
+        rapport_id = f'test-rapport-{time.time_ns()}'
+        backend = current_app.backend
+        partiels = [{'lignes': [[self.users[0].id, 1, 1]], 'total': 1, 'terminees': 1}] * 3
+        for index, partiel in enumerate(partiels):
+            backend.store_result(f'{rapport_id}-p{index}', partiel, 'SUCCESS')
+
+        rapport = merge_report_partitions(partiels, report_id=rapport_id)
+
+        self.assertEqual(rapport['total'], 3)
+        cles = progress_keys(rapport_id, {'partitions': 3})
+        self.assertEqual(backend.mget(cles), [None, None, None])
+
+
+
+class RapportFichiersTest(APITestCase):
+    """Tests des fichiers de rapports et de leur téléchargement (taches.artifacts)."""
+
+    databases = '__all__'
+
+    def setUp(self):
+        """Stockage 'reports' temporaire, et un rapport de l'utilisateur connecté."""
+        self.dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dossier.cleanup)
+        stockage = override_settings(STORAGES={**settings.STORAGES, 'reports': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': self.dossier.name},
+        }})
+        stockage.enable()
+        self.addCleanup(stockage.disable)
+        self.user = User.objects.create_user(username='rapporteur')
+        self.autre = User.objects.create_user(username='autre')
+        for j in range(3):
+            Tache.objects.create(titre=f'Tâche {j}', proprietaire=self.user, termine=j == 0)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        resultat = generate_task_report.apply(kwargs={'user_id': self.user.id})
+        self.rapport_id, self.rapport = resultat.id, resultat.get()
+        self.url = self.rapport['fichiers']['csv']['url']
+        self.contenu = (Path(self.dossier.name) / artifact_name(self.user.id, self.rapport_id, 'csv')).read_bytes()
+
+    def test_resultat_sans_lignes(self):
+        """Test que le résultat ne garde qu'un pointeur vers les fichiers."""
+        self.assertNotIn('lignes', self.rapport)
+        self.assertEqual(self.rapport['total'], 3)
+        self.assertLessEqual({'csv', 'json'}, set(self.rapport['fichiers']))
+        self.assertEqual(self.rapport['fichiers']['csv']['taille'], len(self.contenu))
+        self.assertEqual(
+            gzip.decompress(self.contenu).decode(),
+            f'proprietaire_id,total,terminees\n{self.user.id},3,1\n',
+        )
+
+    def test_telechargement_complet(self):
+        """Test que le fichier est servi en pièce jointe, avec ETag et Accept-Ranges."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.getvalue(), self.contenu)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        json_url = self.rapport['fichiers']['json']['url']
+        self.assertEqual(gzip.decompress(self.client.get(json_url).getvalue()), f'[[{self.user.id},3,1]]'.encode())
+
+    def test_telechargement_par_plage(self):
+        """Test des requêtes Range: plage, suffixe, hors du fichier."""
+        taille = len(self.contenu)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response.getvalue(), self.contenu[:10])
+        self.assertEqual(response['Content-Range'], f'bytes 0-9/{taille}')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.getvalue(), self.contenu[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={taille}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{taille}')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1,4-5')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_requetes_conditionnelles(self):
+        """Test de If-None-Match (304) et de If-Range avec un ETag périmé (fichier entier)."""
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.getvalue(), self.contenu[10:])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"perime"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.getvalue(), self.contenu)
+
+    def test_rapport_d_un_autre_utilisateur(self):
+        """Test qu'un utilisateur ne peut pas télécharger le rapport d'un autre."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.autre).key}')
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_format_ou_identifiant_invalide(self):
+        """Test qu'un format inconnu ou un identifiant hors du dossier donne 404."""
+        url = reverse('report-download', kwargs={'task_id': self.rapport_id, 'fmt': 'xml'})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        url = reverse('report-download', kwargs={'task_id': '..', 'fmt': 'csv'})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expiration_et_purge(self):
+        """Test qu'un fichier expiré n'est plus servi, puis est supprimé par la purge."""
+        with override_settings(REPORT_ARTIFACT_RETENTION=timedelta(0)):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+            supprimes = purge_report_artifacts()
+
+        self.assertEqual(supprimes, len(self.rapport['fichiers']))
+        self.assertEqual(purge_artifacts(), 0)
+
+    def test_rapport_sans_utilisateur_garde_les_lignes(self):
+        """Test qu'un rapport lancé sans utilisateur (ancien message) garde ses lignes."""
+        rapport = generate_task_report.apply().get()
+
+        self.assertEqual(rapport['lignes'], [[self.user.id, 3, 1]])
+        self.assertNotIn('fichiers', rapport)
+
+    def test_demarrage_transmet_l_utilisateur(self):
+        """Test que StartReportGenerationView lance le rapport pour l'utilisateur connecté."""
+        with mock.patch('taches.views.generate_task_report') as task:
+            task.delay.return_value.id = 'abc'
+            self.client.post(reverse('start-report'))
+
+        task.delay.assert_called_once_with(self.user.id)
+
+
+
+class TaskStatusBatchTest(APITestCase):
+    """Tests du statut groupé de plusieurs tâches Celery (POST /api/task-status/)."""
+
+    def setUp(self):
+        """Utilisateur authentifié."""
+        self.user = User.objects.create_user(username='tableau')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        self.url = reverse('task-status-batch')
+
+    @skipUnless(redis_disponible(settings.CELERY_RESULT_BACKEND), 'Redis non disponible')
+    def test_etats_resultats_et_progression(self):
+        """Test que tous les états sont lus en deux MGET: tâches, puis partitions."""
+        backend = current_app.backend
+        prefixe = f'test-lot-{time.time_ns()}'
+        fini, echec, rapport = f'{prefixe}-ok', f'{prefixe}-ko', f'{prefixe}-r'
+        backend.store_result(fini, {'message': 'Rapport prêt'}, 'SUCCESS')
+        backend.store_result(echec, ValueError('boum'), 'FAILURE')
+        backend.store_result(rapport, {'partitions': 2}, 'PROGRESS')
+        backend.store_result(f'{rapport}-p1', {'lignes': []}, 'SUCCESS')
+        identifiants = [fini, echec, rapport, f'{rapport}-p1']
+        try:
+            with mock.patch.object(backend, 'mget', wraps=backend.mget) as mget:
+                response = self.client.post(
+                    self.url, {'task_ids': [rapport, fini, echec, f'{prefixe}-inconnue', fini]}, format='json'
+                )
+        finally:
+            for task_id in identifiants:
+                backend.forget(task_id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            rapport: {'state': 'PROGRESS', 'progress': {'partitions': 2, 'terminees': 1}},
+            fini: {'state': 'SUCCESS', 'result': {'message': 'Rapport prêt'}},
+            echec: {'state': 'FAILURE', 'result': 'boum'},
+            f'{prefixe}-inconnue': {'state': 'PENDING'},
+        })
+        self.assertEqual(mget.call_count, 2)
+
+    def test_une_seule_lecture_sans_rapport_en_cours(self):
+        """Test qu'il n'y a qu'un MGET quand aucun rapport n'est en cours."""
+        with mock.patch.object(current_app.backend, 'mget', return_value=[None, None]) as mget:
+            response = self.client.post(self.url, {'task_ids': ['a', 'b']}, format='json')
+
+        self.assertEqual(response.json(), {'a': {'state': 'PENDING'}, 'b': {'state': 'PENDING'}})
+        mget.assert_called_once()
+
+    def test_liste_invalide(self):
+        """Test qu'une liste absente, vide, mal typée ou trop longue donne 400."""
+        for data in ({}, {'task_ids': []}, {'task_ids': 'abc'}, {'task_ids': ['a', 3]}):
+            response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, data)
+
+        with override_settings(TASK_STATUS_BATCH_MAX=2):
+            response = self.client.post(self.url, {'task_ids': ['a', 'b', 'c']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_authentifie(self):
+        """Test que l'authentification par token est obligatoire, comme pour une seule tâche."""
+        self.client.credentials()
+
+        response = self.client.post(self.url, {'task_ids': ['a']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+def cleanup_a_date(now):
+    """Archive les tâches terminées de tous les shards à une date donnée."""
+    return sum(fan_out(lambda using: archive_completed(now=now, using=using)))
+
+
+class GroupCommitTest(TransactionTestCase):
+    """
+    Tests pour la validation groupée des écritures (taches.groupcommit).
+
+    TransactionTestCase: les écritures des threads sont validées par le thread
+    meneur, qui ne voit pas la transaction d'un TestCase.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(username='user1', password='pass123')
+        self.shard = shard_for(self.user.pk)
+        self.committer = GroupCommitter()
+
+    def creation(self, titre, erreur=None):
+        """Écriture soumise: crée une tâche, puis lève erreur si elle est fournie."""
+        def ecrire():
+            Tache.objects.create(titre=titre, proprietaire=self.user)
+            if erreur:
+                raise erreur
+            return titre, threading.get_ident()
+        return ecrire
+
+    def soumettre(self, ecritures):
+        """Soumet les écritures depuis autant de threads simultanés; retourne résultats ou erreurs."""
+        depart = threading.Barrier(len(ecritures))
+        resultats = [None] * len(ecritures)
+
+        def soumettre(index, ecriture):
+            try:
+                depart.wait()
+                resultats[index] = self.committer.submit(ecriture, self.shard)
+            except Exception as exc:
+                resultats[index] = exc
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=soumettre, args=args, name=f'requete-{args[0]}') for args in enumerate(ecritures)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return resultats
+
+    @override_settings(GROUP_COMMIT_WINDOW_MS=300)
+    def test_ecritures_simultanees_une_transaction(self):
+        """Test que les écritures simultanées sont exécutées ensemble, par un seul thread."""
+        with mock.patch('taches.groupcommit.transaction.atomic', wraps=transaction.atomic) as atomic:
+            resultats = self.soumettre([self.creation(f'T{i}') for i in range(5)])
+
+        self.assertEqual(sorted(titre for titre, _ in resultats), [f'T{i}' for i in range(5)])
+        self.assertEqual(len({meneur for _, meneur in resultats}), 1)
+        # Une transaction pour le lot, plus un point de sauvegarde par écriture
+        self.assertEqual(atomic.call_count, 6)
+        self.assertEqual(Tache.objects.using(self.shard).count(), 5)
+
+    @override_settings(GROUP_COMMIT_WINDOW_MS=300)
+    def test_erreur_propre_a_chaque_ecriture(self):
+        """Test qu'une écriture en erreur est annulée seule et que l'erreur revient à son appelant."""
+        resultats = self.soumettre([
+            self.creation('Valide 1'),
+            self.creation('Refusée', ValidationError({'titre': 'invalide'})),
+            self.creation('Valide 2'),
+        ])
+
+        self.assertEqual([resultat[0] for resultat in (resultats[0], resultats[2])], ['Valide 1', 'Valide 2'])
+        self.assertIsInstance(resultats[1], ValidationError)
+        self.assertEqual(
+            sorted(Tache.objects.using(self.shard).values_list('titre', flat=True)), ['Valide 1', 'Valide 2']
+        )
+
+    @override_settings(GROUP_COMMIT_WINDOW_MS=5000, GROUP_COMMIT_MAX_BATCH=2)
+    def test_lot_complet_valide_sans_attendre(self):
+        """Test qu'un lot complet est validé sans attendre la fin de la fenêtre."""
+        debut = time.monotonic()
+        resultats = self.soumettre([self.creation(f'T{i}') for i in range(4)])
+
+        self.assertLess(time.monotonic() - debut, 4)
+        self.assertEqual(len({meneur for _, meneur in resultats}), 2)
+
+    @override_settings(GROUP_COMMIT_WINDOW_MS=300)
+    def test_on_commit_dans_le_thread_de_la_requete(self):
+        """Test que les fonctions on_commit d'une écriture sont exécutées une fois, par son thread."""
+        executees = []
+
+        def creation(titre, erreur=None):
+            def ecrire():
+                transaction.on_commit(lambda: executees.append((titre, threading.current_thread().name)), using=self.shard)
+                return self.creation(titre, erreur)()
+            return ecrire
+
+        resultats = self.soumettre([creation('T0'), creation('T1', ValidationError('refusée')), creation('T2')])
+
+        self.assertIsInstance(resultats[1], ValidationError)
+        self.assertEqual(sorted(executees), [('T0', 'requete-0'), ('T2', 'requete-2')])
+
+    @override_settings(GROUP_COMMIT_WINDOW_MS=300)
+    def test_outbox_publie_une_fois(self):
+        """Test qu'une écriture groupée avec message outbox et publication à la validation publie une fois."""
+        def creation_avec_message():
+            tache = Tache.objects.create(titre='Avec message', proprietaire=self.user)
+            enqueue('taches.tasks.send_creation_email', {'tache_id': tache.id}, using=self.shard)
+            transaction.on_commit(lambda: dispatch_pending(using=self.shard), using=self.shard)
+
+        with mock.patch.object(current_app, 'send_task') as send_task:
+            self.soumettre([creation_avec_message, self.creation('T1'), self.creation('T2')])
+
+        send_task.assert_called_once()
+        message = OutboxMessage.objects.using(self.shard).get()
+        self.assertEqual(send_task.call_args.kwargs['kwargs']['outbox_id'], message.id)
+        self.assertIsNotNone(message.envoye_le)
+
+    def test_api_en_mode_groupe(self):
+        """Test que création et modification par l'API passent par la validation groupée."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with override_settings(GROUP_COMMIT_ENABLED=True), \
+                mock.patch.object(groupcommit_committer, 'submit', wraps=groupcommit_committer.submit) as submit:
+            response = client.post(reverse('tache-list'), {'titre': 'Groupée'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = client.patch(
+                reverse('tache-detail', args=[response.data['id']]), {'termine': True}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            invalide = client.post(reverse('tache-list'), {}, format='json')
+
+        self.assertEqual(submit.call_count, 2)
+        self.assertEqual(invalide.status_code, status.HTTP_400_BAD_REQUEST)
+        tache = Tache.objects.using(self.shard).get()
+        self.assertTrue(tache.termine)
+        self.assertTrue(OutboxMessage.objects.using(self.shard).filter(payload__tache_id=tache.id).exists())
+
+    def test_creations_simultanees_mode_direct(self):
+        """Test que des créations simultanées par l'API sans validation groupée réussissent toutes."""
+        def creation(index):
+            def ecrire():
+                client = APIClient()
+                client.force_authenticate(self.user)
+                return client.post(reverse('tache-list'), {'titre': f'T{index}'}, format='json').status_code
+            return ecrire
+
+        depart = threading.Barrier(8)
+        statuts = []
+
+        def requete(ecrire):
+            try:
+                depart.wait()
+                statuts.append(ecrire())
+            except Exception as exc:
+                statuts.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=requete, args=(creation(i),)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuts, [status.HTTP_201_CREATED] * 8)
+        self.assertEqual(Tache.objects.using(self.shard).count(), 8)
+        self.assertEqual(len(set(Tache.objects.using(self.shard).values_list('rang', flat=True))), 8)
+
+    def test_mode_direct_par_defaut(self):
+        """Test que sans GROUP_COMMIT_ENABLED l'écriture est exécutée directement."""
+        with mock.patch.object(groupcommit_committer, 'submit') as submit:
+            self.assertEqual(commit_write(lambda: 42, self.shard), 42)
+        submit.assert_not_called()
+
+
+@override_settings(LOAD_SHEDDING_ENABLED=True)
+class LoadSheddingTest(TestCase):
+    """
+    Tests du délestage adaptatif (taches.loadshedding).
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = LoadSheddingMiddleware(lambda request: HttpResponse('ok'))
+        self.limiter = self.middleware.limiter
+
+    def remplir(self, limiter, nombre):
+        for _ in range(nombre):
+            self.assertTrue(limiter.try_acquire())
+
+    def test_priorites(self):
+        """Test que les rafraîchissements périodiques sont de priorité basse et les écritures haute."""
+        self.assertEqual(request_priority(self.factory.get('/api/taches/')), BASSE)
+        self.assertEqual(request_priority(self.factory.get('/api/check-report-status/abc/')), BASSE)
+        self.assertEqual(request_priority(self.factory.post('/api/task-status/')), BASSE)
+        self.assertEqual(request_priority(self.factory.get('/api/taches/3/')), NORMALE)
+        self.assertEqual(request_priority(self.factory.post('/api/taches/')), HAUTE)
+        self.assertEqual(request_priority(self.factory.delete('/api/taches/3/')), HAUTE)
+
+    def test_limite_reduite_quand_la_latence_augmente(self):
+        """Test que la limite diminue quand la latence dépasse la tolérance, et croît sinon."""
+        limiter = AdaptiveLimiter(initial=20, minimum=4, maximum=200, tolerance=2.0)
+        for _ in range(10):
+            self.remplir(limiter, 20 - limiter.in_flight)
+            limiter.release(0.01)
+        self.assertGreater(limiter.limit, 20)
+
+        initiale = limiter.limit
+        for _ in range(20):
+            self.remplir(limiter, int(limiter.limit) - limiter.in_flight)
+            limiter.release(0.2)
+        self.assertLess(limiter.limit, initiale / 2)
+        self.assertGreaterEqual(limiter.limit, 4)
+
+    def test_limite_inchangee_si_peu_utilisee(self):
+        """Test que la latence des requêtes isolées ne modifie pas la limite."""
+        limiter = AdaptiveLimiter(initial=20, minimum=4, maximum=200)
+        for latence in (0.01, 0.5, 0.01, 0.5):
+            self.assertTrue(limiter.acquire())
+            limiter.release(latence)
+
+        self.assertEqual((limiter.limit, limiter.in_flight), (20, 0))
+
+    def test_basse_priorite_delestee_en_premier(self):
+        """Test qu'au-delà de la part de la priorité basse seules les autres requêtes passent."""
+        self.remplir(self.limiter, int(self.limiter.limit * settings.LOAD_SHEDDING_LOW_PRIORITY_SHARE))
+
+        response = self.middleware(self.factory.get('/api/taches/'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], str(settings.LOAD_SHEDDING_RETRY_AFTER))
+        self.assertEqual(self.middleware(self.factory.get('/api/taches/3/')).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.middleware(self.factory.post('/api/taches/')).status_code, status.HTTP_200_OK)
+
+    def test_attente_recente_deleste_basse_priorite(self):
+        """Test que la priorité basse est refusée tant que l'attente récente dépasse la cible."""
+        self.assertTrue(self.limiter.try_acquire())
+        self.limiter.release(0.01, delay=1.0)
+
+        self.assertEqual(self.middleware(self.factory.get('/api/taches/')).status_code, 503)
+        self.assertEqual(self.middleware(self.factory.get('/api/taches/3/')).status_code, 200)
+        with mock.patch('taches.loadshedding.time.monotonic', return_value=time.monotonic() + 5):
+            # Attente trop ancienne pour être représentative
+            self.assertEqual(self.limiter.recent_delay, 0.0)
+
+    @override_settings(LOAD_SHEDDING_MAX_WAIT_MS=10, LOAD_SHEDDING_WRITE_MAX_WAIT_MS=2000)
+    def test_ecriture_attend_une_place(self):
+        """Test qu'une écriture attend une place libérée, et qu'une lecture n'attend que son délai."""
+        self.remplir(self.limiter, int(self.limiter.limit))
+        self.assertEqual(self.middleware(self.factory.get('/api/taches/3/')).status_code, 503)
+
+        liberation = threading.Timer(0.05, self.limiter.release, args=(0.01,))
+        liberation.start()
+        self.addCleanup(liberation.cancel)
+        self.assertEqual(self.middleware(self.factory.post('/api/taches/')).status_code, 200)
+
+    def test_attente_amont_deduite(self):
+        """Test qu'une requête qui a trop attendu dans la file du proxy est refusée d'emblée."""
+        en_tete = {'X-Request-Start': f't={time.time() - 5:.3f}'}
+
+        self.assertEqual(self.middleware(self.factory.post('/api/taches/', headers=en_tete)).status_code, 503)
+        en_tete = {'X-Request-Start': str(int(time.time() * 1000))}
+        self.assertEqual(self.middleware(self.factory.get('/api/taches/', headers=en_tete)).status_code, 200)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_asgi(self):
+        """Test que le middleware déleste aussi les requêtes ASGI sans bloquer la boucle."""
+        async def get_response(request):
+            return HttpResponse('ok')
+
+        middleware = LoadSheddingMiddleware(get_response)
+        self.remplir(middleware.limiter, int(middleware.limiter.limit))
+
+        self.assertEqual((await middleware(self.factory.get('/api/taches/'))).status_code, 503)
+        asyncio.get_running_loop().call_later(0.05, middleware.limiter.release, 0.01)
+        self.assertEqual((await middleware(self.factory.post('/api/taches/'))).status_code, 200)
+
+    async def test_asgi_ordre_d_arrivee(self):
+        """Test que les requêtes ASGI en attente sont admises dans leur ordre d'arrivée, sans attente active."""
+        limiter = AdaptiveLimiter(initial=4, minimum=4, maximum=4)
+        self.remplir(limiter, 4)
+        admises = []
+
+        async def attendre(nom):
+            if await limiter.acquire_async(timeout=2):
+                admises.append(nom)
+
+        attentes = [asyncio.create_task(attendre(nom)) for nom in ('premiere', 'deuxieme', 'troisieme')]
+        await asyncio.sleep(0.01)
+        # Une nouvelle requête ne double pas les requêtes en attente
+        self.assertFalse(limiter.try_acquire())
+
+        for _ in range(2):
+            limiter.release(0.01)
+            await asyncio.sleep(0.01)
+        self.assertEqual(admises, ['premiere', 'deuxieme'])
+        self.assertEqual(limiter.in_flight, 4)
+
+        attentes[2].cancel()
+        await asyncio.gather(*attentes, return_exceptions=True)
+        limiter.release(0.01)
+        self.assertEqual((limiter.in_flight, len(limiter._waiters)), (3, 0))
+
+    @override_settings(LOAD_SHEDDING_ENABLED=False)
+    def test_desactive(self):
+        """Test que le middleware se retire de la chaîne sans LOAD_SHEDDING_ENABLED."""
+        with self.assertRaises(MiddlewareNotUsed):
+            LoadSheddingMiddleware(lambda request: None)
+
+
+class TacheArchiveTest(TransactionTestCase):
+    """
+    Tests pour l'archivage des tâches terminées dans des partitions mensuelles.
+
+    TransactionTestCase: les partitions sont créées avec le schema editor, qui
+    ne peut pas s'exécuter dans la transaction d'un TestCase avec SQLite.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        """Configuration initiale pour chaque test."""
+        self.user = User.objects.create_user(username='user1', password='pass123')
+        self.autre = User.objects.create_user(username='user2', password='pass123')
+        self.shard = shard_for(self.user.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        """Supprime les partitions, qui ne sont pas gérées par les migrations."""
+        fan_out(lambda using: purge_partitions(date(9999, 1, 1), using=using))
+
+    def creer(self, titre, termine=True, proprietaire=None):
+        return Tache.objects.create(titre=titre, termine=termine, proprietaire=proprietaire or self.user)
+
+    def test_cleanup_deplace_taches_terminees(self):
+        """Test que seules les tâches terminées quittent la table Tache, identifiants conservés."""
+        terminees = [self.creer(f'Terminée {i}') for i in range(5)]
+        active = self.creer('Active', termine=False)
+
+        count = cleanup_completed_tasks()
+
+        self.assertEqual(count, 5)
+        self.assertEqual(list(Tache.objects.using(self.shard)), [active])
+        archive = partition_model(list_partitions(self.shard)[0])
+        self.assertEqual(
+            sorted(archive.objects.using(self.shard).values_list('id', flat=True)), [t.id for t in terminees]
+        )
+
+    def test_archivage_par_lots(self):
+        """Test que l'archivage traite toutes les tâches, lot par lot."""
+        for i in range(5):
+            self.creer(f'Terminée {i}')
+
+        with CaptureQueriesContext(connections[self.shard]) as queries:
+            count = archive_completed(batch_size=2, using=self.shard)
+
+        self.assertEqual(count, 5)
+        self.assertFalse(Tache.objects.exists())
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "taches_archive_')]
+        self.assertEqual(len(inserts), 3)
+
+    def test_endpoint_pagine_sur_plusieurs_mois(self):
+        """Test que /api/archives/ lit toutes les partitions, pour l'utilisateur seulement."""
+        self.creer('Septembre')
+        cleanup_a_date(datetime(2026, 9, 15, tzinfo=dt_timezone.utc))
+        self.creer('Octobre 1')
+        self.creer('Octobre 2')
+        self.creer('Autre utilisateur', proprietaire=self.autre)
+        cleanup_a_date(datetime(2026, 10, 15, tzinfo=dt_timezone.utc))
+
+        page1 = self.client.get(reverse('archive-list'), {'page_size': 2})
+        page2 = self.client.get(page1.data['next'])
+
+        self.assertEqual(page1.status_code, status.HTTP_200_OK)
+        self.assertEqual(page1.data['count'], 3)
+        titres = [t['titre'] for t in page1.data['results'] + page2.data['results']]
+        self.assertEqual(titres, ['Octobre 2', 'Octobre 1', 'Septembre'])
+
+        septembre = self.client.get(reverse('archive-list'), {'mois': '2026-09'})
+        self.assertEqual([t['titre'] for t in septembre.data['results']], ['Septembre'])
+        self.assertEqual(self.client.get(reverse('archive-list'), {'mois': 'octobre'}).status_code, 400)
+
+    def test_endpoint_lecture_seule_et_authentifie(self):
+        """Test que l'archive refuse l'écriture et les requêtes anonymes."""
+        self.assertEqual(self.client.post(reverse('archive-list'), {}).status_code, 405)
+        self.assertEqual(APIClient().get(reverse('archive-list')).status_code, 401)
+
+    def test_purge_supprime_partitions_entieres(self):
+        """Test que la purge supprime les tables des mois anciens uniquement."""
+        for mois in (8, 9, 10):
+            self.creer(f'Mois {mois}')
+            archive_completed(now=datetime(2026, mois, 15, tzinfo=dt_timezone.utc), using=self.shard)
+
+        supprimes = purge_partitions(date(2026, 9, 20), using=self.shard)
+
+        self.assertEqual(supprimes, [date(2026, 8, 1)])
+        self.assertEqual(list_partitions(self.shard), [date(2026, 10, 1), date(2026, 9, 1)])
+        self.assertNotIn('taches_archive_202608', connections[self.shard].introspection.table_names())
+
+
+TROIS_SHARDS = ['default', 'shard1', 'shard2']
+
+
+class ShardRoutingTest(TestCase):
+    """Tests pour la répartition des tâches par propriétaire (taches.sharding)."""
+
+    def test_jump_hash_stable_et_minimal(self):
+        """Test qu'ajouter un shard ne déplace des utilisateurs que vers le nouveau shard."""
+        for user_id in range(2000):
+            avant, apres = jump_hash(user_id, 3), jump_hash(user_id, 4)
+            self.assertEqual(avant, jump_hash(user_id, 3))
+            self.assertIn(apres, (avant, 3))
+
+    def test_jump_hash_repartition(self):
+        """Test que les utilisateurs sont répartis à peu près également."""
+        comptes = [0] * 4
+        for user_id in range(4000):
+            comptes[jump_hash(user_id, 4)] += 1
+        self.assertTrue(all(800 < compte < 1200 for compte in comptes), comptes)
+
+    @override_settings(TACHE_SHARDS=TROIS_SHARDS)
+    def test_shard_des_identifiants(self):
+        """Test que le shard d'une ligne se déduit de sa plage d'identifiants."""
+        self.assertEqual(shard_for_id(42), 'default')
+        self.assertEqual(shard_for_id(2 * SHARD_ID_RANGE + 42), 'shard2')
+        self.assertEqual(shard_for_id(7 * SHARD_ID_RANGE), 'default')
+        self.assertEqual(shard_for(7), TROIS_SHARDS[jump_hash(7, 3)])
+
+    @override_settings(TACHE_SHARDS=TROIS_SHARDS)
+    def test_router(self):
+        """Test les décisions du routeur: écriture sur le shard du propriétaire, migrations."""
+        router = TacheShardRouter()
+        user = User(pk=7)
+        tache = Tache(titre='x', proprietaire=user)
+
+        self.assertEqual(router.db_for_write(Tache, instance=tache), shard_for(7))
+        self.assertEqual(router.db_for_read(Tache, instance=user), shard_for(7))
+        self.assertIsNone(router.db_for_read(User, instance=user))
+        self.assertTrue(router.allow_migrate('shard1', 'taches', model_name='tache'))
+        self.assertTrue(router.allow_migrate('shard1', 'taches', model_name='outboxmessage'))
+        self.assertFalse(router.allow_migrate('shard1', 'auth', model_name='user'))
+        self.assertIsNone(router.allow_migrate('default', 'auth', model_name='user'))
+
+    def test_fan_out_parallele(self):
+        """Test que fan_out exécute la fonction sur chaque base, dans l'ordre des shards."""
+        debut = time.perf_counter()
+        resultats = fan_out(lambda alias: time.sleep(0.2) or alias.upper(), aliases=['a', 'b', 'c'])
+
+        self.assertEqual(resultats, ['A', 'B', 'C'])
+        self.assertLess(time.perf_counter() - debut, 0.5)
+
+
+@skipUnless(len(settings.TACHE_SHARDS) > 1, 'Un seul shard configuré (TACHE_SHARD_COUNT)')
+class ShardedTacheTest(TransactionTestCase):
+    """
+    Tests de bout en bout avec plusieurs shards.
+
+    Lancés avec: TACHE_SHARD_COUNT=3 python manage.py test taches.tests.ShardedTacheTest
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        """Crée des utilisateurs jusqu'à en avoir un sur 'default' et un sur un autre shard."""
+        self.users = {}
+        i = 0
+        while len(self.users) < 2:
+            user = User.objects.create_user(username=f'user{i}', password='pass123')
+            self.users.setdefault('default' if shard_for(user.pk) == 'default' else 'autre', user)
+            i += 1
+        self.user = self.users['autre']
+        self.shard = shard_for(self.user.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        """Supprime les partitions d'archive de tous les shards."""
+        fan_out(lambda using: purge_partitions(date(9999, 1, 1), using=using))
+
+    def test_creation_sur_shard_du_proprietaire(self):
+        """Test que la tâche et son message outbox sont écrits sur le shard du propriétaire."""
+        response = self.client.post(reverse('tache-list'), {'titre': 'Shardée'}, format='json')
+        tache_id = response.data['id']
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(shard_for_id(tache_id), self.shard)
+        self.assertTrue(Tache.objects.using(self.shard).filter(id=tache_id).exists())
+        self.assertFalse(Tache.objects.using('default').filter(id=tache_id).exists())
+        self.assertEqual(OutboxMessage.objects.using(self.shard).count(), 1)
+
+        detail = self.client.patch(
+            reverse('tache-detail', kwargs={'pk': tache_id}), {'termine': True}, format='json'
+        )
+        self.assertEqual(detail.data['proprietaire'], self.user.username)
+        self.assertEqual([t['id'] for t in self.client.get(reverse('tache-list')).data], [tache_id])
+
+    def test_admin_outbox_par_shard(self):
+        """Test que l'administration de l'outbox liste et affiche les messages de chaque shard."""
+        tache_id = self.client.post(reverse('tache-list'), {'titre': 'Shardée'}, format='json').data['id']
+        message = OutboxMessage.objects.using(self.shard).get(payload__tache_id=tache_id)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+        liste = self.client.get(reverse('admin:taches_outboxmessage_changelist'), {'shard': self.shard})
+        defaut = self.client.get(reverse('admin:taches_outboxmessage_changelist'))
+        detail = self.client.get(reverse('admin:taches_outboxmessage_change', args=[message.id]))
+
+        self.assertEqual(list(liste.context['cl'].result_list), [message])
+        self.assertNotIn(message, defaut.context['cl'].result_list)
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail.context['original'], message)
+
+    def test_nettoyage_et_rapport_sur_tous_les_shards(self):
+        """Test que l'archivage et l'agrégation du rapport couvrent tous les shards."""
+        for user in self.users.values():
+            Tache.objects.create(titre='Terminée', termine=True, proprietaire=user)
+            Tache.objects.create(titre='Active', proprietaire=user)
+
+        self.assertEqual(cleanup_completed_tasks(), 2)
+        self.assertEqual(sum(fan_out(lambda using: Tache.objects.using(using).count())), 2)
+        archives = self.client.get(reverse('archive-list'))
+        self.assertEqual([t['titre'] for t in archives.data['results']], ['Terminée'])
+
+    def test_suppression_utilisateur(self):
+        """Test que supprimer un utilisateur supprime ses tâches sur son shard."""
+        Tache.objects.create(titre='Orpheline ?', proprietaire=self.user)
+
+        self.user.delete()
+
+        self.assertFalse(Tache.objects.using(self.shard).exists())
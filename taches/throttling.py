@@ -0,0 +1,182 @@
+"""
+Limitation de débit (throttling) par token bucket dans Redis.
+
+Les endpoints qui lancent des tâches Celery coûteuses (/api/start-report/,
+/api/test-celery/) sont limités à la fois par utilisateur et globalement, pour
+qu'un seul script ne puisse pas saturer les workers.
+
+Chaque limite est un token bucket stocké dans Redis et mis à jour par un script
+Lua: la vérification et la consommation des jetons sont atomiques, et l'horloge
+utilisée est celle de Redis, ce qui rend la limite exacte entre processus et
+entre serveurs.
+
+Les limites se configurent dans REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] avec
+le format DRF '<nombre>/<période>', pour les clés '<scope>-user' et '<scope>-global'.
+Exemple: 'start-report-user': '3/min' autorise une rafale de 3 rapports, puis
+un nouveau rapport toutes les 20 secondes.
+"""
+import logging
+import math
+import threading
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+# KEYS: un bucket par limite. ARGV: (capacité, jetons par ms) pour chaque bucket.
+# Retourne 0 si la requête est acceptée (un jeton consommé dans chaque bucket),
+# sinon le délai en millisecondes avant qu'un jeton soit disponible dans tous les buckets.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) / rate))
+    end
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate) + 1000)
+end
+return wait
+"""
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _redis():
+    """
+    Retourne le module redis.
+
+    Import différé: redis n'est chargé qu'à la première requête limitée, pas au
+    démarrage du processus web.
+    """
+    import redis
+
+    return redis
+
+
+def get_throttle_redis():
+    """
+    Retourne le client Redis partagé des limites de débit (settings.THROTTLE_REDIS_URL).
+
+    Returns:
+        redis.Redis: Client thread-safe avec pool de connexions.
+    """
+    url = settings.THROTTLE_REDIS_URL
+    client = _clients.get(url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(url)
+            if client is None:
+                client = _redis().Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+                _clients[url] = client
+    return client
+
+
+def parse_rate(rate):
+    """
+    Convertit une limite DRF '<nombre>/<période>' en paramètres de token bucket.
+
+    Args:
+        rate (str): Par exemple '3/min', '100/hour', '10/s'.
+
+    Returns:
+        tuple: (capacité en jetons, jetons regagnés par milliseconde)
+    """
+    num, period = rate.split('/')
+    seconds = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    capacity = int(num)
+    return capacity, capacity / (seconds * 1000)
+
+
+class RedisTokenBucketThrottle(BaseThrottle):
+    """
+    Throttle DRF combinant une limite par utilisateur et une limite globale.
+
+    Les sous-classes définissent `scope`; les limites sont lues dans
+    DEFAULT_THROTTLE_RATES sous '<scope>-user' et '<scope>-global' (une limite
+    absente ou None est désactivée). Une requête refusée reçoit une réponse 429
+    avec l'en-tête Retry-After (géré par DRF à partir de wait()).
+
+    Notes:
+        - Les deux buckets sont vérifiés et débités dans le même script Lua: une
+          requête refusée par la limite globale ne consomme pas le quota de l'utilisateur.
+        - Si Redis est injoignable, la requête est acceptée (fail-open) et un
+          avertissement est journalisé, pour ne pas rendre l'API indisponible.
+    """
+    scope = None
+    key_prefix = 'throttle'
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_rate(self, suffix):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(f'{self.scope}-{suffix}')
+
+    def get_buckets(self, request):
+        """
+        Retourne les buckets à vérifier pour cette requête.
+
+        Returns:
+            list: Tuples (clé Redis, capacité, jetons par milliseconde).
+        """
+        buckets = []
+        user_rate = self.get_rate('user')
+        if user_rate and request.user and request.user.is_authenticated:
+            key = f'{self.key_prefix}:{self.scope}:user:{request.user.pk}'
+            buckets.append((key, *parse_rate(user_rate)))
+        global_rate = self.get_rate('global')
+        if global_rate:
+            buckets.append((f'{self.key_prefix}:{self.scope}:global', *parse_rate(global_rate)))
+        return buckets
+
+    def allow_request(self, request, view):
+        buckets = self.get_buckets(request)
+        if not buckets:
+            return True
+        keys = [key for key, _, _ in buckets]
+        args = [value for _, capacity, rate in buckets for value in (capacity, rate)]
+        try:
+            wait_ms = get_throttle_redis().eval(TOKEN_BUCKET_SCRIPT, len(keys), *keys, *args)
+        except _redis().RedisError:
+            logger.warning('Throttle %s: Redis indisponible, requête acceptée', self.scope)
+            return True
+
+        if wait_ms:
+            self.retry_after = int(wait_ms) / 1000
+            return False
+        return True
+
+    def wait(self):
+        if self.retry_after is None:
+            return None
+        return math.ceil(self.retry_after)
+
+
+class StartReportThrottle(RedisTokenBucketThrottle):
+    """Limite de /api/start-report/ (rapport de 15 secondes)."""
+    scope = 'start-report'
+
+
+class TestCeleryThrottle(RedisTokenBucketThrottle):
+    """Limite de /api/test-celery/ (tâche de test de 5 secondes)."""
+    scope = 'test-celery'
@@ -18,4 +18,7 @@ urlpatterns = [
     path('api/test-celery/', views.test_celery_view, name='test-celery'),
     path('api/start-report/', views.StartReportGenerationView.as_view(), name='start-report'),
     path('api/check-report-status/<str:task_id>/', views.CheckTaskStatusView.as_view(), name='check-report-status'),
+    path('api/task-status/', views.TaskStatusBatchView.as_view(), name='task-status-batch'),
+    path('api/reports/<str:task_id>/<str:fmt>/', views.ReportDownloadView.as_view(), name='report-download'),
+    path('api/archives/', views.ArchiveListView.as_view(), name='archive-list'),
 ]
\ No newline at end of file
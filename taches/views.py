@@ -1,16 +1,227 @@
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
-from celery.result import AsyncResult
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
+from rest_framework.pagination import LimitOffsetPagination, PageNumberPagination
+from datetime import date
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Substr
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+from .archives import archives_for
+from .artifacts import REPORT_FORMATS, artifact_name, get_report_storage, is_expired, iter_range, parse_byte_range
+from .filters import TacheFilterBackend, TacheOrderingFilter
+from .groupcommit import commit_write
 from .models import Tache
-from .serializers import TacheSerializer
-from .tasks import tache_test_asynchrone, send_creation_email, generate_task_report
+from .serializers import DESCRIPTION_PREVIEW_LENGTH, TacheArchiveeSerializer, TacheSerializer
+from .sharding import shard_for
+from .statuses import task_statuses
+from .outbox import enqueue, save_with_creation_email
+from .ranking import RANK_REBALANCE_LENGTH
+from .reports import REPORT_PROGRESS, report_progress
+from .tasks import tache_test_asynchrone, generate_task_report
+from .throttling import StartReportThrottle, TestCeleryThrottle
 
+# Champs sélectionnables avec ?fields= et ?omit= (liste et détail)
+SPARSE_FIELDS = (
+    'id', 'titre', 'description', 'cree_le', 'termine', 'echeance', 'rappel_envoye_le', 'rang', 'proprietaire',
+)
 
-class TacheViewSet(ModelViewSet):
+
+def _parse_field_list(value, param):
+    """
+    Découpe un paramètre de requête 'a,b,c' en ensemble de noms de champs.
+
+    Args:
+        value (str): La valeur du paramètre.
+        param (str): Le nom du paramètre (pour le message d'erreur).
+
+    Returns:
+        set: Les noms de champs demandés.
+
+    Raises:
+        ValidationError: Si un champ n'existe pas (réponse 400).
+    """
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - set(SPARSE_FIELDS)
+    if unknown:
+        raise ValidationError({param: f"Champs inconnus : {', '.join(sorted(unknown))}"})
+    return names
+
+
+class TachePagination(LimitOffsetPagination):
+    """
+    Pagination optionnelle de la liste des tâches (?limit=N&offset=M).
+
+    Sans ?limit=, la liste complète est renvoyée comme avant (tableau JSON).
+    """
+    max_limit = 500
+
+
+class TacheQuerysetMixin:
+    """
+    Logique commune aux ViewSets synchrone et asynchrone des tâches.
+
+    Limite les tâches à celles de l'utilisateur connecté et applique les
+    sparse fieldsets (?fields=, ?omit=, ?preview=) au QuerySet et au sérialiseur.
+    La liste accepte aussi les filtres et tris de taches.filters et la
+    pagination ?limit=&offset=.
+    Utilisé par TacheViewSet et par taches.async_views.AsyncTacheViewSet.
+    """
+    serializer_class = TacheSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [TacheFilterBackend, TacheOrderingFilter]
+    pagination_class = TachePagination
+
+    def get_queryset(self):
+        """
+        Filtre les tÃ¢ches pour ne retourner que celles appartenant Ã  l'utilisateur authentifiÃ©.
+        
+        Cette mÃ©thode garantit que chaque utilisateur ne voit et ne peut modifier
+        que ses propres tÃ¢ches, assurant l'isolation des donnÃ©es entre utilisateurs.
+        
+        Returns:
+            QuerySet: Un QuerySet filtrÃ© contenant uniquement les tÃ¢ches de l'utilisateur connectÃ©,
+                     ordonnÃ©es par date de crÃ©ation dÃ©croissante.
+        """
+        # Le gestionnaire inverse lit le shard du propriétaire (taches.sharding) et
+        # associe self.request.user à chaque tâche: pas de jointure ni de requête
+        # supplémentaire pour le nom du propriétaire
+        queryset = self.request.user.taches.all()
+
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+
+        # Ne lire que les colonnes nécessaires aux champs demandés (proprietaire_id
+        # est toujours lu: il sert à associer self.request.user à chaque tâche)
+        columns = [name for name in fields if name not in ('id', 'description', 'proprietaire')]
+        if 'description' in fields:
+            if self.description_preview:
+                queryset = queryset.annotate(
+                    description_apercu=Substr('description', 1, DESCRIPTION_PREVIEW_LENGTH + 1)
+                )
+            else:
+                columns.append('description')
+        return queryset.only('id', 'proprietaire', *columns)
+
+    def update_termine(self, termine):
+        """
+        Modifie le statut de la tâche de l'URL en une requête SQL (actions complete,
+        uncomplete et toggle).
+
+        Args:
+            termine (bool): Le nouveau statut, ou None pour inverser le statut actuel.
+
+        Returns:
+            Response: {'id': ..., 'termine': ...}, le nouveau statut.
+
+        Raises:
+            Http404: Si la tâche n'existe pas ou appartient à un autre utilisateur.
+        """
+        try:
+            pk = int(self.kwargs['pk'])
+        except ValueError:
+            raise Http404
+        user = self.request.user
+        nouveau = Tache.objects.using(shard_for(user.pk)).set_termine(pk, user.pk, termine)
+        if nouveau is None:
+            raise Http404
+        return Response({'id': pk, 'termine': nouveau})
+
+    def move_tache(self):
+        """
+        Déplace la tâche de l'URL dans l'ordre manuel (action deplacer).
+
+        Corps de la requête: {'apres': <id>} pour placer la tâche juste après
+        une autre, {'apres': null} pour la placer en tête. Seule la tâche
+        déplacée est modifiée, en un UPDATE (voir TacheQuerySet.move). Si sa
+        nouvelle clé de rang est trop longue, le rééquilibrage des rangs de
+        l'utilisateur est demandé dans la même transaction (outbox).
+
+        Returns:
+            Response: {'id': ..., 'rang': ...}, la nouvelle clé de rang.
+
+        Raises:
+            ValidationError: Si 'apres' est absent, invalide ou désigne une tâche inconnue.
+            Http404: Si la tâche n'existe pas ou appartient à un autre utilisateur.
+        """
+        try:
+            pk = int(self.kwargs['pk'])
+        except ValueError:
+            raise Http404
+        if 'apres' not in self.request.data:
+            raise ValidationError({'apres': 'Ce champ est obligatoire (null pour placer la tâche en tête).'})
+        apres = self.request.data['apres']
+        if apres is not None and (isinstance(apres, bool) or not isinstance(apres, int)):
+            raise ValidationError({'apres': "Identifiant de tâche ou null attendu."})
+        user = self.request.user
+        using = shard_for(user.pk)
+        with transaction.atomic(using=using):
+            try:
+                rang = Tache.objects.using(using).move(pk, user.pk, apres)
+            except Tache.DoesNotExist:
+                raise ValidationError({'apres': 'Tâche inconnue.'})
+            except ValueError as exc:
+                raise ValidationError({'apres': str(exc)})
+            if rang is None:
+                raise Http404
+            if len(rang) > RANK_REBALANCE_LENGTH:
+                enqueue('taches.tasks.rebalance_ranks', {'proprietaire_id': user.pk}, using=using)
+        return Response({'id': pk, 'rang': rang})
+
+    def get_sparse_fields(self):
+        """
+        Retourne les champs demandés via ?fields= et ?omit= pour les lectures.
+
+        Returns:
+            set | None: Les champs à sérialiser, ou None pour les écritures
+                (création, modification, suppression), qui utilisent tous les champs.
+
+        Raises:
+            ValidationError: Si un champ demandé n'existe pas.
+        """
+        if self.action not in ('list', 'retrieve'):
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            params = self.request.query_params
+            fields = set(SPARSE_FIELDS)
+            if 'fields' in params:
+                fields &= _parse_field_list(params['fields'], 'fields')
+            if 'omit' in params:
+                fields -= _parse_field_list(params['omit'], 'omit')
+            self._sparse_fields = fields
+        return self._sparse_fields
+
+    @property
+    def description_preview(self):
+        """bool: True si la liste est demandée avec un aperçu de description (?preview=1)."""
+        return (
+            self.action == 'list'
+            and self.request.query_params.get('preview', '').lower() in ('1', 'true')
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Construit le sérialiseur en appliquant les champs demandés pour les lectures.
+
+        Returns:
+            TacheSerializer: Le sérialiseur limité aux champs demandés.
+        """
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('description_preview', self.description_preview)
+        return super().get_serializer(*args, **kwargs)
+
+
+class TacheViewSet(TacheQuerysetMixin, ModelViewSet):
     """
     ViewSet pour les opÃ©rations CRUD sur les tÃ¢ches.
     
@@ -25,32 +236,26 @@ class TacheViewSet(ModelViewSet):
         - update (PUT /api/taches/{id}/): Met Ã  jour complÃ¨tement une tÃ¢che.
         - partial_update (PATCH /api/taches/{id}/): Met Ã  jour partiellement une tÃ¢che.
         - destroy (DELETE /api/taches/{id}/): Supprime une tÃ¢che.
+        - complete, uncomplete, toggle (POST /api/taches/{id}/<action>/): Modifient
+          uniquement le statut, en une requête SQL; réponse {'id', 'termine'}.
+        - deplacer (POST /api/taches/{id}/deplacer/, {'apres': id|null}): Déplace la
+          tâche dans l'ordre manuel (?ordering=rang) en un UPDATE; réponse {'id', 'rang'}.
     
     Attributs:
         serializer_class (TacheSerializer): Le sÃ©rialiseur utilisÃ© pour la sÃ©rialisation/dÃ©sÃ©rialisation.
         permission_classes (list): Liste des classes de permission (IsAuthenticated requis).
     
+    Paramètres de requête (list et retrieve):
+        - fields=titre,termine: Ne retourner que ces champs (la requête SQL est réduite avec only()).
+        - omit=description: Retirer ces champs de la réponse et de la requête SQL.
+        - preview=1 (list uniquement): Description tronquée à DESCRIPTION_PREVIEW_LENGTH caractères,
+          seul le début de la colonne est lu en base.
+
     MÃ©thodes:
         get_queryset(): Filtre les tÃ¢ches pour ne retourner que celles de l'utilisateur connectÃ©.
         perform_create(serializer): Associe automatiquement la tÃ¢che crÃ©Ã©e Ã  l'utilisateur authentifiÃ©
                                     et dÃ©clenche l'envoi d'e-mail asynchrone.
     """
-    serializer_class = TacheSerializer
-    permission_classes = [IsAuthenticated]
-
-    def get_queryset(self):
-        """
-        Filtre les tÃ¢ches pour ne retourner que celles appartenant Ã  l'utilisateur authentifiÃ©.
-        
-        Cette mÃ©thode garantit que chaque utilisateur ne voit et ne peut modifier
-        que ses propres tÃ¢ches, assurant l'isolation des donnÃ©es entre utilisateurs.
-        
-        Returns:
-            QuerySet: Un QuerySet filtrÃ© contenant uniquement les tÃ¢ches de l'utilisateur connectÃ©,
-                     ordonnÃ©es par date de crÃ©ation dÃ©croissante.
-        """
-        return Tache.objects.filter(proprietaire=self.request.user)
-    
     def perform_create(self, serializer):
         """
         Associe automatiquement la tÃ¢che crÃ©Ã©e Ã  l'utilisateur authentifiÃ©
@@ -60,27 +265,60 @@ class TacheViewSet(ModelViewSet):
         Elle garantit que le champ 'proprietaire' est automatiquement dÃ©fini avec
         l'utilisateur actuellement authentifiÃ©, sans nÃ©cessiter de le passer dans les donnÃ©es.
         
-        AprÃ¨s la sauvegarde, une tÃ¢che Celery asynchrone est dÃ©clenchÃ©e pour envoyer
-        un e-mail de notification, sans bloquer la rÃ©ponse HTTP au client.
+        La tâche et le message d'e-mail de notification (OutboxMessage) sont
+        enregistrés dans la même transaction: aucun appel au broker pendant la
+        requête, et pas de notification pour une création annulée. Le message
+        est publié à Celery par la tâche planifiée dispatch_outbox.
         
         Args:
-            serializer (TacheSerializer): Le sÃ©rialiseur contenant les donnÃ©es de la tÃ¢che Ã  crÃ©er.
-                Les donnÃ©es doivent contenir au minimum 'titre'. 'description' et 'termine' sont optionnels.
+            serializer (TacheSerializer): Le sérialiseur contenant les données de la tâche à créer.
+                Les données doivent contenir au minimum 'titre'. 'description' et 'termine' sont optionnels.
         
         Flow:
-            1. Sauvegarde de la tÃ¢che avec l'utilisateur comme propriÃ©taire
-            2. DÃ©clenchement asynchrone de send_creation_email avec l'ID de la tÃ¢che
-            3. Retour immÃ©diat au client (pas d'attente de l'envoi d'e-mail)
+            1. Transaction: sauvegarde de la tâche (utilisateur propriétaire) + message outbox
+            2. Retour immédiat au client (pas d'attente du broker ni de l'envoi d'e-mail)
+            3. Publication du message par dispatch_outbox, puis envoi par send_creation_email
+        
+        Avec GROUP_COMMIT_ENABLED, la transaction est validée avec celles des
+        créations et modifications simultanées du processus (taches.groupcommit).
+        """
+        user = self.request.user
+        commit_write(lambda: save_with_creation_email(serializer, user), shard_for(user.pk))
+
+    def perform_update(self, serializer):
         """
-        # Sauvegarder la tÃ¢che avec le propriÃ©taire
-        serializer.save(proprietaire=self.request.user)
+        Enregistre la tâche modifiée (PUT, PATCH), en validation groupée si
+        GROUP_COMMIT_ENABLED (taches.groupcommit).
         
-        # DÃ©clencher l'envoi d'e-mail de maniÃ¨re asynchrone
-        send_creation_email.delay(serializer.instance.id)
+        Args:
+            serializer (TacheSerializer): Le sérialiseur validé.
+        """
+        commit_write(serializer.save, serializer.instance._state.db)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """POST /api/taches/{id}/complete/: marque la tâche comme terminée."""
+        return self.update_termine(True)
+
+    @action(detail=True, methods=['post'])
+    def uncomplete(self, request, pk=None):
+        """POST /api/taches/{id}/uncomplete/: marque la tâche comme en cours."""
+        return self.update_termine(False)
+
+    @action(detail=True, methods=['post'])
+    def toggle(self, request, pk=None):
+        """POST /api/taches/{id}/toggle/: inverse le statut de la tâche."""
+        return self.update_termine(None)
+
+    @action(detail=True, methods=['post'])
+    def deplacer(self, request, pk=None):
+        """POST /api/taches/{id}/deplacer/: place la tâche après une autre ({'apres': id|null})."""
+        return self.move_tache()
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([TestCeleryThrottle])
 def test_celery_view(request):
     """
     Vue de test pour vÃ©rifier que Celery fonctionne correctement.
@@ -93,6 +331,7 @@ def test_celery_view(request):
     
     Permissions:
         - NÃ©cessite une authentification par token
+        - LimitÃ©e par utilisateur et globalement (TestCeleryThrottle): 429 + Retry-After au-delÃ 
     
     Returns:
         Response: Un message JSON confirmant que la tÃ¢che a Ã©tÃ© lancÃ©e en arriÃ¨re-plan.
@@ -130,6 +369,7 @@ class StartReportGenerationView(APIView):
     
     Permissions:
         - Nécessite une authentification par token
+        - Limitée par utilisateur et globalement (StartReportThrottle): 429 + Retry-After au-delà
     
     Returns:
         Response: Un objet JSON contenant l'ID de la tâche lancée.
@@ -144,9 +384,10 @@ class StartReportGenerationView(APIView):
     Notes:
         - La réponse est immédiate (non-bloquante)
         - L'ID de la tâche peut être utilisé pour interroger l'état via CheckTaskStatusView
-        - La tâche prend 15 secondes à s'exécuter complètement
+        - Le rapport est calculé en parallèle par partitions (map-reduce, voir taches.reports)
     """
     permission_classes = [IsAuthenticated]
+    throttle_classes = [StartReportThrottle]
     
     def post(self, request):
         """
@@ -158,8 +399,8 @@ class StartReportGenerationView(APIView):
         Returns:
             Response: JSON avec task_id et message de confirmation
         """
-        # Déclencher la tâche de génération de rapport
-        result = generate_task_report.delay()
+        # Déclencher la tâche de génération de rapport (fichiers réservés à l'utilisateur)
+        result = generate_task_report.delay(request.user.id)
         
         return Response({
             'task_id': result.id,
@@ -190,6 +431,8 @@ class CheckTaskStatusView(APIView):
     États possibles:
         - PENDING: La tâche est en attente d'exécution
         - STARTED: La tâche a démarré son exécution
+        - PROGRESS: Le rapport est en cours de calcul; 'progress' indique le
+          nombre de partitions calculées (voir taches.reports)
         - SUCCESS: La tâche s'est terminée avec succès
         - FAILURE: La tâche a échoué
         - RETRY: La tâche est en cours de nouvelle tentative
@@ -202,11 +445,28 @@ class CheckTaskStatusView(APIView):
             "result": null
         }
     
+    Exemple de réponse (rapport en cours de calcul):
+        {
+            "task_id": "abc123-def456-789ghi",
+            "state": "PROGRESS",
+            "result": null,
+            "progress": {"partitions": 8, "terminees": 3}
+        }
+    
     Exemple de réponse (terminée):
         {
             "task_id": "abc123-def456-789ghi",
             "state": "SUCCESS",
-            "result": "Le rapport de tâches a été généré avec succès !"
+            "result": {
+                "message": "Le rapport de tâches a été généré avec succès ! (12 tâches, dont 5 terminées)",
+                "total": 12, "terminees": 5, "proprietaires": 2, "partitions": 8,
+                "fichiers": {
+                    "csv": {"nom": "abc123-def456-789ghi.csv.gz", "taille": 61,
+                            "url": "/api/reports/abc123-def456-789ghi/csv/"},
+                    "json": {...}
+                },
+                "expire_le": "2026-10-20T09:30:00+00:00"
+            }
         }
     
     Exemple de réponse (échec):
@@ -220,6 +480,8 @@ class CheckTaskStatusView(APIView):
         - Cette vue peut être appelée régulièrement (polling) depuis le frontend
         - Le client doit stocker le task_id reçu de StartReportGenerationView
         - En production, considérer WebSockets pour des mises à jour en temps réel
+        - Les lignes du rapport ne sont pas dans le résultat (Redis) mais dans
+          des fichiers, téléchargés avec ReportDownloadView
     """
     permission_classes = [IsAuthenticated]
     
@@ -234,6 +496,10 @@ class CheckTaskStatusView(APIView):
         Returns:
             Response: JSON avec task_id, state et result
         """
+        # Import différé: celery.result n'est chargé qu'au premier suivi de tâche,
+        # pas au démarrage du processus web
+        from celery.result import AsyncResult
+
         # Récupérer l'objet AsyncResult pour cette tâche
         task_result = AsyncResult(task_id)
         
@@ -250,5 +516,212 @@ class CheckTaskStatusView(APIView):
         # Si la tâche a échoué, inclure l'erreur
         elif task_result.state == 'FAILURE':
             response_data['result'] = str(task_result.info)
+        # Rapport en cours: partitions déjà calculées
+        elif task_result.state == REPORT_PROGRESS:
+            response_data['progress'] = report_progress(task_id, task_result.info)
         
-        return Response(response_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+def parse_task_ids(data):
+    """
+    Valide la liste d'identifiants de tâches d'une requête de statut groupée.
+
+    Args:
+        data (dict): Le corps de la requête ({'task_ids': [...]}).
+
+    Returns:
+        list: Les identifiants, sans doublon, dans l'ordre de la requête.
+
+    Raises:
+        ValidationError: Si la liste est absente, vide, contient autre chose que
+            des chaînes non vides, ou dépasse TASK_STATUS_BATCH_MAX (réponse 400).
+    """
+    task_ids = data.get('task_ids') if isinstance(data, dict) else None
+    if not isinstance(task_ids, list) or not task_ids:
+        raise ValidationError({'task_ids': 'Une liste non vide d\'identifiants est requise.'})
+    if not all(isinstance(task_id, str) and task_id for task_id in task_ids):
+        raise ValidationError({'task_ids': 'Les identifiants doivent être des chaînes non vides.'})
+    task_ids = list(dict.fromkeys(task_ids))
+    if len(task_ids) > settings.TASK_STATUS_BATCH_MAX:
+        raise ValidationError({'task_ids': f'Au plus {settings.TASK_STATUS_BATCH_MAX} identifiants par requête.'})
+    return task_ids
+
+
+class TaskStatusBatchView(APIView):
+    """
+    Vue API pour vérifier l'état de plusieurs tâches Celery en une requête.
+    
+    Équivalent groupé de CheckTaskStatusView pour les tableaux de bord qui
+    suivent de nombreux rapports: les états, résultats et progressions sont lus
+    en un ou deux MGET au backend de résultats (voir taches.statuses), au lieu
+    de plusieurs allers-retours par tâche.
+    
+    Endpoint:
+        POST /api/task-status/   {"task_ids": ["abc123", "def456"]}
+    
+    Permissions:
+        - Nécessite une authentification par token (comme CheckTaskStatusView)
+    
+    Returns:
+        Response: {task_id: état} dans l'ordre de la requête. Chaque état a la
+            forme de la réponse de CheckTaskStatusView, sans 'task_id' et sans
+            'result' vide. Status 400 si la liste est invalide ou dépasse
+            TASK_STATUS_BATCH_MAX identifiants.
+    
+    Exemple de réponse:
+        {
+            "abc123": {"state": "SUCCESS", "result": {"message": "...", "total": 12, ...}},
+            "def456": {"state": "PROGRESS", "progress": {"partitions": 8, "terminees": 3}},
+            "ghi789": {"state": "PENDING"}
+        }
+    
+    Notes:
+        - POST plutôt que GET: une centaine d'UUID dépasse la longueur d'URL
+          acceptée par certains proxys
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Récupère l'état actuel des tâches demandées.
+        
+        Args:
+            request: L'objet HttpRequest
+        
+        Returns:
+            Response: JSON {task_id: {state, result, progress}}
+        """
+        return Response(task_statuses(parse_task_ids(request.data)), status=status.HTTP_200_OK)
+
+
+class ReportDownloadView(APIView):
+    """
+    Vue API de téléchargement d'un fichier de rapport (voir taches.artifacts).
+    
+    Endpoint:
+        GET /api/reports/<task_id>/<format>/   (format: csv, json, parquet si pyarrow)
+    
+    Permissions:
+        - Nécessite une authentification par token
+        - Un utilisateur ne peut télécharger que ses propres rapports (404 sinon)
+    
+    Returns:
+        FileResponse | StreamingHttpResponse: Le fichier en pièce jointe (200),
+            une plage d'octets (206 + Content-Range), 304 Not Modified,
+            412 Precondition Failed ou 416 Range Not Satisfiable.
+    
+    Notes:
+        - Reprise d'un téléchargement interrompu: Range: bytes=<début>- avec
+          If-Range: <ETag> (le fichier entier est renvoyé s'il a changé)
+        - L'ETag fort dépend de la taille et de la date d'écriture du fichier
+        - Un fichier plus ancien que REPORT_ARTIFACT_RETENTION n'est plus servi
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, task_id, fmt):
+        """
+        Sert le fichier du rapport, entier ou par plage.
+        
+        Args:
+            request: L'objet HttpRequest
+            task_id (str): L'ID de la tâche generate_task_report
+            fmt (str): Le format du fichier (le paramètre 'format' est réservé par DRF)
+        
+        Returns:
+            HttpResponse: Le fichier, une plage ou une réponse conditionnelle.
+        
+        Raises:
+            Http404: Si le fichier n'existe pas, appartient à un autre utilisateur
+                ou a expiré.
+        """
+        try:
+            name = artifact_name(request.user.id, task_id, fmt)
+        except ValueError:
+            raise Http404('Rapport introuvable')
+        storage = get_report_storage()
+        try:
+            size = storage.size(name)
+            modified = storage.get_modified_time(name)
+        except FileNotFoundError:
+            raise Http404('Rapport introuvable')
+        if is_expired(modified):
+            raise Http404('Rapport expiré')
+
+        timestamp = int(modified.timestamp())
+        etag = f'"{int(modified.timestamp() * 1e6):x}-{size:x}"'
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = self._file_response(request, storage.open(name, 'rb'), size, etag, timestamp)
+            response.headers['Content-Type'] = REPORT_FORMATS[fmt][1]
+            response.headers['Content-Disposition'] = content_disposition_header(True, name.rsplit('/', 1)[1])
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(timestamp)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def _file_response(self, request, file, size, etag, timestamp):
+        """Réponse 200 (fichier entier), 206 (plage demandée) ou 416."""
+        header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if header and if_range and if_range not in (etag, http_date(timestamp)):
+            # Le fichier a changé depuis le début du téléchargement: tout renvoyer
+            header = None
+        try:
+            byte_range = parse_byte_range(header, size) if header else None
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is None:
+            response = FileResponse(file)
+            response.headers['Content-Length'] = str(size)
+            return response
+        first, last = byte_range
+        response = StreamingHttpResponse(iter_range(file, first, last), status=status.HTTP_206_PARTIAL_CONTENT)
+        response.headers['Content-Length'] = str(last - first + 1)
+        response.headers['Content-Range'] = f'bytes {first}-{last}/{size}'
+        return response
+
+
+class ArchivePagination(PageNumberPagination):
+    """Pagination de l'archive: ?page=N, ?page_size=M (200 au plus)."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ArchiveListView(ListAPIView):
+    """
+    Vue API en lecture seule des tâches archivées de l'utilisateur connecté.
+    
+    Les tâches terminées sont déplacées par cleanup_completed_tasks dans des
+    partitions mensuelles (voir taches.archives); cette vue les lit toutes,
+    des plus récemment archivées aux plus anciennes.
+    
+    Endpoint:
+        GET /api/archives/?page=1&page_size=50
+        GET /api/archives/?mois=2026-10  (une seule partition)
+    
+    Permissions:
+        - Nécessite une authentification par token
+        - Un utilisateur ne voit que ses propres archives
+    
+    Returns:
+        Response: Page au format DRF {'count', 'next', 'previous', 'results'}.
+    """
+    serializer_class = TacheArchiveeSerializer
+    pagination_class = ArchivePagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        mois = self.request.query_params.get('mois')
+        if mois:
+            try:
+                annee, numero = mois.split('-')
+                mois = date(int(annee), int(numero), 1)
+            except ValueError:
+                raise ValidationError({'mois': 'Format attendu : AAAA-MM'})
+        return archives_for(self.request.user.id, mois=mois or None)